@@ -1,11 +1,11 @@
 import copy
 import json
 import time
-import pytz
 import traceback
 import requests
 import numpy as np
 from abc import ABC, abstractmethod
+from functools import partial
 from typing import List, Optional, Tuple, Union, Callable
 
 from violet.constants import (
@@ -21,9 +21,12 @@ from violet.constants import (
     CHAINING_FOR_MEMORY_UPDATE,
     MAX_EMBEDDING_DIM,
     MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-    MAX_CHAINING_STEPS
+    MAX_CHAINING_STEPS,
+    MEMORY_RETRIEVAL_MAX_WORKERS,
+    MEMORY_RETRIEVAL_TIMEOUT
 )
 import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from violet import LLMConfig
 from violet.errors import ContextWindowExceededError, LLMError
 from violet.functions.ast_parsers import coerce_dict_args_by_annotations, get_function_annotations_from_source
@@ -64,7 +67,7 @@ from violet.services.step_manager import StepManager
 from violet.services.user_manager import UserManager
 from violet.services.tool_execution_sandbox import ToolExecutionSandbox
 from violet.settings import summarizer_settings
-from violet.llm_api.embeddings import embedding_model
+from violet.llm_api.embeddings import get_query_embedding
 from violet.system import get_contine_chaining, get_token_limit_warning, package_function_response, package_summarize_message, package_user_message
 from violet.llm_api.llm_client import LLMClient
 from violet.utils.utils import (
@@ -78,9 +81,18 @@ from violet.utils.utils import (
     printd,
     validate_function_response,
     convert_timezone_to_utc,
+    get_timezone,
     log_telemetry,
 )
 from violet.services.file_manager import FileManager
+from violet.services.memory_retrieval_cache import MemoryRetrievalCache
+
+# shared by all agents so concurrent steps cannot open more than a bounded number of retrieval sessions
+_memory_retrieval_executor = ThreadPoolExecutor(
+    max_workers=MEMORY_RETRIEVAL_MAX_WORKERS, thread_name_prefix="memory_retrieval")
+
+# shown in the system prompt for a memory type whose retrieval failed or timed out, so it is not read as empty
+UNAVAILABLE_MEMORY = "Unavailable: this memory could not be retrieved for this step, it may still contain relevant information."
 
 
 class BaseAgent(ABC):
@@ -168,6 +180,9 @@ class Agent(BaseAgent):
         self.resource_memory_manager = ResourceMemoryManager()
         self.semantic_memory_manager = SemanticMemoryManager()
 
+        # Memory retrievals shared by the inner steps of the current `step` (set in `step`)
+        self.memory_retrieval_cache: Optional[MemoryRetrievalCache] = None
+
         # State needed for contine_chaining pausing
 
         self.first_message_verify_mono = first_message_verify_mono
@@ -271,10 +286,11 @@ class Agent(BaseAgent):
                 key = "items" if function_name == 'episodic_memory_insert' else 'new_items'
                 if key in function_args:
                     # Need to change the timezone into UTC timezone
+                    timezone_str = self.user_manager.get_user_by_id(self.user.id).timezone
                     for item in function_args[key]:
                         if 'occurred_at' in item:
                             item['occurred_at'] = convert_timezone_to_utc(
-                                item['occurred_at'], self.user_manager.get_user_by_id(self.user.id).timezone)
+                                item['occurred_at'], timezone_str)
 
             if function_name in ['search_in_memory', 'list_memory_within_timerange']:
                 function_args['timezone_str'] = self.user_manager.get_user_by_id(
@@ -1096,6 +1112,9 @@ class Agent(BaseAgent):
         total_usage = UsageStatistics()
         step_count = 0
 
+        # memory retrieved for the system prompt is reused by the inner steps until the memory is written to
+        self.memory_retrieval_cache = MemoryRetrievalCache(self.agent_state.id)
+
         initial_message_count = len(self.agent_manager.get_in_context_messages(
             agent_id=self.agent_state.id, actor=self.user))
 
@@ -1306,136 +1325,38 @@ class Agent(BaseAgent):
         search_method = 'bm25'
 
         # Prepare embedding for semantic search
-        if key_words != '' and search_method == 'embedding':
-            embedded_text = embedding_model(
-                self.agent_state.embedding_config).get_text_embedding(key_words)
+        if key_words != '' and search_method in ('embedding', 'hybrid'):
+            embedded_text = get_query_embedding(self.agent_state.embedding_config, key_words)
             embedded_text = np.array(embedded_text)
             embedded_text = np.pad(
                 embedded_text, (0, MAX_EMBEDDING_DIM - embedded_text.shape[0]), mode="constant").tolist()
         else:
             embedded_text = None
 
-        # Retrieve core memory
-        if self.agent_state.name == 'core_memory_agent' or "core" not in retrieved_memories:
-            current_persisted_memory = Memory(
-                blocks=[self.block_manager.get_block_by_id(
-                    block.id, actor=self.user) for block in self.agent_state.memory.get_blocks()]
-            )
-            core_memory = current_persisted_memory.compile()
-            retrieved_memories['core'] = core_memory
-
-        if self.agent_state.name == 'knowledge_vault' or 'knowledge_vault' not in retrieved_memories:
-            if self.agent_state.name == 'knowledge_vault' or self.agent_state.name == 'reflexion_agent':
-                current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(
-                    agent_state=self.agent_state, embedded_text=embedded_text, query=key_words, search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
-            else:
-                current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(agent_state=self.agent_state, embedded_text=embedded_text, query=key_words,
-                                                                                      search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str, sensitivity=['low', 'medium'])
-
-            knowledge_vault_memory = ''
-            if len(current_knowledge_vault) > 0:
-                for idx, knowledge_vault_item in enumerate(current_knowledge_vault):
-                    knowledge_vault_memory += f"[{idx}] Knowledge Vault Item ID: {knowledge_vault_item.id}; Caption: {knowledge_vault_item.caption}\n"
-            retrieved_memories['knowledge_vault'] = {
-                'total_number_of_items': self.knowledge_vault_manager.get_total_number_of_items(),
-                'current_count': len(current_knowledge_vault),
-                'text': knowledge_vault_memory
-            }
-
-        # Retrieve episodic memory
-        if self.agent_state.name == 'episodic_memory_agent' or 'episodic' not in retrieved_memories:
-            current_episodic_memory = self.episodic_memory_manager.list_episodic_memory(
-                agent_state=self.agent_state, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
-            episodic_memory = ''
-            if len(current_episodic_memory) > 0:
-                for idx, event in enumerate(current_episodic_memory):
-                    tree_path_str = f" - Path: {' > '.join(event.tree_path)}" if event.tree_path else ""
-                    if self.agent_state.name == 'episodic_memory_agent' or self.agent_state.name == 'reflexion_agent':
-                        episodic_memory += f"[Event ID: {event.id}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str} (Details: {len(event.details)} Characters)\n"
-                    else:
-                        episodic_memory += f"[{idx}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str} (Details: {len(event.details)} Characters)\n"
-
-            recent_episodic_memory = episodic_memory.strip()
-
-            most_relevant_episodic_memory = self.episodic_memory_manager.list_episodic_memory(
-                agent_state=self.agent_state, embedded_text=embedded_text, query=key_words, search_field='details', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
-            most_relevant_episodic_memory_str = ''
-            if len(most_relevant_episodic_memory) > 0:
-                for idx, event in enumerate(most_relevant_episodic_memory):
-                    tree_path_str = f" - Path: {' > '.join(event.tree_path)}" if event.tree_path else ""
-                    if self.agent_state.name == 'episodic_memory_agent' or self.agent_state.name == 'reflexion_agent':
-                        most_relevant_episodic_memory_str += f"[Event ID: {event.id}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str}  (Details: {len(event.details)} Characters)\n"
-                    else:
-                        most_relevant_episodic_memory_str += f"[{idx}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str}  (Details: {len(event.details)} Characters)\n"
-            relevant_episodic_memory = most_relevant_episodic_memory_str.strip()
-            retrieved_memories['episodic'] = {
-                'total_number_of_items': self.episodic_memory_manager.get_total_number_of_items(),
-                'recent_count': len(current_episodic_memory),
-                'relevant_count': len(most_relevant_episodic_memory),
-                'recent_episodic_memory': recent_episodic_memory,
-                'relevant_episodic_memory': relevant_episodic_memory
-            }
-
-        # Retrieve resource memory
-        if self.agent_state.name == 'resource_memory_agent' or 'resource' not in retrieved_memories:
-            current_resource_memory = self.resource_memory_manager.list_resources(
-                agent_state=self.agent_state, query=key_words, embedded_text=embedded_text, search_field='summary', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
-            resource_memory = ''
-            if len(current_resource_memory) > 0:
-                for idx, resource in enumerate(current_resource_memory):
-                    tree_path_str = f"; Path: {' > '.join(resource.tree_path)}" if resource.tree_path else ""
-                    if self.agent_state.name == 'resource_memory_agent' or self.agent_state.name == 'reflexion_agent':
-                        resource_memory += f"[Resource ID: {resource.id}] Resource Title: {resource.title}; Resource Summary: {resource.summary} Resource Type: {resource.resource_type}{tree_path_str}\n"
-                    else:
-                        resource_memory += f"[{idx}] Resource Title: {resource.title}; Resource Summary: {resource.summary} Resource Type: {resource.resource_type}{tree_path_str}\n"
-            resource_memory = resource_memory.strip()
-            retrieved_memories['resource'] = {
-                'total_number_of_items': self.resource_memory_manager.get_total_number_of_items(),
-                'current_count': len(current_resource_memory),
-                'text': resource_memory
-            }
-
-        # Retrieve procedural memory
-        if self.agent_state.name == 'procedural_memory_agent' or 'procedural' not in retrieved_memories:
-            current_procedural_memory = self.procedural_memory_manager.list_procedures(
-                agent_state=self.agent_state, query=key_words, embedded_text=embedded_text, search_field="summary", search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
-            procedural_memory = ''
-            if len(current_procedural_memory) > 0:
-                for idx, procedure in enumerate(current_procedural_memory):
-                    tree_path_str = f"; Path: {' > '.join(procedure.tree_path)}" if procedure.tree_path else ""
-                    if self.agent_state.name == 'procedural_memory_agent' or self.agent_state.name == 'reflexion_agent':
-                        procedural_memory += f"[Procedure ID: {procedure.id}] Entry Type: {procedure.entry_type}; Summary: {procedure.summary}{tree_path_str}\n"
-                    else:
-                        procedural_memory += f"[{idx}] Entry Type: {procedure.entry_type}; Summary: {procedure.summary}{tree_path_str}\n"
-            procedural_memory = procedural_memory.strip()
-            retrieved_memories['procedural'] = {
-                'total_number_of_items': self.procedural_memory_manager.get_total_number_of_items(),
-                'current_count': len(current_procedural_memory),
-                'text': procedural_memory
-            }
-
-        # Retrieve semantic memory
-        if self.agent_state.name == 'semantic_memory_agent' or 'semantic' not in retrieved_memories:
-            current_semantic_memory = self.semantic_memory_manager.list_semantic_items(
-                agent_state=self.agent_state, query=key_words, embedded_text=embedded_text, search_field="details", search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
-            semantic_memory = ''
-            if len(current_semantic_memory) > 0:
-                for idx, semantic_memory_item in enumerate(current_semantic_memory):
-                    tree_path_str = f"; Path: {' > '.join(semantic_memory_item.tree_path)}" if semantic_memory_item.tree_path else ""
-                    if self.agent_state.name == 'semantic_memory_agent' or self.agent_state.name == 'reflexion_agent':
-                        semantic_memory += f"[Semantic Memory ID: {semantic_memory_item.id}] Name: {semantic_memory_item.name}; Summary: {semantic_memory_item.summary}{tree_path_str}\n"
-                    else:
-                        semantic_memory += f"[{idx}] Name: {semantic_memory_item.name}; Summary: {semantic_memory_item.summary}{tree_path_str}\n"
-
-            semantic_memory = semantic_memory.strip()
-            retrieved_memories['semantic'] = {
-                'total_number_of_items': self.semantic_memory_manager.get_total_number_of_items(),
-                'current_count': len(current_semantic_memory),
-                'text': semantic_memory
-            }
-
-        # Build the complete system prompt
-        memory_system_prompt = self.build_system_prompt(retrieved_memories)
+        # Retrieve every memory type concurrently; the agent's own memory type is always refreshed
+        retrievers = {
+            'core': (self._retrieve_core_memory, 'core_memory_agent', 'block'),
+            'knowledge_vault': (self._retrieve_knowledge_vault, 'knowledge_vault', 'knowledge_vault'),
+            'episodic': (self._retrieve_episodic_memory, 'episodic_memory_agent', 'episodic_memory'),
+            'resource': (self._retrieve_resource_memory, 'resource_memory_agent', 'resource_memory'),
+            'procedural': (self._retrieve_procedural_memory, 'procedural_memory_agent', 'procedural_memory'),
+            'semantic': (self._retrieve_semantic_memory, 'semantic_memory_agent', 'semantic_memory'),
+        }
+        pending = {
+            memory_type: partial(self._retrieve_cached, memory_type, table_name, retriever)
+            for memory_type, (retriever, agent_name, table_name) in retrievers.items()
+            if self.agent_state.name == agent_name or memory_type not in retrieved_memories
+        }
+        retrieved_memories.update(self._retrieve_memories_concurrently(
+            pending, key_words=key_words, embedded_text=embedded_text,
+            search_method=search_method, timezone_str=timezone_str))
+
+        # Build the complete system prompt. Memory types that could not be retrieved are shown as
+        # unavailable, except core memory, which falls back to the blocks loaded with the agent state
+        prompt_memories = retrieved_memories
+        if 'core' not in retrieved_memories:
+            prompt_memories = dict(retrieved_memories, core=self.agent_state.memory.compile())
+        memory_system_prompt = self.build_system_prompt(prompt_memories)
 
         complete_system_prompt = raw_system + "\n\n" + memory_system_prompt
 
@@ -1444,6 +1365,183 @@ class Agent(BaseAgent):
 
         return complete_system_prompt, retrieved_memories
 
+    def _retrieve_memories_concurrently(self, retrievers: dict, timeout: Optional[float] = None, **kwargs) -> dict:
+        """
+        Run the memory retrievers in the shared retrieval pool and collect their results.
+
+        Every retriever gets `timeout` seconds, `MEMORY_RETRIEVAL_TIMEOUT` by default, counted from
+        when it starts running, so time spent queued behind the retrievals of other agents does not
+        count against it; one still queued after `timeout` seconds is cancelled. A retriever that
+        fails, times out or never starts is left out of the result, the caller renders that memory
+        type as unavailable and it is retried on the next step instead of holding up this one.
+        """
+        if timeout is None:
+            timeout = MEMORY_RETRIEVAL_TIMEOUT
+        started = {}
+
+        def run(memory_type, retriever):
+            started[memory_type] = time.monotonic()
+            return retriever(**kwargs)
+
+        submitted = time.monotonic()
+        futures = {
+            memory_type: _memory_retrieval_executor.submit(run, memory_type, retriever)
+            for memory_type, retriever in retrievers.items()
+        }
+
+        results = {}
+        for memory_type, future in futures.items():
+            while True:
+                start = started.get(memory_type)
+                deadline = (submitted if start is None else start) + timeout
+                try:
+                    results[memory_type] = future.result(timeout=max(0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    if start is None and memory_type in started:
+                        # started while waiting, it gets its own budget
+                        continue
+                    future.cancel()
+                    if start is None:
+                        self.logger.warning(
+                            f"Retrieving {memory_type} memory did not start within {timeout}s, continuing without it")
+                    else:
+                        self.logger.warning(
+                            f"Retrieving {memory_type} memory took longer than {timeout}s, continuing without it")
+                except Exception as e:
+                    self.logger.warning(f"Failed to retrieve {memory_type} memory: {e}")
+                break
+        return results
+
+    def _retrieve_cached(self, memory_type: str, table_name: str, retriever: Callable, **kwargs):
+        """Run `retriever` unless the step's retrieval cache holds a result of the same query taken since the last write to `table_name`."""
+        if self.memory_retrieval_cache is None:
+            return retriever(**kwargs)
+        query = (kwargs['key_words'], kwargs['search_method'])
+        if memory_type == 'core':
+            query += tuple(block.id for block in self.agent_state.memory.get_blocks())
+        return self.memory_retrieval_cache.get_or_retrieve(
+            memory_type, table_name, query, lambda: retriever(**kwargs))
+
+    def _retrieve_core_memory(self, key_words: str, embedded_text: Optional[List[float]], search_method: str, timezone_str: str):
+        """Compile the core memory blocks as currently persisted."""
+        current_persisted_memory = Memory(
+            blocks=[self.block_manager.get_block_by_id(
+                block.id, actor=self.user) for block in self.agent_state.memory.get_blocks()]
+        )
+        core_memory = current_persisted_memory.compile()
+        return core_memory
+
+    def _retrieve_knowledge_vault(self, key_words: str, embedded_text: Optional[List[float]], search_method: str, timezone_str: str):
+        """Retrieve the knowledge vault items relevant to the keywords."""
+        if self.agent_state.name == 'knowledge_vault' or self.agent_state.name == 'reflexion_agent':
+            current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(
+                agent_state=self.agent_state, embedded_text=embedded_text, query=key_words, search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        else:
+            current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(agent_state=self.agent_state, embedded_text=embedded_text, query=key_words,
+                                                                                  search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str, sensitivity=['low', 'medium'])
+
+        knowledge_vault_memory = ''
+        if len(current_knowledge_vault) > 0:
+            for idx, knowledge_vault_item in enumerate(current_knowledge_vault):
+                knowledge_vault_memory += f"[{idx}] Knowledge Vault Item ID: {knowledge_vault_item.id}; Caption: {knowledge_vault_item.caption}\n"
+        return {
+            'total_number_of_items': self.knowledge_vault_manager.get_total_number_of_items(),
+            'current_count': len(current_knowledge_vault),
+            'text': knowledge_vault_memory
+        }
+
+    def _retrieve_episodic_memory(self, key_words: str, embedded_text: Optional[List[float]], search_method: str, timezone_str: str):
+        """Retrieve the most recent and the most relevant episodic memories."""
+        current_episodic_memory = self.episodic_memory_manager.list_episodic_memory(
+            agent_state=self.agent_state, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        episodic_memory = ''
+        if len(current_episodic_memory) > 0:
+            for idx, event in enumerate(current_episodic_memory):
+                tree_path_str = f" - Path: {' > '.join(event.tree_path)}" if event.tree_path else ""
+                if self.agent_state.name == 'episodic_memory_agent' or self.agent_state.name == 'reflexion_agent':
+                    episodic_memory += f"[Event ID: {event.id}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str} (Details: {len(event.details)} Characters)\n"
+                else:
+                    episodic_memory += f"[{idx}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str} (Details: {len(event.details)} Characters)\n"
+
+        recent_episodic_memory = episodic_memory.strip()
+
+        most_relevant_episodic_memory = self.episodic_memory_manager.list_episodic_memory(
+            agent_state=self.agent_state, embedded_text=embedded_text, query=key_words, search_field='details', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        most_relevant_episodic_memory_str = ''
+        if len(most_relevant_episodic_memory) > 0:
+            for idx, event in enumerate(most_relevant_episodic_memory):
+                tree_path_str = f" - Path: {' > '.join(event.tree_path)}" if event.tree_path else ""
+                if self.agent_state.name == 'episodic_memory_agent' or self.agent_state.name == 'reflexion_agent':
+                    most_relevant_episodic_memory_str += f"[Event ID: {event.id}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str}  (Details: {len(event.details)} Characters)\n"
+                else:
+                    most_relevant_episodic_memory_str += f"[{idx}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str}  (Details: {len(event.details)} Characters)\n"
+        relevant_episodic_memory = most_relevant_episodic_memory_str.strip()
+        return {
+            'total_number_of_items': self.episodic_memory_manager.get_total_number_of_items(),
+            'recent_count': len(current_episodic_memory),
+            'relevant_count': len(most_relevant_episodic_memory),
+            'recent_episodic_memory': recent_episodic_memory,
+            'relevant_episodic_memory': relevant_episodic_memory
+        }
+
+    def _retrieve_resource_memory(self, key_words: str, embedded_text: Optional[List[float]], search_method: str, timezone_str: str):
+        """Retrieve the resource memories relevant to the keywords."""
+        current_resource_memory = self.resource_memory_manager.list_resources(
+            agent_state=self.agent_state, query=key_words, embedded_text=embedded_text, search_field='summary', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        resource_memory = ''
+        if len(current_resource_memory) > 0:
+            for idx, resource in enumerate(current_resource_memory):
+                tree_path_str = f"; Path: {' > '.join(resource.tree_path)}" if resource.tree_path else ""
+                if self.agent_state.name == 'resource_memory_agent' or self.agent_state.name == 'reflexion_agent':
+                    resource_memory += f"[Resource ID: {resource.id}] Resource Title: {resource.title}; Resource Summary: {resource.summary} Resource Type: {resource.resource_type}{tree_path_str}\n"
+                else:
+                    resource_memory += f"[{idx}] Resource Title: {resource.title}; Resource Summary: {resource.summary} Resource Type: {resource.resource_type}{tree_path_str}\n"
+        resource_memory = resource_memory.strip()
+        return {
+            'total_number_of_items': self.resource_memory_manager.get_total_number_of_items(),
+            'current_count': len(current_resource_memory),
+            'text': resource_memory
+        }
+
+    def _retrieve_procedural_memory(self, key_words: str, embedded_text: Optional[List[float]], search_method: str, timezone_str: str):
+        """Retrieve the procedural memories relevant to the keywords."""
+        current_procedural_memory = self.procedural_memory_manager.list_procedures(
+            agent_state=self.agent_state, query=key_words, embedded_text=embedded_text, search_field="summary", search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        procedural_memory = ''
+        if len(current_procedural_memory) > 0:
+            for idx, procedure in enumerate(current_procedural_memory):
+                tree_path_str = f"; Path: {' > '.join(procedure.tree_path)}" if procedure.tree_path else ""
+                if self.agent_state.name == 'procedural_memory_agent' or self.agent_state.name == 'reflexion_agent':
+                    procedural_memory += f"[Procedure ID: {procedure.id}] Entry Type: {procedure.entry_type}; Summary: {procedure.summary}{tree_path_str}\n"
+                else:
+                    procedural_memory += f"[{idx}] Entry Type: {procedure.entry_type}; Summary: {procedure.summary}{tree_path_str}\n"
+        procedural_memory = procedural_memory.strip()
+        return {
+            'total_number_of_items': self.procedural_memory_manager.get_total_number_of_items(),
+            'current_count': len(current_procedural_memory),
+            'text': procedural_memory
+        }
+
+    def _retrieve_semantic_memory(self, key_words: str, embedded_text: Optional[List[float]], search_method: str, timezone_str: str):
+        """Retrieve the semantic memories relevant to the keywords."""
+        current_semantic_memory = self.semantic_memory_manager.list_semantic_items(
+            agent_state=self.agent_state, query=key_words, embedded_text=embedded_text, search_field="details", search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        semantic_memory = ''
+        if len(current_semantic_memory) > 0:
+            for idx, semantic_memory_item in enumerate(current_semantic_memory):
+                tree_path_str = f"; Path: {' > '.join(semantic_memory_item.tree_path)}" if semantic_memory_item.tree_path else ""
+                if self.agent_state.name == 'semantic_memory_agent' or self.agent_state.name == 'reflexion_agent':
+                    semantic_memory += f"[Semantic Memory ID: {semantic_memory_item.id}] Name: {semantic_memory_item.name}; Summary: {semantic_memory_item.summary}{tree_path_str}\n"
+                else:
+                    semantic_memory += f"[{idx}] Name: {semantic_memory_item.name}; Summary: {semantic_memory_item.summary}{tree_path_str}\n"
+
+        semantic_memory = semantic_memory.strip()
+        return {
+            'total_number_of_items': self.semantic_memory_manager.get_total_number_of_items(),
+            'current_count': len(current_semantic_memory),
+            'text': semantic_memory
+        }
+
     def build_system_prompt(self, retrieved_memories: dict) -> str:
         """Build the system prompt for the LLM API"""
         template = """Current Time: {current_time}
@@ -1464,60 +1562,62 @@ These keywords have been used to retrieve relevant memories from the database.
 """
         user_timezone_str = self.user_manager.get_user_by_id(
             self.user.id).timezone
-        user_tz = pytz.timezone(user_timezone_str.split(" (")[0])
+        user_tz = get_timezone(user_timezone_str)
         # current_time = datetime.now(user_tz).strftime('%Y-%m-%d %H:%M:%S')
         current_time = "Not Specified"
 
         keywords = retrieved_memories['key_words']
-        core_memory = retrieved_memories['core']
-        episodic_memory = retrieved_memories['episodic']
-        resource_memory = retrieved_memories['resource']
-        semantic_memory = retrieved_memories['semantic']
-        procedural_memory = retrieved_memories['procedural']
-        knowledge_vault = retrieved_memories['knowledge_vault']
-
+        core_memory = retrieved_memories.get('core')
+        episodic_memory = retrieved_memories.get('episodic')
+        episodic_available = 'episodic' in retrieved_memories
+
+        def counted_section(memory_type: str) -> Tuple[str, str]:
+            """Counts and text of a memory section, a memory type missing from `retrieved_memories` failed to load."""
+            if memory_type not in retrieved_memories:
+                return "Unavailable", UNAVAILABLE_MEMORY
+            memory = retrieved_memories[memory_type]
+            total = memory['total_number_of_items'] if memory else 0
+            count = memory['current_count'] if memory else 0
+            return f"{count} out of {total} Items", (memory['text'] if memory else "") or "Empty"
+
+        if episodic_available:
+            recent_episodic_text = (episodic_memory['recent_episodic_memory'] if episodic_memory else "") or "Empty"
+        else:
+            recent_episodic_text = UNAVAILABLE_MEMORY
         system_prompt = template.format(
             current_time=current_time,
             keywords=keywords,
             core_memory=core_memory if core_memory else "Empty",
-            episodic_memory=episodic_memory['recent_episodic_memory'] if episodic_memory else "Empty",
+            episodic_memory=recent_episodic_text,
         )
 
         if keywords is not None:
-            episodic_total = episodic_memory['total_number_of_items'] if episodic_memory else 0
-            relevant_episodic_text = episodic_memory['relevant_episodic_memory'] if episodic_memory else ""
-            relevant_count = episodic_memory['relevant_count'] if episodic_memory else 0
+            if episodic_available:
+                episodic_total = episodic_memory['total_number_of_items'] if episodic_memory else 0
+                relevant_episodic_text = episodic_memory['relevant_episodic_memory'] if episodic_memory else ""
+                relevant_count = episodic_memory['relevant_count'] if episodic_memory else 0
+                relevant_header = f"{relevant_count} out of {episodic_total} Events Orderred by Relevance to Keywords"
+            else:
+                relevant_header, relevant_episodic_text = "Unavailable", UNAVAILABLE_MEMORY
 
-            system_prompt += f"\n<episodic_memory> Most Relevant Events ({relevant_count} out of {episodic_total} Events Orderred by Relevance to Keywords):\n" + (
+            system_prompt += f"\n<episodic_memory> Most Relevant Events ({relevant_header}):\n" + (
                 relevant_episodic_text if relevant_episodic_text else "Empty") + "\n</episodic_memory>\n"
 
         # Add knowledge vault with counts
-        knowledge_vault_total = knowledge_vault['total_number_of_items'] if knowledge_vault else 0
-        knowledge_vault_text = knowledge_vault['text'] if knowledge_vault else ""
-        knowledge_vault_count = knowledge_vault['current_count'] if knowledge_vault else 0
-        system_prompt += f"\n<knowledge_vault> ({knowledge_vault_count} out of {knowledge_vault_total} Items):\n" + (
-            knowledge_vault_text if knowledge_vault_text else "Empty") + "\n</knowledge_vault>\n"
+        knowledge_vault_counts, knowledge_vault_text = counted_section('knowledge_vault')
+        system_prompt += f"\n<knowledge_vault> ({knowledge_vault_counts}):\n{knowledge_vault_text}\n</knowledge_vault>\n"
 
         # Add semantic memory with counts
-        semantic_total = semantic_memory['total_number_of_items'] if semantic_memory else 0
-        semantic_text = semantic_memory['text'] if semantic_memory else ""
-        semantic_count = semantic_memory['current_count'] if semantic_memory else 0
-        system_prompt += f"\n<semantic_memory> ({semantic_count} out of {semantic_total} Items):\n" + (
-            semantic_text if semantic_text else "Empty") + "\n</semantic_memory>\n"
+        semantic_counts, semantic_text = counted_section('semantic')
+        system_prompt += f"\n<semantic_memory> ({semantic_counts}):\n{semantic_text}\n</semantic_memory>\n"
 
         # Add resource memory with counts
-        resource_total = resource_memory['total_number_of_items'] if resource_memory else 0
-        resource_text = resource_memory['text'] if resource_memory else ""
-        resource_count = resource_memory['current_count'] if resource_memory else 0
-        system_prompt += f"\n<resource_memory> ({resource_count} out of {resource_total} Items):\n" + (
-            resource_text if resource_text else "Empty") + "\n</resource_memory>\n"
+        resource_counts, resource_text = counted_section('resource')
+        system_prompt += f"\n<resource_memory> ({resource_counts}):\n{resource_text}\n</resource_memory>\n"
 
         # Add procedural memory with counts
-        procedural_total = procedural_memory['total_number_of_items'] if procedural_memory else 0
-        procedural_text = procedural_memory['text'] if procedural_memory else ""
-        procedural_count = procedural_memory['current_count'] if procedural_memory else 0
-        system_prompt += f"\n<procedural_memory> ({procedural_count} out of {procedural_total} Items):\n" + (
-            procedural_text if procedural_text else "Empty") + "\n</procedural_memory>"
+        procedural_counts, procedural_text = counted_section('procedural')
+        system_prompt += f"\n<procedural_memory> ({procedural_counts}):\n{procedural_text}\n</procedural_memory>"
 
         return system_prompt
 
@@ -1718,21 +1818,26 @@ These keywords have been used to retrieve relevant memories from the database.
                     f"Memory usage acceptable: last response total_tokens ({current_total_tokens}) < {summarizer_settings.memory_warning_threshold * int(self.agent_state.llm_config.context_window)}"
                 )
 
-            # Log step - this must happen before messages are persisted
-            step = self.step_manager.log_step(
-                actor=self.user,
-                provider_name=self.agent_state.llm_config.model_endpoint_type,
-                model=self.agent_state.llm_config.model,
-                context_window_limit=self.agent_state.llm_config.context_window,
-                usage=response.usage,
-            )
-            for message in all_new_messages:
-                message.step_id = step.id
+            # The step, its messages and the in-context window persist in one transaction. Tools and
+            # summarization ran before it, so the write lock is not held during their LLM and embedding calls
+            from violet.server.server import step_unit_of_work
+
+            with step_unit_of_work():
+                # Log step - this must happen before messages are persisted
+                step = self.step_manager.log_step(
+                    actor=self.user,
+                    provider_name=self.agent_state.llm_config.model_endpoint_type,
+                    model=self.agent_state.llm_config.model,
+                    context_window_limit=self.agent_state.llm_config.context_window,
+                    usage=response.usage,
+                )
+                for message in all_new_messages:
+                    message.step_id = step.id
 
-            # Persisting into Messages
-            self.agent_state = self.agent_manager.append_to_in_context_messages(
-                all_new_messages, agent_id=self.agent_state.id, actor=self.user
-            )
+                # Persisting into Messages
+                self.agent_state = self.agent_manager.append_to_in_context_messages(
+                    all_new_messages, agent_id=self.agent_state.id, actor=self.user
+                )
 
             return AgentStepResponse(
                 messages=all_new_messages,
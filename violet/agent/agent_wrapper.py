@@ -4,7 +4,6 @@ import json
 from typing import Optional
 import yaml
 import uuid
-import pytz
 import base64
 import threading
 from datetime import datetime
@@ -12,7 +11,7 @@ from violet.llm_api.llm_client import LLMClient
 from violet.schemas.enums import MessageRole
 from violet.schemas.message import Message
 from violet.schemas.violet_message_content import MessageContentType, TextContent
-from violet.utils.utils import parse_json
+from violet.utils.utils import get_timezone, parse_json
 from PIL import Image
 import logging
 from .app_utils import encode_image
@@ -25,6 +24,7 @@ from violet.agent.agent_states import AgentStates
 from violet.agent.agent_configs import AGENT_CONFIGS
 from violet.agent.app_constants import TEMPORARY_MESSAGE_LIMIT, MAXIMUM_NUM_IMAGES_IN_CLOUD, GEMINI_MODELS, OPENAI_MODELS, WITH_REFLEXION_AGENT, WITH_BACKGROUND_AGENT
 from violet.schemas.violet_message import MessageType
+from violet.services.near_duplicates import find_similar_pairs, jaccard_similarity, word_set
 
 from violet import create_client
 from violet import LLMConfig, EmbeddingConfig
@@ -700,7 +700,7 @@ class AgentWrapper:
         self.client.server.user_manager.update_user_timezone(
             timezone_str, self.client.user.id)
         self.timezone_str = timezone_str
-        self.timezone = pytz.timezone(timezone_str.split(" (")[0])
+        self.timezone = get_timezone(timezone_str)
 
     def set_persona(self, persona_name):
         # Update the persona for the agent using the persona name
@@ -1212,18 +1212,12 @@ Please perform this analysis and create new memories as appropriate. Provide a d
 
         try:
             # Analyze episodic memory redundancy
-            episodic_memories = self.client.server.episodic_memory_manager.list_episodic_memory(
-                self.agent_states.episodic_memory_agent_state, limit=None
-            )
             redundancy_results['episodic'] = self._analyze_redundancy(
-                episodic_memories, 'episodic')
+                self.client.server.episodic_memory_manager, 'episodic')
 
             # Analyze semantic memory redundancy
-            semantic_memories = self.client.server.semantic_memory_manager.list_semantic_items(
-                self.agent_states.semantic_memory_agent_state, limit=None
-            )
             redundancy_results['semantic'] = self._analyze_redundancy(
-                semantic_memories, 'semantic')
+                self.client.server.semantic_memory_manager, 'semantic')
 
             # Analyze core memory redundancy
             core_blocks = self.client.server.block_manager.get_blocks(
@@ -1232,25 +1226,16 @@ Please perform this analysis and create new memories as appropriate. Provide a d
                 core_blocks)
 
             # Analyze resource memory redundancy
-            resource_memories = self.client.server.resource_memory_manager.list_resources(
-                self.agent_states.resource_memory_agent_state, limit=None
-            )
             redundancy_results['resource'] = self._analyze_redundancy(
-                resource_memories, 'resource')
+                self.client.server.resource_memory_manager, 'resource')
 
             # Analyze procedural memory redundancy
-            procedural_memories = self.client.server.procedural_memory_manager.list_procedures(
-                self.agent_states.procedural_memory_agent_state, limit=None
-            )
             redundancy_results['procedural'] = self._analyze_redundancy(
-                procedural_memories, 'procedural')
+                self.client.server.procedural_memory_manager, 'procedural')
 
             # Analyze knowledge vault redundancy
-            knowledge_vault_items = self.client.server.knowledge_vault_manager.list_knowledge(
-                self.agent_states.knowledge_vault_agent_state, limit=None
-            )
             redundancy_results['knowledge_vault'] = self._analyze_redundancy(
-                knowledge_vault_items, 'knowledge_vault')
+                self.client.server.knowledge_vault_manager, 'knowledge_vault')
 
         except Exception as e:
             self.logger.error(f"Error analyzing redundancy: {e}")
@@ -1258,40 +1243,43 @@ Please perform this analysis and create new memories as appropriate. Provide a d
 
         return redundancy_results
 
-    def _analyze_redundancy(self, memories, memory_type):
+    def _analyze_redundancy(self, manager, memory_type):
         """Analyze redundancy within a specific memory type"""
-        if not memories:
+        # the table is streamed page by page, only the ids and word sets of the items are kept
+        ids = []
+
+        def texts():
+            for item_id, text in manager.iter_texts():
+                ids.append(item_id)
+                yield text
+
+        # Compare memories for similarity, only the pairs found by MinHash-LSH are scored
+        similar_pairs = find_similar_pairs(texts(), threshold=0.7)
+        if not ids:
             return f"No {memory_type} memories found."
 
         redundancy_info = {
-            'total_count': len(memories),
+            'total_count': len(ids),
             'potential_duplicates': [],
             'similar_items': [],
             'recommendations': []
         }
 
-        # Compare memories for similarity
-        for i, memory1 in enumerate(memories):
-            for j, memory2 in enumerate(memories[i+1:], i+1):
-                similarity_score = self._calculate_similarity(
-                    memory1, memory2, memory_type)
-
-                if similarity_score > 0.9:  # Very high similarity - potential duplicate
-                    redundancy_info['potential_duplicates'].append({
-                        'memory1_id': getattr(memory1, 'id', i),
-                        'memory2_id': getattr(memory2, 'id', j),
-                        'similarity': similarity_score,
-                        'content1': self._get_memory_content(memory1, memory_type),
-                        'content2': self._get_memory_content(memory2, memory_type)
-                    })
-                elif similarity_score > 0.7:  # High similarity - could be merged
-                    redundancy_info['similar_items'].append({
-                        'memory1_id': getattr(memory1, 'id', i),
-                        'memory2_id': getattr(memory2, 'id', j),
-                        'similarity': similarity_score,
-                        'content1': self._get_memory_content(memory1, memory_type),
-                        'content2': self._get_memory_content(memory2, memory_type)
-                    })
+        # only the texts of the reported pairs are read back
+        pair_ids = {ids[k] for i, j, _ in similar_pairs for k in (i, j)}
+        contents = dict(manager.iter_texts(ids=pair_ids)) if pair_ids else {}
+        for i, j, similarity_score in similar_pairs:
+            pair = {
+                'memory1_id': ids[i],
+                'memory2_id': ids[j],
+                'similarity': similarity_score,
+                'content1': contents.get(ids[i], ''),
+                'content2': contents.get(ids[j], '')
+            }
+            if similarity_score > 0.9:  # Very high similarity - potential duplicate
+                redundancy_info['potential_duplicates'].append(pair)
+            else:  # High similarity - could be merged
+                redundancy_info['similar_items'].append(pair)
 
         # Generate recommendations
         if redundancy_info['potential_duplicates']:
@@ -1433,20 +1421,10 @@ Please perform this analysis and create new memories as appropriate. Provide a d
     def _calculate_similarity(self, memory1, memory2, memory_type):
         """Calculate similarity between two memories (simplified implementation)"""
         try:
-            content1 = self._get_memory_content(memory1, memory_type).lower()
-            content2 = self._get_memory_content(memory2, memory_type).lower()
-
-            # Simple similarity based on common words (in real implementation, would use embeddings)
-            words1 = set(content1.split())
-            words2 = set(content2.split())
-
-            if not words1 and not words2:
-                return 0.0
-
-            intersection = len(words1.intersection(words2))
-            union = len(words1.union(words2))
-
-            return intersection / union if union > 0 else 0.0
+            # Simple similarity based on common words, the same measure as the redundancy analysis
+            return jaccard_similarity(
+                word_set(self._get_memory_content(memory1, memory_type)),
+                word_set(self._get_memory_content(memory2, memory_type)))
 
         except Exception:
             return 0.0
@@ -37,6 +37,28 @@ DEFAULT_EMBEDDING_CHUNK_SIZE = 300
 
 MAX_CHAINING_STEPS = 10
 MAX_RETRIEVAL_LIMIT_IN_SYSTEM = 10
+# how many extra candidates to take from the vector index to survive additional SQL filters
+VECTOR_INDEX_OVERSAMPLE = 4
+
+# hybrid (bm25 + embedding) search: candidates fetched per method and reciprocal rank fusion constant
+HYBRID_SEARCH_CANDIDATE_MULTIPLIER = 3
+RRF_K = 60
+
+# memory retrieval while building the system prompt: shared worker threads and per memory type timeout (seconds)
+MEMORY_RETRIEVAL_MAX_WORKERS = 12
+MEMORY_RETRIEVAL_TIMEOUT = 10
+
+# most buckets counted in one call of count_episodic_memory_by_bucket
+MAX_TIMELINE_BUCKETS = 1000
+
+# rows read per query when a whole memory table is scanned, e.g. by the redundancy analysis
+MEMORY_SCAN_PAGE_SIZE = 1000
+
+# search_in_memory: results per memory type, and the time budget of every type when searching all memories
+MEMORY_SEARCH_LIMIT = 10
+MEMORY_SEARCH_TIMEOUT = 5
+# list_memory_within_timerange: larger time ranges are refused
+MEMORY_TIMERANGE_LIMIT = 50
 
 # tokenizers
 EMBEDDING_TO_TOKENIZER_MAP = {
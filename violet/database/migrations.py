@@ -0,0 +1,322 @@
+"""
+Lightweight data migrations applied at server start-up.
+
+`Base.metadata.create_all` only creates missing tables, so changes to the layout of
+existing data are expressed here as named, idempotent steps. Applied steps are
+recorded in the `violet_migrations` table and skipped on the next start.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from violet.helpers.converters import decode_legacy_embedding, encode_embedding, is_encoded_embedding
+from violet.log import get_logger
+from violet.utils.utils import get_utc_time
+
+logger = get_logger(__name__)
+
+MIGRATIONS_TABLE = "violet_migrations"
+MIGRATION_BATCH_SIZE = 500
+
+# memory table -> embedding columns stored as `CommonVector` on SQLite
+MEMORY_EMBEDDING_COLUMNS = {
+    "episodic_memory": ["summary_embedding", "details_embedding"],
+    "semantic_memory": ["name_embedding", "summary_embedding", "details_embedding"],
+    "procedural_memory": ["summary_embedding", "steps_embedding"],
+    "resource_memory": ["summary_embedding"],
+    "knowledge_vault": ["caption_embedding"],
+}
+
+
+class MigrationSkipped(Exception):
+    """Raised by a migration that cannot run yet; it is retried on the next start."""
+
+
+@dataclass
+class Migration:
+    name: str
+    upgrade: Callable[[Connection], None]
+    # dialects the migration applies to, `None` means every dialect
+    dialects: Optional[Tuple[str, ...]] = None
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(name: str, dialects: Optional[Tuple[str, ...]] = None):
+    """Register a migration. Migrations run in registration order."""
+
+    def decorator(func: Callable[[Connection], None]):
+        MIGRATIONS.append(Migration(name=name, upgrade=func, dialects=dialects))
+        return func
+
+    return decorator
+
+
+def _table_exists(connection: Connection, table_name: str) -> bool:
+    return inspect(connection).has_table(table_name)
+
+
+def _sqlite_has_fts5(connection: Connection) -> bool:
+    return "ENABLE_FTS5" in {row[0] for row in connection.exec_driver_sql("PRAGMA compile_options")}
+
+
+def run_migrations(engine: Engine) -> None:
+    """Apply every registered migration that has not been recorded yet."""
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} "
+            "(name VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"))
+        applied = {row[0] for row in connection.execute(
+            text(f"SELECT name FROM {MIGRATIONS_TABLE}"))}
+
+    for item in MIGRATIONS:
+        if item.name in applied:
+            continue
+        if item.dialects is not None and engine.dialect.name not in item.dialects:
+            continue
+
+        logger.info(f"Applying migration {item.name}")
+        try:
+            with engine.begin() as connection:
+                item.upgrade(connection)
+                connection.execute(
+                    text(f"INSERT INTO {MIGRATIONS_TABLE} (name, applied_at) VALUES (:name, :applied_at)"),
+                    {"name": item.name, "applied_at": get_utc_time()},
+                )
+        except MigrationSkipped as e:
+            logger.warning(f"Skipped migration {item.name}: {e}")
+
+
+def _native_embedding(vector: np.ndarray, embedding_config) -> np.ndarray:
+    """Strip the zero padding added for the fixed-size layout."""
+    if embedding_config:
+        if isinstance(embedding_config, str):
+            embedding_config = json.loads(embedding_config)
+        embedding_dim = embedding_config.get("embedding_dim")
+        if embedding_dim and embedding_dim <= vector.shape[0]:
+            return vector[:embedding_dim]
+
+    nonzero = np.flatnonzero(vector)
+    return vector[:nonzero[-1] + 1] if nonzero.size else vector[:0]
+
+
+@migration("0001_compact_sqlite_embeddings", dialects=("sqlite",))
+def compact_sqlite_embeddings(connection: Connection) -> None:
+    """Rewrite base64 padded float32 embeddings in the native-dimension binary format."""
+    from violet.settings import settings
+
+    for table_name, columns in MEMORY_EMBEDDING_COLUMNS.items():
+        if not _table_exists(connection, table_name):
+            continue
+
+        converted = 0
+        last_id = ""
+        while True:
+            rows = connection.execute(
+                text(
+                    f"SELECT id, embedding_config, {', '.join(columns)} FROM {table_name} "
+                    "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": MIGRATION_BATCH_SIZE},
+            ).all()
+            if not rows:
+                break
+
+            for row in rows:
+                values = {}
+                for column, data in zip(columns, row[2:]):
+                    if not data or is_encoded_embedding(data):
+                        continue
+                    vector = _native_embedding(
+                        decode_legacy_embedding(bytes(data)), row[1])
+                    values[column] = encode_embedding(
+                        vector, dtype=settings.embedding_storage_dtype)
+
+                if values:
+                    assignments = ", ".join(f"{column} = :{column}" for column in values)
+                    connection.execute(
+                        text(f"UPDATE {table_name} SET {assignments} WHERE id = :id"),
+                        {**values, "id": row[0]},
+                    )
+                    converted += 1
+
+            last_id = rows[-1][0]
+
+        if converted:
+            logger.info(f"Compacted embeddings of {converted} rows in {table_name}")
+
+
+@migration("0002_sqlite_memory_fts5", dialects=("sqlite",))
+def create_memory_fts5_indexes(connection: Connection) -> None:
+    """Create the FTS5 keyword indexes of the memory tables."""
+    from violet.services.memory_fts import FTS_COLUMNS, create_fts_index
+
+    if not _sqlite_has_fts5(connection):
+        raise MigrationSkipped("SQLite is built without FTS5, bm25 search uses the in-memory index")
+
+    for table_name in FTS_COLUMNS:
+        if _table_exists(connection, table_name):
+            create_fts_index(connection, table_name)
+
+
+@migration("0003_memory_embedding_pending")
+def add_memory_embedding_pending(connection: Connection) -> None:
+    """Add the `embedding_pending` flag of the deferred embedding mode to existing memory tables."""
+    for table_name in MEMORY_EMBEDDING_COLUMNS:
+        if not _table_exists(connection, table_name):
+            continue
+        columns = {column["name"] for column in inspect(connection).get_columns(table_name)}
+        if "embedding_pending" in columns:
+            continue
+        connection.execute(text(
+            f"ALTER TABLE {table_name} ADD COLUMN embedding_pending BOOLEAN NOT NULL DEFAULT FALSE"))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table_name}_embedding_pending ON {table_name} (embedding_pending)"))
+
+
+@migration("0004_episodic_memory_timeline_indexes")
+def create_episodic_memory_timeline_indexes(connection: Connection) -> None:
+    """Index the episodic timeline on (organization_id, occurred_at, id) and (occurred_at, id)."""
+    if not _table_exists(connection, "episodic_memory"):
+        return
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_episodic_memory_organization_occurred_at "
+        "ON episodic_memory (organization_id, occurred_at, id)"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_episodic_memory_occurred_at ON episodic_memory (occurred_at, id)"))
+
+
+@migration("0005_memory_tree_paths")
+def index_memory_tree_paths(connection: Connection) -> None:
+    """Fill the tree path prefix index from the `tree_path` of the existing memory rows."""
+    from violet.services.memory_tree_paths import tree_path_rows
+
+    if not _table_exists(connection, "memory_tree_paths"):
+        raise MigrationSkipped("memory_tree_paths does not exist yet")
+
+    for table_name in ("episodic_memory", "semantic_memory", "procedural_memory", "resource_memory"):
+        if not _table_exists(connection, table_name):
+            continue
+        connection.execute(text("DELETE FROM memory_tree_paths WHERE table_name = :table_name"),
+                           {"table_name": table_name})
+        rows = connection.execute(text(f"SELECT id, tree_path FROM {table_name}"))
+        while True:
+            batch = rows.fetchmany(MIGRATION_BATCH_SIZE)
+            if not batch:
+                break
+            path_rows = [
+                path_row
+                for item_id, tree_path in batch
+                for path_row in tree_path_rows(
+                    table_name, item_id, json.loads(tree_path) if isinstance(tree_path, str) else tree_path)
+            ]
+            if path_rows:
+                connection.execute(text(
+                    "INSERT INTO memory_tree_paths (table_name, path, item_id, depth) "
+                    "VALUES (:table_name, :path, :item_id, :depth)"), path_rows)
+
+
+@migration("0006_memory_access_counts")
+def add_memory_access_counts(connection: Connection) -> None:
+    """Add the retrieval counts of the hot/cold tiering to existing memory tables."""
+    for table_name in ("episodic_memory", "semantic_memory", "resource_memory"):
+        if not _table_exists(connection, table_name):
+            continue
+        columns = {column["name"] for column in inspect(connection).get_columns(table_name)}
+        if "access_count" not in columns:
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0"))
+        if "last_accessed_at" not in columns:
+            timestamp_type = "TIMESTAMP WITH TIME ZONE" if connection.dialect.name == "postgresql" else "DATETIME"
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN last_accessed_at {timestamp_type}"))
+
+
+@migration("0007_agents_messages")
+def move_message_ids_to_agents_messages(connection: Connection) -> None:
+    """Move the in-context `message_ids` JSON list of the agents into the ordered agents_messages table."""
+    if not _table_exists(connection, "agents"):
+        return
+    if not _table_exists(connection, "agents_messages"):
+        raise MigrationSkipped("agents_messages does not exist yet")
+    if "message_ids" not in {column["name"] for column in inspect(connection).get_columns("agents")}:
+        return
+
+    rows = connection.execute(text(
+        "SELECT id, message_ids FROM agents WHERE message_ids IS NOT NULL "
+        "AND id NOT IN (SELECT agent_id FROM agents_messages)"))
+    while True:
+        batch = rows.fetchmany(MIGRATION_BATCH_SIZE)
+        if not batch:
+            break
+        position_rows = [
+            {"agent_id": agent_id, "position": position, "message_id": message_id}
+            for agent_id, message_ids in batch
+            for position, message_id in enumerate(
+                json.loads(message_ids) if isinstance(message_ids, str) else message_ids or [])
+        ]
+        if position_rows:
+            connection.execute(text(
+                "INSERT INTO agents_messages (agent_id, position, message_id) "
+                "VALUES (:agent_id, :position, :message_id)"), position_rows)
+
+    # agents.message_ids is left in place, unused, so the previous release can still be rolled back to
+
+
+@migration("0008_sqlite_memory_fts5_stable_keys", dialects=("sqlite",))
+def rekey_memory_fts5_indexes(connection: Connection) -> None:
+    """Rebuild the FTS5 indexes keyed by the implicit rowid, which VACUUM may renumber, on stable keys."""
+    from violet.services.memory_fts import (
+        FTS_COLUMNS, create_fts_index, drop_fts_index, fts_keys_table_name, fts_table_name)
+
+    for table_name in FTS_COLUMNS:
+        # indexes created by 0002 on a new database already have their key table
+        if not _table_exists(connection, fts_table_name(table_name)):
+            continue
+        if _table_exists(connection, fts_keys_table_name(table_name)):
+            continue
+        drop_fts_index(connection, table_name)
+        create_fts_index(connection, table_name)
+
+
+@migration("0009_memory_archive_search")
+def index_memory_archive_search(connection: Connection) -> None:
+    """Index the text of the memory archive for keyword searches, and the tree paths of its items."""
+    from violet.services.memory_fts import ARCHIVE_FTS_COLUMNS, ARCHIVE_FTS_KEY_COLUMNS, create_fts_index
+    from violet.services.memory_tiering import TIERED_MEMORY_CLASSES, decode_payload
+    from violet.services.memory_tree_paths import archived_tree_path_rows
+
+    if not _table_exists(connection, "memory_archive"):
+        return
+    if not _table_exists(connection, "memory_tree_paths"):
+        raise MigrationSkipped("memory_tree_paths does not exist yet")
+
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_memory_archive_search_text "
+            "ON memory_archive USING gin (to_tsvector('simple', search_text))"))
+    elif _sqlite_has_fts5(connection):
+        create_fts_index(connection, "memory_archive", ARCHIVE_FTS_COLUMNS, ARCHIVE_FTS_KEY_COLUMNS)
+    else:
+        logger.warning("SQLite is built without FTS5, archive searches scan the archived text")
+
+    classes = {target_class.__tablename__: target_class for target_class in TIERED_MEMORY_CLASSES}
+    rows = connection.execute(text("SELECT table_name, id, payload FROM memory_archive"))
+    while True:
+        batch = rows.fetchmany(MIGRATION_BATCH_SIZE)
+        if not batch:
+            break
+        path_rows = [
+            path_row
+            for table_name, item_id, payload in batch if table_name in classes
+            for path_row in archived_tree_path_rows(
+                classes[table_name], item_id, decode_payload(payload).get("tree_path"))
+        ]
+        if path_rows:
+            connection.execute(text(
+                "INSERT INTO memory_tree_paths (table_name, path, item_id, depth) "
+                "VALUES (:table_name, :path, :item_id, :depth)"), path_rows)
@@ -0,0 +1,154 @@
+"""
+Approximate nearest neighbour indexes for the pgvector embedding columns.
+
+Embeddings are stored zero-padded to `MAX_EMBEDDING_DIM` (4096), which is above what
+pgvector can index (2000 dimensions for `vector`, 4000 for `halfvec`). The indexes are
+therefore built on an expression that keeps the first `pg_vector_index_dim` dimensions.
+As long as the embedding model produces at most that many dimensions the dropped part is
+only padding and cosine distances are unchanged. Queries use the same expression so the
+planner can pick the index.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import cast, func, literal_column, text
+from sqlalchemy.engine import Connection, Engine
+
+from violet.database.migrations import MEMORY_EMBEDDING_COLUMNS
+from violet.log import get_logger
+from violet.settings import settings
+
+logger = get_logger(__name__)
+
+# largest dimension pgvector can index per storage type
+PGVECTOR_MAX_INDEX_DIM = {"vector": 2000, "halfvec": 4000}
+
+
+def index_vector_type(dim: int) -> Optional[str]:
+    """Storage type of the indexed expression, or None when `dim` cannot be indexed."""
+    if dim <= PGVECTOR_MAX_INDEX_DIM["vector"]:
+        return "vector"
+    if dim <= PGVECTOR_MAX_INDEX_DIM["halfvec"]:
+        return "halfvec"
+    return None
+
+
+def index_name(table_name: str, column_name: str) -> str:
+    return f"ix_{table_name}_{column_name}_{settings.pg_vector_index_type}_{settings.pg_vector_index_dim}"
+
+
+def indexed_embedding_expression(column, dim: int):
+    """The expression the ANN index is built on: the first `dim` dimensions of `column`."""
+    from pgvector.sqlalchemy import Vector
+
+    # bounds are rendered inline, a bound parameter would not match the index expression
+    subvector = func.subvector(column, literal_column("1"), literal_column(str(int(dim))))
+    if index_vector_type(dim) == "halfvec":
+        from pgvector.sqlalchemy import HALFVEC
+
+        return cast(subvector, HALFVEC(dim))
+    return cast(subvector, Vector(dim))
+
+
+def native_embedding_dim(embedded_text: List[float], embedding_config=None) -> int:
+    """Dimension of the query embedding without the zero padding."""
+    if embedding_config is not None and getattr(embedding_config, "embedding_dim", None):
+        return embedding_config.embedding_dim
+    nonzero = np.flatnonzero(np.asarray(embedded_text))
+    return int(nonzero[-1]) + 1 if nonzero.size else 0
+
+
+def indexed_search_target(column, embedded_text: List[float], embedding_config=None) -> Tuple[object, List[float]]:
+    """
+    Return the (expression, query vector) pair to rank `column` by.
+
+    When the ANN index covers the embedding dimension the indexed expression and a
+    truncated query are returned, otherwise the full column and query.
+    """
+    dim = settings.pg_vector_index_dim
+    if (
+        settings.pg_vector_index_type == "none"
+        or index_vector_type(dim) is None
+        or native_embedding_dim(embedded_text, embedding_config) > dim
+    ):
+        return column, embedded_text
+    return indexed_embedding_expression(column, dim), list(embedded_text[:dim])
+
+
+def create_vector_index(connection: Connection, table_name: str, column_name: str) -> None:
+    """Create the ANN index of one embedding column and drop indexes built with other settings."""
+    dim = settings.pg_vector_index_dim
+    vector_type = index_vector_type(dim)
+    name = index_name(table_name, column_name)
+
+    stale_indexes = connection.execute(
+        text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = :table_name "
+            "AND (indexname LIKE :hnsw OR indexname LIKE :ivfflat) AND indexname != :name"
+        ),
+        {
+            "table_name": table_name,
+            "hnsw": f"ix_{table_name}_{column_name}_hnsw_%",
+            "ivfflat": f"ix_{table_name}_{column_name}_ivfflat_%",
+            "name": name,
+        },
+    ).scalars().all()
+    for stale_index in stale_indexes:
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {stale_index}")
+
+    if settings.pg_vector_index_type == "none":
+        return
+
+    if settings.pg_vector_index_type == "hnsw":
+        options = f"m = {settings.pg_hnsw_m}, ef_construction = {settings.pg_hnsw_ef_construction}"
+    else:
+        options = f"lists = {settings.pg_ivfflat_lists}"
+
+    connection.exec_driver_sql(
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table_name} USING {settings.pg_vector_index_type} "
+        f"((subvector({column_name}, 1, {dim})::{vector_type}({dim})) {vector_type}_cosine_ops) "
+        f"WITH ({options})"
+    )
+
+
+def ensure_vector_indexes(engine: Engine) -> None:
+    """Create or update the ANN indexes of every memory embedding column (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
+    if settings.pg_vector_index_type != "none" and index_vector_type(settings.pg_vector_index_dim) is None:
+        logger.warning(
+            f"pg_vector_index_dim={settings.pg_vector_index_dim} is above the pgvector index limit "
+            f"of {PGVECTOR_MAX_INDEX_DIM['halfvec']}, embedding search will not use an ANN index")
+        return
+
+    for table_name, columns in MEMORY_EMBEDDING_COLUMNS.items():
+        for column_name in columns:
+            try:
+                with engine.begin() as connection:
+                    create_vector_index(connection, table_name, column_name)
+            except Exception as e:
+                # e.g. pgvector older than 0.7 has no subvector() or halfvec
+                logger.warning(f"Could not create the ANN index of {table_name}.{column_name}: {e}")
+
+
+def apply_vector_search_params(session, effort: Optional[int] = None, limit: Optional[int] = None) -> None:
+    """
+    Set the recall/latency trade-off of the ANN index for the current transaction.
+
+    `effort` is `hnsw.ef_search` (candidates kept while walking the graph) or
+    `ivfflat.probes` (lists scanned), defaulting to the configured value. Higher values
+    improve recall at the cost of latency. HNSW never returns more than `ef_search` rows,
+    so it is raised to at least `limit`.
+    """
+    if not settings.violet_pg_uri_no_default or settings.pg_vector_index_type == "none":
+        return
+
+    if settings.pg_vector_index_type == "hnsw":
+        ef_search = effort or settings.pg_hnsw_ef_search
+        if limit:
+            ef_search = max(ef_search, limit)
+        session.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+    else:
+        probes = effort or settings.pg_ivfflat_probes
+        session.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
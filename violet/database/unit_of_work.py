@@ -0,0 +1,147 @@
+"""
+Step-scoped unit of work.
+
+Inside `unit_of_work(engine)`, every `db_context()` session opened by the current thread
+joins one database transaction. A manager's `session.commit()` only releases a savepoint and
+its `session.rollback()` only undoes that manager's writes; the transaction itself commits
+once when the block exits, or rolls back entirely when the block raises. An agent's inner
+step thereby persists its step, messages and in-context window with one commit.
+
+A unit of work holds the write lock from its first statement on, it should only wrap a
+sequence of writes, never LLM, embedding or other external calls. In-process state that
+mirrors the database (search indexes, queues) is updated through `after_commit`.
+
+The state is held in a context variable, so threads started inside the block (memory
+retrieval, agents triggered by a tool) do not join it and use their own sessions.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.engine import Connection, Engine, RootTransaction
+from sqlalchemy.orm import Session
+
+from violet.log import get_logger
+
+logger = get_logger(__name__)
+
+_current_unit_of_work: ContextVar[Optional["UnitOfWork"]] = ContextVar("violet_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    """One database transaction shared by the sessions of a block, opened on first use."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.sessions = 0
+        self._connection: Optional[Connection] = None
+        self._transaction: Optional[RootTransaction] = None
+        self._callbacks: List[Tuple[Callable, tuple]] = []
+        self._commit_callbacks: List[Tuple[Callable, tuple]] = []
+
+    def session(self) -> Session:
+        """A session joined to the transaction, its commits and rollbacks stay within a savepoint."""
+        if self._connection is None:
+            self._connection = self.engine.connect()
+            self._transaction = self._connection.begin()
+            if self._connection.dialect.name == "sqlite":
+                # pysqlite defers BEGIN to the first write, the savepoints of the sessions would then be
+                # outermost and commit on release. IMMEDIATE also takes the write lock now: a deferred
+                # transaction that has read cannot write anymore once another connection committed.
+                # A unit of work wraps writes only, so the lock is not taken much earlier than needed.
+                self._connection.exec_driver_sql("BEGIN IMMEDIATE")
+        self.sessions += 1
+        return Session(bind=self._connection, join_transaction_mode="create_savepoint", autoflush=False)
+
+    def call_after(self, callback: Callable, *args) -> None:
+        self._callbacks.append((callback, args))
+
+    def call_after_commit(self, callback: Callable, *args) -> None:
+        self._commit_callbacks.append((callback, args))
+
+    def commit(self) -> None:
+        commit_callbacks, self._commit_callbacks = self._commit_callbacks, []
+        try:
+            if self._transaction is not None:
+                self._transaction.commit()
+        finally:
+            self._close()
+        # once committed, the commit callbacks run first: they update the state the others invalidate
+        self._callbacks = commit_callbacks + self._callbacks
+
+    def rollback(self) -> None:
+        self._commit_callbacks = []
+        try:
+            if self._transaction is not None:
+                self._transaction.rollback()
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+        self._transaction = None
+
+    def run_callbacks(self) -> None:
+        callbacks, self._callbacks = self._callbacks, []
+        for callback, args in callbacks:
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception(f"Unit of work callback {callback} failed")
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current_unit_of_work.get()
+
+
+def after_unit_of_work(callback: Callable, *args) -> None:
+    """
+    Run `callback(*args)` once the current unit of work has committed or rolled back.
+
+    Does nothing outside a unit of work, where the write the callback follows up on is
+    already committed.
+    """
+    unit_of_work = _current_unit_of_work.get()
+    if unit_of_work is not None:
+        unit_of_work.call_after(callback, *args)
+
+
+def after_commit(callback: Callable, *args) -> None:
+    """
+    Run `callback(*args)` once the writes made so far are committed.
+
+    Outside a unit of work they already are and the callback runs right away. Inside one it
+    runs when the unit of work commits, and never if it rolls back.
+    """
+    unit_of_work = _current_unit_of_work.get()
+    if unit_of_work is None:
+        callback(*args)
+    else:
+        unit_of_work.call_after_commit(callback, *args)
+
+
+@contextmanager
+def unit_of_work(engine: Engine) -> Iterator[UnitOfWork]:
+    """Share one transaction between the sessions of the block, joins the current one if any."""
+    current = _current_unit_of_work.get()
+    if current is not None:
+        yield current
+        return
+
+    unit = UnitOfWork(engine)
+    token = _current_unit_of_work.set(unit)
+    try:
+        yield unit
+    except BaseException:
+        _current_unit_of_work.reset(token)
+        unit.rollback()
+        raise
+    else:
+        _current_unit_of_work.reset(token)
+        unit.commit()
+    finally:
+        unit.run_callbacks()
+
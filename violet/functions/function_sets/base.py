@@ -92,6 +92,7 @@ def search_in_memory(self: "Agent", memory_type: str, query: str, search_field:
         search_method: The method to search in the memory. Choose from:
             - 'bm25': BM25 ranking-based full-text search (fast and effective for keyword-based searches)
             - 'embedding': Vector similarity search using embeddings (most powerful, good for conceptual matches)
+            - 'hybrid': Combines 'bm25' and 'embedding' results, good when both exact keywords and related concepts matter
 
     Returns:
         str: Query result string
@@ -104,85 +105,76 @@ def search_in_memory(self: "Agent", memory_type: str, query: str, search_field:
         raise ValueError(
             "embedding is not supported for knowledge_vault memory's 'secret_value' field.")
 
-    if memory_type == 'all':
-        search_field = 'null'
-
     if memory_type == 'core':
         # It means the model is an idiot, but we still return the results:
         return self.agent_state.memory.compile(), len(self.agent_state.memory.list_block_labels())
 
-    if memory_type == 'episodic' or memory_type == 'all':
-        episodic_memory = self.episodic_memory_manager.list_episodic_memory(
-            agent_state=self.agent_state,
-            query=query,
-            search_field=search_field if search_field != 'null' else 'summary',
-            search_method=search_method,
-            limit=10,
-            timezone_str=timezone_str,
-        )
-        formatted_results_from_episodic = [{'memory_type': 'episodic', 'id': x.id, 'timestamp': x.occurred_at,
-                                            'event_type': x.event_type, 'actor': x.actor, 'summary': x.summary, 'details': x.details} for x in episodic_memory]
-        if memory_type == 'episodic':
-            return formatted_results_from_episodic, len(formatted_results_from_episodic)
-
-    if memory_type == 'resource' or memory_type == 'all':
-        resource_memories = self.resource_memory_manager.list_resources(agent_state=self.agent_state,
-                                                                        query=query,
-                                                                        search_field=search_field if search_field != 'null' else (
-                                                                            'summary' if search_method == 'embedding' else 'content'),
-                                                                        search_method=search_method,
-                                                                        limit=10,
-                                                                        timezone_str=timezone_str,
-                                                                        )
-        formatted_results_resource = [{'memory_type': 'resource', 'id': x.id, 'resource_type': x.resource_type,
-                                       'summary': x.summary, 'content': x.content} for x in resource_memories]
-        if memory_type == 'resource':
-            return formatted_results_resource, len(formatted_results_resource)
-
-    if memory_type == 'procedural' or memory_type == 'all':
-        procedural_memories = self.procedural_memory_manager.list_procedures(agent_state=self.agent_state,
-                                                                             query=query,
-                                                                             search_field=search_field if search_field != 'null' else 'summary',
-                                                                             search_method=search_method,
-                                                                             limit=10,
-                                                                             timezone_str=timezone_str,
-                                                                             )
-        formatted_results_procedural = [{'memory_type': 'procedural', 'id': x.id,
-                                         'entry_type': x.entry_type, 'summary': x.summary, 'steps': x.steps} for x in procedural_memories]
-        if memory_type == 'procedural':
-            return formatted_results_procedural, len(formatted_results_procedural)
-
-    if memory_type == 'knowledge_vault' or memory_type == 'all':
-        knowledge_vault_memories = self.knowledge_vault_manager.list_knowledge(agent_state=self.agent_state,
-                                                                               query=query,
-                                                                               search_field=search_field if search_field != 'null' else 'caption',
-                                                                               search_method=search_method,
-                                                                               limit=10,
-                                                                               timezone_str=timezone_str,
-                                                                               )
-        formatted_results_knowledge_vault = [{'memory_type': 'knowledge_vault', 'id': x.id, 'entry_type': x.entry_type, 'source': x.source,
-                                              'sensitivity': x.sensitivity, 'secret_value': x.secret_value, 'caption': x.caption} for x in knowledge_vault_memories]
-        if memory_type == 'knowledge_vault':
-            return formatted_results_knowledge_vault, len(formatted_results_knowledge_vault)
-
-    if memory_type == 'semantic' or memory_type == 'all':
-        semantic_memories = self.semantic_memory_manager.list_semantic_items(agent_state=self.agent_state,
-                                                                             query=query,
-                                                                             search_field=search_field if search_field != 'null' else 'summary',
-                                                                             search_method=search_method,
-                                                                             limit=10,
-                                                                             timezone_str=timezone_str,
-                                                                             )
+    from functools import partial
+
+    from violet.constants import MEMORY_SEARCH_LIMIT, MEMORY_SEARCH_TIMEOUT
+
+    # memory type -> (list method, default search field, result formatter)
+    searches = {
+        'episodic': (self.episodic_memory_manager.list_episodic_memory, 'summary',
+                     lambda x: {'memory_type': 'episodic', 'id': x.id, 'timestamp': x.occurred_at,
+                                'event_type': x.event_type, 'actor': x.actor, 'summary': x.summary, 'details': x.details}),
+        'resource': (self.resource_memory_manager.list_resources, 'summary' if search_method == 'embedding' else 'content',
+                     lambda x: {'memory_type': 'resource', 'id': x.id, 'resource_type': x.resource_type,
+                                'summary': x.summary, 'content': x.content}),
+        'procedural': (self.procedural_memory_manager.list_procedures, 'summary',
+                       lambda x: {'memory_type': 'procedural', 'id': x.id,
+                                  'entry_type': x.entry_type, 'summary': x.summary, 'steps': x.steps}),
+        'knowledge_vault': (self.knowledge_vault_manager.list_knowledge, 'caption',
+                            lambda x: {'memory_type': 'knowledge_vault', 'id': x.id, 'entry_type': x.entry_type, 'source': x.source,
+                                       'sensitivity': x.sensitivity, 'secret_value': x.secret_value, 'caption': x.caption}),
         # title, summary, details, source
-        formatted_results_semantic = [{"memory_type": 'semantic', 'id': x.id, 'name': x.name,
-                                       'summary': x.summary, 'details': x.details, 'source': x.source} for x in semantic_memories]
-        if memory_type == 'semantic':
-            return formatted_results_semantic, len(formatted_results_semantic)
-
-    else:
+        'semantic': (self.semantic_memory_manager.list_semantic_items, 'summary',
+                     lambda x: {"memory_type": 'semantic', 'id': x.id, 'name': x.name,
+                                'summary': x.summary, 'details': x.details, 'source': x.source}),
+    }
+
+    def search(memory_type: str, search_field: str, embedded_text: Optional[List[float]] = None) -> List[dict]:
+        list_method, default_search_field, format_result = searches[memory_type]
+        memories = list_method(agent_state=self.agent_state,
+                               query=query,
+                               embedded_text=embedded_text,
+                               search_field=search_field if search_field != 'null' else default_search_field,
+                               search_method=search_method,
+                               limit=MEMORY_SEARCH_LIMIT,
+                               timezone_str=timezone_str,
+                               )
+        return [format_result(x) for x in memories]
+
+    if memory_type in searches:
+        formatted_results = search(memory_type, search_field)
+        return formatted_results, len(formatted_results)
+
+    if memory_type != 'all':
         raise ValueError(
             f"Memory type '{memory_type}' is not supported. Please choose from 'episodic', 'resource', 'procedural', 'knowledge_vault', 'semantic'.")
-    return formatted_results_from_episodic + formatted_results_resource + formatted_results_procedural + formatted_results_knowledge_vault + formatted_results_semantic, len(formatted_results_from_episodic) + len(formatted_results_resource) + len(formatted_results_procedural) + len(formatted_results_knowledge_vault) + len(formatted_results_semantic)
+
+    # Search every memory type concurrently with its default field, the query is embedded only once.
+    # A memory type that fails or exceeds its time budget is left out instead of failing the whole search.
+    embedded_text = None
+    if search_method in ('embedding', 'hybrid') and query:
+        from violet.llm_api.embeddings import get_query_embedding
+        from violet.utils.utils import pad_embedding
+
+        embedded_text = pad_embedding(get_query_embedding(self.agent_state.embedding_config, query))
+
+    results = self._retrieve_memories_concurrently(
+        {memory_type: partial(search, memory_type) for memory_type in searches},
+        timeout=MEMORY_SEARCH_TIMEOUT, search_field='null', embedded_text=embedded_text)
+
+    # one list ranked by the position of every result within its memory type, so the best
+    # matches of each type come first; every type contributes at most MEMORY_SEARCH_LIMIT results
+    ranked_results = sorted(
+        ((rank, order, result)
+         for order, memory_type in enumerate(searches)
+         for rank, result in enumerate(results.get(memory_type, [])[:MEMORY_SEARCH_LIMIT])),
+        key=lambda x: (x[0], x[1]))
+    formatted_results = [result for _, _, result in ranked_results]
+    return formatted_results, len(formatted_results)
 
 
 def list_memory_within_timerange(self: "Agent", memory_type: List[str], start_time: str, end_time: str, timezone_str: str) -> Optional[str]:
@@ -194,6 +186,8 @@ def list_memory_within_timerange(self: "Agent", memory_type: List[str], start_ti
         end_time (str): The end time of the time range. It has to be in the form of "%Y-%m-%d %H:%M:%S"
     """
 
+    from violet.constants import MEMORY_TIMERANGE_LIMIT
+
     memory_type = memory_type[0]
 
     start_time = convert_timezone_to_utc(start_time, timezone_str)
@@ -205,13 +199,15 @@ def list_memory_within_timerange(self: "Agent", memory_type: List[str], start_ti
             start_time=start_time,
             end_time=end_time,
             timezone_str=timezone_str,
+            # one more than accepted is enough to tell that the range is too large
+            limit=MEMORY_TIMERANGE_LIMIT + 1,
         )
         formatted_results_from_episodic = [{'memory_type': 'episodic', 'id': x.id, 'timestamp': x.occurred_at,
                                             'event_type': x.event_type, 'actor': x.actor, 'summary': x.summary} for x in episodic_memory]
         if memory_type == 'episodic':
             if len(formatted_results_from_episodic) == 0:
                 return f"No results found."
-            elif len(formatted_results_from_episodic) > 50:
+            elif len(formatted_results_from_episodic) > MEMORY_TIMERANGE_LIMIT:
                 return "Too many results found. Please narrow down your search."
             else:
                 return formatted_results_from_episodic, len(formatted_results_from_episodic)
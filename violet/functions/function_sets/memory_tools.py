@@ -103,17 +103,18 @@ def episodic_memory_insert(self: "Agent", items: List[EpisodicEventForLLM]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.episodic_memory_manager.insert_event(
-            agent_state=self.agent_state,
-            timestamp=item['occurred_at'],
-            event_type=item['event_type'],
-            actor=item['actor'],
-            summary=item['summary'],
-            details=item['details'],
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.episodic_memory_manager.insert_events(
+        agent_state=self.agent_state,
+        events=[{
+            'timestamp': item['occurred_at'],
+            'event_type': item['event_type'],
+            'actor': item['actor'],
+            'summary': item['summary'],
+            'details': item['details'],
+            'tree_path': item.get('tree_path'),
+        } for item in items],
+        organization_id=self.user.organization_id
+    )
     response = "Events inserted! Now you need to check if there are repeated events shown in the system prompt."
     return response
 
@@ -157,17 +158,18 @@ def episodic_memory_replace(self: "Agent", event_ids: List[str], new_items: List
     for event_id in event_ids:
         self.episodic_memory_manager.delete_event_by_id(event_id)
 
-    for new_item in new_items:
-        self.episodic_memory_manager.insert_event(
-            agent_state=self.agent_state,
-            timestamp=new_item['occurred_at'],
-            event_type=new_item['event_type'],
-            actor=new_item['actor'],
-            summary=new_item['summary'],
-            details=new_item['details'],
-            organization_id=self.user.organization_id,
-            tree_path=new_item.get('tree_path')
-        )
+    self.episodic_memory_manager.insert_events(
+        agent_state=self.agent_state,
+        events=[{
+            'timestamp': new_item['occurred_at'],
+            'event_type': new_item['event_type'],
+            'actor': new_item['actor'],
+            'summary': new_item['summary'],
+            'details': new_item['details'],
+            'tree_path': new_item.get('tree_path'),
+        } for new_item in new_items],
+        organization_id=self.user.organization_id
+    )
 
 
 def check_episodic_memory(self: "Agent", event_ids: List[str], timezone_str: str) -> List[EpisodicEventForLLM]:
@@ -201,16 +203,17 @@ def resource_memory_insert(self: "Agent", items: List[ResourceMemoryItemBase]):
         Optional[str]: None is always returned as this function does not produce a response.
     """
 
-    for item in items:
-        self.resource_memory_manager.insert_resource(
-            agent_state=self.agent_state,
-            title=item['title'],
-            summary=item['summary'],
-            resource_type=item['resource_type'],
-            content=item['content'],
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.resource_memory_manager.insert_resources(
+        agent_state=self.agent_state,
+        items=[{
+            'title': item['title'],
+            'summary': item['summary'],
+            'resource_type': item['resource_type'],
+            'content': item['content'],
+            'tree_path': item.get('tree_path'),
+        } for item in items],
+        organization_id=self.user.organization_id
+    )
 
 
 def resource_memory_update(self: "Agent", old_ids: List[str], new_items: List[ResourceMemoryItemBase]):
@@ -227,16 +230,17 @@ def resource_memory_update(self: "Agent", old_ids: List[str], new_items: List[Re
             resource_id=old_id
         )
 
-    for item in new_items:
-        self.resource_memory_manager.insert_resource(
-            agent_state=self.agent_state,
-            title=item['title'],
-            summary=item['summary'],
-            resource_type=item['resource_type'],
-            content=item['content'],
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.resource_memory_manager.insert_resources(
+        agent_state=self.agent_state,
+        items=[{
+            'title': item['title'],
+            'summary': item['summary'],
+            'resource_type': item['resource_type'],
+            'content': item['content'],
+            'tree_path': item.get('tree_path'),
+        } for item in new_items],
+        organization_id=self.user.organization_id
+    )
 
 
 def procedural_memory_insert(self: "Agent", items: List[ProceduralMemoryItemBase]):
@@ -249,15 +253,16 @@ def procedural_memory_insert(self: "Agent", items: List[ProceduralMemoryItemBase
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.procedural_memory_manager.insert_procedure(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            summary=item['summary'],
-            steps=item['steps'],
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.procedural_memory_manager.insert_procedures(
+        agent_state=self.agent_state,
+        items=[{
+            'entry_type': item['entry_type'],
+            'summary': item['summary'],
+            'steps': item['steps'],
+            'tree_path': item.get('tree_path'),
+        } for item in items],
+        organization_id=self.user.organization_id
+    )
 
 
 def procedural_memory_update(self: "Agent", old_ids: List[str], new_items: List[ProceduralMemoryItemBase]):
@@ -276,15 +281,16 @@ def procedural_memory_update(self: "Agent", old_ids: List[str], new_items: List[
             procedure_id=old_id
         )
 
-    for item in new_items:
-        self.procedural_memory_manager.insert_procedure(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            summary=item['summary'],
-            steps=item['steps'],
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.procedural_memory_manager.insert_procedures(
+        agent_state=self.agent_state,
+        items=[{
+            'entry_type': item['entry_type'],
+            'summary': item['summary'],
+            'steps': item['steps'],
+            'tree_path': item.get('tree_path'),
+        } for item in new_items],
+        organization_id=self.user.organization_id
+    )
 
 
 def check_semantic_memory(self: "Agent", semantic_item_ids: List[str], timezone_str: str) -> List[SemanticMemoryItemBase]:
@@ -317,16 +323,17 @@ def semantic_memory_insert(self: "Agent", items: List[SemanticMemoryItemBase]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.semantic_memory_manager.insert_semantic_item(
-            agent_state=self.agent_state,
-            name=item['name'],
-            summary=item['summary'],
-            details=item['details'],
-            source=item['source'],
-            tree_path=item['tree_path'],
-            organization_id=self.user.organization_id
-        )
+    self.semantic_memory_manager.insert_semantic_items(
+        agent_state=self.agent_state,
+        items=[{
+            'name': item['name'],
+            'summary': item['summary'],
+            'details': item['details'],
+            'source': item['source'],
+            'tree_path': item['tree_path'],
+        } for item in items],
+        organization_id=self.user.organization_id
+    )
 
 
 def semantic_memory_update(self: "Agent", old_semantic_item_ids: List[str], new_items: List[SemanticMemoryItemBase]):
@@ -346,18 +353,18 @@ def semantic_memory_update(self: "Agent", old_semantic_item_ids: List[str], new_
             semantic_memory_id=old_id
         )
 
-    new_ids = []
-    for item in new_items:
-        inserted_item = self.semantic_memory_manager.insert_semantic_item(
-            agent_state=self.agent_state,
-            name=item['name'],
-            summary=item['summary'],
-            details=item['details'],
-            source=item['source'],
-            tree_path=item['tree_path'],
-            organization_id=self.user.organization_id
-        )
-        new_ids.append(inserted_item.id)
+    inserted_items = self.semantic_memory_manager.insert_semantic_items(
+        agent_state=self.agent_state,
+        items=[{
+            'name': item['name'],
+            'summary': item['summary'],
+            'details': item['details'],
+            'source': item['source'],
+            'tree_path': item['tree_path'],
+        } for item in new_items],
+        organization_id=self.user.organization_id
+    )
+    new_ids = [inserted_item.id for inserted_item in inserted_items]
 
     message_to_return = "Semantic memory with the following ids have been deleted: " + \
         str(old_semantic_item_ids) + \
@@ -375,16 +382,17 @@ def knowledge_vault_insert(self: "Agent", items: List[KnowledgeVaultItemBase]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.knowledge_vault_manager.insert_knowledge(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            source=item['source'],
-            sensitivity=item['sensitivity'],
-            secret_value=item['secret_value'],
-            caption=item['caption'],
-            organization_id=self.user.organization_id
-        )
+    self.knowledge_vault_manager.insert_knowledge_items(
+        agent_state=self.agent_state,
+        items=[{
+            'entry_type': item['entry_type'],
+            'source': item['source'],
+            'sensitivity': item['sensitivity'],
+            'secret_value': item['secret_value'],
+            'caption': item['caption'],
+        } for item in items],
+        organization_id=self.user.organization_id
+    )
 
 
 def knowledge_vault_update(self: "Agent", old_ids: List[str], new_items: List[KnowledgeVaultItemBase]):
@@ -403,16 +411,17 @@ def knowledge_vault_update(self: "Agent", old_ids: List[str], new_items: List[Kn
             knowledge_vault_item_id=old_id
         )
 
-    for item in new_items:
-        self.knowledge_vault_manager.insert_knowledge(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            source=item['source'],
-            sensitivity=item['sensitivity'],
-            secret_value=item['secret_value'],
-            caption=item['caption'],
-            organization_id=self.user.organization_id
-        )
+    self.knowledge_vault_manager.insert_knowledge_items(
+        agent_state=self.agent_state,
+        items=[{
+            'entry_type': item['entry_type'],
+            'source': item['source'],
+            'sensitivity': item['sensitivity'],
+            'secret_value': item['secret_value'],
+            'caption': item['caption'],
+        } for item in new_items],
+        organization_id=self.user.organization_id
+    )
 
 
 def trigger_memory_update_with_instruction(self: "Agent", user_message: object, instruction: str, memory_type: str) -> Optional[str]:
@@ -1,4 +1,5 @@
 import base64
+import struct
 from typing import Any, Dict, List, Optional, Union
 
 import numpy as np
@@ -269,25 +270,89 @@ def deserialize_message_content(data: Optional[List[Dict]]) -> List[MessageConte
 # --------------------------
 
 
-def serialize_vector(vector: Optional[Union[List[float], np.ndarray]]) -> Optional[bytes]:
-    """Convert a NumPy array or list into a base64-encoded byte string."""
+# Binary layout (little endian):
+#   magic (2 bytes) | version (uint8) | dtype code (uint8) | dimension (uint32) | [scale (float32), int8 only] | payload
+# Embeddings are stored at their native dimension, values written before this format
+# existed are base64-encoded float32 arrays and are still readable.
+EMBEDDING_FORMAT_MAGIC = b"\x93E"
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_DTYPE_CODES = {"float32": 0, "float16": 1, "int8": 2}
+_EMBEDDING_HEADER = struct.Struct("<2sBBI")
+_EMBEDDING_SCALE = struct.Struct("<f")
+
+
+def encode_embedding(vector: Union[List[float], np.ndarray], dtype: str = "float32") -> bytes:
+    """Encode an embedding into the versioned binary format with the requested precision."""
+    if dtype not in EMBEDDING_DTYPE_CODES:
+        raise ValueError(f"Unsupported embedding storage dtype: {dtype}")
+
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    header = _EMBEDDING_HEADER.pack(
+        EMBEDDING_FORMAT_MAGIC, EMBEDDING_FORMAT_VERSION, EMBEDDING_DTYPE_CODES[dtype], vector.shape[0])
+
+    if dtype == "int8":
+        # symmetric per-vector quantization
+        max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        quantized = np.clip(np.round(vector / scale), -127, 127).astype(np.int8)
+        return header + _EMBEDDING_SCALE.pack(scale) + quantized.tobytes()
+    if dtype == "float16":
+        return header + vector.astype("<f2").tobytes()
+    return header + vector.astype("<f4").tobytes()
+
+
+def is_encoded_embedding(data: Optional[bytes]) -> bool:
+    """Whether `data` is stored in the versioned binary format."""
+    return bool(data) and bytes(data[:2]) == EMBEDDING_FORMAT_MAGIC
+
+
+def decode_embedding(data: bytes) -> np.ndarray:
+    """Decode an embedding written by `encode_embedding` into a float32 array."""
+    data = bytes(data)
+    magic, version, dtype_code, dim = _EMBEDDING_HEADER.unpack_from(data)
+    if magic != EMBEDDING_FORMAT_MAGIC or version != EMBEDDING_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported embedding format (magic={magic!r}, version={version})")
+
+    offset = _EMBEDDING_HEADER.size
+    if dtype_code == EMBEDDING_DTYPE_CODES["int8"]:
+        (scale,) = _EMBEDDING_SCALE.unpack_from(data, offset)
+        offset += _EMBEDDING_SCALE.size
+        return np.frombuffer(data, dtype=np.int8, count=dim, offset=offset).astype(np.float32) * np.float32(scale)
+    if dtype_code == EMBEDDING_DTYPE_CODES["float16"]:
+        return np.frombuffer(data, dtype="<f2", count=dim, offset=offset).astype(np.float32)
+    if dtype_code == EMBEDDING_DTYPE_CODES["float32"]:
+        return np.frombuffer(data, dtype="<f4", count=dim, offset=offset)
+    raise ValueError(f"Unknown embedding dtype code: {dtype_code}")
+
+
+def decode_legacy_embedding(data: bytes, base64_encoded: bool = True) -> np.ndarray:
+    """Decode an embedding stored before the versioned format (base64 float32 on SQLite)."""
+    if base64_encoded:
+        data = base64.b64decode(data)
+    return np.frombuffer(data, dtype=np.float32)
+
+
+def serialize_vector(vector: Optional[Union[List[float], np.ndarray]], dtype: Optional[str] = None) -> Optional[bytes]:
+    """Convert a NumPy array or list into the versioned binary embedding format."""
     if vector is None:
         return None
-    if isinstance(vector, list):
-        vector = np.array(vector, dtype=np.float32)
+    if dtype is None:
+        from violet.settings import settings
+        dtype = settings.embedding_storage_dtype
 
-    return base64.b64encode(vector.tobytes())
+    return encode_embedding(vector, dtype=dtype)
 
 
 def deserialize_vector(data: Optional[bytes], dialect: Dialect) -> Optional[np.ndarray]:
-    """Convert a base64-encoded byte string back into a NumPy array."""
+    """Convert a stored embedding back into a NumPy array."""
     if not data:
         return None
 
-    if dialect.name == "sqlite":
-        data = base64.b64decode(data)
+    if is_encoded_embedding(data):
+        return decode_embedding(data)
 
-    return np.frombuffer(data, dtype=np.float32)
+    return decode_legacy_embedding(data, base64_encoded=dialect.name == "sqlite")
 
 
 # --------------------------
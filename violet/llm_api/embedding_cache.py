@@ -0,0 +1,162 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from violet.helpers.converters import decode_embedding, encode_embedding
+from violet.log import get_logger
+from violet.schemas.embedding_config import EmbeddingConfig
+from violet.settings import settings
+
+logger = get_logger(__name__)
+
+# rows kept in the on-disk cache; the oldest are pruned every `EMBEDDING_CACHE_PRUNE_INTERVAL` writes
+EMBEDDING_CACHE_DISK_MAX_ENTRIES = 100_000
+EMBEDDING_CACHE_PRUNE_INTERVAL = 1000
+
+
+def normalize_text(text: str) -> str:
+    """Unicode and whitespace normalization, so trivially different strings share an entry."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def embedding_model_identity(config: EmbeddingConfig) -> str:
+    """The parts of an embedding config that change the embedding of a text."""
+    return config.model_dump_json(exclude={"embedding_chunk_size", "handle"})
+
+
+class EmbeddingCache:
+    """
+    Content-addressed LRU cache of text embeddings, shared by all agents and managers.
+
+    Entries are keyed by the embedding model identity and the hash of the normalized text.
+    The in-memory part holds float32 vectors up to `max_bytes`; with `persist` the
+    embeddings are also written to a SQLite file, so a restart starts warm.
+    """
+
+    def __init__(self, max_bytes: int, persist: bool = False, path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.persist = persist
+        self.path = path
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(config: EmbeddingConfig, text: str) -> str:
+        content = embedding_model_identity(config) + "\0" + normalize_text(text)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if not self.persist:
+            return None
+        if self._connection is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                connection = sqlite3.connect(self.path, check_same_thread=False)
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL, "
+                    "created_at REAL NOT NULL DEFAULT (julianday('now')))")
+                self._connection = connection
+            except sqlite3.Error as e:
+                logger.warning(f"Disabling the on-disk embedding cache {self.path}: {e}")
+                self.persist = False
+        return self._connection
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        # caller holds the lock
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = vector
+        self._size += vector.nbytes
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.nbytes
+            self.evictions += 1
+
+    def get(self, config: EmbeddingConfig, text: str) -> Optional[List[float]]:
+        if self.max_bytes <= 0:
+            return None
+        key = self.key(config, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+
+            connection = self._disk()
+            if connection is not None:
+                row = connection.execute("SELECT embedding FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = decode_embedding(row[0])
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector.tolist()
+
+            self.misses += 1
+            return None
+
+    def put(self, config: EmbeddingConfig, text: str, embedding: List[float]) -> None:
+        if self.max_bytes <= 0:
+            return
+        key = self.key(config, text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+
+            connection = self._disk()
+            if connection is None:
+                return
+            try:
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, embedding) VALUES (?, ?)",
+                        (key, encode_embedding(vector)))
+                    self._writes += 1
+                    if self._writes % EMBEDDING_CACHE_PRUNE_INTERVAL == 0:
+                        connection.execute(
+                            "DELETE FROM embeddings WHERE key NOT IN "
+                            "(SELECT key FROM embeddings ORDER BY created_at DESC LIMIT ?)",
+                            (EMBEDDING_CACHE_DISK_MAX_ENTRIES,))
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to write the on-disk embedding cache: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit-rate metrics; disk hits count as hits."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# singleton
+query_embedding_cache = EmbeddingCache(
+    max_bytes=settings.embedding_cache_max_bytes,
+    persist=settings.embedding_cache_persist,
+    path=os.path.join(str(settings.VIOLET_DIR), "embedding_cache.db"),
+)
@@ -1,5 +1,8 @@
+import threading
 import uuid
-from typing import Any, List, Optional
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import tiktoken
@@ -61,7 +64,112 @@ def check_and_split_text(text: str, embedding_model: str) -> List[str]:
     return [text]
 
 
-class EmbeddingEndpoint:
+@lru_cache(maxsize=None)
+def get_embedding_encoding(embedding_model: str):
+    """tiktoken encoding used to count the tokens sent to `embedding_model`, None if it cannot be loaded."""
+    try:
+        return tiktoken.get_encoding(EMBEDDING_TO_TOKENIZER_MAP.get(embedding_model, EMBEDDING_TO_TOKENIZER_DEFAULT))
+    except Exception as e:
+        # tiktoken downloads the encoding on first use, which fails on offline machines
+        printd(f"Warning: couldn't load tokenizer for model {embedding_model} ({e}), estimating token counts")
+        return None
+
+
+def count_embedding_tokens(text: str, embedding_model: str) -> int:
+    encoding = get_embedding_encoding(embedding_model)
+    if encoding is None:
+        # roughly four characters per token
+        return len(text or "") // 4 + 1
+    return len(encoding.encode(text or "", disallowed_special=()))
+
+
+def batch_texts(texts: List[str], embedding_model: str, batch_size: Optional[int] = None, max_tokens: Optional[int] = None) -> List[List[str]]:
+    """
+    Split `texts` into micro-batches of at most `batch_size` texts and `max_tokens` tokens,
+    keeping their order. A text longer than `max_tokens` is sent in a batch of its own.
+    """
+    from violet.settings import settings
+
+    batch_size = batch_size or settings.embedding_batch_size
+    max_tokens = max_tokens or settings.embedding_batch_max_tokens
+
+    batches = []
+    batch, batch_tokens = [], 0
+    for text in texts:
+        num_tokens = count_embedding_tokens(text, embedding_model)
+        if batch and (len(batch) >= batch_size or batch_tokens + num_tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += num_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _sorted_embeddings(data: List[dict]) -> List[List[float]]:
+    # OpenAI-style responses carry the input position in `index`
+    return [item["embedding"] for item in sorted(data, key=lambda item: item.get("index", 0))]
+
+
+def create_http_client(timeout: Optional[float] = None):
+    """httpx client with a keep-alive connection pool, shared by all requests of one embedding model."""
+    import httpx
+    from violet.settings import settings
+
+    return httpx.Client(
+        timeout=httpx.Timeout(
+            timeout or settings.httpx_timeout_read,
+            connect=settings.httpx_timeout_connect,
+            write=settings.httpx_timeout_write,
+            pool=settings.httpx_timeout_pool,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.httpx_max_connections,
+            max_keepalive_connections=settings.httpx_max_keepalive_connections,
+            keepalive_expiry=settings.httpx_keepalive_expiry,
+        ),
+    )
+
+
+class BatchedEmbeddings:
+    """
+    Base class of the embedding backends.
+
+    `get_text_embeddings` splits the texts into micro-batches (`embedding_batch_size` texts
+    and `embedding_batch_max_tokens` tokens at most) and embeds each with one `_embed_batch`
+    request. Backends without a batch endpoint fall back to one request per text.
+    """
+
+    model_name: str
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        raise NotImplementedError
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self.get_text_embedding(text) for text in texts]
+
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed `texts`, returning one embedding per text in the same order."""
+        embeddings = []
+        for batch in batch_texts(texts, self.model_name):
+            embeddings.extend(self._embed_batch(batch))
+        return embeddings
+
+    def close(self) -> None:
+        """Release the connections held by the model."""
+        client = getattr(self, "_http_client", None)
+        if client is not None:
+            client.close()
+
+    def close_when_released(self) -> None:
+        """Close the connections once the last user of the model has dropped it."""
+        client = getattr(self, "_http_client", None)
+        if client is not None:
+            weakref.finalize(self, client.close)
+
+
+class EmbeddingEndpoint(BatchedEmbeddings):
     """Implementation for OpenAI compatible endpoint"""
 
     # """ Based off llama index https://github.com/run-llama/llama_index/blob/a98bdb8ecee513dc2e880f56674e7fd157d1dc3a/llama_index/embeddings/text_embeddings_inference.py """
@@ -89,27 +197,28 @@ class EmbeddingEndpoint:
         self._user = user
         self._base_url = base_url
         self._timeout = timeout
+        self._http_client = create_http_client(timeout)
 
-    def _call_api(self, text: str) -> List[float]:
+    def _call_api(self, text: Union[str, List[str]]):
         if not is_valid_url(self._base_url):
             raise ValueError(
                 f"Embeddings endpoint does not have a valid URL (set to: '{self._base_url}'). Make sure embedding_endpoint is set correctly in your Violet config."
             )
-        import httpx
-
         headers = {"Content-Type": "application/json"}
         json_data = {"input": text,
                      "model": self.model_name, "user": self._user}
 
-        with httpx.Client() as client:
-            response = client.post(
-                f"{self._base_url}/embeddings",
-                headers=headers,
-                json=json_data,
-                timeout=self._timeout,
-            )
+        response = self._http_client.post(
+            f"{self._base_url}/embeddings",
+            headers=headers,
+            json=json_data,
+            timeout=self._timeout,
+        )
 
-        response_json = response.json()
+        return response.json()
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        response_json = self._call_api(text)
 
         if isinstance(response_json, list):
             # embedding directly in response
@@ -128,11 +237,25 @@ class EmbeddingEndpoint:
 
         return embedding
 
-    def get_text_embedding(self, text: str) -> List[float]:
-        return self._call_api(text)
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response_json = self._call_api(texts)
+
+        if isinstance(response_json, list) and all(isinstance(embedding, list) for embedding in response_json):
+            # one embedding per input directly in response
+            embeddings = response_json
+        elif isinstance(response_json, dict) and isinstance(response_json.get("data"), list):
+            embeddings = _sorted_embeddings(response_json["data"])
+        else:
+            raise TypeError(
+                f"Got back an unexpected payload from text embedding function, response=\n{response_json}")
+
+        if len(embeddings) != len(texts):
+            raise TypeError(
+                f"Expected {len(texts)} embeddings from text embedding function, got {len(embeddings)}")
+        return embeddings
 
 
-class OllamaEmbeddings:
+class OllamaEmbeddings(BatchedEmbeddings):
 
     # Format:
     # curl http://localhost:11434/api/embeddings -d '{
@@ -142,31 +265,48 @@ class OllamaEmbeddings:
 
     def __init__(self, model: str, base_url: str, ollama_additional_kwargs: dict):
         self.model = model
+        self.model_name = model
         self.base_url = base_url
         self.ollama_additional_kwargs = ollama_additional_kwargs
+        self._http_client = create_http_client()
 
     def get_text_embedding(self, text: str):
-        import httpx
-
         headers = {"Content-Type": "application/json"}
         json_data = {"model": self.model, "prompt": text}
         json_data.update(self.ollama_additional_kwargs)
 
-        with httpx.Client() as client:
-            response = client.post(
-                f"{self.base_url}/api/embeddings",
-                headers=headers,
-                json=json_data,
-            )
+        response = self._http_client.post(
+            f"{self.base_url}/api/embeddings",
+            headers=headers,
+            json=json_data,
+        )
 
         response_json = response.json()
         return response_json["embedding"]
 
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        headers = {"Content-Type": "application/json"}
+        json_data = {"model": self.model, "input": texts}
+        json_data.update(self.ollama_additional_kwargs)
+
+        response = self._http_client.post(
+            f"{self.base_url}/api/embed",
+            headers=headers,
+            json=json_data,
+        )
+
+        if response.status_code == 404:
+            # Ollama before 0.3 only has the single prompt `/api/embeddings` endpoint
+            return super()._embed_batch(texts)
 
-class LlamaEmbeddings:
+        return response.json()["embeddings"]
+
+
+class LlamaEmbeddings(BatchedEmbeddings):
 
     def __init__(self, embedding_config: EmbeddingConfig):
         self.embedding_config = embedding_config
+        self.model_name = embedding_config.embedding_model
 
         self.local_embeddings_model = load_embedding_model(
             embedding_config=embedding_config)
@@ -177,6 +317,45 @@ class LlamaEmbeddings:
 
         return res['data'][0]['embedding']
 
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        res = self.local_embeddings_model.create_embedding(
+            texts, model=self.embedding_config.embedding_model)
+
+        return _sorted_embeddings(res['data'])
+
+
+class OpenAIEmbeddings(BatchedEmbeddings):
+    """OpenAI embeddings through llama-index, sending each micro-batch as one request."""
+
+    def __init__(self, api_base: str, api_key: str, additional_kwargs: dict):
+        from llama_index.embeddings.openai import OpenAIEmbedding
+        from violet.settings import settings
+
+        self.client = OpenAIEmbedding(
+            api_base=api_base,
+            api_key=api_key,
+            additional_kwargs=additional_kwargs,
+            embed_batch_size=settings.embedding_batch_size,
+        )
+        self.model_name = self.client.model_name
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        return self.client.get_text_embedding(text)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.client.get_text_embedding_batch(texts)
+
+
+def get_query_embedding(config: EmbeddingConfig, query_text: str) -> List[float]:
+    """Embedding of a search query, served from the shared query embedding cache when possible."""
+    from violet.llm_api.embedding_cache import query_embedding_cache
+
+    embedding = query_embedding_cache.get(config, query_text)
+    if embedding is None:
+        embedding = embedding_model(config).get_text_embedding(query_text)
+        query_embedding_cache.put(config, query_text, embedding)
+    return embedding
+
 
 def query_embedding(embedding_model, query_text: str):
     """Generate padded embedding for querying database"""
@@ -187,8 +366,8 @@ def query_embedding(embedding_model, query_text: str):
     return query_vec
 
 
-def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None):
-    """Return LlamaIndex embedding model to use for embeddings"""
+def create_embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None):
+    """Build a new embedding model for `config`; use `embedding_model` to get a shared one."""
 
     endpoint_type = config.embedding_endpoint_type
 
@@ -196,7 +375,6 @@ def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None
     from violet.settings import model_settings
 
     if endpoint_type == "openai":
-        from llama_index.embeddings.openai import OpenAIEmbedding
         from violet.services.provider_manager import ProviderManager
 
         # Check for database-stored API key first, fall back to model_settings
@@ -204,7 +382,7 @@ def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None
         api_key = override_key if override_key else model_settings.openai_api_key
 
         additional_kwargs = {"user_id": user_id} if user_id else {}
-        model = OpenAIEmbedding(
+        model = OpenAIEmbeddings(
             api_base=config.embedding_endpoint,
             api_key=api_key,
             additional_kwargs=additional_kwargs,
@@ -229,3 +407,56 @@ def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None
 
     else:
         raise ValueError(f"Unknown endpoint type {endpoint_type}")
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide embedding models, one per embedding config (and user).
+
+    Building a model can load a local model, look up the OpenAI key in the database and
+    open a connection pool, so models are built once and reused until `invalidate` is
+    called for their config, e.g. when the configured model or a provider key changes.
+    Invalidated models may still be in use by other threads, their pool is closed when
+    the last reference goes away.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, Optional[str]], BatchedEmbeddings] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _config_key(config: EmbeddingConfig) -> str:
+        return config.model_dump_json()
+
+    def get(self, config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None) -> BatchedEmbeddings:
+        key = (self._config_key(config), str(user_id) if user_id else None)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = create_embedding_model(config, user_id)
+                self._models[key] = model
+        return model
+
+    def invalidate(self, config: Optional[EmbeddingConfig] = None) -> None:
+        """Drop the models of `config`, or every model when no config is given; in-flight requests keep theirs."""
+        with self._lock:
+            if config is None:
+                keys = list(self._models)
+            else:
+                config_key = self._config_key(config)
+                keys = [key for key in self._models if key[0] == config_key]
+            models = [self._models.pop(key) for key in keys]
+        for model in models:
+            model.close_when_released()
+
+
+# singleton
+embedding_model_registry = EmbeddingModelRegistry()
+
+
+def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None):
+    """Return the shared embedding model to use for `config`"""
+    return embedding_model_registry.get(config, user_id)
@@ -55,6 +55,11 @@ def uninstall_model(llm_config: LLMConfig):
 
 
 def uninstall_embedding_model(embedding_config: EmbeddingConfig):
+    from violet.llm_api.embeddings import embedding_model_registry
+
+    # shared embedding models of this config would keep using the unloaded model
+    embedding_model_registry.invalidate(embedding_config)
+
     embedding_endpoint_type = embedding_config.embedding_endpoint_type
 
     if embedding_endpoint_type == 'llama':
@@ -1,9 +1,13 @@
 from violet.orm.agent import Agent
+from violet.orm.agents_messages import AgentsMessages
 from violet.orm.agents_tags import AgentsTags
 from violet.orm.base import Base
 from violet.orm.block import Block
 from violet.orm.blocks_agents import BlocksAgents
 from violet.orm.file import FileMetadata
+from violet.orm.memory_archive import MemoryArchiveItem
+from violet.orm.memory_stats import MemoryStats
+from violet.orm.memory_tree_path import MemoryTreePath
 from violet.orm.message import Message
 from violet.orm.organization import Organization
 from violet.orm.provider import Provider
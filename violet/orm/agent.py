@@ -4,8 +4,10 @@ from typing import TYPE_CHECKING, List, Optional
 from sqlalchemy import JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from violet.orm.agents_messages import AgentsMessages
 from violet.orm.block import Block
 from violet.orm.custom_columns import EmbeddingConfigColumn, LLMConfigColumn, ToolRulesColumn
+from violet.orm.enums import AgentLoadProfile
 from violet.orm.message import Message
 from violet.orm.mixins import OrganizationMixin
 from violet.orm.organization import Organization
@@ -49,11 +51,11 @@ class Agent(SqlalchemyBase, OrganizationMixin):
     topic: Mapped[Optional[str]] = mapped_column(
         String, nullable=True, doc="The current topic between the agent and the user.")
 
-    # In context memory
-    # TODO: This should be a separate mapping table
-    # This is dangerously flexible with the JSON type
-    message_ids: Mapped[Optional[List[str]]] = mapped_column(
-        JSON, nullable=True, doc="List of message IDs in in-context memory.")
+    # Deprecated: the in-context window moved to agents_messages (see in_context_messages). The column
+    # is no longer read or written and is only kept so the previous release still finds it, it is
+    # dropped by a later migration.
+    legacy_message_ids: Mapped[Optional[List[str]]] = mapped_column(
+        "message_ids", JSON, nullable=True, deferred=True, doc="Deprecated, see in_context_messages.")
 
     # Metadata and configs
     metadata_: Mapped[Optional[dict]] = mapped_column(
@@ -70,23 +72,25 @@ class Agent(SqlalchemyBase, OrganizationMixin):
         ToolRulesColumn, doc="the tool rules for this agent.")
 
     # relationships
+    # all of them load lazily, callers ask for what they need through AgentLoadProfile
     organization: Mapped["Organization"] = relationship(
         "Organization", back_populates="agents")
     tool_exec_environment_variables: Mapped[List["AgentEnvironmentVariable"]] = relationship(
         "AgentEnvironmentVariable",
         back_populates="agent",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
         doc="Environment variables associated with this agent.",
     )
     tools: Mapped[List["Tool"]] = relationship(
-        "Tool", secondary="tools_agents", lazy="selectin", passive_deletes=True)
+        "Tool", secondary="tools_agents", lazy="select", passive_deletes=True)
     core_memory: Mapped[List["Block"]] = relationship(
-        "Block", secondary="blocks_agents", lazy="selectin")
+        "Block", secondary="blocks_agents", lazy="select")
     messages: Mapped[List["Message"]] = relationship(
         "Message",
         back_populates="agent",
-        lazy="selectin",
+        # Never loaded with the agent, in-context messages are fetched by id (see message_ids)
+        lazy="select",
         # Ensure messages are deleted when the agent is deleted
         cascade="all, delete-orphan",
         passive_deletes=True,
@@ -95,20 +99,35 @@ class Agent(SqlalchemyBase, OrganizationMixin):
         "AgentsTags",
         back_populates="agent",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
         doc="Tags associated with the agent.",
     )
+    # In context memory, written with bulk statements by the AgentManager
+    in_context_messages: Mapped[List["AgentsMessages"]] = relationship(
+        "AgentsMessages",
+        order_by="AgentsMessages.position",
+        lazy="select",
+        passive_deletes=True,
+        viewonly=True,
+        doc="The in-context window of the agent, ordered by position.",
+    )
+
+    @property
+    def message_ids(self) -> List[str]:
+        """The ids of the in-context messages, oldest first."""
+        return [m.message_id for m in self.in_context_messages]
 
-    def to_pydantic(self) -> PydanticAgentState:
-        """converts to the basic pydantic model counterpart"""
+    def to_pydantic(self, profile: AgentLoadProfile = AgentLoadProfile.full) -> PydanticAgentState:
+        """converts to the basic pydantic model counterpart, the lightweight profile leaves the relationships empty"""
+        full = profile == AgentLoadProfile.full
         state = {
             "id": self.id,
             "organization_id": self.organization_id,
             "name": self.name,
             "description": self.description,
             "message_ids": self.message_ids,
-            "tools": self.tools,
-            "tags": [t.tag for t in self.tags],
+            "tools": self.tools if full else [],
+            "tags": [t.tag for t in self.tags] if full else [],
             "tool_rules": self.tool_rules,
             "system": self.system,
             "topic": self.topic,
@@ -116,11 +135,11 @@ class Agent(SqlalchemyBase, OrganizationMixin):
             "llm_config": self.llm_config,
             "embedding_config": self.embedding_config,
             "metadata_": self.metadata_,
-            "memory": Memory(blocks=[b.to_pydantic() for b in self.core_memory]),
+            "memory": Memory(blocks=[b.to_pydantic() for b in self.core_memory] if full else []),
             "created_by_id": self.created_by_id,
             "last_updated_by_id": self.last_updated_by_id,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
-            "tool_exec_environment_variables": self.tool_exec_environment_variables,
+            "tool_exec_environment_variables": self.tool_exec_environment_variables if full else [],
         }
         return self.__pydantic_model__(**state)
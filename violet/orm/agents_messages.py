@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from violet.orm.base import Base
+
+
+class AgentsMessages(Base):
+    """
+    In-context window of an agent: the messages sent to the LLM, ordered by position.
+
+    Positions only need to be increasing, not contiguous: appends take the next position,
+    trims delete rows and prepends use the gap a trim leaves after the system message.
+    """
+
+    __tablename__ = "agents_messages"
+
+    agent_id: Mapped[str] = mapped_column(
+        String, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
+    position: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, doc="Order of the message in the in-context window.")
+    message_id: Mapped[str] = mapped_column(
+        String, nullable=False, doc="The in-context message.")
@@ -19,3 +19,10 @@ class ToolSourceType(str, Enum):
 
     python = "python"
     json = "json"
+
+
+class AgentLoadProfile(str, Enum):
+    """Which relationships are loaded with an agent"""
+
+    lightweight = "lightweight"  # the agent row only: configs, system prompt and in-context message ids
+    full = "full"  # the row with its tools, memory blocks, tags and environment variables
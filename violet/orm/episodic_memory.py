@@ -6,7 +6,7 @@ from sqlalchemy import Column, DateTime, String, JSON, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, declared_attr, relationship
 
 from violet.orm.sqlalchemy_base import SqlalchemyBase
-from violet.orm.mixins import OrganizationMixin
+from violet.orm.mixins import EmbeddingPendingMixin, MemoryAccessMixin, OrganizationMixin
 
 from violet.schemas.episodic_memory import EpisodicEvent as PydanticEpisodicEvent
 
@@ -18,7 +18,7 @@ if TYPE_CHECKING:
     from violet.orm.organization import Organization
 
 
-class EpisodicEvent(SqlalchemyBase, OrganizationMixin):
+class EpisodicEvent(SqlalchemyBase, OrganizationMixin, EmbeddingPendingMixin, MemoryAccessMixin):
     """
     Represents an event in the 'episodic memory' system, capturing
     timestamped interactions or observations with a short summary
@@ -108,7 +108,7 @@ class EpisodicEvent(SqlalchemyBase, OrganizationMixin):
 
     # Full-text search indexes - handled by migration script
     # PostgreSQL: GIN indexes on tsvector expressions
-    # SQLite: FTS5 virtual table with triggers
+    # SQLite: FTS5 virtual table with triggers (services/memory_fts.py)
     __table_args__ = tuple(
         filter(None, [
             # PostgreSQL full-text search indexes
@@ -138,6 +138,11 @@ class EpisodicEvent(SqlalchemyBase, OrganizationMixin):
                   'summary') if not settings.violet_pg_uri_no_default else None,
             Index('ix_episodic_memory_details_sqlite',
                   'details') if not settings.violet_pg_uri_no_default else None,
+
+            # Timeline indexes, keyset pages and time ranges are ordered by (occurred_at, id)
+            Index('ix_episodic_memory_organization_occurred_at',
+                  'organization_id', 'occurred_at', 'id'),
+            Index('ix_episodic_memory_occurred_at', 'occurred_at', 'id'),
         ])
     )
 
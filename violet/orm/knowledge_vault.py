@@ -6,7 +6,7 @@ from sqlalchemy import Column, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, declared_attr, relationship
 
 from violet.orm.sqlalchemy_base import SqlalchemyBase
-from violet.orm.mixins import OrganizationMixin
+from violet.orm.mixins import EmbeddingPendingMixin, OrganizationMixin
 from violet.schemas.knowledge_vault import KnowledgeVaultItem as PydanticKnowledgeVaultItem
 
 from violet.orm.custom_columns import CommonVector, EmbeddingConfigColumn
@@ -17,7 +17,7 @@ if TYPE_CHECKING:
     from violet.orm.organization import Organization
 
 
-class KnowledgeVaultItem(SqlalchemyBase, OrganizationMixin):
+class KnowledgeVaultItem(SqlalchemyBase, OrganizationMixin, EmbeddingPendingMixin):
     """
     Stores verbatim knowledge vault entries like credentials, bookmarks, addresses,
     or other structured data that needs quick retrieval.
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Integer, LargeBinary, String, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from violet.orm.base import Base
+from violet.settings import settings
+
+
+class MemoryArchiveItem(Base):
+    """
+    Cold tier of the episodic, semantic and resource memory tables.
+
+    A memory row moved out of its hot table by the tiering job, see services/memory_tiering.py.
+    The full row is kept as a compressed payload; only the columns needed to find it again are
+    stored in the clear and indexed, so the archive can be searched without touching the hot tables.
+    """
+
+    __tablename__ = "memory_archive"
+
+    table_name: Mapped[str] = mapped_column(String, primary_key=True, doc="Name of the hot memory table.")
+    id: Mapped[str] = mapped_column(String, primary_key=True, doc="Id of the archived memory item.")
+    organization_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, doc="Organization of the item.")
+    occurred_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, doc="When the event occurred, or when the item was created.")
+    access_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, doc="Retrievals while hot.")
+    last_accessed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, doc="Last retrieval while hot.")
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, doc="When the item was moved to the archive.")
+    search_text: Mapped[str] = mapped_column(
+        Text, nullable=False, default="", doc="Lower-cased text fields of the item, matched by archive searches.")
+    payload: Mapped[bytes] = mapped_column(
+        LargeBinary, nullable=False, doc="zlib compressed column values of the item, embeddings included.")
+
+    # Keyword searches: a GIN index on PostgreSQL, an FTS5 table on SQLite (database/migrations.py)
+    __table_args__ = tuple(
+        filter(None, [
+            Index("ix_memory_archive_organization_occurred_at", "table_name", "organization_id", "occurred_at"),
+            Index("ix_memory_archive_occurred_at", "table_name", "occurred_at"),
+            Index(
+                "ix_memory_archive_search_text",
+                text("to_tsvector('simple', search_text)"),
+                postgresql_using="gin",
+            ) if settings.violet_pg_uri_no_default else None,
+        ])
+    )
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from violet.orm.base import Base
+
+
+class MemoryStats(Base):
+    """Maintained row count of a memory table, adjusted after every committed insert and delete."""
+
+    __tablename__ = "memory_stats"
+
+    table_name: Mapped[str] = mapped_column(String, primary_key=True, doc="Name of the memory table.")
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, doc="Number of rows in the table.")
+    reconciled_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, doc="When the count was last recomputed with COUNT(*).")
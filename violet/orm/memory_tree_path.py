@@ -0,0 +1,22 @@
+from sqlalchemy import Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from violet.orm.base import Base
+
+
+class MemoryTreePath(Base):
+    """
+    One row per memory item and prefix of its `tree_path`, so a subtree is an index lookup.
+
+    Maintained in the transaction of every insert, update and delete of the memory tables,
+    see services/memory_tree_paths.py.
+    """
+
+    __tablename__ = "memory_tree_paths"
+
+    table_name: Mapped[str] = mapped_column(String, primary_key=True, doc="Name of the memory table.")
+    path: Mapped[str] = mapped_column(String, primary_key=True, doc="Normalized tree path prefix.")
+    item_id: Mapped[str] = mapped_column(String, primary_key=True, doc="Id of the memory item under the prefix.")
+    depth: Mapped[int] = mapped_column(Integer, nullable=False, doc="Number of segments of the prefix.")
+
+    __table_args__ = (Index("ix_memory_tree_paths_item", "table_name", "item_id"),)
@@ -58,9 +58,9 @@ class Message(SqlalchemyBase, OrganizationMixin, AgentMixin):
     agent: Mapped["Agent"] = relationship(
         "Agent", back_populates="messages", lazy="selectin")
     organization: Mapped["Organization"] = relationship(
-        "Organization", back_populates="messages", lazy="selectin")
+        "Organization", back_populates="messages", lazy="select")
     step: Mapped["Step"] = relationship(
-        "Step", back_populates="messages", lazy="selectin")
+        "Step", back_populates="messages", lazy="select")
 
     def to_pydantic(self) -> PydanticMessage:
         """Custom pydantic conversion to handle data using legacy text field"""
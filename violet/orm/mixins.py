@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from violet.orm.base import Base
@@ -25,6 +26,33 @@ class OrganizationMixin(Base):
         String, ForeignKey("organizations.id"), nullable=True)
 
 
+class EmbeddingPendingMixin(Base):
+    """Mixin for memory items whose embeddings may be computed in the background."""
+
+    __abstract__ = True
+
+    embedding_pending: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=text("FALSE"), index=True,
+        doc="Set while the embeddings of the item wait for the background backfill")
+
+    def __init__(self, **kwargs):
+        # rows built from partial selects are not pending unless stated otherwise
+        kwargs.setdefault("embedding_pending", False)
+        super().__init__(**kwargs)
+
+
+class MemoryAccessMixin(Base):
+    """Mixin for memory items whose retrievals are counted by the hot/cold tiering."""
+
+    __abstract__ = True
+
+    access_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0"),
+        doc="Number of times the item was returned by a memory retrieval")
+    last_accessed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, doc="When the item was last returned by a memory retrieval")
+
+
 class UserMixin(Base):
     """Mixin for models that belong to a user."""
 
@@ -6,7 +6,7 @@ from sqlalchemy import Column, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, declared_attr, relationship
 
 from violet.orm.sqlalchemy_base import SqlalchemyBase
-from violet.orm.mixins import OrganizationMixin
+from violet.orm.mixins import EmbeddingPendingMixin, OrganizationMixin
 
 from violet.schemas.procedural_memory import ProceduralMemoryItem as PydanticProceduralMemoryItem
 from violet.orm.custom_columns import CommonVector, EmbeddingConfigColumn
@@ -17,7 +17,7 @@ if TYPE_CHECKING:
     from violet.orm.organization import Organization
 
 
-class ProceduralMemoryItem(SqlalchemyBase, OrganizationMixin):
+class ProceduralMemoryItem(SqlalchemyBase, OrganizationMixin, EmbeddingPendingMixin):
     """
     Stores procedural memory entries, such as workflows, step-by-step guides, or how-to knowledge.
 
@@ -6,7 +6,7 @@ from sqlalchemy import Column, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, declared_attr, relationship
 
 from violet.orm.sqlalchemy_base import SqlalchemyBase
-from violet.orm.mixins import OrganizationMixin
+from violet.orm.mixins import EmbeddingPendingMixin, MemoryAccessMixin, OrganizationMixin
 
 from violet.schemas.resource_memory import ResourceMemoryItem as PydanticResourceMemoryItem
 from violet.orm.custom_columns import CommonVector, EmbeddingConfigColumn
@@ -17,7 +17,7 @@ if TYPE_CHECKING:
     from violet.orm.organization import Organization
 
 
-class ResourceMemoryItem(SqlalchemyBase, OrganizationMixin):
+class ResourceMemoryItem(SqlalchemyBase, OrganizationMixin, EmbeddingPendingMixin, MemoryAccessMixin):
     """
     Stores references to user's documents, files, or resources for easy retrieval & linking to tasks.
 
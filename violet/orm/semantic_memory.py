@@ -2,7 +2,7 @@ from typing import TYPE_CHECKING, Optional
 from sqlalchemy import Column, JSON, String, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, declared_attr, relationship
 from violet.orm.sqlalchemy_base import SqlalchemyBase
-from violet.orm.mixins import OrganizationMixin
+from violet.orm.mixins import EmbeddingPendingMixin, MemoryAccessMixin, OrganizationMixin
 from violet.schemas.semantic_memory import SemanticMemoryItem as PydanticSemanticMemoryItem
 from datetime import datetime
 import datetime as dt
@@ -14,7 +14,7 @@ if TYPE_CHECKING:
     from violet.orm.organization import Organization
 
 
-class SemanticMemoryItem(SqlalchemyBase, OrganizationMixin):
+class SemanticMemoryItem(SqlalchemyBase, OrganizationMixin, EmbeddingPendingMixin, MemoryAccessMixin):
     """
     Stores semantic memory entries that represent general knowledge,
     concepts, facts, and language elements that can be accessed without 
@@ -194,6 +194,7 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
         access_type: AccessType = AccessType.ORGANIZATION,
         join_model: Optional[Base] = None,
         join_conditions: Optional[Union[Tuple, List]] = None,
+        load_options: Optional[List] = None,
         **kwargs,
     ) -> List["SqlalchemyBase"]:
         """
@@ -211,6 +212,7 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
             ascending: Sort direction
             tags: List of tags to filter by
             match_all_tags: If True, return items matching all tags. If False, match any tag.
+            load_options: Loader options (e.g. selectinload) applied to the query
             **kwargs: Additional filters to apply
         """
         if start_date and end_date and start_date > end_date:
@@ -339,6 +341,8 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
                     query = query.order_by(desc(cls.created_at), desc(cls.id))
 
             query = query.limit(limit)
+            if load_options:
+                query = query.options(*load_options)
 
             return list(session.execute(query).scalars())
 
@@ -352,6 +356,7 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
         actor: Optional["User"] = None,
         access: Optional[List[Literal["read", "write", "admin"]]] = ["read"],
         access_type: AccessType = AccessType.ORGANIZATION,
+        load_options: Optional[List] = None,
         **kwargs,
     ) -> "SqlalchemyBase":
         """The primary accessor for an ORM record.
@@ -360,6 +365,7 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
             identifier: the identifier of the record to read, can be the id string or the UUID object for backwards compatibility
             actor: if specified, results will be scoped only to records the user is able to access
             access: if actor is specified, records will be filtered to the minimum permission level for the actor
+            load_options: loader options (e.g. selectinload) applied to the query
             kwargs: additional arguments to pass to the read, used for more complex objects
         Returns:
             The matching object
@@ -393,6 +399,8 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
         if hasattr(cls, "is_deleted"):
             query = query.where(cls.is_deleted == False)
             query_conditions.append("is_deleted=False")
+        if load_options:
+            query = query.options(*load_options)
         if found := db_session.execute(query).scalar():
             return found
 
@@ -427,6 +435,37 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
                     f"Unexpected error creating {self.__class__.__name__} with ID {self.id}: {e}")
                 raise
 
+    @classmethod
+    @handle_db_timeout
+    @transaction_retry(max_retries=5, base_delay=0.1, max_delay=3.0)
+    def batch_create(cls, items: List["SqlalchemyBase"], db_session: "Session", actor: Optional["User"] = None) -> List["SqlalchemyBase"]:
+        """Create `items` in one transaction: a single flush, a single commit and a single read back."""
+        logger.debug(f"Batch creating {len(items)} {cls.__name__} with actor={actor}")
+        if not items:
+            return []
+
+        if actor:
+            for item in items:
+                item._set_created_and_updated_by_fields(actor.id)
+
+        with db_session as session:
+            try:
+                session.add_all(items)
+                session.flush()
+                ids = [item.id for item in items]
+                session.commit()
+                # repopulate the expired items, server defaults included, with one query instead of a refresh each
+                session.execute(select(cls).where(cls.id.in_(ids))).scalars().all()
+                return items
+            except (DBAPIError, IntegrityError) as e:
+                session.rollback()
+                logger.error(f"Failed to batch create {cls.__name__}: {e}")
+                cls._handle_dbapi_error(e)
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Unexpected error batch creating {cls.__name__}: {e}")
+                raise
+
     @handle_db_timeout
     @retry_db_operation(max_retries=3, base_delay=0.1, max_delay=2.0)
     def delete(self, db_session: "Session", actor: Optional["User"] = None) -> "SqlalchemyBase":
@@ -1,4 +1,3 @@
-import base64
 import sqlite3
 from typing import Optional, Union
 
@@ -7,6 +6,7 @@ from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
 from violet.constants import MAX_EMBEDDING_DIM
+from violet.helpers.converters import decode_embedding, decode_legacy_embedding, is_encoded_embedding, serialize_vector
 
 
 def adapt_array(arr):
@@ -21,10 +21,8 @@ def adapt_array(arr):
     elif not isinstance(arr, np.ndarray):
         raise ValueError(f"Unsupported type: {type(arr)}")
 
-    # Convert to bytes and then base64 encode
-    bytes_data = arr.tobytes()
-    base64_data = base64.b64encode(bytes_data)
-    return sqlite3.Binary(base64_data)
+    # Stored at the native dimension in the versioned binary format, no base64
+    return sqlite3.Binary(serialize_vector(arr))
 
 
 def convert_array(text):
@@ -39,13 +37,13 @@ def convert_array(text):
         return text
 
     # Handle both bytes and sqlite3.Binary
-    binary_data = bytes(text) if isinstance(text, sqlite3.Binary) else text
+    binary_data = bytes(text)
 
     try:
-        # First decode base64
-        decoded_data = base64.b64decode(binary_data)
-        # Then convert to numpy array
-        return np.frombuffer(decoded_data, dtype=np.float32)
+        if is_encoded_embedding(binary_data):
+            return decode_embedding(binary_data)
+        # Values written before the versioned format are base64 float32
+        return decode_legacy_embedding(binary_data)
     except Exception:
         return None
 
@@ -67,14 +65,14 @@ def verify_embedding_dimension(embedding: np.ndarray, expected_dim: int = MAX_EM
 
 
 def validate_and_transform_embedding(
-    embedding: Union[bytes, sqlite3.Binary, list, np.ndarray], expected_dim: int = MAX_EMBEDDING_DIM, dtype: np.dtype = np.float32
+    embedding: Union[bytes, sqlite3.Binary, list, np.ndarray], expected_dim: Optional[int] = MAX_EMBEDDING_DIM, dtype: np.dtype = np.float32
 ) -> Optional[np.ndarray]:
     """
     Validates and transforms embeddings to ensure correct dimensionality.
 
     Args:
         embedding: Input embedding in various possible formats
-        expected_dim: Expected embedding dimension (default 4096)
+        expected_dim: Expected embedding dimension (default 4096), `None` accepts any dimension
         dtype: NumPy dtype for the embedding (default float32)
 
     Returns:
@@ -96,22 +94,28 @@ def validate_and_transform_embedding(
     else:
         raise ValueError(f"Unsupported embedding type: {type(embedding)}")
 
+    if vec is None:
+        raise ValueError("Could not decode embedding")
+
     # Validate dimension
-    if vec.shape[0] != expected_dim:
+    if expected_dim is not None and vec.shape[0] != expected_dim:
         raise ValueError(
             f"Invalid embedding dimension: got {vec.shape[0]}, expected {expected_dim}")
 
     return vec
 
 
-def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
+def cosine_distance(embedding1, embedding2, expected_dim=None):
     """
     Calculate cosine distance between two embeddings
 
+    Embeddings of different lengths are compared after zero-padding the shorter one,
+    so native-dimension vectors can be compared with padded ones.
+
     Args:
         embedding1: First embedding
         embedding2: Second embedding
-        expected_dim: Expected embedding dimension (default 4096)
+        expected_dim: Expected embedding dimension (default: any)
 
     Returns:
         float: Cosine distance
@@ -126,6 +130,11 @@ def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
     except ValueError:
         return 0.0
 
+    if vec1.shape[0] != vec2.shape[0]:
+        dim = max(vec1.shape[0], vec2.shape[0])
+        vec1 = np.pad(vec1, (0, dim - vec1.shape[0]), mode="constant")
+        vec2 = np.pad(vec2, (0, dim - vec2.shape[0]), mode="constant")
+
     similarity = np.dot(vec1, vec2) / \
         (np.linalg.norm(vec1) * np.linalg.norm(vec2))
     distance = float(1.0 - similarity)
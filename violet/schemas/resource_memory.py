@@ -2,11 +2,10 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 from pydantic import Field, field_validator
-from violet.constants import MAX_EMBEDDING_DIM
 
 from violet.schemas.violet_base import VioletBase
 from violet.schemas.embedding_config import EmbeddingConfig
-from violet.utils.utils import get_utc_time
+from violet.utils.utils import get_utc_time, pad_embedding
 
 
 class ResourceMemoryItemBase(VioletBase):
@@ -46,21 +45,16 @@ class ResourceMemoryItem(ResourceMemoryItemBase):
         None, description="The embedding of the summary")
     embedding_config: Optional[EmbeddingConfig] = Field(
         None, description="The embedding configuration used by the event")
+    embedding_pending: bool = Field(
+        False, description="Whether the embeddings are still being computed in the background")
     metadata_: Dict[str, Any] = Field(
         default_factory=dict, description="Arbitrary additional metadata (tags, creation date, etc.)")
 
     @field_validator("summary_embedding")
     @classmethod
     def pad_embeddings(cls, embedding: List[float]) -> List[float]:
-        """Pad embeddings to `MAX_EMBEDDING_SIZE`. This is necessary to ensure all stored embeddings are the same size."""
-        import numpy as np
-
-        if embedding and len(embedding) != MAX_EMBEDDING_DIM:
-            np_embedding = np.array(embedding)
-            padded_embedding = np.pad(
-                np_embedding, (0, MAX_EMBEDDING_DIM - np_embedding.shape[0]), mode="constant")
-            return padded_embedding.tolist()
-        return embedding
+        """Pad embeddings to `MAX_EMBEDDING_SIZE` for pgvector. SQLite keeps embeddings at their native dimension."""
+        return pad_embedding(embedding)
 
 
 class ResourceMemoryItemUpdate(VioletBase):
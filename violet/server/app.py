@@ -18,6 +18,7 @@ from violet.config import VioletConfig
 from violet.log import get_logger
 from violet.server.context import close, get_agent, get_server, get_tts_pipeline, setup
 from violet.server.server import SyncServer
+from violet.services.embedding_backfill import embedding_backfill
 from violet.utils.file import get_absolute_path
 from violet.voice.TTS_infer_pack.TTS import TTS
 from violet.voice.whisper.whisper import Whisper
@@ -301,6 +302,7 @@ async def health_check(agent: AgentWrapper = Depends(get_agent)):
     return {
         "status": "healthy",
         "agent_initialized": agent is not None,
+        "embedding_backlog": embedding_backfill.backlog(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -1043,7 +1045,7 @@ def _save_api_key_to_env_file(key_name: str, api_key: str):
 
 
 @app.get("/memory/episodic")
-async def get_episodic_memory(agent: AgentWrapper = Depends(get_agent)):
+async def get_episodic_memory(include_archive: bool = False, agent: AgentWrapper = Depends(get_agent)):
     """Get episodic memory (past events)"""
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
@@ -1057,6 +1059,7 @@ async def get_episodic_memory(agent: AgentWrapper = Depends(get_agent)):
         events = episodic_manager.list_episodic_memory(
             agent_state=agent.agent_states.episodic_memory_agent_state,
             limit=50,
+            include_archive=include_archive,
             timezone_str=agent.client.server.user_manager.get_user_by_id(
                 agent.client.user.id).timezone
         )
@@ -1081,8 +1084,48 @@ async def get_episodic_memory(agent: AgentWrapper = Depends(get_agent)):
         return []
 
 
+@app.get("/memory/episodic/timeline")
+async def get_episodic_timeline(
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        agent: AgentWrapper = Depends(get_agent)):
+    """Page through the episodic timeline, newest first; pass `next_cursor` back for the next page"""
+    if agent is None:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+
+    from violet.services.episodic_memory_manager import encode_timeline_cursor
+
+    episodic_manager = agent.client.server.episodic_memory_manager
+    try:
+        events = episodic_manager.list_episodic_memory_page(
+            agent_state=agent.agent_states.episodic_memory_agent_state,
+            cursor=cursor,
+            limit=limit,
+            start_time=start_time,
+            end_time=end_time,
+            timezone_str=agent.client.server.user_manager.get_user_by_id(
+                agent.client.user.id).timezone
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "items": [{
+            "id": event.id,
+            "timestamp": event.occurred_at.isoformat() if event.occurred_at else None,
+            "summary": event.summary,
+            "details": event.details,
+            "event_type": event.event_type,
+            "tree_path": event.tree_path if hasattr(event, 'tree_path') else [],
+        } for event in events],
+        "next_cursor": encode_timeline_cursor(events[-1]) if len(events) == limit else None,
+    }
+
+
 @app.get("/memory/semantic")
-async def get_semantic_memory(agent: AgentWrapper = Depends(get_agent)):
+async def get_semantic_memory(include_archive: bool = False, agent: AgentWrapper = Depends(get_agent)):
     """Get semantic memory (knowledge)"""
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
@@ -1097,6 +1140,7 @@ async def get_semantic_memory(agent: AgentWrapper = Depends(get_agent)):
             semantic_items = semantic_manager.list_semantic_items(
                 agent_state=agent.agent_states.semantic_memory_agent_state,
                 limit=50,
+                include_archive=include_archive,
                 timezone_str=agent.client.server.user_manager.get_user_by_id(
                     agent.client.user.id).timezone
             )
@@ -1176,7 +1220,7 @@ async def get_procedural_memory(agent: AgentWrapper = Depends(get_agent)):
 
 
 @app.get("/memory/resources")
-async def get_resource_memory(agent: AgentWrapper = Depends(get_agent)):
+async def get_resource_memory(include_archive: bool = False, agent: AgentWrapper = Depends(get_agent)):
     """Get resource memory (docs and files)"""
     if agent is None:
         raise HTTPException(status_code=500, detail="Agent not initialized")
@@ -1189,6 +1233,7 @@ async def get_resource_memory(agent: AgentWrapper = Depends(get_agent)):
         resources = resource_manager.list_resources(
             agent_state=agent.agent_states.resource_memory_agent_state,
             limit=50,
+            include_archive=include_archive,
             timezone_str=agent.client.server.user_manager.get_user_by_id(
                 agent.client.user.id).timezone
         )
@@ -82,6 +82,48 @@ def setup_whisper():
             **{"module": "whisper", "status": "successful"})
 
 
+def setup_embedding_backfill():
+    """
+    Start the embedding backfill worker, it also embeds the rows left pending by a previous run.
+    """
+    from violet.services.embedding_backfill import embedding_backfill
+
+    embedding_backfill.start()
+
+    log_telemetry(
+        logger=logger,
+        event="initialize",
+        **{"module": "embedding backfill", "status": "successful"})
+
+
+def setup_memory_stats():
+    """
+    Start the periodic reconciliation of the maintained memory counts.
+    """
+    from violet.services.memory_stats import memory_stats
+
+    memory_stats.start()
+
+    log_telemetry(
+        logger=logger,
+        event="initialize",
+        **{"module": "memory stats", "status": "successful"})
+
+
+def setup_memory_tiering():
+    """
+    Start counting memory retrievals and the periodic hot/cold tiering.
+    """
+    from violet.services.memory_tiering import memory_tiering
+
+    memory_tiering.start()
+
+    log_telemetry(
+        logger=logger,
+        event="initialize",
+        **{"module": "memory tiering", "status": "successful"})
+
+
 def setup():
     """
     Unify setup system context method
@@ -90,6 +132,9 @@ def setup():
     setup_model()
     setup_tts()
     setup_whisper()
+    setup_embedding_backfill()
+    setup_memory_stats()
+    setup_memory_tiering()
 
 
 def get_agent():
@@ -148,6 +193,9 @@ def get_transcription_engine():
 
 def close():
     close_model()
+    close_embedding_backfill()
+    close_memory_stats()
+    close_memory_tiering()
     close_embedding_model()
     close_tts_pipeline()
     close_whisper_handler()
@@ -165,6 +213,39 @@ def close_model():
         **{"module": "model", "status": "successful"})
 
 
+def close_embedding_backfill():
+    from violet.services.embedding_backfill import embedding_backfill
+
+    embedding_backfill.stop(timeout=5)
+
+    log_telemetry(
+        logger=logger,
+        event="close",
+        **{"module": "embedding backfill", "status": "successful"})
+
+
+def close_memory_stats():
+    from violet.services.memory_stats import memory_stats
+
+    memory_stats.stop(timeout=5)
+
+    log_telemetry(
+        logger=logger,
+        event="close",
+        **{"module": "memory stats", "status": "successful"})
+
+
+def close_memory_tiering():
+    from violet.services.memory_tiering import memory_tiering
+
+    memory_tiering.stop(timeout=5)
+
+    log_telemetry(
+        logger=logger,
+        event="close",
+        **{"module": "memory tiering", "status": "successful"})
+
+
 def close_embedding_model():
     from violet.local_llm import uninstall_embedding_model
 
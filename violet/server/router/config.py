@@ -66,6 +66,11 @@ async def update_embedding_config(embedding_config: EmbeddingConfig):
             sort_keys=True
         )
 
+    if previous_emb_config != embedding_config:
+        from violet.llm_api.embeddings import embedding_model_registry
+
+        embedding_model_registry.invalidate(previous_emb_config)
+
     if previous_emb_config.embedding_model != embedding_config.embedding_model:
         from violet.local_llm import uninstall_embedding_model, load_embedding_model
 
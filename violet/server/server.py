@@ -7,7 +7,7 @@ from sqlalchemy import create_engine
 from rich.text import Text
 from rich.panel import Panel
 from rich.console import Console
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 import asyncio
 import os
 import traceback
@@ -22,6 +22,9 @@ from fastapi.responses import StreamingResponse
 import violet.constants as constants
 import violet.system as system
 from violet.agent import Agent, save_agent
+from violet.database.migrations import run_migrations
+from violet.database.unit_of_work import current_unit_of_work, unit_of_work
+from violet.database.pgvector_indexes import ensure_vector_indexes
 
 # TODO use custom interface
 from violet.interface import AgentInterface  # abstract
@@ -29,6 +32,7 @@ from violet.interface import CLIInterface  # for printing to terminal
 from violet.log import get_logger
 from violet.agent import EpisodicMemoryAgent, ProceduralMemoryAgent, ResourceMemoryAgent, KnowledgeVaultAgent, MetaMemoryAgent, SemanticMemoryAgent, CoreMemoryAgent, ReflexionAgent, BackgroundAgent
 from violet.orm import Base
+from violet.orm.enums import AgentLoadProfile
 from violet.orm.errors import NoResultFound
 from violet.schemas.agent import AgentState, AgentType, CreateAgent
 from violet.schemas.block import BlockUpdate
@@ -53,6 +57,7 @@ from violet.schemas.source import Source
 from violet.schemas.tool import Tool
 from violet.schemas.usage import VioletUsageStatistics
 from violet.schemas.user import User
+from violet.services.agent_cache import agent_cache, agent_versions
 from violet.services.agent_manager import AgentManager
 from violet.services.block_manager import BlockManager
 from violet.services.message_manager import MessageManager
@@ -281,6 +286,8 @@ if not USE_PGLITE and settings.violet_pg_uri_no_default:
 
     # Create all tables for PostgreSQL
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    ensure_vector_indexes(engine)
 elif not USE_PGLITE:
     # TODO: don't rely on config storage
     sqlite_db_path = os.path.join(config.recall_storage_path, "sqlite.db")
@@ -327,6 +334,7 @@ elif not USE_PGLITE:
     engine.connect = wrapped_connect
 
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
 if not USE_PGLITE:
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -334,7 +342,9 @@ if not USE_PGLITE:
 
 # Dependency
 def get_db():
-    db = SessionLocal()
+    # inside a step's unit of work, every session joins its transaction
+    current = current_unit_of_work()
+    db = current.session() if current is not None else SessionLocal()
     try:
         yield db
     finally:
@@ -344,6 +354,13 @@ def get_db():
 db_context = contextmanager(get_db)
 
 
+def step_unit_of_work():
+    """One transaction for the writes of an agent inner step, see database/unit_of_work.py."""
+    if USE_PGLITE or not settings.agent_step_unit_of_work:
+        return nullcontext()
+    return unit_of_work(engine)
+
+
 class SyncServer(Server):
     """Simple single-threaded / blocking server process"""
 
@@ -451,13 +468,26 @@ class SyncServer(Server):
             )
 
     def load_agent(self, agent_id: str, actor: User, interface: Union[AgentInterface, None] = None) -> Agent:
-        """Updated method to load agents from persisted storage"""
+        """
+        Updated method to load agents from persisted storage
+
+        A warm Agent checked in by a previous step is reused while the persisted state of the
+        agent, its tools and its blocks is unchanged, see `AgentCache`.
+        """
         agent_lock = self.per_agent_lock_manager.get_lock(agent_id)
         with agent_lock:
+            interface = interface or self.default_interface_factory()
+            agent = agent_cache.checkout(agent_id, actor.id)
+            if agent is not None:
+                agent.interface = interface
+                agent.user = actor
+                return agent
+
+            # read before the state, a write while loading makes the Agent stale
+            version = agent_versions.get(agent_id)
             agent_state = self.agent_manager.get_agent_by_id(
                 agent_id=agent_id, actor=actor)
 
-            interface = interface or self.default_interface_factory()
             if agent_state.agent_type == AgentType.chat_agent:
                 agent = Agent(agent_state=agent_state,
                               interface=interface, user=actor)
@@ -492,6 +522,7 @@ class SyncServer(Server):
                 raise ValueError(
                     f"Invalid agent type {agent_state.agent_type}")
 
+            agent_cache.lease(agent, version)
             return agent
 
     def _step(
@@ -548,6 +579,8 @@ class SyncServer(Server):
                 extra_messages=extra_messages,
                 message_queue=message_queue,
             )
+            # only an Agent that completed its step is reused
+            agent_cache.checkin(violet_agent)
 
         except Exception as e:
             logger.error(f"Error in server._step: {e}")
@@ -687,8 +720,9 @@ class SyncServer(Server):
             raise ValueError(f"User user_id={user_id} does not exist")
 
         try:
+            # existence check only, the step loads the full agent
             agent = self.agent_manager.get_agent_by_id(
-                agent_id=agent_id, actor=actor)
+                agent_id=agent_id, actor=actor, profile=AgentLoadProfile.lightweight)
         except NoResultFound:
             raise ValueError(f"Agent agent_id={agent_id} does not exist")
 
@@ -741,8 +775,9 @@ class SyncServer(Server):
             raise ValueError(f"User user_id={user_id} does not exist")
 
         try:
+            # existence check only, the step loads the full agent
             agent = self.agent_manager.get_agent_by_id(
-                agent_id=agent_id, actor=actor)
+                agent_id=agent_id, actor=actor, profile=AgentLoadProfile.lightweight)
         except NoResultFound:
             raise ValueError(f"Agent agent_id={agent_id} does not exist")
 
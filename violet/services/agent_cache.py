@@ -0,0 +1,142 @@
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+
+from violet.database.unit_of_work import after_unit_of_work
+from violet.orm.agent import Agent as AgentModel
+from violet.orm.block import Block as BlockModel
+from violet.orm.sandbox_config import AgentEnvironmentVariable
+from violet.orm.tool import Tool as ToolModel
+from violet.settings import settings
+
+if TYPE_CHECKING:
+    from violet.agent import Agent
+
+# agent columns and relationships the Agent object keeps in sync itself while it steps, or
+# always re-reads from the database; writing them does not make a loaded Agent stale
+AGENT_FIELDS_OWNED_BY_STEP = {"in_context_messages", "messages", "topic", "updated_at", "_last_updated_by_id"}
+
+
+class AgentVersions:
+    """
+    Process-wide write counters of the persisted agent state.
+
+    The counter of an agent moves with every write to its row, tools, environment variables
+    or configuration, and the shared counter with every write to a tool or memory block,
+    which may be attached to any agent. An Agent object built at one version is stale as
+    soon as either counter moves.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._shared = 0
+        self._lock = threading.Lock()
+
+    def get(self, agent_id: str) -> Tuple[int, int]:
+        return self._versions[agent_id], self._shared
+
+    def bump(self, agent_id: str) -> None:
+        with self._lock:
+            self._versions[agent_id] += 1
+        # and again when a step's unit of work ends, an Agent built meanwhile saw the state before the commit
+        after_unit_of_work(self.bump, agent_id)
+
+    def bump_all(self) -> None:
+        with self._lock:
+            self._shared += 1
+        after_unit_of_work(self.bump_all)
+
+
+def _after_agent_update(mapper, connection, target) -> None:
+    state = inspect(target)
+    if any(attr.history.has_changes() for attr in state.attrs if attr.key not in AGENT_FIELDS_OWNED_BY_STEP):
+        agent_versions.bump(target.id)
+
+
+def _after_agent_delete(mapper, connection, target) -> None:
+    agent_versions.bump(target.id)
+
+
+def _after_environment_variable_write(mapper, connection, target) -> None:
+    agent_versions.bump(target.agent_id)
+
+
+def _after_shared_write(mapper, connection, target) -> None:
+    agent_versions.bump_all()
+
+
+# mapper events fire on flush, a rolled back write only costs a rebuild
+event.listen(AgentModel, "after_update", _after_agent_update)
+event.listen(AgentModel, "after_delete", _after_agent_delete)
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(AgentEnvironmentVariable, _event_name, _after_environment_variable_write)
+for _event_name in ("after_update", "after_delete"):
+    event.listen(ToolModel, _event_name, _after_shared_write)
+    event.listen(BlockModel, _event_name, _after_shared_write)
+
+
+class AgentCache:
+    """
+    Bounded LRU of warm Agent objects for `SyncServer.load_agent`, keyed by agent id.
+
+    An Agent is checked out for the exclusive use of one step and checked back in when the
+    step succeeds, so concurrent steps of the same agent never share an object: a second
+    step finds the entry gone and builds its own Agent, as without the cache. An entry is
+    only handed out while the versions it was built at are current and to the same actor.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], str, Agent]]" = OrderedDict()
+        # Agent objects handed out -> the versions they were built at
+        self._leases: "weakref.WeakKeyDictionary[Agent, Tuple[int, int]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def checkout(self, agent_id: str, actor_id: str) -> Optional["Agent"]:
+        """Take the warm Agent of `agent_id` out of the cache, None if there is no current one."""
+        version = agent_versions.get(agent_id)
+        with self._lock:
+            entry = self._entries.pop(agent_id, None)
+            if entry is None or entry[0] != version or entry[1] != actor_id:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._leases[entry[2]] = version
+            return entry[2]
+
+    def lease(self, agent: "Agent", version: Tuple[int, int]) -> None:
+        """Record a freshly built Agent, `version` read before its state was loaded."""
+        with self._lock:
+            self._leases[agent] = version
+
+    def checkin(self, agent: "Agent") -> None:
+        """Return an Agent after a successful step, it is dropped if its state changed meanwhile."""
+        if self.max_size <= 0:
+            return
+        agent_id = agent.agent_state.id
+        with self._lock:
+            version = self._leases.pop(agent, None)
+            if version is None or version != agent_versions.get(agent_id):
+                return
+            self._entries[agent_id] = (version, agent.user.id, agent)
+            self._entries.move_to_end(agent_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, agent_id: Optional[str] = None) -> None:
+        """Drop the entry of `agent_id`, or every entry."""
+        with self._lock:
+            if agent_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(agent_id, None)
+
+
+# singletons
+agent_versions = AgentVersions()
+agent_cache = AgentCache(max_size=settings.agent_cache_max_size)
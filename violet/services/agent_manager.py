@@ -2,7 +2,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 import numpy as np
-from sqlalchemy import Select, func, literal, select, union_all
+from sqlalchemy import Select, delete, func, literal, select, union_all
+from sqlalchemy.orm import selectinload
 
 from violet.constants import (
     CORE_MEMORY_TOOLS, BASE_TOOLS, MAX_EMBEDDING_DIM,
@@ -14,7 +15,10 @@ from violet.log import get_logger
 from violet.orm import Agent as AgentModel
 from violet.orm import Block as BlockModel
 from violet.orm import Tool as ToolModel
+from violet.orm.agents_messages import AgentsMessages
+from violet.orm.enums import AgentLoadProfile
 from violet.orm.errors import NoResultFound
+from violet.orm.message import Message as MessageModel
 from violet.orm.sandbox_config import AgentEnvironmentVariable as AgentEnvironmentVariableModel
 from violet.orm.sqlite_functions import adapt_array
 from violet.schemas.agent import AgentState as PydanticAgentState
@@ -28,8 +32,13 @@ from violet.schemas.tool_rule import ToolRule as PydanticToolRule
 from violet.schemas.user import User as PydanticUser
 from violet.services.block_manager import BlockManager
 from violet.services.helpers.agent_manager_helper import (
+    _append_in_context_message_ids,
+    _prepend_in_context_message_ids,
     _process_relationship,
     _process_tags,
+    _replace_system_message_id,
+    _set_in_context_message_ids,
+    _trim_in_context_message_ids,
     check_supports_structured_output,
     compile_system_message,
     derive_system_message,
@@ -43,6 +52,15 @@ from violet.utils.utils import enforce_types, get_utc_time, united_diff
 
 logger = get_logger(__name__)
 
+# relationships of the full agent profile, loaded one query per relationship for all agents read
+FULL_AGENT_LOAD_OPTIONS = [
+    selectinload(AgentModel.tools),
+    selectinload(AgentModel.core_memory),
+    selectinload(AgentModel.tags),
+    selectinload(AgentModel.tool_exec_environment_variables),
+    selectinload(AgentModel.in_context_messages),
+]
+
 
 # Agent Manager Class
 class AgentManager:
@@ -363,11 +381,14 @@ class AgentManager:
 
             # Update scalar fields directly
             scalar_fields = {"name", "system", "topic", "llm_config", "embedding_config",
-                             "message_ids", "tool_rules", "description", "metadata_"}
+                             "tool_rules", "description", "metadata_"}
             for field in scalar_fields:
                 value = getattr(agent_update, field, None)
                 if value is not None:
                     setattr(agent, field, value)
+            if agent_update.message_ids is not None:
+                _set_in_context_message_ids(
+                    session, agent.id, agent_update.message_ids)
 
             # Update relationships using _process_relationship and _process_tags
             if agent_update.tool_ids is not None:
@@ -408,18 +429,38 @@ class AgentManager:
                 limit=limit,
                 organization_id=actor.organization_id if actor else None,
                 query_text=query_text,
+                load_options=FULL_AGENT_LOAD_OPTIONS,
                 **kwargs,
             )
 
             return [agent.to_pydantic() for agent in agents]
 
     @enforce_types
-    def get_agent_by_id(self, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
-        """Fetch an agent by its ID."""
+    def get_agent_by_id(
+        self, agent_id: str, actor: PydanticUser, profile: AgentLoadProfile = AgentLoadProfile.full
+    ) -> PydanticAgentState:
+        """Fetch an agent by its ID, the lightweight profile skips tools, memory blocks, tags and environment variables."""
         with self.session_maker() as session:
             agent = AgentModel.read(
-                db_session=session, identifier=agent_id, actor=actor)
-            return agent.to_pydantic()
+                db_session=session, identifier=agent_id, actor=actor,
+                load_options=FULL_AGENT_LOAD_OPTIONS if profile == AgentLoadProfile.full else None)
+            return agent.to_pydantic(profile=profile)
+
+    @enforce_types
+    def get_agent_message_ids(self, agent_id: str, actor: PydanticUser) -> List[str]:
+        """Fetch the in-context message ids of an agent, without loading the agent itself."""
+        with self.session_maker() as session:
+            query = AgentModel.apply_access_predicate(
+                select(AgentsMessages.message_id)
+                .select_from(AgentModel)
+                .outerjoin(AgentsMessages, AgentsMessages.agent_id == AgentModel.id)
+                .where(AgentModel.id == agent_id)
+                .order_by(AgentsMessages.position),
+                actor, ["read"])
+            rows = session.execute(query).scalars().all()
+            if not rows:
+                raise NoResultFound(f"Agent not found with id='{agent_id}'")
+            return [message_id for message_id in rows if message_id is not None]
 
     @enforce_types
     def get_agent_by_name(self, agent_name: str, actor: PydanticUser) -> PydanticAgentState:
@@ -510,28 +551,46 @@ class AgentManager:
     # ======================================================================================================================
     # In Context Messages Management
     # ======================================================================================================================
-    # TODO: There are several assumptions here that are not explicitly checked
-    # TODO: 1) These message ids are valid
-    # TODO: 2) These messages are ordered from oldest to newest
-    # TODO: This can be fixed by having an actual relationship in the ORM for message_ids
-    # TODO: This can also be made more efficient, instead of getting, setting, we can do it all in one db session for one query.
+    # The in-context window lives in the agents_messages table, ordered by position. Appends,
+    # trims and prepends write only the rows they change, see the helpers in agent_manager_helper.
+    # TODO: The message ids are not checked to be valid
     @enforce_types
     def get_in_context_messages(self, agent_id: str, actor: PydanticUser) -> List[PydanticMessage]:
-        message_ids = self.get_agent_by_id(
-            agent_id=agent_id, actor=actor).message_ids
-        return self.message_manager.get_messages_by_ids(message_ids=message_ids, actor=actor)
+        """Fetch the in-context messages of an agent in order, in one query."""
+        with self.session_maker() as session:
+            query = (
+                select(MessageModel)
+                .join(AgentsMessages, AgentsMessages.message_id == MessageModel.id)
+                .where(
+                    AgentsMessages.agent_id == agent_id,
+                    MessageModel.organization_id == actor.organization_id,
+                    MessageModel.is_deleted == False,
+                )
+                .order_by(AgentsMessages.position)
+            )
+            return [message.to_pydantic() for message in session.execute(query).scalars()]
+
+    def _update_in_context_messages(self, agent_id: str, actor: PydanticUser, write, *args) -> PydanticAgentState:
+        """Apply `write(session, agent_id, *args)` to the in-context window and return the agent."""
+        with self.session_maker() as session:
+            agent = AgentModel.read(
+                db_session=session, identifier=agent_id, actor=actor)
+            write(session, agent_id, *args)
+            session.commit()
+            return agent.to_pydantic()
 
     @enforce_types
     def get_system_message(self, agent_id: str, actor: PydanticUser) -> PydanticMessage:
-        message_ids = self.get_agent_by_id(
-            agent_id=agent_id, actor=actor).message_ids
+        message_ids = self.get_agent_message_ids(
+            agent_id=agent_id, actor=actor)
         return self.message_manager.get_message_by_id(message_id=message_ids[0], actor=actor)
 
     @enforce_types
     def rebuild_system_prompt(self, agent_id: str, system_prompt: str, actor: PydanticUser, force=False) -> PydanticAgentState:
         """Rebuld the system prompt, put the system_prompt at the first position in the list of messages."""
 
-        agent_state = self.get_agent_by_id(agent_id=agent_id, actor=actor)
+        agent_state = self.get_agent_by_id(
+            agent_id=agent_id, actor=actor, profile=AgentLoadProfile.lightweight)
         # Swap the system message out (only if there is a diff)
         message = PydanticMessage.dict_to_message(
             agent_id=agent_id,
@@ -539,9 +598,8 @@ class AgentManager:
             openai_message_dict={"role": "system", "content": system_prompt},
         )
         message = self.message_manager.create_message(message, actor=actor)
-        message_ids = [message.id] + \
-            agent_state.message_ids[1:]  # swap index 0 (system)
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
+        # swap index 0 (system)
+        return self._update_in_context_messages(agent_id, actor, _replace_system_message_id, message.id)
 
     @enforce_types
     def update_topic(self, agent_id: str, topic: str, actor: PydanticUser) -> PydanticAgentState:
@@ -549,48 +607,38 @@ class AgentManager:
 
     @enforce_types
     def set_in_context_messages(self, agent_id: str, message_ids: List[str], actor: PydanticUser) -> PydanticAgentState:
-        return self.update_agent(agent_id=agent_id, agent_update=UpdateAgent(message_ids=message_ids), actor=actor)
+        return self._update_in_context_messages(agent_id, actor, _set_in_context_message_ids, message_ids)
 
     @enforce_types
     def trim_older_in_context_messages(self, num: int, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
-        message_ids = self.get_agent_by_id(
-            agent_id=agent_id, actor=actor).message_ids
-        new_messages = [message_ids[0]] + \
-            message_ids[num:]  # 0 is system message
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=new_messages, actor=actor)
+        # 0 is system message
+        return self._update_in_context_messages(agent_id, actor, _trim_in_context_message_ids, num)
 
     @enforce_types
     def trim_all_in_context_messages_except_system(self, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
-        message_ids = self.get_agent_by_id(
-            agent_id=agent_id, actor=actor).message_ids
-        new_messages = [message_ids[0]]  # 0 is system message
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=new_messages, actor=actor)
+        # 0 is system message
+        return self._update_in_context_messages(agent_id, actor, _trim_in_context_message_ids)
 
     @enforce_types
     def prepend_to_in_context_messages(self, messages: List[PydanticMessage], agent_id: str, actor: PydanticUser) -> PydanticAgentState:
-        message_ids = self.get_agent_by_id(
-            agent_id=agent_id, actor=actor).message_ids
         new_messages = self.message_manager.create_many_messages(
             messages, actor=actor)
-        message_ids = [message_ids[0]] + \
-            [m.id for m in new_messages] + message_ids[1:]
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
+        return self._update_in_context_messages(
+            agent_id, actor, _prepend_in_context_message_ids, [m.id for m in new_messages])
 
     @enforce_types
     def append_to_in_context_messages(self, messages: List[PydanticMessage], agent_id: str, actor: PydanticUser) -> PydanticAgentState:
         messages = self.message_manager.create_many_messages(
             messages, actor=actor)
-        message_ids = self.get_agent_by_id(
-            agent_id=agent_id, actor=actor).message_ids or []
-        message_ids += [m.id for m in messages]
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
+        return self._update_in_context_messages(
+            agent_id, actor, _append_in_context_message_ids, [m.id for m in messages])
 
     @enforce_types
     def reset_messages(self, agent_id: str, actor: PydanticUser, add_default_initial_messages: bool = False) -> PydanticAgentState:
         """
         Removes all in-context messages for the specified agent by:
-          1) Clearing the agent.messages relationship (which cascades delete-orphans).
-          2) Resetting the message_ids list to empty.
+          1) Deleting the agent's messages in one statement, without loading them.
+          2) Emptying the in-context window.
           3) Committing the transaction.
 
         This action is destructive and cannot be undone once committed.
@@ -608,12 +656,13 @@ class AgentManager:
             agent = AgentModel.read(
                 db_session=session, identifier=agent_id, actor=actor)
 
-            # Because of cascade="all, delete-orphan" on agent.messages, setting
-            # this relationship to an empty list will physically remove them from the DB.
-            agent.messages = []
+            # agent.messages is never loaded, delete the rows directly rather than through the relationship
+            session.execute(delete(MessageModel).where(
+                MessageModel.agent_id == agent_id))
 
-            # Also clear out the message_ids field to keep in-context memory consistent
-            agent.message_ids = []
+            # Also clear out the in-context window to keep in-context memory consistent
+            session.execute(delete(AgentsMessages).where(
+                AgentsMessages.agent_id == agent_id))
 
             # Commit the update
             agent.update(db_session=session, actor=actor)
@@ -7,6 +7,7 @@ from violet.schemas.block import Block
 from violet.schemas.block import Block as PydanticBlock
 from violet.schemas.block import BlockUpdate, Human, Persona
 from violet.schemas.user import User as PydanticUser
+from violet.services.memory_retrieval_cache import memory_versions
 from violet.utils.utils import enforce_types, list_human_files, list_persona_files
 
 
@@ -32,6 +33,7 @@ class BlockManager:
                 block = BlockModel(
                     **data, organization_id=actor.organization_id)
                 block.create(session, actor=actor)
+                memory_versions.bump(BlockModel)
             return block.to_pydantic()
 
     @enforce_types
@@ -49,6 +51,7 @@ class BlockManager:
                 setattr(block, key, value)
 
             block.update(db_session=session, actor=actor)
+            memory_versions.bump(BlockModel)
             return block.to_pydantic()
 
     @enforce_types
@@ -57,6 +60,7 @@ class BlockManager:
         with self.session_maker() as session:
             block = BlockModel.read(db_session=session, identifier=block_id)
             block.hard_delete(db_session=session, actor=actor)
+            memory_versions.bump(BlockModel)
             return block.to_pydantic()
 
     @enforce_types
@@ -0,0 +1,335 @@
+import atexit
+import math
+import os
+import pickle
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from violet.log import get_logger
+from violet.settings import settings
+
+logger = get_logger(__name__)
+
+# same parameters as `rank_bm25.BM25Okapi`
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+BM25_INDEX_VERSION = 1
+
+
+class BM25Index:
+    """
+    Incrementally maintained inverted index that scores like `rank_bm25.BM25Okapi`.
+
+    Documents keep their insertion order, which is the order the corpus would have been
+    handed to `BM25Okapi`, so ties are broken the same way as the in-memory search.
+    Document frequencies, lengths and postings are updated per document, only the
+    average idf (which `BM25Okapi` uses to floor negative idfs) is recomputed lazily
+    after a change.
+    """
+
+    def __init__(self, text_fn: Callable, tokenizer: Callable[[str], List[str]], predicate: Optional[Callable] = None):
+        self.text_fn = text_fn
+        self.tokenizer = tokenizer
+        self.predicate = predicate
+        self.lock = threading.RLock()
+        self._doc_freqs: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._average_idf: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_freqs)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._doc_freqs
+
+    def add_tokens(self, item_id: str, tokens: List[str]) -> None:
+        """Insert or replace a document from its tokens. Documents without tokens are not indexed."""
+        with self.lock:
+            if not tokens:
+                self.remove(item_id)
+                return
+            if item_id in self._doc_freqs:
+                self._unlink(item_id)
+            frequencies = Counter(tokens)
+            # re-assigning an existing key keeps its position in the corpus order
+            self._doc_freqs[item_id] = frequencies
+            self._doc_lengths[item_id] = len(tokens)
+            self._total_length += len(tokens)
+            for term, count in frequencies.items():
+                self._postings.setdefault(term, {})[item_id] = count
+            self._average_idf = None
+
+    def upsert(self, item) -> None:
+        """Index an ORM item, or drop it when it no longer belongs to this corpus."""
+        if self.predicate is not None and not self.predicate(item):
+            self.remove(item.id)
+            return
+        self.add_tokens(item.id, self.tokenizer(self.text_fn(item)))
+
+    def _unlink(self, item_id: str) -> None:
+        for term in self._doc_freqs[item_id]:
+            postings = self._postings[term]
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths[item_id]
+
+    def remove(self, item_id: str) -> None:
+        with self.lock:
+            if item_id not in self._doc_freqs:
+                return
+            self._unlink(item_id)
+            del self._doc_freqs[item_id]
+            del self._doc_lengths[item_id]
+            self._average_idf = None
+
+    def _idf(self, term: str) -> float:
+        corpus_size = len(self._doc_freqs)
+        frequency = len(self._postings[term])
+        return math.log(corpus_size - frequency + 0.5) - math.log(frequency + 0.5)
+
+    def _calc_average_idf(self) -> float:
+        if self._average_idf is None:
+            idf_sum = sum(self._idf(term) for term in self._postings)
+            self._average_idf = idf_sum / len(self._postings) if self._postings else 0.0
+        return self._average_idf
+
+    def get_scores(self, query_tokens: List[str]) -> Dict[str, float]:
+        """BM25 scores of the documents containing at least one query token; all others score 0."""
+        with self.lock:
+            if not self._doc_freqs:
+                return {}
+            average_length = self._total_length / len(self._doc_freqs)
+            eps = BM25_EPSILON * self._calc_average_idf()
+
+            scores: Dict[str, float] = {}
+            for term in query_tokens:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = self._idf(term)
+                if idf < 0:
+                    idf = eps
+                for item_id, frequency in postings.items():
+                    doc_length = self._doc_lengths[item_id]
+                    scores[item_id] = scores.get(item_id, 0.0) + idf * (
+                        frequency * (BM25_K1 + 1)
+                        / (frequency + BM25_K1 * (1 - BM25_B + BM25_B * doc_length / average_length)))
+            return scores
+
+    def rank(self, query_tokens: List[str], limit: Optional[int] = None) -> List[str]:
+        """
+        Ids of the best `limit` documents, ordered exactly like sorting the `BM25Okapi`
+        scores of the whole corpus in descending order.
+        """
+        with self.lock:
+            if not query_tokens:
+                ids = list(self._doc_freqs)
+                return ids[:limit] if limit else ids
+
+            scores = self.get_scores(query_tokens)
+            position = {item_id: i for i, item_id in enumerate(self._doc_freqs)} if scores else {}
+            positive = sorted(
+                (item_id for item_id, score in scores.items() if score > 0),
+                key=lambda item_id: (-scores[item_id], position[item_id]))
+            if limit and len(positive) >= limit:
+                return positive[:limit]
+
+            # documents without a positive score keep their corpus order, negative scores go last
+            negative = sorted(
+                (item_id for item_id, score in scores.items() if score < 0),
+                key=lambda item_id: (-scores[item_id], position[item_id]))
+            ranked = positive
+            for item_id in self._doc_freqs:
+                if limit and len(ranked) >= limit:
+                    break
+                if scores.get(item_id, 0.0) == 0.0:
+                    ranked.append(item_id)
+            ranked.extend(negative)
+            return ranked[:limit] if limit else ranked
+
+    def state(self) -> List[Tuple[str, Dict[str, int]]]:
+        with self.lock:
+            return [(item_id, dict(frequencies)) for item_id, frequencies in self._doc_freqs.items()]
+
+    def load_state(self, documents: List[Tuple[str, Dict[str, int]]]) -> None:
+        with self.lock:
+            for item_id, frequencies in documents:
+                self.add_tokens(item_id, list(Counter(frequencies).elements()))
+
+
+class BM25IndexManager:
+    """
+    Process-wide registry of BM25 indexes, one per memory table and search field.
+
+    This backs the in-memory `bm25` search used when SQLite has no FTS5 index. Indexes are
+    built on first use, kept in sync by the memory managers through `sync_item` and
+    `remove_item`. The per-field indexes are saved to disk so a restart does not re-tokenize
+    every row; indexes over a filtered corpus (registered under a tuple name) are kept in
+    memory only, the least recently used ones are dropped past `bm25_index_max_filtered`.
+    """
+
+    def __init__(self):
+        self._indexes: "OrderedDict[Tuple[str, Hashable], BM25Index]" = OrderedDict()
+        # key -> (target class, corpus filters) of every loaded index
+        self._sources: Dict[Tuple[str, Hashable], Tuple] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        atexit.register(self.save)
+
+    @staticmethod
+    def _filtered(key: Tuple[str, Hashable]) -> bool:
+        return isinstance(key[1], tuple)
+
+    def _evict_filtered(self) -> None:
+        filtered = [key for key in self._indexes if self._filtered(key)]
+        for key in filtered[:max(len(filtered) - settings.bm25_index_max_filtered, 0)]:
+            del self._indexes[key]
+            self._sources.pop(key, None)
+            logger.debug(f"Evicted BM25 index {key}")
+
+    @staticmethod
+    def _path(key: Tuple[str, Hashable]) -> str:
+        table_name, name = key
+        file_name = "_".join(str(part) for part in (name if isinstance(name, tuple) else (name,)))
+        return os.path.join(str(settings.VIOLET_DIR), "bm25_index", f"{table_name}.{file_name}.pkl")
+
+    @staticmethod
+    def _fingerprint(session, target_class, filters) -> Tuple:
+        count, last_update = session.execute(
+            select(func.count(target_class.id), func.max(target_class.updated_at)).where(*filters)).one()
+        return count, str(last_update)
+
+    def get_index(self, session, target_class, name: Hashable, text_fn: Callable, tokenizer: Callable,
+                  predicate: Optional[Callable] = None, filters=None) -> BM25Index:
+        """
+        Return the index of `target_class` registered under `name`, building it if needed.
+
+        `text_fn` extracts the searchable text of an item and `tokenizer` turns it into tokens.
+        `filters` restrict the corpus in SQL and `predicate` applies the same restriction to
+        items passed to `sync_item`.
+        """
+        key = (target_class.__tablename__, name)
+        filters = list(filters or [])
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+            index = BM25Index(text_fn, tokenizer, predicate)
+            index.lock.acquire()
+            self._indexes[key] = index
+            self._sources[key] = (target_class, filters)
+            if self._filtered(key):
+                self._evict_filtered()
+
+        try:
+            if self._filtered(key) or not self._load(index, key, self._fingerprint(session, target_class, filters)):
+                # same statement as the in-memory search so the corpus order matches
+                for item in session.execute(select(target_class).where(*filters)).scalars():
+                    index.upsert(item)
+                if not self._filtered(key):
+                    self._dirty.add(key)
+                logger.debug(f"Built BM25 index for {key} with {len(index)} documents")
+        except Exception:
+            with self._lock:
+                self._indexes.pop(key, None)
+                self._sources.pop(key, None)
+            raise
+        finally:
+            index.lock.release()
+        return index
+
+    def _load(self, index: BM25Index, key, fingerprint) -> bool:
+        if not settings.bm25_index_persist:
+            return False
+        path = self._path(key)
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable BM25 index {path}: {e}")
+            return False
+        if state.get("version") != BM25_INDEX_VERSION or tuple(state.get("fingerprint") or ()) != fingerprint:
+            # rows were written after the index was saved
+            return False
+        index.load_state(state["documents"])
+        return True
+
+    def search(self, session, target_class, name: Hashable, query_tokens: List[str], limit: Optional[int] = None, **index_kwargs) -> list:
+        """Return the best matching ORM items in the order the in-memory BM25Okapi search would."""
+        index = self.get_index(session, target_class, name, **index_kwargs)
+        ranked_ids = index.rank(query_tokens, limit)
+        if not ranked_ids:
+            return []
+        items = session.execute(select(target_class).where(target_class.id.in_(ranked_ids))).scalars().all()
+        items_by_id = {item.id: item for item in items}
+        return [items_by_id[item_id] for item_id in ranked_ids if item_id in items_by_id]
+
+    def sync_item(self, item) -> None:
+        """Re-index a freshly written ORM row in every loaded index of its table."""
+        with self._lock:
+            loaded = list(self._indexes.items())
+        for key, index in loaded:
+            if key[0] == item.__tablename__:
+                index.upsert(item)
+                if not self._filtered(key):
+                    self._dirty.add(key)
+
+    def remove_item(self, target_class, item_id: str) -> None:
+        """Drop a deleted row from every loaded index of its table."""
+        with self._lock:
+            loaded = list(self._indexes.items())
+        for key, index in loaded:
+            if key[0] == target_class.__tablename__:
+                index.remove(item_id)
+                if not self._filtered(key):
+                    self._dirty.add(key)
+
+    def save(self) -> None:
+        """Write the changed per-field indexes to disk, stamped with the current table fingerprint."""
+        if not settings.bm25_index_persist or not self._dirty:
+            return
+        from violet.server.server import db_context
+
+        for key in list(self._dirty):
+            index = self._indexes.get(key)
+            if index is None:
+                self._dirty.discard(key)
+                continue
+            target_class, filters = self._sources[key]
+            try:
+                # also runs at interpreter exit, a database error must not escape the hook
+                with db_context() as session, index.lock:
+                    state = {
+                        "version": BM25_INDEX_VERSION,
+                        "fingerprint": self._fingerprint(session, target_class, filters),
+                        "documents": index.state(),
+                    }
+                path = self._path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "wb") as f:
+                    pickle.dump(state, f)
+                os.replace(path + ".tmp", path)
+                self._dirty.discard(key)
+            except Exception as e:
+                logger.warning(f"Failed to save BM25 index {key}: {e}")
+
+    def reset(self) -> None:
+        """Forget all loaded indexes; they are reloaded on the next search."""
+        with self._lock:
+            self._indexes.clear()
+            self._sources.clear()
+            self._dirty.clear()
+
+
+# singleton
+bm25_index_manager = BM25IndexManager()
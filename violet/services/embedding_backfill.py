@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, true
+
+from violet.llm_api.embedding_cache import embedding_model_identity
+from violet.llm_api.embeddings import embedding_model
+from violet.log import get_logger
+from violet.orm.episodic_memory import EpisodicEvent
+from violet.orm.knowledge_vault import KnowledgeVaultItem
+from violet.orm.procedural_memory import ProceduralMemoryItem
+from violet.orm.resource_memory import ResourceMemoryItem
+from violet.orm.semantic_memory import SemanticMemoryItem
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.vector_index import vector_index_manager
+from violet.settings import settings
+from violet.utils.utils import pad_embedding
+
+logger = get_logger(__name__)
+
+# memory class -> (embedding column, source text) pairs, the same texts the managers embed on insert
+EMBEDDING_SOURCES: Dict[type, List[Tuple[str, Callable]]] = {
+    EpisodicEvent: [
+        ("details_embedding", lambda item: item.details),
+        ("summary_embedding", lambda item: item.summary),
+    ],
+    SemanticMemoryItem: [
+        ("name_embedding", lambda item: item.name),
+        ("summary_embedding", lambda item: item.summary),
+        ("details_embedding", lambda item: item.details),
+    ],
+    ProceduralMemoryItem: [
+        ("summary_embedding", lambda item: item.summary),
+        ("steps_embedding", lambda item: "\n".join(item.steps or [])),
+    ],
+    ResourceMemoryItem: [
+        ("summary_embedding", lambda item: item.summary),
+    ],
+    KnowledgeVaultItem: [
+        ("caption_embedding", lambda item: item.caption),
+    ],
+}
+
+
+def _table_name(target) -> str:
+    return target if isinstance(target, str) else target.__tablename__
+
+
+class EmbeddingBackfillWorker:
+    """
+    Background worker computing the embeddings of memory rows written in deferred mode.
+
+    With `defer_memory_embeddings` the managers insert rows without embeddings and with
+    `embedding_pending` set, then `enqueue` them here. The worker embeds the pending rows of
+    every table in batches of `embedding_backfill_batch_size`, grouped by embedding model,
+    writes the embeddings, clears the flag and refreshes the vector index.
+
+    When a batch fails its rows are embedded one by one, so a text the model always rejects
+    only fails itself. A failed row stays pending and is retried after `interval` seconds,
+    doubled on every further failure, and after `max_attempts` failures it is left alone
+    until the server restarts. Meanwhile the query skips it, so it never holds back the rows queued
+    behind it.
+
+    `pending_ids` lets the searches rank rows that are not embedded yet lexically, and
+    `backlog` reports how many rows are waiting.
+    """
+
+    def __init__(self, batch_size: int, interval: float, max_attempts: int = 8):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.embedded = 0
+        self.failures = 0
+        self._pending: Dict[str, Set[str]] = defaultdict(set)
+        # (table name, item id) -> (failed attempts, monotonic time of the next attempt)
+        self._failed: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, item) -> None:
+        """Register a freshly inserted pending row and wake the worker up."""
+        with self._lock:
+            self._pending[item.__tablename__].add(item.id)
+        self.start()
+        self._wakeup.set()
+
+    def discard(self, target_class, item_id: str) -> None:
+        """Forget a deleted row."""
+        with self._lock:
+            self._pending[target_class.__tablename__].discard(item_id)
+            self._failed.pop((target_class.__tablename__, item_id), None)
+
+    def pending_ids(self, target) -> Set[str]:
+        """Ids of the rows of a table (name, ORM class or row) that still wait for their embeddings."""
+        with self._lock:
+            return set(self._pending.get(_table_name(target), ()))
+
+    def skipped_ids(self, target) -> Set[str]:
+        """Ids of the pending rows of a table that failed and wait for their next attempt, or were given up."""
+        table_name = _table_name(target)
+        now = time.monotonic()
+        with self._lock:
+            return {item_id for (failed_table, item_id), (attempts, retry_at) in self._failed.items()
+                    if failed_table == table_name and (attempts >= self.max_attempts or retry_at > now)}
+
+    def backlog(self) -> Dict[str, int]:
+        """Number of rows waiting for their embeddings, per memory table."""
+        with self._lock:
+            return {target_class.__tablename__: len(self._pending.get(target_class.__tablename__, ()))
+                    for target_class in EMBEDDING_SOURCES}
+
+    def start(self) -> None:
+        """Load the rows left pending by a previous run and start the worker thread."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="embedding_backfill", daemon=True)
+
+        try:
+            self._load_pending()
+        except Exception as e:
+            logger.warning(f"Could not load the pending embedding backlog: {e}")
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        thread.join(timeout)
+
+    def _load_pending(self) -> None:
+        from violet.server.server import db_context
+
+        with db_context() as session:
+            for target_class in EMBEDDING_SOURCES:
+                ids = session.execute(
+                    select(target_class.id).where(target_class.embedding_pending == true())).scalars().all()
+                with self._lock:
+                    self._pending[target_class.__tablename__].update(ids)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                while not self._stopped.is_set() and self.run_once():
+                    pass
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Embedding backfill failed, retrying in {self.interval}s: {e}")
+            self._wakeup.wait(self.interval)
+
+    def run_once(self) -> int:
+        """Embed one batch of pending rows of every table. Returns the number of rows embedded."""
+        from violet.server.server import db_context
+
+        embedded = 0
+        for target_class, sources in EMBEDDING_SOURCES.items():
+            # rows are enqueued once committed, so the query below sees every row queued so far
+            queued = self.pending_ids(target_class)
+            if not queued:
+                continue
+            skipped = self.skipped_ids(target_class)
+            with db_context() as session:
+                query = (
+                    select(target_class)
+                    .where(target_class.embedding_pending == true())
+                    .order_by(target_class.created_at.asc(), target_class.id.asc())
+                    .limit(self.batch_size)
+                )
+                if skipped:
+                    query = query.where(target_class.id.notin_(skipped))
+                items = session.execute(query).scalars().all()
+                if not items:
+                    # only forget what the query could see, rows queued meanwhile and failed rows stay pending
+                    with self._lock:
+                        self._pending[target_class.__tablename__].difference_update(queued - skipped)
+                    continue
+
+                # rows inserted with different embedding models are embedded separately
+                groups: Dict[str, list] = defaultdict(list)
+                for item in items:
+                    if item.embedding_config is None:
+                        # nothing to embed with, the row stays searchable lexically only
+                        item.embedding_pending = False
+                        continue
+                    groups[embedding_model_identity(item.embedding_config)].append(item)
+                for group in groups.values():
+                    self._embed(group, sources)
+                session.commit()
+
+                done = [item for item in items if not item.embedding_pending]
+                for item in done:
+                    vector_index_manager.sync_item(item)
+                if done:
+                    memory_versions.bump(target_class)
+                with self._lock:
+                    self._pending[target_class.__tablename__].difference_update(item.id for item in done)
+            embedded += len(done)
+
+        self.embedded += embedded
+        return embedded
+
+    def _embed(self, group: list, sources: List[Tuple[str, Callable]]) -> None:
+        """Embed rows of one embedding model, one by one if the batch fails. Failed rows stay pending."""
+        try:
+            self._embed_batch(group, sources)
+            return
+        except Exception as e:
+            if len(group) == 1:
+                self._record_failure(group[0], e)
+                return
+            logger.warning(f"Embedding a backfill batch of {len(group)} rows failed, embedding them one by one: {e}")
+
+        for item in group:
+            try:
+                self._embed_batch([item], sources)
+            except Exception as e:
+                self._record_failure(item, e)
+
+    def _embed_batch(self, group: list, sources: List[Tuple[str, Callable]]) -> None:
+        texts = [text_fn(item) or "" for item in group for _, text_fn in sources]
+        # every embedding is computed before any row is changed, a failed batch leaves its rows untouched
+        vectors = embedding_model(group[0].embedding_config).get_text_embeddings(texts)
+        if len(vectors) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        embeddings = iter(vectors)
+        for item in group:
+            for column_name, _ in sources:
+                setattr(item, column_name, pad_embedding(next(embeddings)))
+            item.embedding_pending = False
+            with self._lock:
+                self._failed.pop((item.__tablename__, item.id), None)
+
+    def _record_failure(self, item, error: Exception) -> None:
+        self.failures += 1
+        key = (item.__tablename__, item.id)
+        with self._lock:
+            attempts = self._failed.get(key, (0, 0.0))[0] + 1
+            self._failed[key] = (attempts, time.monotonic() + self.interval * 2 ** (attempts - 1))
+        if attempts >= self.max_attempts:
+            logger.warning(f"Giving up embedding {item.__tablename__} row {item.id} after {attempts} attempts "
+                           f"until the server restarts, it stays searchable lexically: {error}")
+        else:
+            logger.debug(f"Embedding {item.__tablename__} row {item.id} failed, attempt {attempts}: {error}")
+
+
+# singleton
+embedding_backfill = EmbeddingBackfillWorker(
+    batch_size=settings.embedding_backfill_batch_size,
+    interval=settings.embedding_backfill_interval,
+    max_attempts=settings.embedding_backfill_max_attempts,
+)
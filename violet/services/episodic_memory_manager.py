@@ -1,27 +1,65 @@
+import base64
 import re
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 import json
 import string
 import time
 import datetime as dt
-from datetime import datetime
+from datetime import datetime, timedelta
 from violet.orm.errors import NoResultFound
 from violet.orm.episodic_memory import EpisodicEvent
 from violet.schemas.user import User as PydanticUser
-from sqlalchemy import Select, func, literal, select, union_all, text
+from sqlalchemy import DateTime, Integer, Select, cast, extract, func, literal, select, tuple_, union_all, text
 from violet.schemas.episodic_memory import EpisodicEvent as PydanticEpisodicEvent
 from violet.utils.utils import enforce_types
 from pydantic import BaseModel, Field
 from sqlalchemy import select
-from rapidfuzz import fuzz
-from rank_bm25 import BM25Okapi
 from violet.settings import settings
 from violet.schemas.agent import AgentState
 from violet.llm_api.embeddings import embedding_model, parse_and_chunk_text
-from violet.services.utils import build_query, update_timezone
+from violet.database.pgvector_indexes import apply_vector_search_params
+from violet.services.utils import build_query, hybrid_search, iter_item_texts, merge_pending_embeddings, update_timezone
+from violet.services.bm25_index import bm25_index_manager
+from violet.services.fuzzy_index import fuzzy_index_manager
+from violet.services.memory_index_sync import remove_memory_item, sync_memory_item
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.memory_stats import memory_stats
+from violet.services.memory_tiering import memory_tiering, records_access
+from violet.services.memory_tree_paths import (
+    count_subtree,
+    in_subtree,
+    list_subtree,
+    normalize_tree_path,
+    subtree_candidate_ids,
+    subtree_filter,
+    subtree_ids,
+    subtree_sql_filter,
+)
+from violet.services.memory_fts import memory_fts_index
 from violet.helpers.converters import deserialize_vector
-from violet.constants import BUILD_EMBEDDINGS_FOR_MEMORY
+from violet.constants import BUILD_EMBEDDINGS_FOR_MEMORY, MAX_TIMELINE_BUCKETS
+
+
+def _utc_naive(timestamp: datetime) -> datetime:
+    """`occurred_at` is stored as naive UTC."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def encode_timeline_cursor(event: PydanticEpisodicEvent) -> str:
+    """Opaque cursor of the page following `event` in `list_episodic_memory_page`."""
+    position = f"{_utc_naive(event.occurred_at).isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def decode_timeline_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        occurred_at, event_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(occurred_at), event_id
+    except ValueError as e:
+        raise ValueError(f"Invalid timeline cursor: {cursor}") from e
 
 
 class EpisodicMemoryManager:
@@ -196,6 +234,8 @@ class EpisodicMemoryManager:
         with self.session_maker() as session:
             episodic_memory_item = EpisodicEvent(**episodic_memory_dict)
             episodic_memory_item.create(session)
+            sync_memory_item(episodic_memory_item)
+            memory_versions.bump(episodic_memory_item)
             return episodic_memory_item.to_pydantic()
 
     @enforce_types
@@ -215,6 +255,8 @@ class EpisodicMemoryManager:
                 episodic_memory_item = EpisodicEvent.read(
                     db_session=session, identifier=id)
                 episodic_memory_item.hard_delete(session)
+                remove_memory_item(EpisodicEvent, id)
+                memory_versions.bump(EpisodicEvent)
             except NoResultFound:
                 raise NoResultFound(
                     f"Episodic episodic_memory record with id {id} not found.")
@@ -230,41 +272,55 @@ class EpisodicMemoryManager:
                      organization_id: str,
                      tree_path: Optional[List[str]] = None) -> PydanticEpisodicEvent:
 
-        try:
+        return self.insert_events(
+            agent_state=agent_state,
+            events=[{'timestamp': timestamp, 'event_type': event_type, 'actor': actor,
+                     'details': details, 'summary': summary, 'tree_path': tree_path}],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                # TODO: need to check if we need to chunk the text
-                embed_model = embedding_model(agent_state.embedding_config)
-                details_embedding = embed_model.get_text_embedding(details)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                embedding_config = agent_state.embedding_config
-            else:
-                details_embedding = None
-                summary_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_events(self, agent_state: AgentState, events: List[dict], organization_id: str) -> List[PydanticEpisodicEvent]:
+        """
+        Insert several events, embedding all of their fields with one batched embedding call.
 
-            event = self.create_episodic_memory(
+        Every dict holds the `insert_event` arguments `timestamp`, `event_type`, `actor`,
+        `details`, `summary` and optionally `tree_path`.
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag,
+        # in deferred mode they are computed afterwards by the embedding backfill worker
+        embedding_pending = BUILD_EMBEDDINGS_FOR_MEMORY and settings.defer_memory_embeddings
+        if BUILD_EMBEDDINGS_FOR_MEMORY and events and not embedding_pending:
+            embed_model = embedding_model(agent_state.embedding_config)
+            embeddings = iter(embed_model.get_text_embeddings(
+                [text for event in events for text in (event['details'], event['summary'])]))
+            embedding_config = agent_state.embedding_config
+        else:
+            embeddings = None
+            embedding_config = agent_state.embedding_config if embedding_pending else None
+
+        inserted = []
+        for event in events:
+            details_embedding = next(embeddings) if embeddings else None
+            summary_embedding = next(embeddings) if embeddings else None
+            inserted.append(self.create_episodic_memory(
                 PydanticEpisodicEvent(
-                    occurred_at=timestamp,
-                    event_type=event_type,
-                    actor=actor,
-                    summary=summary,
-                    details=details,
-                    tree_path=tree_path or [],
+                    occurred_at=event['timestamp'],
+                    event_type=event['event_type'],
+                    actor=event['actor'],
+                    summary=event['summary'],
+                    details=event['details'],
+                    tree_path=event.get('tree_path') or [],
                     organization_id=organization_id,
                     summary_embedding=summary_embedding,
                     details_embedding=details_embedding,
                     embedding_config=embedding_config,
+                    embedding_pending=embedding_pending,
                     last_modify={"timestamp": datetime.now(
                         dt.timezone.utc).isoformat(), "operation": "created"},
                 )
-            )
-
-            return event
-
-        except Exception as e:
-            raise e
+            ))
+        return inserted
 
     @update_timezone
     @enforce_types
@@ -272,30 +328,142 @@ class EpisodicMemoryManager:
                                               agent_state: AgentState,
                                               start_time: datetime,
                                               end_time: datetime,
-                                              timezone_str: str = None) -> List[PydanticEpisodicEvent]:
+                                              timezone_str: str = None,
+                                              limit: Optional[int] = None) -> List[PydanticEpisodicEvent]:
         """
-        list all episodic events around a timestamp
+        list all episodic events around a timestamp, oldest first
         time_window: The time window to search around the timestamp. It is in the form of "HH:MM:SS" or "HH:MM".
+        limit: Maximum number of events to return
         """
         with self.session_maker() as session:
 
-            # Query for episodic events within the time window
+            # Query for episodic events within the time window, a range scan of the occurred_at index
             query = select(EpisodicEvent).where(
-                EpisodicEvent.occurred_at.between(start_time, end_time)
-            )
+                EpisodicEvent.occurred_at.between(_utc_naive(start_time), _utc_naive(end_time))
+            ).order_by(EpisodicEvent.occurred_at.asc(), EpisodicEvent.id.asc())
+            if limit:
+                query = query.limit(limit)
 
             result = session.execute(query)
             episodic_memory = result.scalars().all()
 
             return [event.to_pydantic() for event in episodic_memory]
 
+    @update_timezone
+    @enforce_types
+    def list_episodic_memory_page(self,
+                                  agent_state: AgentState,
+                                  cursor: Optional[str] = None,
+                                  limit: int = 50,
+                                  start_time: Optional[datetime] = None,
+                                  end_time: Optional[datetime] = None,
+                                  organization_id: Optional[str] = None,
+                                  ascending: bool = False,
+                                  timezone_str: str = None) -> List[PydanticEpisodicEvent]:
+        """
+        One page of the episodic timeline, newest first unless `ascending`.
+
+        Pages are keyset paginated on (occurred_at, id): pass `encode_timeline_cursor` of the
+        last event of a page as `cursor` to get the next one. Every page is a bounded range scan
+        of the timeline index, however deep into the history it is. A page shorter than `limit`
+        is the last one.
+
+        Args:
+            agent_state: The agent state
+            cursor: Cursor of the last event of the previous page, None for the first page
+            limit: Number of events per page
+            start_time: Only events that occurred at or after this time
+            end_time: Only events that occurred at or before this time
+            organization_id: Only events of this organization
+            ascending: Oldest events first
+            timezone_str: Timezone string for timestamp conversion
+        """
+        with self.session_maker() as session:
+            position = tuple_(EpisodicEvent.occurred_at, EpisodicEvent.id)
+            query = select(EpisodicEvent).where(EpisodicEvent.occurred_at.isnot(None))
+            if organization_id:
+                query = query.where(EpisodicEvent.organization_id == organization_id)
+            if start_time:
+                query = query.where(EpisodicEvent.occurred_at >= _utc_naive(start_time))
+            if end_time:
+                query = query.where(EpisodicEvent.occurred_at <= _utc_naive(end_time))
+            if cursor:
+                after = tuple_(*decode_timeline_cursor(cursor))
+                query = query.where(position > after if ascending else position < after)
+
+            if ascending:
+                query = query.order_by(EpisodicEvent.occurred_at.asc(), EpisodicEvent.id.asc())
+            else:
+                query = query.order_by(EpisodicEvent.occurred_at.desc(), EpisodicEvent.id.desc())
+
+            episodic_memory = session.execute(query.limit(limit)).scalars().all()
+            return [event.to_pydantic() for event in episodic_memory]
+
+    @enforce_types
+    def count_episodic_memory_by_bucket(self,
+                                        start_time: datetime,
+                                        end_time: datetime,
+                                        bucket: timedelta = timedelta(days=1),
+                                        organization_id: Optional[str] = None) -> List[Tuple[datetime, int]]:
+        """
+        Number of episodic events per time bucket between `start_time` and `end_time`.
+
+        Buckets are `bucket` long and aligned on `start_time`, empty buckets are included, so
+        a timeline view can show the shape of a period and then page into the busy buckets
+        with `list_episodic_memory_page`. Events are counted per bucket in SQL over the
+        occurred_at index, at most MAX_TIMELINE_BUCKETS buckets are counted in one call.
+        """
+        start_time, end_time = _utc_naive(start_time), _utc_naive(end_time)
+        if bucket <= timedelta(0):
+            raise ValueError(f"Invalid timeline bucket: {bucket}")
+        bucket_count = int((end_time - start_time) // bucket) + 1
+        if bucket_count > MAX_TIMELINE_BUCKETS:
+            raise ValueError(
+                f"{bucket_count} timeline buckets requested, at most {MAX_TIMELINE_BUCKETS} are counted at once")
+
+        if settings.violet_pg_uri_no_default:
+            bucket_index = func.floor(extract("epoch", EpisodicEvent.occurred_at - start_time) / bucket.total_seconds())
+        else:
+            # julianday() is a float number of days, rounded to milliseconds the bucket edges are exact
+            offset_ms = func.round(
+                (func.julianday(EpisodicEvent.occurred_at) - func.julianday(literal(start_time, DateTime))) * 86400000)
+            bucket_index = cast(offset_ms, Integer) // max(bucket // timedelta(milliseconds=1), 1)
+
+        with self.session_maker() as session:
+            query = select(bucket_index.label("bucket_index"), func.count()).where(
+                EpisodicEvent.occurred_at.between(start_time, end_time))
+            if organization_id:
+                query = query.where(EpisodicEvent.organization_id == organization_id)
+            # grouped by the label, PostgreSQL would not match the bound start_time of the expression
+            counts = {int(index): count for index, count in session.execute(query.group_by("bucket_index"))}
+
+        return [(start_time + i * bucket, counts.get(i, 0)) for i in range(bucket_count)]
+
     def get_total_number_of_items(self) -> int:
         """Get the total number of items in the episodic memory."""
+        return memory_stats.count(EpisodicEvent)
+
+    def iter_texts(self, ids: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Ids and texts (summary and details) of all events, or of `ids`, read page by page without loading the table."""
+        return iter_item_texts(self.session_maker, EpisodicEvent, [EpisodicEvent.summary, EpisodicEvent.details],
+                               lambda row: f"{row.summary or ''} {row.details or ''}", ids)
+
+    @update_timezone
+    @enforce_types
+    def list_episodic_memory_in_subtree(self,
+                                        tree_path: List[str],
+                                        limit: Optional[int] = 50,
+                                        timezone_str: str = None) -> List[PydanticEpisodicEvent]:
+        """List the episodic events under a tree path category, most recently created first."""
         with self.session_maker() as session:
-            query = select(func.count(EpisodicEvent.id))
-            result = session.execute(query)
-            return result.scalar_one()
+            return [event.to_pydantic() for event in list_subtree(session, EpisodicEvent, tree_path, limit)]
+
+    def count_episodic_memory_in_subtree(self, tree_path: List[str]) -> int:
+        """Count the episodic events under a tree path category."""
+        with self.session_maker() as session:
+            return count_subtree(session, EpisodicEvent, tree_path)
 
+    @records_access(EpisodicEvent)
     @update_timezone
     @enforce_types
     def list_episodic_memory(self,
@@ -305,7 +473,10 @@ class EpisodicMemoryManager:
                              search_field: str = '',
                              search_method: str = 'embedding',
                              limit: Optional[int] = 50,
-                             timezone_str: str = None) -> List[PydanticEpisodicEvent]:
+                             timezone_str: str = None,
+                             vector_search_effort: Optional[int] = None,
+                             tree_path_prefix: Optional[List[str]] = None,
+                             include_archive: bool = False) -> List[PydanticEpisodicEvent]:
         """
         List all episodic events with various search methods.
 
@@ -318,10 +489,16 @@ class EpisodicMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the FTS5 index with bm25() ranking on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
+                - 'hybrid': bm25 and embedding candidates fused with reciprocal rank fusion
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
+            vector_search_effort: Recall/latency knob of the pgvector ANN index for embedding search
+                (hnsw.ef_search or ivfflat.probes), defaults to the configured value
+            tree_path_prefix: Only return items under this category, a prefix of their tree_path
+            include_archive: Also search the archived (cold) items, which fill the places left by the
+                hot items; the archive is matched on the words of the query
 
         Returns:
             List of episodic events matching the search criteria
@@ -331,14 +508,31 @@ class EpisodicMemoryManager:
             PostgreSQL's native full-text search with ts_rank_cd for BM25-like scoring. This is much more efficient 
             than loading all documents into memory and leverages your existing GIN indexes.
 
-            **For SQLite users**: 'fts5_match' is recommended for text-based searches as it's efficient and uses 
-            proper BM25 ranking. 'fts5_match' requires SQLite compiled with FTS5 support.
+            **For SQLite users**: 'bm25' runs against the FTS5 index of the table, ranked with SQLite's native
+            bm25(). When SQLite is built without FTS5 it falls back to in-memory BM25 processing.
 
             Performance comparison:
             - PostgreSQL 'bm25': Native DB search, very fast, scales well
-            - Legacy 'bm25' (SQLite): In-memory processing, slow for large datasets
+            - SQLite 'bm25': FTS5 index, does not load the table into memory
+            - Fallback 'bm25' (SQLite without FTS5): In-memory processing, slow for large datasets
         """
 
+        if include_archive:
+            items = self.list_episodic_memory(
+                agent_state=agent_state, query=query, embedded_text=embedded_text, search_field=search_field,
+                search_method=search_method, limit=limit, vector_search_effort=vector_search_effort,
+                tree_path_prefix=tree_path_prefix)
+            if limit and len(items) >= limit:
+                return items
+            return items + memory_tiering.search_archive(
+                EpisodicEvent, query, limit=limit - len(items) if limit else None, tree_path_prefix=tree_path_prefix)
+
+        if search_method == 'hybrid' and query != '':
+            return hybrid_search(
+                self.list_episodic_memory, EpisodicEvent, agent_state, query, search_field,
+                embedded_text=embedded_text, limit=limit, vector_search_effort=vector_search_effort,
+                tree_path_prefix=tree_path_prefix)
+
         with self.session_maker() as session:
 
             # TODO: handle the case where query is None, we need to extract the 50 most recent results
@@ -346,6 +540,8 @@ class EpisodicMemoryManager:
             if query == '':
                 query_stmt = select(EpisodicEvent).order_by(
                     EpisodicEvent.occurred_at.desc())
+                if tree_path_prefix:
+                    query_stmt = query_stmt.where(subtree_filter(EpisodicEvent, tree_path_prefix))
                 if limit:
                     query_stmt = query_stmt.limit(limit)
                 result = session.execute(query_stmt)
@@ -370,6 +566,8 @@ class EpisodicMemoryManager:
                     EpisodicEvent.last_modify.label("last_modify"),
                     EpisodicEvent.tree_path.label("tree_path"),
                 )
+                if tree_path_prefix:
+                    base_query = base_query.where(subtree_filter(EpisodicEvent, tree_path_prefix))
 
                 if search_method == 'embedding':
 
@@ -385,7 +583,11 @@ class EpisodicMemoryManager:
                         search_field=eval(
                             "EpisodicEvent." + search_field + "_embedding"),
                         target_class=EpisodicEvent,
+                        limit=limit,
+                        candidate_ids=subtree_candidate_ids(session, EpisodicEvent, tree_path_prefix),
                     )
+                    apply_vector_search_params(
+                        session, vector_search_effort, limit)
 
                 elif search_method == 'string_match':
 
@@ -399,95 +601,41 @@ class EpisodicMemoryManager:
                     if settings.violet_pg_uri_no_default:
                         # Use PostgreSQL's native full-text search with ts_rank for BM25-like functionality
                         return self._postgresql_fulltext_search(
-                            session, base_query, query, search_field, limit
+                            session, base_query, query, search_field, limit, tree_path_prefix
                         )
+                    elif memory_fts_index.is_available(session, EpisodicEvent):
+                        # SQLite FTS5 index, ranked with the native bm25()
+                        episodic_memory = memory_fts_index.search(
+                            session, EpisodicEvent, query, search_field, limit,
+                            filters=[subtree_filter(EpisodicEvent, tree_path_prefix)] if tree_path_prefix else None)
+                        return [event.to_pydantic() for event in episodic_memory]
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
-                        # Load all candidate events (memory-intensive, kept for compatibility)
-                        result = session.execute(select(EpisodicEvent))
-                        all_events = result.scalars().all()
-
-                        if not all_events:
-                            return []
-
-                        # Prepare documents for BM25
-                        documents = []
-                        valid_events = []
-
-                        for event in all_events:
-                            # Determine which field to use for search
-                            if search_field and hasattr(event, search_field):
-                                text_to_search = getattr(
-                                    event, search_field) or ""
-                            else:
-                                text_to_search = event.summary or ""
-
-                            # Preprocess the text into tokens
-                            tokens = self._preprocess_text_for_bm25(
-                                text_to_search)
-
-                            # Only include events that have tokens after preprocessing
-                            if tokens:
-                                documents.append(tokens)
-                                valid_events.append(event)
-
-                        if not documents:
-                            return []
-
-                        # Initialize BM25 with the documents
-                        bm25 = BM25Okapi(documents)
-
-                        # Preprocess the query
-                        query_tokens = self._preprocess_text_for_bm25(query)
-
-                        if not query_tokens:
-                            # If query has no valid tokens, return most recent events
-                            return [event.to_pydantic() for event in valid_events[:limit]]
-
-                        # Get BM25 scores for all documents
-                        scores = bm25.get_scores(query_tokens)
-
-                        # Create scored events list
-                        scored_events = list(zip(scores, valid_events))
-
-                        # Sort by BM25 score in descending order
-                        scored_events.sort(key=lambda x: x[0], reverse=True)
-
-                        # Get top events based on limit
-                        top_events = [event for score,
-                                      event in scored_events[:limit]]
-                        episodic_memory = top_events
-
-                        # Return the list after converting to Pydantic
+                        # Fallback to in-memory BM25 when SQLite is built without FTS5
+                        # Incrementally maintained index, ranks like rank_bm25.BM25Okapi
+                        field = search_field if search_field and hasattr(EpisodicEvent, search_field) else 'summary'
+                        # the tree path filter restricts the corpus, so each subtree gets its own index
+                        episodic_memory = bm25_index_manager.search(
+                            session, EpisodicEvent,
+                            (field, *normalize_tree_path(tree_path_prefix)) if tree_path_prefix else field,
+                            self._preprocess_text_for_bm25(query), limit,
+                            text_fn=lambda event: getattr(event, field) or "",
+                            tokenizer=self._preprocess_text_for_bm25,
+                            predicate=(lambda item: in_subtree(item.tree_path, tree_path_prefix)) if tree_path_prefix else None,
+                            filters=[subtree_filter(EpisodicEvent, tree_path_prefix)] if tree_path_prefix else None,
+                        )
                         return [event.to_pydantic() for event in episodic_memory]
 
                 elif search_method == 'fuzzy_match':
 
-                    # Load all candidate events (kept for backward compatibility)
-                    result = session.execute(select(EpisodicEvent))
-                    all_events = result.scalars().all()
-                    scored_events = []
-                    for event in all_events:
-                        # Determine which field to use:
-                        # 1. If a search_field is provided (like "summary" or "details") use that.
-                        # 2. Otherwise, fallback to the summary.
-                        if search_field and hasattr(event, search_field):
-                            text_to_search = getattr(event, search_field)
-                        else:
-                            text_to_search = event.summary
-
-                        # Use fuzz.partial_ratio for short query matching against long text.
-                        score = fuzz.partial_ratio(
-                            query.lower(), text_to_search.lower())
-                        scored_events.append((score, event))
-
-                    # Sort events in descending order of fuzzy match score.
-                    scored_events.sort(key=lambda x: x[0], reverse=True)
-                    # Optionally, you could filter out results below a certain score threshold.
-                    top_events = [event for score,
-                                  event in scored_events[:limit]]
-                    episodic_memory = top_events
-                    # Return the list after converting to Pydantic.
+                    # Cached corpus scored in bulk with rapidfuzz partial_ratio.
+                    # Use the search_field when given (like "summary" or "details"), otherwise the summary.
+                    field = search_field if search_field and hasattr(EpisodicEvent, search_field) else 'summary'
+                    # one corpus per field, the tree path filter restricts the ranked ids
+                    episodic_memory = fuzzy_index_manager.search(
+                        session, EpisodicEvent, field, query, limit,
+                        text_fn=lambda event: getattr(event, field) or "",
+                        ids=subtree_ids(session, EpisodicEvent, tree_path_prefix) if tree_path_prefix else None,
+                    )
                     return [event.to_pydantic() for event in episodic_memory]
 
                 if limit:
@@ -500,9 +648,15 @@ class EpisodicMemoryManager:
                     data = dict(row._mapping)
                     episodic_memory.append(EpisodicEvent(**data))
 
-                return [event.to_pydantic() for event in episodic_memory]
+                episodic_memory = [event.to_pydantic() for event in episodic_memory]
+                if search_method == 'embedding':
+                    # rows still waiting for their embeddings are ranked lexically
+                    return merge_pending_embeddings(
+                        self.list_episodic_memory, EpisodicEvent, agent_state, query, search_field,
+                        episodic_memory, limit, tree_path_prefix=tree_path_prefix)
+                return episodic_memory
 
-    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit):
+    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit, tree_path_prefix=None):
         """
         Efficient PostgreSQL-native full-text search using ts_rank for BM25-like functionality.
         This method leverages PostgreSQL's built-in full-text search capabilities and GIN indexes.
@@ -513,6 +667,7 @@ class EpisodicMemoryManager:
             query_text: Search query string
             search_field: Field to search in ('summary', 'details', 'actor', 'event_type', etc.)
             limit: Maximum number of results to return
+            tree_path_prefix: Only search items under this category
 
         Returns:
             List of EpisodicEvent objects ranked by relevance
@@ -589,6 +744,11 @@ class EpisodicMemoryManager:
                 setweight(to_tsvector('english', coalesce(event_type, '')), 'D'),
                 to_tsquery('english', :tsquery), 32)"""
 
+        # Restrict to a tree path subtree if provided
+        tree_path_filter, tree_path_params = "", {}
+        if tree_path_prefix:
+            tree_path_filter, tree_path_params = subtree_sql_filter("episodic_memory", tree_path_prefix)
+
         # Try AND query first for more precise results
         try:
             and_query_sql = text(f"""
@@ -598,14 +758,15 @@ class EpisodicMemoryManager:
                     embedding_config, organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM episodic_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = list(session.execute(and_query_sql, {
                 'tsquery': tsquery_string_and,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             }))
 
             # If AND query returns sufficient results, use them
@@ -650,14 +811,15 @@ class EpisodicMemoryManager:
                     embedding_config, organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM episodic_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = session.execute(or_query_sql, {
                 'tsquery': tsquery_string_or,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             })
 
             episodic_memory = []
@@ -738,6 +900,8 @@ class EpisodicMemoryManager:
             }
 
             selected_event.update(session)
+            sync_memory_item(selected_event)
+            memory_versions.bump(selected_event)
             return selected_event.to_pydantic()
 
     def _parse_embedding_field(self, embedding_value):
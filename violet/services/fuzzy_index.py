@@ -0,0 +1,231 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import select
+
+from violet.log import get_logger
+
+logger = get_logger(__name__)
+
+# character n-grams hashed into a fixed-size bit signature per document, the size is a power of two
+FUZZY_NGRAM = 3
+FUZZY_SIGNATURE_BITS = 1024
+# documents re-scored with `partial_ratio` per requested result, below this the whole corpus is scored
+FUZZY_CANDIDATE_MULTIPLIER = 20
+FUZZY_MIN_CANDIDATES = 2000
+
+
+def ngram_hashes(text: str) -> np.ndarray:
+    """Signature bits of the character n-grams of `text`, repeated n-grams repeat their bit."""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    count = codes.size - FUZZY_NGRAM + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint32)
+    hashes = codes[:count].copy()
+    for offset in range(1, FUZZY_NGRAM):
+        hashes = hashes * np.uint32(40503) ^ codes[offset:offset + count]
+    return hashes & np.uint32(FUZZY_SIGNATURE_BITS - 1)
+
+
+class FuzzyIndex:
+    """
+    Cached corpus of lower-cased search strings scored in bulk with `rapidfuzz`.
+
+    Ranking is the same as scoring every document with `fuzz.partial_ratio` and sorting by
+    score, ties in corpus order. Large corpora are first narrowed down to the documents
+    sharing the most character n-grams with the query, using a packed n-gram bit signature
+    per document, and only those candidates are scored, so there the ranking is approximate.
+    """
+
+    def __init__(self, text_fn: Callable, initial_capacity: int = 1024):
+        self.text_fn = text_fn
+        self._initial_capacity = initial_capacity
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._positions: Dict[str, int] = {}
+        # insertion sequence of every position, breaks ties in corpus order
+        self._sequence = np.zeros(0, dtype=np.int64)
+        self._signatures = np.zeros((0, FUZZY_SIGNATURE_BITS // 8), dtype=np.uint8)
+        self._next_sequence = 0
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._positions
+
+    def _ensure_capacity(self, size: int) -> None:
+        capacity = self._signatures.shape[0]
+        if size <= capacity:
+            return
+        new_capacity = max(self._initial_capacity, capacity * 2, size)
+        signatures = np.zeros((new_capacity, self._signatures.shape[1]), dtype=np.uint8)
+        signatures[:capacity] = self._signatures
+        sequence = np.zeros(new_capacity, dtype=np.int64)
+        sequence[:capacity] = self._sequence
+        self._signatures, self._sequence = signatures, sequence
+
+    def add_text(self, item_id: str, text: str) -> None:
+        """Insert or replace a document. A replaced document keeps its position in the corpus order."""
+        text = (text or "").lower()
+        bits = np.zeros(FUZZY_SIGNATURE_BITS, dtype=bool)
+        bits[ngram_hashes(text)] = True
+        with self.lock:
+            position = self._positions.get(item_id)
+            if position is None:
+                position = len(self._ids)
+                self._ensure_capacity(position + 1)
+                self._positions[item_id] = position
+                self._ids.append(item_id)
+                self._texts.append(text)
+                self._sequence[position] = self._next_sequence
+                self._next_sequence += 1
+            else:
+                self._texts[position] = text
+            self._signatures[position] = np.packbits(bits)
+
+    def upsert(self, item) -> None:
+        """Index an ORM item."""
+        self.add_text(item.id, self.text_fn(item))
+
+    def remove(self, item_id: str) -> None:
+        """Remove a document by moving the last one into its slot."""
+        with self.lock:
+            position = self._positions.pop(item_id, None)
+            if position is None:
+                return
+            last_position = len(self._ids) - 1
+            if position != last_position:
+                last_id = self._ids[last_position]
+                self._ids[position] = last_id
+                self._texts[position] = self._texts[last_position]
+                self._signatures[position] = self._signatures[last_position]
+                self._sequence[position] = self._sequence[last_position]
+                self._positions[last_id] = position
+            self._ids.pop()
+            self._texts.pop()
+
+    def _candidates(self, query: str, positions: np.ndarray, k: int) -> np.ndarray:
+        """The `k` of `positions` whose documents share the most n-grams with the query."""
+        query_bits = np.unique(ngram_hashes(query))
+        if query_bits.size == 0:
+            return positions
+        overlap = np.zeros(positions.size, dtype=np.int32)
+        signatures = self._signatures[positions]
+        for bit in query_bits:
+            # `np.packbits` stores the first bit in the most significant position
+            overlap += (signatures[:, bit >> 3] & np.uint8(0x80 >> (bit & 7))) != 0
+        return positions[np.argpartition(-overlap, k)[:k]]
+
+    def rank(self, query: str, limit: Optional[int] = None, ids: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Ids of the best `limit` documents by `partial_ratio` against the query.
+
+        With `ids` only those documents are ranked, unknown ids are ignored. `partial_ratio`
+        scores every document on its own, so a restricted ranking is the ranking of the
+        restricted corpus.
+        """
+        query = (query or "").lower()
+        with self.lock:
+            if ids is None:
+                positions = np.arange(len(self._ids))
+            else:
+                positions = np.array(sorted({self._positions[item_id] for item_id in ids if item_id in self._positions}),
+                                     dtype=np.int64)
+            if positions.size == 0:
+                return []
+
+            candidate_count = max(limit * FUZZY_CANDIDATE_MULTIPLIER, FUZZY_MIN_CANDIDATES) if limit else positions.size
+            if candidate_count < positions.size:
+                positions = self._candidates(query, positions, candidate_count)
+
+            scores = process.cdist(
+                [query], [self._texts[i] for i in positions],
+                scorer=fuzz.partial_ratio, processor=None, workers=-1)[0]
+            ranked = positions[np.lexsort((self._sequence[positions], -scores))]
+            if limit:
+                ranked = ranked[:limit]
+            return [self._ids[i] for i in ranked]
+
+
+class FuzzyIndexManager:
+    """
+    Process-wide registry of fuzzy search corpora, one per memory table and search field.
+
+    This backs the `fuzzy_match` search of the memory managers. Corpora are loaded on first
+    use and kept in sync through `sync_item` and `remove_item`, so a search no longer reads
+    the whole table.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str], FuzzyIndex] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, session, target_class, field: str, text_fn: Callable) -> FuzzyIndex:
+        """
+        Return the corpus of the `field` of `target_class`, loading it if needed.
+
+        `text_fn` extracts the searchable text of an item. Filtered searches rank a subset of
+        this corpus, see `search`, so there is a single corpus per table and field.
+        """
+        key = (target_class.__tablename__, field)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                return index
+            index = FuzzyIndex(text_fn)
+            index.lock.acquire()
+            self._indexes[key] = index
+
+        try:
+            # same statement as the row-by-row search so ties keep the table order
+            for item in session.execute(select(target_class)).scalars():
+                index.upsert(item)
+            logger.debug(f"Built fuzzy index for {key} with {len(index)} documents")
+        except Exception:
+            with self._lock:
+                self._indexes.pop(key, None)
+            raise
+        finally:
+            index.lock.release()
+        return index
+
+    def search(self, session, target_class, field: str, query: str, limit: Optional[int] = None,
+               text_fn: Callable = None, ids: Optional[Iterable[str]] = None) -> list:
+        """
+        Return the ORM items best matching `query` by `partial_ratio`.
+
+        `ids` restricts the ranking to those items, e.g. the items of a subtree or of a set of
+        sensitivities, None ranks the whole table.
+        """
+        index = self.get_index(session, target_class, field, text_fn)
+        ranked_ids = index.rank(query, limit, ids=ids)
+        if not ranked_ids:
+            return []
+        items = session.execute(select(target_class).where(target_class.id.in_(ranked_ids))).scalars().all()
+        items_by_id = {item.id: item for item in items}
+        return [items_by_id[item_id] for item_id in ranked_ids if item_id in items_by_id]
+
+    def sync_item(self, item) -> None:
+        """Re-index a freshly written ORM row in every loaded corpus of its table."""
+        for key, index in list(self._indexes.items()):
+            if key[0] == item.__tablename__:
+                index.upsert(item)
+
+    def remove_item(self, target_class, item_id: str) -> None:
+        """Drop a deleted row from every loaded corpus of its table."""
+        for key, index in list(self._indexes.items()):
+            if key[0] == target_class.__tablename__:
+                index.remove(item_id)
+
+    def reset(self) -> None:
+        """Forget all loaded corpora; they are reloaded on the next search."""
+        with self._lock:
+            self._indexes.clear()
+
+
+# singleton
+fuzzy_index_manager = FuzzyIndexManager()
@@ -1,10 +1,13 @@
 import datetime
 from typing import List, Literal, Optional
 
+from sqlalchemy import delete, func, insert, select, update
+
 from violet import system
 from violet.constants import IN_CONTEXT_MEMORY_KEYWORD, STRUCTURED_OUTPUT_MODELS
 from violet.helpers import ToolRulesSolver
 from violet.orm.agent import Agent as AgentModel
+from violet.orm.agents_messages import AgentsMessages
 from violet.orm.agents_tags import AgentsTags
 from violet.orm.errors import NoResultFound
 from violet.prompts import gpt_system
@@ -88,6 +91,93 @@ def _process_tags(agent: AgentModel, tags: List[str], replace=True):
             [tag for tag in new_tags if tag.tag not in existing_tags])
 
 
+def _insert_in_context_message_ids(session, agent_id: str, message_ids: List[str], start: int):
+    if message_ids:
+        session.execute(insert(AgentsMessages), [
+            {"agent_id": agent_id, "position": start + i, "message_id": message_id}
+            for i, message_id in enumerate(message_ids)
+        ])
+
+
+def _set_in_context_message_ids(session, agent_id: str, message_ids: List[str]):
+    """
+    Replaces the in-context window of an agent.
+
+    Only the rows after the prefix shared with the current window are rewritten, so
+    extending or truncating the window costs the changed messages, not the whole window.
+    """
+    current = session.execute(
+        select(AgentsMessages.position, AgentsMessages.message_id)
+        .where(AgentsMessages.agent_id == agent_id)
+        .order_by(AgentsMessages.position)
+    ).all()
+    keep = 0
+    while keep < min(len(current), len(message_ids)) and current[keep].message_id == message_ids[keep]:
+        keep += 1
+    if keep < len(current):
+        session.execute(delete(AgentsMessages).where(
+            AgentsMessages.agent_id == agent_id, AgentsMessages.position >= current[keep].position))
+    start = current[keep - 1].position + 1 if keep else 0
+    _insert_in_context_message_ids(session, agent_id, message_ids[keep:], start)
+
+
+def _append_in_context_message_ids(session, agent_id: str, message_ids: List[str]):
+    """Appends messages at the end of the in-context window of an agent."""
+    last = session.execute(select(func.max(AgentsMessages.position)).where(
+        AgentsMessages.agent_id == agent_id)).scalar()
+    _insert_in_context_message_ids(session, agent_id, message_ids, 0 if last is None else last + 1)
+
+
+def _prepend_in_context_message_ids(session, agent_id: str, message_ids: List[str]):
+    """Inserts messages right after the system message, the first of the in-context window."""
+    head = session.execute(
+        select(AgentsMessages.position)
+        .where(AgentsMessages.agent_id == agent_id)
+        .order_by(AgentsMessages.position)
+        .limit(2)
+    ).scalars().all()
+    if len(head) < 2:
+        return _append_in_context_message_ids(session, agent_id, message_ids)
+
+    system_position, first_position = head
+    shift = len(message_ids) - (first_position - system_position - 1)
+    if shift > 0:
+        # not enough room after a trim, move the rest of the window; through negative
+        # positions so that no intermediate row collides with an existing one
+        session.execute(update(AgentsMessages).where(
+            AgentsMessages.agent_id == agent_id, AgentsMessages.position > system_position
+        ).values(position=-(AgentsMessages.position + shift)))
+        session.execute(update(AgentsMessages).where(
+            AgentsMessages.agent_id == agent_id, AgentsMessages.position < 0
+        ).values(position=-AgentsMessages.position))
+        first_position += shift
+    _insert_in_context_message_ids(session, agent_id, message_ids, first_position - len(message_ids))
+
+
+def _trim_in_context_message_ids(session, agent_id: str, num: Optional[int] = None):
+    """
+    Removes in-context messages after the system message: those at index 1 to `num` - 1,
+    or all of them when `num` is None.
+    """
+    positions = select(AgentsMessages.position).where(
+        AgentsMessages.agent_id == agent_id).order_by(AgentsMessages.position).offset(1)
+    if num is not None:
+        if num <= 1:
+            return
+        positions = positions.limit(num - 1)
+    session.execute(delete(AgentsMessages).where(
+        AgentsMessages.agent_id == agent_id, AgentsMessages.position.in_(positions)))
+
+
+def _replace_system_message_id(session, agent_id: str, message_id: str):
+    """Swaps the system message, the first of the in-context window, for `message_id`."""
+    system_position = select(func.min(AgentsMessages.position)).where(
+        AgentsMessages.agent_id == agent_id).scalar_subquery()
+    session.execute(update(AgentsMessages).where(
+        AgentsMessages.agent_id == agent_id, AgentsMessages.position == system_position
+    ).values(message_id=message_id))
+
+
 def derive_system_message(agent_type: AgentType, system: Optional[str] = None):
     if system is None:
         # Map agent types to their corresponding system prompt paths
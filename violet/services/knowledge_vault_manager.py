@@ -1,12 +1,10 @@
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import json
 import string
 import re
 import time
 
-from rapidfuzz import fuzz
-from rank_bm25 import BM25Okapi
 from violet.orm.errors import NoResultFound
 from violet.orm.knowledge_vault import KnowledgeVaultItem
 from violet.schemas.user import User as PydanticUser
@@ -17,12 +15,38 @@ from sqlalchemy import select, func, text
 from violet.schemas.agent import AgentState
 from violet.llm_api.embeddings import embedding_model
 from difflib import SequenceMatcher
-from violet.services.utils import build_query, update_timezone
+from violet.database.pgvector_indexes import apply_vector_search_params
+from violet.services.utils import build_query, hybrid_search, iter_item_texts, merge_pending_embeddings, update_timezone
+from violet.services.bm25_index import bm25_index_manager
+from violet.services.fuzzy_index import fuzzy_index_manager
+from violet.services.memory_index_sync import remove_memory_item, sync_memory_item
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.memory_stats import memory_stats
+from violet.services.memory_fts import memory_fts_index
 from violet.settings import settings
 from violet.helpers.converters import deserialize_vector
 from violet.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 
 
+def sensitivity_candidate_ids(session, sensitivity: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    Ids of the items in `sensitivity` to restrict the in-process vector ranking to, None without a filter.
+
+    Ranking every item and filtering afterwards could leave fewer than `limit` rows, or none when
+    the nearest items are all of another sensitivity. On PostgreSQL the condition of the query is
+    applied by the database itself.
+    """
+    if sensitivity is None or settings.violet_pg_uri_no_default:
+        return None
+    return sensitivity_ids(session, sensitivity)
+
+
+def sensitivity_ids(session, sensitivity: List[str]) -> List[str]:
+    """Ids of the knowledge vault items of the given sensitivities."""
+    return list(session.execute(
+        select(KnowledgeVaultItem.id).where(KnowledgeVaultItem.sensitivity.in_(sensitivity))).scalars().all())
+
+
 class KnowledgeVaultManager:
     """Manager class to handle business logic related to Knowledge Vault Items."""
 
@@ -192,6 +216,8 @@ class KnowledgeVaultManager:
             search_field: Field to search in ('caption' or 'secret_value')
             limit: Maximum number of results to return
             sensitivity: List of sensitivity levels to filter by
+            vector_search_effort: Recall/latency knob of the pgvector ANN index for embedding search
+                (hnsw.ef_search or ivfflat.probes), defaults to the configured value
 
         Returns:
             List of KnowledgeVaultItem objects ranked by relevance
@@ -449,6 +475,8 @@ class KnowledgeVaultManager:
         with self.session_maker() as session:
             knowledge_item = KnowledgeVaultItem(**item_data)
             knowledge_item.create(session)
+            sync_memory_item(knowledge_item)
+            memory_versions.bump(knowledge_item)
 
             # Return the created item as a Pydantic model
             return knowledge_item.to_pydantic()
@@ -468,40 +496,57 @@ class KnowledgeVaultManager:
                          caption: str,
                          organization_id: str):
         """Insert knowledge into the knowledge vault."""
-        try:
+        return self.insert_knowledge_items(
+            agent_state=agent_state,
+            items=[{'entry_type': entry_type, 'source': source, 'sensitivity': sensitivity,
+                    'secret_value': secret_value, 'caption': caption}],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                embed_model = embedding_model(agent_state.embedding_config)
-                caption_embedding = embed_model.get_text_embedding(caption)
-                embedding_config = agent_state.embedding_config
-            else:
-                caption_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_knowledge_items(self, agent_state: AgentState, items: List[dict], organization_id: str) -> List[PydanticKnowledgeVaultItem]:
+        """
+        Insert several knowledge vault items, embedding their captions with one batched embedding call.
 
-            knowledge = self.create_item(
+        Every dict holds the `insert_knowledge` arguments `entry_type`, `source`,
+        `sensitivity`, `secret_value` and `caption`.
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag,
+        # in deferred mode they are computed afterwards by the embedding backfill worker
+        embedding_pending = BUILD_EMBEDDINGS_FOR_MEMORY and settings.defer_memory_embeddings
+        if BUILD_EMBEDDINGS_FOR_MEMORY and items and not embedding_pending:
+            embed_model = embedding_model(agent_state.embedding_config)
+            caption_embeddings = embed_model.get_text_embeddings([item['caption'] for item in items])
+            embedding_config = agent_state.embedding_config
+        else:
+            caption_embeddings = [None] * len(items)
+            embedding_config = agent_state.embedding_config if embedding_pending else None
+
+        return [
+            self.create_item(
                 PydanticKnowledgeVaultItem(
-                    entry_type=entry_type,
-                    source=source,
-                    caption=caption,
-                    sensitivity=sensitivity,
-                    secret_value=secret_value,
+                    entry_type=item['entry_type'],
+                    source=item['source'],
+                    caption=item['caption'],
+                    sensitivity=item['sensitivity'],
+                    secret_value=item['secret_value'],
                     organization_id=organization_id,
                     caption_embedding=caption_embedding,
                     embedding_config=embedding_config,
+                    embedding_pending=embedding_pending,
                 )
             )
-            return knowledge
-
-        except Exception as e:
-            raise e
+            for item, caption_embedding in zip(items, caption_embeddings)
+        ]
 
     def get_total_number_of_items(self) -> int:
         """Get the total number of items in the knowledge vault."""
-        with self.session_maker() as session:
-            query = select(func.count(KnowledgeVaultItem.id))
-            result = session.execute(query)
-            return result.scalar_one()
+        return memory_stats.count(KnowledgeVaultItem)
+
+    def iter_texts(self, ids: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Ids and texts (caption and secret value) of all items, or of `ids`, read page by page without loading the table."""
+        return iter_item_texts(self.session_maker, KnowledgeVaultItem, [KnowledgeVaultItem.caption, KnowledgeVaultItem.secret_value],
+                               lambda row: f"{row.caption or ''} {row.secret_value or ''}", ids)
 
     @update_timezone
     @enforce_types
@@ -513,7 +558,8 @@ class KnowledgeVaultManager:
                        search_method: str = 'string_match',
                        timezone_str: str = None,
                        limit: Optional[int] = 50,
-                       sensitivity: Optional[List[str]] = None) -> List[PydanticKnowledgeVaultItem]:
+                       sensitivity: Optional[List[str]] = None,
+                       vector_search_effort: Optional[int] = None) -> List[PydanticKnowledgeVaultItem]:
         """
         Retrieve knowledge vault items according to the query.
 
@@ -526,8 +572,9 @@ class KnowledgeVaultManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the FTS5 index with bm25() ranking on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
+                - 'hybrid': bm25 and embedding candidates fused with reciprocal rank fusion
             timezone_str: Timezone string for timestamp conversion
             limit: Maximum number of results to return
             sensitivity: List of sensitivity levels to filter by. Only items with sensitivity in this list will be returned.
@@ -540,13 +587,20 @@ class KnowledgeVaultManager:
             PostgreSQL's native full-text search with ts_rank_cd for BM25-like scoring. This is much more efficient 
             than loading all documents into memory and leverages your existing GIN indexes.
 
-            **For SQLite users**: 'bm25' now has fallback support that uses in-memory BM25 processing.
+            **For SQLite users**: 'bm25' runs against the FTS5 index of the table, ranked with SQLite's native
+            bm25(). When SQLite is built without FTS5 it falls back to in-memory BM25 processing.
 
             Performance comparison:
             - PostgreSQL 'bm25': Native DB search, very fast, scales well
-            - Fallback 'bm25' (SQLite): In-memory processing, slower for large datasets but still provides 
+            - SQLite 'bm25': FTS5 index, does not load the table into memory
+            - Fallback 'bm25' (SQLite without FTS5): In-memory processing, slower for large datasets but still provides 
               proper BM25 ranking
         """
+        if search_method == 'hybrid' and query != '':
+            return hybrid_search(
+                self.list_knowledge, KnowledgeVaultItem, agent_state, query, search_field,
+                embedded_text=embedded_text, limit=limit, vector_search_effort=vector_search_effort, sensitivity=sensitivity)
+
         with self.session_maker() as session:
 
             if query == '':
@@ -600,7 +654,11 @@ class KnowledgeVaultManager:
                         search_field=getattr(
                             KnowledgeVaultItem, search_field + "_embedding"),
                         target_class=KnowledgeVaultItem,
+                        limit=limit,
+                        candidate_ids=sensitivity_candidate_ids(session, sensitivity),
                     )
+                    apply_vector_search_params(
+                        session, vector_search_effort, limit)
 
                 elif search_method == 'string_match':
 
@@ -616,104 +674,38 @@ class KnowledgeVaultManager:
                         return self._postgresql_fulltext_search(
                             session, base_query, query, search_field, limit, sensitivity
                         )
+                    elif memory_fts_index.is_available(session, KnowledgeVaultItem):
+                        # SQLite FTS5 index, ranked with the native bm25()
+                        knowledge_vault = memory_fts_index.search(
+                            session, KnowledgeVaultItem, query, search_field, limit,
+                            filters=[KnowledgeVaultItem.sensitivity.in_(sensitivity)] if sensitivity is not None else None)
+                        return [item.to_pydantic() for item in knowledge_vault]
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
-                        # Load all candidate items (memory-intensive, kept for compatibility)
-                        fuzzy_query = select(KnowledgeVaultItem)
-
-                        # Add sensitivity filter if provided
-                        if sensitivity is not None:
-                            fuzzy_query = fuzzy_query.where(
-                                KnowledgeVaultItem.sensitivity.in_(sensitivity))
-
-                        result = session.execute(fuzzy_query)
-                        all_items = result.scalars().all()
-
-                        if not all_items:
-                            return []
-
-                        # Prepare documents for BM25
-                        documents = []
-                        valid_items = []
-
-                        for item in all_items:
-                            # Determine which field to use for search
-                            if search_field and hasattr(item, search_field):
-                                text_to_search = getattr(
-                                    item, search_field) or ""
-                            else:
-                                text_to_search = item.caption or ""
-
-                            # Preprocess the text into tokens
-                            tokens = self._preprocess_text_for_bm25(
-                                text_to_search)
-
-                            # Only include items that have tokens after preprocessing
-                            if tokens:
-                                documents.append(tokens)
-                                valid_items.append(item)
-
-                        if not documents:
-                            return []
-
-                        # Initialize BM25 with the documents
-                        bm25 = BM25Okapi(documents)
-
-                        # Preprocess the query
-                        query_tokens = self._preprocess_text_for_bm25(query)
-
-                        if not query_tokens:
-                            # If query has no valid tokens, return most recent items
-                            return [item.to_pydantic() for item in valid_items[:limit]]
-
-                        # Get BM25 scores for all documents
-                        scores = bm25.get_scores(query_tokens)
-
-                        # Create scored items list
-                        scored_items = list(zip(scores, valid_items))
-
-                        # Sort by BM25 score in descending order
-                        scored_items.sort(key=lambda x: x[0], reverse=True)
-
-                        # Get top items based on limit
-                        top_items = [item for score,
-                                     item in scored_items[:limit]]
-                        knowledge_vault = top_items
-
-                        # Return the list after converting to Pydantic
+                        # Fallback to in-memory BM25 when SQLite is built without FTS5
+                        # Incrementally maintained index, ranks like rank_bm25.BM25Okapi
+                        field = search_field if search_field and hasattr(KnowledgeVaultItem, search_field) else 'caption'
+                        # the sensitivity filter changes the corpus statistics, so each filter gets its own index
+                        knowledge_vault = bm25_index_manager.search(
+                            session, KnowledgeVaultItem,
+                            (field, *sorted(sensitivity)) if sensitivity is not None else field,
+                            self._preprocess_text_for_bm25(query), limit,
+                            text_fn=lambda item: getattr(item, field) or "",
+                            tokenizer=self._preprocess_text_for_bm25,
+                            predicate=(lambda item: item.sensitivity in sensitivity) if sensitivity is not None else None,
+                            filters=[KnowledgeVaultItem.sensitivity.in_(sensitivity)] if sensitivity is not None else None,
+                        )
                         return [item.to_pydantic() for item in knowledge_vault]
 
                 elif search_method == 'fuzzy_match':
-                    # Fuzzy matching: load all candidate items into memory,
-                    # then compute fuzzy matching score using RapidFuzz.
-                    fuzzy_query = select(KnowledgeVaultItem)
-
-                    # Add sensitivity filter if provided
-                    if sensitivity is not None:
-                        fuzzy_query = fuzzy_query.where(
-                            KnowledgeVaultItem.sensitivity.in_(sensitivity))
-
-                    result = session.execute(fuzzy_query)
-                    all_items = result.scalars().all()
-                    scored_items = []
-                    for item in all_items:
-                        # Determine which field to use:
-                        # 1. If a search_field is provided (like "description" etc.) use that.
-                        # 2. Otherwise, fallback to the description.
-                        if search_field and hasattr(item, search_field):
-                            text_to_search = getattr(item, search_field)
-                        else:
-                            text_to_search = item.caption
-
-                        # Compute the fuzzy matching score using partial_ratio.
-                        score = fuzz.partial_ratio(
-                            query.lower(), text_to_search.lower())
-                        scored_items.append((score, item))
-
-                    # Sort items descending by score and pick the top ones
-                    scored_items.sort(key=lambda x: x[0], reverse=True)
-                    top_items = [item for score, item in scored_items[:limit]]
-                    return [item.to_pydantic() for item in top_items]
+                    # Cached corpus scored in bulk with rapidfuzz partial_ratio, defaulting to the caption.
+                    field = search_field if search_field and hasattr(KnowledgeVaultItem, search_field) else 'caption'
+                    # one corpus per field, the sensitivity filter restricts the ranked ids
+                    knowledge_vault = fuzzy_index_manager.search(
+                        session, KnowledgeVaultItem, field, query, limit,
+                        text_fn=lambda item: getattr(item, field) or "",
+                        ids=sensitivity_ids(session, sensitivity) if sensitivity is not None else None,
+                    )
+                    return [item.to_pydantic() for item in knowledge_vault]
 
                 if limit:
                     main_query = main_query.limit(limit)
@@ -725,7 +717,13 @@ class KnowledgeVaultManager:
                     data = dict(row._mapping)
                     knowledge_vault.append(KnowledgeVaultItem(**data))
 
-                return [item.to_pydantic() for item in knowledge_vault]
+                knowledge_vault = [item.to_pydantic() for item in knowledge_vault]
+                if search_method == 'embedding':
+                    # rows still waiting for their embeddings are ranked lexically
+                    return merge_pending_embeddings(
+                        self.list_knowledge, KnowledgeVaultItem, agent_state, query, search_field,
+                        knowledge_vault, limit, sensitivity=sensitivity)
+                return knowledge_vault
 
     @enforce_types
     def delete_knowledge_by_id(self, knowledge_vault_item_id: str) -> None:
@@ -735,6 +733,8 @@ class KnowledgeVaultManager:
                 item = KnowledgeVaultItem.read(
                     db_session=session, identifier=knowledge_vault_item_id)
                 item.hard_delete(session)
+                remove_memory_item(KnowledgeVaultItem, knowledge_vault_item_id)
+                memory_versions.bump(KnowledgeVaultItem)
             except NoResultFound:
                 raise NoResultFound(
                     f"Knowledge vault item with id {knowledge_vault_item_id} not found.")
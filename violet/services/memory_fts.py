@@ -0,0 +1,182 @@
+import re
+import string
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import column, literal_column, select, table, text
+from sqlalchemy.engine import Connection
+
+from violet.log import get_logger
+from violet.settings import settings
+
+logger = get_logger(__name__)
+
+# memory table -> searchable text columns, ordered by weight (highest first).
+# The order and weights mirror the `setweight` A-D ranks of the PostgreSQL full-text search.
+FTS_COLUMNS: Dict[str, List[str]] = {
+    "episodic_memory": ["summary", "details", "actor", "event_type"],
+    "semantic_memory": ["name", "summary", "details", "source"],
+    "procedural_memory": ["summary", "steps", "entry_type"],
+    "resource_memory": ["title", "summary", "content", "resource_type"],
+    "knowledge_vault": ["caption", "secret_value"],
+}
+FTS_WEIGHTS = [1.0, 0.4, 0.2, 0.1]
+
+# memory_archive (services/memory_tiering.py) is matched on its lower-cased text, its rows are keyed by hot table and id
+ARCHIVE_FTS_COLUMNS = ["search_text"]
+ARCHIVE_FTS_KEY_COLUMNS = ("table_name", "id")
+
+# unicode61 splits on punctuation and lowercases like `_clean_text_for_search`
+FTS_TOKENIZER = "unicode61 remove_diacritics 0"
+
+
+def fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def fts_keys_table_name(table_name: str) -> str:
+    return f"{table_name}_fts_keys"
+
+
+def create_fts_index(connection: Connection, table_name: str, columns: Optional[List[str]] = None,
+                     key_columns: Tuple[str, ...] = ("id",)) -> None:
+    """
+    Create the FTS5 index of a memory table together with the triggers that keep it in sync.
+
+    The index is contentless, so the text is not stored twice. Its rowids come from a key table
+    mapping the `key_columns` of each row to an INTEGER PRIMARY KEY: the implicit rowids of the
+    memory tables may change on VACUUM, these do not. `columns` default to the FTS_COLUMNS of the
+    table. Existing rows are indexed when the index is created.
+    """
+    fts_table = fts_table_name(table_name)
+    keys_table = fts_keys_table_name(table_name)
+    if _sqlite_table_exists(connection, fts_table):
+        return
+
+    columns = columns or FTS_COLUMNS[table_name]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+    row_values = ", ".join(f"{table_name}.{name}" for name in columns)
+    key_list = ", ".join(key_columns)
+    key_definitions = ", ".join(f"{name} VARCHAR NOT NULL" for name in key_columns)
+
+    def key_of(row: str) -> str:
+        condition = " AND ".join(f"{keys_table}.{name} = {row}.{name}" for name in key_columns)
+        return f"(SELECT fts_rowid FROM {keys_table} WHERE {condition})"
+
+    statements = [
+        f"CREATE TABLE {keys_table} (fts_rowid INTEGER PRIMARY KEY, {key_definitions}, UNIQUE ({key_list}))",
+        f"""CREATE VIRTUAL TABLE {fts_table} USING fts5(
+            {column_list}, content='', tokenize='{FTS_TOKENIZER}'
+        )""",
+        f"""CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table_name} BEGIN
+            INSERT INTO {keys_table}({key_list}) VALUES ({", ".join(f"new.{name}" for name in key_columns)});
+            INSERT INTO {fts_table}(rowid, {column_list}) VALUES ({key_of("new")}, {new_values});
+        END""",
+        f"""CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table_name} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', {key_of("old")}, {old_values});
+            DELETE FROM {keys_table} WHERE fts_rowid = {key_of("old")};
+        END""",
+        # only text changes touch the index, embedding or metadata updates do not
+        f"""CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {column_list} ON {table_name} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', {key_of("old")}, {old_values});
+            INSERT INTO {fts_table}(rowid, {column_list}) VALUES ({key_of("old")}, {new_values});
+        END""",
+        f"INSERT INTO {keys_table}({key_list}) SELECT {key_list} FROM {table_name}",
+        f"""INSERT INTO {fts_table}(rowid, {column_list})
+            SELECT {key_of(table_name)}, {row_values} FROM {table_name}""",
+    ]
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def drop_fts_index(connection: Connection, table_name: str) -> None:
+    """Drop the FTS5 index of a memory table, its key table and its triggers."""
+    fts_table = fts_table_name(table_name)
+    for trigger in ("ai", "ad", "au"):
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts_table}_{trigger}")
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts_table}")
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts_keys_table_name(table_name)}")
+
+
+def _sqlite_table_exists(connection: Connection, name: str) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name},
+    ).first() is not None
+
+
+def build_match_expression(query_text: str, operator: str = "OR") -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression that ORs the query tokens, the same
+    tokens the in-memory BM25 search scores against. With `operator="AND"` every token
+    has to match.
+    """
+    translator = str.maketrans(string.punctuation, " " * len(string.punctuation))
+    cleaned = re.sub(r"\s+", " ", (query_text or "").translate(translator).lower().strip())
+    tokens = list(dict.fromkeys(token for token in cleaned.split() if len(token) > 1))
+    if not tokens:
+        return None
+    return f" {operator} ".join(f'"{token}"' for token in tokens)
+
+
+class MemoryFTSIndex:
+    """SQLite FTS5 keyword search over the memory tables, ranked with the native `bm25()`."""
+
+    def __init__(self):
+        self._available: Dict[str, bool] = {}
+
+    def is_available(self, session, target_class) -> bool:
+        """Whether the FTS5 index of a memory table exists (SQLite only)."""
+        if settings.violet_pg_uri_no_default:
+            return False
+        table_name = target_class.__tablename__
+        if table_name not in self._available:
+            self._available[table_name] = session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": fts_table_name(table_name)},
+            ).first() is not None
+        return self._available[table_name]
+
+    def search(self, session, target_class, query_text: str, search_field: str = "", limit: Optional[int] = 50, filters=None) -> list:
+        """
+        Return the ORM items of `target_class` that match `query_text`, best match first.
+
+        With a `search_field` only that column is matched, otherwise all indexed columns are
+        matched and weighted like the PostgreSQL search. `filters` are extra SQLAlchemy
+        conditions applied before the limit.
+        """
+        match_expression = build_match_expression(query_text)
+        if match_expression is None:
+            # nothing to rank by, return the most recent items like the in-memory search
+            query = select(target_class).where(*(filters or [])).order_by(target_class.created_at.desc())
+            if limit:
+                query = query.limit(limit)
+            return list(session.execute(query).scalars().all())
+
+        table_name = target_class.__tablename__
+        fts_table = fts_table_name(table_name)
+        columns = FTS_COLUMNS[table_name]
+        if search_field in columns:
+            match_expression = f"{search_field} : ({match_expression})"
+            rank = literal_column(f"bm25({fts_table})")
+        else:
+            weights = ", ".join(str(weight) for weight in FTS_WEIGHTS[:len(columns)])
+            rank = literal_column(f"bm25({fts_table}, {weights})")
+
+        fts = table(fts_table, column("rowid"))
+        keys = table(fts_keys_table_name(table_name), column("fts_rowid"), column("id"))
+        query = (
+            select(target_class)
+            .join(keys, keys.c.id == target_class.id)
+            .join(fts, fts.c.rowid == keys.c.fts_rowid)
+            .where(text(f"{fts_table} MATCH :match_expression").bindparams(match_expression=match_expression))
+            .where(*(filters or []))
+            .order_by(rank, target_class.created_at.desc())
+        )
+        if limit:
+            query = query.limit(limit)
+        return list(session.execute(query).scalars().all())
+
+
+# singleton
+memory_fts_index = MemoryFTSIndex()
@@ -0,0 +1,35 @@
+from violet.database.unit_of_work import after_commit
+from violet.services.bm25_index import bm25_index_manager
+from violet.services.embedding_backfill import embedding_backfill
+from violet.services.fuzzy_index import fuzzy_index_manager
+from violet.services.vector_index import vector_index_manager
+
+
+def sync_memory_item(item) -> None:
+    """
+    Propagate a written memory row to the in-process indexes once the write is committed.
+
+    Within a unit of work that rolls back the indexes are left alone, they keep matching the
+    database. `item` must be loaded, as it is after `create` and `update`.
+    """
+    after_commit(_sync_memory_item, item)
+
+
+def remove_memory_item(target_class, item_id: str) -> None:
+    """Drop a deleted memory row from the in-process indexes once the delete is committed."""
+    after_commit(_remove_memory_item, target_class, item_id)
+
+
+def _sync_memory_item(item) -> None:
+    vector_index_manager.sync_item(item)
+    bm25_index_manager.sync_item(item)
+    fuzzy_index_manager.sync_item(item)
+    if item.embedding_pending:
+        embedding_backfill.enqueue(item)
+
+
+def _remove_memory_item(target_class, item_id: str) -> None:
+    vector_index_manager.remove_item(target_class, item_id)
+    bm25_index_manager.remove_item(target_class, item_id)
+    fuzzy_index_manager.remove_item(target_class, item_id)
+    embedding_backfill.discard(target_class, item_id)
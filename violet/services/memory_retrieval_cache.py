@@ -0,0 +1,71 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+
+from violet.database.unit_of_work import after_unit_of_work
+
+
+def _table_name(target: Union[str, type, object]) -> str:
+    return target if isinstance(target, str) else target.__tablename__
+
+
+class MemoryVersions:
+    """
+    Process-wide write counters of the memory tables.
+
+    The managers bump the counter of a table after every insert, update or delete, so a
+    result computed at one version is known to be stale as soon as the counter moves.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, target) -> int:
+        return self._versions[_table_name(target)]
+
+    def bump(self, target) -> None:
+        """Record a write to the table of `target` (a table name, ORM class or ORM row)."""
+        table_name = _table_name(target)
+        with self._lock:
+            self._versions[table_name] += 1
+        # and again when a step's unit of work ends, other threads may read the table before it commits
+        after_unit_of_work(self.bump, table_name)
+
+
+class MemoryRetrievalCache:
+    """
+    Memory retrievals of one `Agent.step`, reused by the following inner steps.
+
+    Entries are keyed on the agent, the memory type and the query, and carry the version
+    of the table they were read from. An entry is only returned while that table has not
+    been written to since, so memory updated by a tool call is re-queried on the next
+    inner step while unchanged memory is not.
+    """
+
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_retrieve(self, memory_type: str, table_name: str, query: Hashable, retrieve: Callable[[], Any]) -> Any:
+        key = (self.agent_id, memory_type, query)
+        # read the version before retrieving, a write during the retrieval makes the entry stale
+        version = memory_versions.get(table_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = retrieve()
+        with self._lock:
+            self._entries[key] = (version, value)
+        return value
+
+
+# singleton
+memory_versions = MemoryVersions()
@@ -0,0 +1,176 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from violet.log import get_logger
+from violet.orm.episodic_memory import EpisodicEvent
+from violet.orm.knowledge_vault import KnowledgeVaultItem
+from violet.orm.memory_stats import MemoryStats
+from violet.orm.procedural_memory import ProceduralMemoryItem
+from violet.orm.resource_memory import ResourceMemoryItem
+from violet.orm.semantic_memory import SemanticMemoryItem
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.settings import settings
+from violet.utils.utils import get_utc_time
+
+logger = get_logger(__name__)
+
+COUNTED_MEMORY_CLASSES = [EpisodicEvent, SemanticMemoryItem, ProceduralMemoryItem, ResourceMemoryItem, KnowledgeVaultItem]
+
+memory_stats_table = MemoryStats.__table__
+
+# session.info key of the count deltas of the current flush
+_SESSION_DELTAS = "memory_count_deltas"
+
+
+def _record_delta(target, delta: int) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_SESSION_DELTAS, defaultdict(int))[target.__tablename__] += delta
+
+
+def _after_insert(mapper, connection, target) -> None:
+    _record_delta(target, 1)
+
+
+def _after_delete(mapper, connection, target) -> None:
+    _record_delta(target, -1)
+
+
+def _after_flush(session, flush_context) -> None:
+    # applied in the writing transaction, so the count commits or rolls back with the rows it
+    # counts; the stats row of a table stays locked until that transaction ends
+    deltas = session.info.pop(_SESSION_DELTAS, None)
+    if not deltas:
+        return
+    connection = session.connection()
+    for table_name, delta in deltas.items():
+        if delta:
+            connection.execute(
+                update(memory_stats_table)
+                .where(memory_stats_table.c.table_name == table_name)
+                .values(item_count=memory_stats_table.c.item_count + delta))
+
+
+for _memory_class in COUNTED_MEMORY_CLASSES:
+    event.listen(_memory_class, "after_insert", _after_insert)
+    event.listen(_memory_class, "after_delete", _after_delete)
+event.listen(Session, "after_flush", _after_flush)
+
+
+class MemoryStatsManager:
+    """
+    Row counts of the memory tables read from the `memory_stats` table instead of COUNT(*).
+
+    Mapper events collect the inserts and deletes of every ORM flush, and the flush applies them
+    to the stats rows with one UPDATE per table in the same transaction. `count` is then a
+    primary key lookup, cached in process until the table is written to again. A table without
+    a stats row is counted once on first use. Writes bypassing the ORM are corrected by
+    `reconcile`, which runs every `memory_stats_reconcile_interval` seconds once `start` is called.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._counts: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def count(self, target_class) -> int:
+        """Number of rows of a memory table."""
+        from violet.server.server import db_context
+
+        table_name = target_class.__tablename__
+        # read the version first, a write during the lookup makes the cached count stale
+        version = memory_versions.get(table_name)
+        cached = self._counts.get(table_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with db_context() as session:
+            item_count = session.execute(
+                select(memory_stats_table.c.item_count).where(memory_stats_table.c.table_name == table_name)
+            ).scalar_one_or_none()
+            if item_count is None:
+                item_count = self._reconcile_table(session, target_class)
+
+        with self._lock:
+            self._counts[table_name] = (version, item_count)
+        return item_count
+
+    def reconcile(self) -> Dict[str, int]:
+        """Recompute every count with COUNT(*). Returns the reconciled counts per table."""
+        from violet.server.server import db_context
+
+        counts = {}
+        with db_context() as session:
+            for target_class in COUNTED_MEMORY_CLASSES:
+                counts[target_class.__tablename__] = self._reconcile_table(session, target_class)
+        with self._lock:
+            self._counts.clear()
+        return counts
+
+    def _reconcile_table(self, session, target_class) -> int:
+        table_name = target_class.__tablename__
+        exists = session.execute(
+            select(memory_stats_table.c.table_name).where(memory_stats_table.c.table_name == table_name)
+        ).first()
+        if exists is None:
+            try:
+                session.execute(insert(memory_stats_table).values(table_name=table_name, item_count=0))
+                session.commit()
+            except IntegrityError:
+                # created concurrently
+                session.rollback()
+
+        # on PostgreSQL, wait for the writers holding the row: the UPDATE below then counts their
+        # rows, and a writer blocked behind it adds its delta to the reconciled count
+        session.execute(
+            select(memory_stats_table.c.table_name)
+            .where(memory_stats_table.c.table_name == table_name)
+            .with_for_update())
+        session.execute(
+            update(memory_stats_table)
+            .where(memory_stats_table.c.table_name == table_name)
+            .values(
+                item_count=select(func.count(target_class.id)).scalar_subquery(),
+                reconciled_at=get_utc_time(),
+            ))
+        session.commit()
+        return session.execute(
+            select(memory_stats_table.c.item_count).where(memory_stats_table.c.table_name == table_name)
+        ).scalar_one()
+
+    def start(self) -> None:
+        """Start the periodic reconciliation, a non-positive interval disables it."""
+        with self._lock:
+            if self._thread is not None or self.interval <= 0:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="memory_stats_reconcile", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopped.set()
+        thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                counts = self.reconcile()
+                logger.debug(f"Reconciled memory counts: {counts}")
+            except Exception as e:
+                logger.warning(f"Memory count reconciliation failed: {e}")
+            self._stopped.wait(self.interval)
+
+
+# singleton
+memory_stats = MemoryStatsManager(interval=settings.memory_stats_reconcile_interval)
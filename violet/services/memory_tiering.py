@@ -0,0 +1,392 @@
+import base64
+import json
+import threading
+import time
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import wraps
+from inspect import signature as inspect_signature
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import and_, bindparam, column, delete, func, insert, inspect, or_, select, table, text, update
+
+from violet.helpers.converters import decode_embedding, encode_embedding
+from violet.log import get_logger
+from violet.orm.episodic_memory import EpisodicEvent
+from violet.orm.memory_archive import MemoryArchiveItem
+from violet.orm.resource_memory import ResourceMemoryItem
+from violet.orm.semantic_memory import SemanticMemoryItem
+from violet.services.memory_fts import build_match_expression, fts_keys_table_name, fts_table_name, memory_fts_index
+from violet.services.memory_index_sync import remove_memory_item, sync_memory_item
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.memory_stats import memory_stats
+from violet.services.memory_tree_paths import (
+    archived_subtree_ids_query,
+    archived_tree_path_rows,
+    archived_tree_paths_table_name,
+    tree_paths_table,
+)
+from violet.settings import settings
+from violet.utils.utils import get_utc_time
+
+logger = get_logger(__name__)
+
+# tiered memory class -> (column of the age of a row, text columns matched by archive searches)
+TIERED_MEMORY_CLASSES = {
+    EpisodicEvent: ("occurred_at", ("event_type", "actor", "summary", "details")),
+    SemanticMemoryItem: ("created_at", ("name", "summary", "details", "source")),
+    ResourceMemoryItem: ("created_at", ("title", "summary", "resource_type", "content")),
+}
+
+
+@dataclass
+class TieringPolicy:
+    """Which hot memory rows move to the archive."""
+
+    # rows older than `min_age`, retrieved at most `max_access_count` times and not within `min_age`
+    min_age: timedelta
+    max_access_count: int
+    # a table above `max_hot_items` rows also archives its coldest surplus regardless of age, 0 disables the cap
+    max_hot_items: int = 0
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, np.ndarray):
+        return {"__embedding__": base64.b64encode(encode_embedding(value)).decode("ascii")}
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and len(value) == 1:
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        if "__embedding__" in value:
+            return decode_embedding(base64.b64decode(value["__embedding__"])).copy()
+    return value
+
+
+def encode_payload(item) -> bytes:
+    """Every column value of an ORM memory row, as compressed JSON."""
+    values = {attr.key: _encode_value(getattr(item, attr.key)) for attr in inspect(type(item)).column_attrs}
+    return zlib.compress(json.dumps(values, ensure_ascii=False).encode("utf-8"))
+
+
+def decode_payload(payload: bytes) -> Dict:
+    """Keyword arguments rebuilding the ORM row encoded by `encode_payload`."""
+    return {key: _decode_value(value) for key, value in json.loads(zlib.decompress(payload)).items()}
+
+
+_recording = threading.local()
+
+
+def records_access(target_class):
+    """
+    Count the items returned by a manager `list_*` method as retrieved.
+
+    Only searches, calls with a non-empty `query`, are counted: plain listings for exports
+    and statistics are not retrievals. Calls made from within another recorded call, e.g.
+    the candidate searches of a hybrid search, are not counted again.
+    """
+
+    def decorator(func):
+        signature = inspect_signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            depth = getattr(_recording, "depth", 0)
+            _recording.depth = depth + 1
+            try:
+                results = func(*args, **kwargs)
+            finally:
+                _recording.depth = depth
+            if depth == 0 and results and signature.bind_partial(*args, **kwargs).arguments.get("query"):
+                memory_tiering.record_access(target_class, [item.id for item in results])
+            return results
+
+        return wrapper
+
+    return decorator
+
+
+class MemoryTieringManager:
+    """
+    Hot/cold tiering of the episodic, semantic and resource memory tables.
+
+    Retrievals are counted in process by `record_access` and written to the `access_count`
+    and `last_accessed_at` columns every `flush_interval` seconds. Every `interval` seconds
+    the rows selected by the `TieringPolicy` are moved, in batches, to the compressed
+    `memory_archive` table. The hot tables, and so every default search, only hold the
+    remaining rows; archived rows are found with `search_archive` and moved back with `restore`.
+    """
+
+    def __init__(self, policy: TieringPolicy, interval: float, flush_interval: float, batch_size: int):
+        self.policy = policy
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # (table name, item id) -> (retrievals, last retrieval) not written yet
+        self._accesses: Dict[Tuple[str, str], Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_access(self, target_class, ids: List[str]) -> None:
+        if target_class not in TIERED_MEMORY_CLASSES:
+            return
+        now = get_utc_time()
+        with self._lock:
+            for item_id in ids:
+                hits, _ = self._accesses.get((target_class.__tablename__, item_id), (0, now))
+                self._accesses[(target_class.__tablename__, item_id)] = (hits + 1, now)
+
+    def flush_access(self) -> int:
+        """Write the recorded retrievals. Returns the number of items updated."""
+        from violet.server.server import db_context
+
+        with self._lock:
+            accesses, self._accesses = self._accesses, {}
+        if not accesses:
+            return 0
+
+        rows = defaultdict(list)
+        for (table_name, item_id), (hits, accessed_at) in accesses.items():
+            rows[table_name].append({"item_id": item_id, "hits": hits, "accessed_at": accessed_at})
+        with db_context() as session:
+            for target_class in TIERED_MEMORY_CLASSES:
+                if not rows[target_class.__tablename__]:
+                    continue
+                table = target_class.__table__
+                # a core UPDATE, the access columns do not invalidate cached retrievals
+                session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("item_id"))
+                    .values(access_count=table.c.access_count + bindparam("hits"),
+                            last_accessed_at=bindparam("accessed_at")),
+                    rows[target_class.__tablename__])
+            session.commit()
+        return len(accesses)
+
+    def cold_ids(self, target_class) -> List[str]:
+        """Ids of the next batch of rows of `target_class` to archive under the policy."""
+        from violet.server.server import db_context
+
+        time_column = getattr(target_class, TIERED_MEMORY_CLASSES[target_class][0])
+        # timestamps are stored as naive UTC
+        cutoff = get_utc_time().replace(tzinfo=None) - self.policy.min_age
+        last_seen = func.coalesce(target_class.last_accessed_at, time_column)
+
+        with db_context() as session:
+            ids = session.execute(
+                select(target_class.id)
+                .where(time_column < cutoff,
+                       target_class.access_count <= self.policy.max_access_count,
+                       or_(target_class.last_accessed_at.is_(None), target_class.last_accessed_at < cutoff))
+                .order_by(last_seen, target_class.id)
+                .limit(self.batch_size)
+            ).scalars().all()
+            if ids or not self.policy.max_hot_items:
+                return list(ids)
+
+            surplus = memory_stats.count(target_class) - self.policy.max_hot_items
+            if surplus <= 0:
+                return []
+            return list(session.execute(
+                select(target_class.id)
+                .order_by(target_class.access_count, last_seen, target_class.id)
+                .limit(min(surplus, self.batch_size))
+            ).scalars().all())
+
+    def archive(self, target_class, ids: List[str]) -> int:
+        """Move rows of `target_class` to the archive. Returns the number of rows moved."""
+        from violet.server.server import db_context
+
+        time_attribute, text_columns = TIERED_MEMORY_CLASSES[target_class]
+        archived_at = get_utc_time()
+        with db_context() as session:
+            items = session.execute(select(target_class).where(target_class.id.in_(ids))).scalars().all()
+            for item in items:
+                session.add(MemoryArchiveItem(
+                    table_name=target_class.__tablename__,
+                    id=item.id,
+                    organization_id=item.organization_id,
+                    occurred_at=getattr(item, time_attribute) or item.created_at,
+                    access_count=item.access_count or 0,
+                    last_accessed_at=item.last_accessed_at,
+                    archived_at=archived_at,
+                    search_text=" ".join(str(getattr(item, column) or "") for column in text_columns).lower(),
+                    payload=encode_payload(item),
+                ))
+                # ORM deletes, so the row counts and tree path index follow
+                session.delete(item)
+                # the archive keeps its own path rows, subtree searches of the archive stay index lookups
+                path_rows = archived_tree_path_rows(target_class, item.id, item.tree_path)
+                if path_rows:
+                    session.execute(insert(tree_paths_table), path_rows)
+            session.commit()
+
+        for item in items:
+            remove_memory_item(target_class, item.id)
+        if items:
+            memory_versions.bump(target_class)
+        return len(items)
+
+    def restore(self, target_class, ids: List[str]) -> list:
+        """Move archived rows of `target_class` back to the hot table. Returns the restored items."""
+        from violet.server.server import db_context
+
+        with db_context() as session:
+            archived = session.execute(
+                select(MemoryArchiveItem)
+                .where(MemoryArchiveItem.table_name == target_class.__tablename__, MemoryArchiveItem.id.in_(ids))
+            ).scalars().all()
+            items = [target_class(**decode_payload(row.payload)) for row in archived]
+            session.add_all(items)
+            for row in archived:
+                session.delete(row)
+            session.execute(delete(tree_paths_table).where(
+                tree_paths_table.c.table_name == archived_tree_paths_table_name(target_class),
+                tree_paths_table.c.item_id.in_([row.id for row in archived])))
+            session.commit()
+
+            # loads the expired rows before the index sync, which may run after the session is closed
+            restored = [item.to_pydantic() for item in items]
+            for item in items:
+                sync_memory_item(item)
+            if items:
+                memory_versions.bump(target_class)
+            return restored
+
+    def search_archive(self, target_class, query: str = '', limit: Optional[int] = 50,
+                       organization_id: Optional[str] = None, tree_path_prefix: Optional[List[str]] = None) -> list:
+        """
+        Archived items of `target_class` containing every word of `query`, most recent first.
+
+        Words are matched against the lower-cased text columns of the items through the full-text
+        index of the archive, an empty query matches every item. The tree path prefix is matched
+        against the archived path rows, so only the returned payloads are decoded.
+        """
+        from violet.server.server import db_context
+
+        statement = (
+            select(MemoryArchiveItem.payload)
+            .where(MemoryArchiveItem.table_name == target_class.__tablename__)
+            .order_by(MemoryArchiveItem.occurred_at.desc(), MemoryArchiveItem.id.desc())
+        )
+        if organization_id:
+            statement = statement.where(MemoryArchiveItem.organization_id == organization_id)
+        if tree_path_prefix:
+            statement = statement.where(
+                MemoryArchiveItem.id.in_(archived_subtree_ids_query(target_class, tree_path_prefix)))
+        if limit:
+            statement = statement.limit(limit)
+
+        with db_context() as session:
+            statement = self._match_words(session, statement, query.lower())
+            payloads = session.execute(statement).scalars().all()
+        return [target_class(**decode_payload(payload)).to_pydantic() for payload in payloads]
+
+    @staticmethod
+    def _match_words(session, statement, query: str):
+        """Restrict an archive select to the rows containing every word of `query`."""
+        if not query.split():
+            return statement
+        if settings.violet_pg_uri_no_default:
+            # matches the expression of ix_memory_archive_search_text
+            return statement.where(text(
+                "to_tsvector('simple', memory_archive.search_text) @@ plainto_tsquery('simple', :archive_query)"
+            ).bindparams(archive_query=query))
+
+        match_expression = build_match_expression(query, operator="AND")
+        if match_expression and memory_fts_index.is_available(session, MemoryArchiveItem):
+            fts = table(fts_table_name(MemoryArchiveItem.__tablename__), column("rowid"))
+            keys = table(fts_keys_table_name(MemoryArchiveItem.__tablename__),
+                         column("fts_rowid"), column("table_name"), column("id"))
+            return (
+                statement
+                .join(keys, and_(keys.c.table_name == MemoryArchiveItem.table_name, keys.c.id == MemoryArchiveItem.id))
+                .join(fts, fts.c.rowid == keys.c.fts_rowid)
+                .where(text(f"{fts.name} MATCH :archive_match").bindparams(archive_match=match_expression))
+            )
+
+        # SQLite without FTS5, or a query of one-letter words the index does not hold
+        for word in query.split():
+            statement = statement.where(MemoryArchiveItem.search_text.contains(word, autoescape=True))
+        return statement
+
+    def count_archived(self, target_class) -> int:
+        from violet.server.server import db_context
+
+        with db_context() as session:
+            return session.execute(
+                select(func.count()).where(MemoryArchiveItem.table_name == target_class.__tablename__)
+            ).scalar_one()
+
+    def run_once(self) -> Dict[str, int]:
+        """Write the recorded retrievals and archive every cold row. Returns the rows archived per table."""
+        self.flush_access()
+        counts = {}
+        for target_class in TIERED_MEMORY_CLASSES:
+            counts[target_class.__tablename__] = 0
+            while True:
+                ids = self.cold_ids(target_class)
+                archived = self.archive(target_class, ids) if ids else 0
+                if not archived:
+                    break
+                counts[target_class.__tablename__] += archived
+        return counts
+
+    def start(self) -> None:
+        """Start flushing retrievals and, with a positive interval, the periodic tiering."""
+        with self._lock:
+            if self._thread is not None or self.flush_interval <= 0:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="memory_tiering", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopped.set()
+        thread.join(timeout)
+        try:
+            self.flush_access()
+        except Exception as e:
+            logger.warning(f"Failed to write memory retrieval counts: {e}")
+
+    def _run(self) -> None:
+        next_tiering = time.monotonic() + self.interval
+        while not self._stopped.is_set():
+            try:
+                if self.interval > 0 and time.monotonic() >= next_tiering:
+                    counts = self.run_once()
+                    logger.debug(f"Archived cold memory rows: {counts}")
+                    next_tiering = time.monotonic() + self.interval
+                else:
+                    self.flush_access()
+            except Exception as e:
+                logger.warning(f"Memory tiering failed: {e}")
+            self._stopped.wait(self.flush_interval)
+
+
+# singleton
+memory_tiering = MemoryTieringManager(
+    policy=TieringPolicy(
+        min_age=timedelta(days=settings.memory_tiering_min_age_days),
+        max_access_count=settings.memory_tiering_max_access_count,
+        max_hot_items=settings.memory_tiering_max_hot_items,
+    ),
+    interval=settings.memory_tiering_interval,
+    flush_interval=settings.memory_access_flush_interval,
+    batch_size=settings.memory_tiering_batch_size,
+)
@@ -0,0 +1,143 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, func, insert, inspect, select
+
+from violet.orm.episodic_memory import EpisodicEvent
+from violet.orm.memory_tree_path import MemoryTreePath
+from violet.orm.procedural_memory import ProceduralMemoryItem
+from violet.orm.resource_memory import ResourceMemoryItem
+from violet.orm.semantic_memory import SemanticMemoryItem
+from violet.settings import settings
+
+TREE_PATH_CLASSES = [EpisodicEvent, SemanticMemoryItem, ProceduralMemoryItem, ResourceMemoryItem]
+
+tree_paths_table = MemoryTreePath.__table__
+
+
+def normalize_tree_path(tree_path: Optional[List[str]]) -> List[str]:
+    """Segments stripped and lower-cased, empty segments dropped."""
+    return [segment for segment in (str(segment).strip().lower() for segment in tree_path or []) if segment]
+
+
+def tree_path_key(segments: List[str]) -> str:
+    return json.dumps(segments, ensure_ascii=False)
+
+
+def in_subtree(tree_path: Optional[List[str]], prefix: Optional[List[str]]) -> bool:
+    """Whether an item with `tree_path` is under `prefix`; every item is under an empty prefix."""
+    prefix = normalize_tree_path(prefix)
+    return normalize_tree_path(tree_path)[:len(prefix)] == prefix
+
+
+def tree_path_rows(table_name: str, item_id: str, tree_path: Optional[List[str]]) -> List[Dict]:
+    """One row per non-empty prefix of `tree_path`."""
+    segments = normalize_tree_path(tree_path)
+    return [{"table_name": table_name, "path": tree_path_key(segments[:depth]), "item_id": item_id, "depth": depth}
+            for depth in range(1, len(segments) + 1)]
+
+
+def _insert_paths(connection, target) -> None:
+    rows = tree_path_rows(target.__tablename__, target.id, target.tree_path)
+    if rows:
+        connection.execute(insert(tree_paths_table), rows)
+
+
+def _delete_paths(connection, target) -> None:
+    connection.execute(delete(tree_paths_table).where(
+        tree_paths_table.c.table_name == target.__tablename__, tree_paths_table.c.item_id == target.id))
+
+
+# mapper events run on the connection of the flush, the paths commit or roll back with the row
+def _after_insert(mapper, connection, target) -> None:
+    _insert_paths(connection, target)
+
+
+def _after_update(mapper, connection, target) -> None:
+    if inspect(target).attrs.tree_path.history.has_changes():
+        _delete_paths(connection, target)
+        _insert_paths(connection, target)
+
+
+def _after_delete(mapper, connection, target) -> None:
+    _delete_paths(connection, target)
+
+
+for _memory_class in TREE_PATH_CLASSES:
+    event.listen(_memory_class, "after_insert", _after_insert)
+    event.listen(_memory_class, "after_update", _after_update)
+    event.listen(_memory_class, "after_delete", _after_delete)
+
+
+def subtree_ids_query(target_class, prefix: List[str]):
+    """Select of the ids of the items of `target_class` under `prefix`."""
+    return select(tree_paths_table.c.item_id).where(
+        tree_paths_table.c.table_name == target_class.__tablename__,
+        tree_paths_table.c.path == tree_path_key(normalize_tree_path(prefix)))
+
+
+def archived_tree_paths_table_name(target_class) -> str:
+    """`table_name` of the paths of the items of `target_class` moved to the memory archive."""
+    return f"memory_archive.{target_class.__tablename__}"
+
+
+def archived_tree_path_rows(target_class, item_id: str, tree_path: Optional[List[str]]) -> List[Dict]:
+    """Path rows of an archived item, kept apart from those of the hot table."""
+    return tree_path_rows(archived_tree_paths_table_name(target_class), item_id, tree_path)
+
+
+def archived_subtree_ids_query(target_class, prefix: List[str]):
+    """Select of the ids of the archived items of `target_class` under `prefix`."""
+    return select(tree_paths_table.c.item_id).where(
+        tree_paths_table.c.table_name == archived_tree_paths_table_name(target_class),
+        tree_paths_table.c.path == tree_path_key(normalize_tree_path(prefix)))
+
+
+def subtree_filter(target_class, prefix: List[str]):
+    """SQL condition restricting `target_class` to the items under `prefix`."""
+    return target_class.id.in_(subtree_ids_query(target_class, prefix))
+
+
+def subtree_sql_filter(table_name: str, prefix: List[str]) -> Tuple[str, Dict[str, str]]:
+    """The same condition for the raw SQL full-text searches, as a WHERE fragment and its parameters."""
+    return (
+        " AND id IN (SELECT item_id FROM memory_tree_paths WHERE table_name = :tree_table AND path = :tree_path)",
+        {"tree_table": table_name, "tree_path": tree_path_key(normalize_tree_path(prefix))},
+    )
+
+
+def list_subtree(session, target_class, prefix: List[str], limit: Optional[int] = 50) -> list:
+    """ORM items under `prefix`, most recently created first."""
+    query = (
+        select(target_class)
+        .join(tree_paths_table, and_(
+            tree_paths_table.c.table_name == target_class.__tablename__,
+            tree_paths_table.c.path == tree_path_key(normalize_tree_path(prefix)),
+            tree_paths_table.c.item_id == target_class.id))
+        .order_by(target_class.created_at.desc(), target_class.id.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    return list(session.execute(query).scalars().all())
+
+
+def count_subtree(session, target_class, prefix: List[str]) -> int:
+    """Number of items under `prefix`, read from the path index only."""
+    return session.execute(
+        select(func.count()).select_from(subtree_ids_query(target_class, prefix).subquery())).scalar_one()
+
+
+def subtree_candidate_ids(session, target_class, prefix: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    Ids under `prefix` to restrict the in-process vector ranking to, None without a prefix.
+
+    On PostgreSQL the subtree condition of the query is applied by the database itself.
+    """
+    if not prefix or settings.violet_pg_uri_no_default:
+        return None
+    return subtree_ids(session, target_class, prefix)
+
+
+def subtree_ids(session, target_class, prefix: List[str]) -> List[str]:
+    """Ids of the items of `target_class` under `prefix`, read from the path index only."""
+    return list(session.execute(subtree_ids_query(target_class, prefix)).scalars().all())
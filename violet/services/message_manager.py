@@ -61,8 +61,15 @@ class MessageManager:
 
     @enforce_types
     def create_many_messages(self, pydantic_msgs: List[PydanticMessage], actor: PydanticUser) -> List[PydanticMessage]:
-        """Create multiple messages."""
-        return [self.create_message(m, actor=actor) for m in pydantic_msgs]
+        """Create multiple messages in one transaction, returned in the order given."""
+        with self.session_maker() as session:
+            msgs = []
+            for pydantic_msg in pydantic_msgs:
+                # Set the organization id of the Pydantic message
+                pydantic_msg.organization_id = actor.organization_id
+                msgs.append(MessageModel(**pydantic_msg.model_dump()))
+            MessageModel.batch_create(msgs, db_session=session, actor=actor)
+            return [msg.to_pydantic() for msg in msgs]
 
     @enforce_types
     def update_message_by_id(self, message_id: str, message_update: MessageUpdate, actor: PydanticUser) -> PydanticMessage:
@@ -1,12 +1,11 @@
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import json
 import string
 import re
 import time
 
 import numpy as np
-from rank_bm25 import BM25Okapi
 from violet.orm.errors import NoResultFound
 from violet.orm.procedural_memory import ProceduralMemoryItem
 from violet.schemas.user import User as PydanticUser
@@ -22,8 +21,24 @@ from violet.schemas.agent import AgentState
 from violet.llm_api.embeddings import embedding_model, parse_and_chunk_text
 from violet.schemas.embedding_config import EmbeddingConfig
 from sqlalchemy import Select, func, literal, select, union_all
-from violet.services.utils import build_query, update_timezone
-from rapidfuzz import fuzz
+from violet.database.pgvector_indexes import apply_vector_search_params
+from violet.services.utils import build_query, hybrid_search, iter_item_texts, merge_pending_embeddings, update_timezone
+from violet.services.bm25_index import bm25_index_manager
+from violet.services.fuzzy_index import fuzzy_index_manager
+from violet.services.memory_index_sync import remove_memory_item, sync_memory_item
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.memory_stats import memory_stats
+from violet.services.memory_tree_paths import (
+    count_subtree,
+    in_subtree,
+    list_subtree,
+    normalize_tree_path,
+    subtree_candidate_ids,
+    subtree_filter,
+    subtree_ids,
+    subtree_sql_filter,
+)
+from violet.services.memory_fts import memory_fts_index
 from violet.settings import settings
 from violet.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 
@@ -80,6 +95,21 @@ class ProceduralMemoryManager:
                   and len(token) > 1]
         return tokens
 
+    def _procedure_text_for_bm25(self, item, search_field: str) -> str:
+        """Text of a procedure that BM25 search scores for the given field ('all' joins every text field)."""
+        if isinstance(item.steps, list):
+            steps_text = ' '.join(item.steps)
+        else:
+            steps_text = str(item.steps) if item.steps else ""
+
+        if search_field == 'summary':
+            return item.summary or ""
+        if search_field == 'steps':
+            return steps_text
+        if search_field == 'entry_type':
+            return item.entry_type or ""
+        return ' '.join([item.summary or "", item.entry_type or "", steps_text])
+
     def _parse_embedding_field(self, embedding_value):
         """
         Helper method to parse embedding field from different PostgreSQL return formats.
@@ -181,7 +211,7 @@ class ProceduralMemoryManager:
 
         return word_matches
 
-    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit):
+    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit, tree_path_prefix=None):
         """
         Efficient PostgreSQL-native full-text search using ts_rank_cd for BM25-like functionality.
         This method leverages PostgreSQL's built-in full-text search capabilities and GIN indexes.
@@ -192,6 +222,7 @@ class ProceduralMemoryManager:
             query_text: Search query string
             search_field: Field to search in ('summary', 'steps', 'entry_type', etc.)
             limit: Maximum number of results to return
+            tree_path_prefix: Only search items under this category
 
         Returns:
             List of ProceduralMemoryItem objects ranked by relevance
@@ -259,6 +290,11 @@ class ProceduralMemoryManager:
                 setweight(to_tsvector('english', coalesce(entry_type, '')), 'C'),
                 to_tsquery('english', :tsquery), 32)"""
 
+        # Restrict to a tree path subtree if provided
+        tree_path_filter, tree_path_params = "", {}
+        if tree_path_prefix:
+            tree_path_filter, tree_path_params = subtree_sql_filter("procedural_memory", tree_path_prefix)
+
         # Try AND query first for more precise results
         try:
             and_query_sql = text(f"""
@@ -268,14 +304,15 @@ class ProceduralMemoryManager:
                     organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM procedural_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = list(session.execute(and_query_sql, {
                 'tsquery': tsquery_string_and,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             }))
 
             # If AND query returns sufficient results, use them
@@ -319,14 +356,15 @@ class ProceduralMemoryManager:
                     organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM procedural_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = session.execute(or_query_sql, {
                 'tsquery': tsquery_string_or,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             })
 
             procedures = []
@@ -434,6 +472,8 @@ class ProceduralMemoryManager:
         with self.session_maker() as session:
             item = ProceduralMemoryItem(**data_dict)
             item.create(session)
+            sync_memory_item(item)
+            memory_versions.bump(item)
             return item.to_pydantic()
 
     @enforce_types
@@ -448,6 +488,8 @@ class ProceduralMemoryManager:
                     setattr(item, k, v)
             item.updated_at = item_update.updated_at  # or get_utc_time
             item.update(session, actor=actor)
+            sync_memory_item(item)
+            memory_versions.bump(item)
             return item.to_pydantic()
 
     @enforce_types
@@ -457,10 +499,27 @@ class ProceduralMemoryManager:
 
     def get_total_number_of_items(self) -> int:
         """Get the total number of items in the procedural memory."""
+        return memory_stats.count(ProceduralMemoryItem)
+
+    def iter_texts(self, ids: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Ids and texts (summary and steps) of all procedures, or of `ids`, read page by page without loading the table."""
+        return iter_item_texts(self.session_maker, ProceduralMemoryItem, [ProceduralMemoryItem.summary, ProceduralMemoryItem.steps],
+                               lambda row: f"{row.summary or ''} {' '.join(row.steps or [])}", ids)
+
+    @update_timezone
+    @enforce_types
+    def list_procedures_in_subtree(self,
+                                   tree_path: List[str],
+                                   limit: Optional[int] = 50,
+                                   timezone_str: str = None) -> List[PydanticProceduralMemoryItem]:
+        """List the procedures under a tree path category, most recently created first."""
+        with self.session_maker() as session:
+            return [procedure.to_pydantic() for procedure in list_subtree(session, ProceduralMemoryItem, tree_path, limit)]
+
+    def count_procedures_in_subtree(self, tree_path: List[str]) -> int:
+        """Count the procedures under a tree path category."""
         with self.session_maker() as session:
-            query = select(func.count(ProceduralMemoryItem.id))
-            result = session.execute(query)
-            return result.scalar_one()
+            return count_subtree(session, ProceduralMemoryItem, tree_path)
 
     @update_timezone
     @enforce_types
@@ -471,7 +530,9 @@ class ProceduralMemoryManager:
                         search_field: str = '',
                         search_method: str = 'embedding',
                         limit: Optional[int] = 50,
-                        timezone_str: str = None) -> List[PydanticProceduralMemoryItem]:
+                        timezone_str: str = None,
+                        vector_search_effort: Optional[int] = None,
+                        tree_path_prefix: Optional[List[str]] = None) -> List[PydanticProceduralMemoryItem]:
         """
         List procedural memory items with various search methods.
 
@@ -484,10 +545,14 @@ class ProceduralMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the FTS5 index with bm25() ranking on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
+                - 'hybrid': bm25 and embedding candidates fused with reciprocal rank fusion
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
+            vector_search_effort: Recall/latency knob of the pgvector ANN index for embedding search
+                (hnsw.ef_search or ivfflat.probes), defaults to the configured value
+            tree_path_prefix: Only return items under this category, a prefix of their tree_path
 
         Returns:
             List of procedural memory items matching the search criteria
@@ -497,18 +562,28 @@ class ProceduralMemoryManager:
             PostgreSQL's native full-text search with ts_rank_cd for BM25-like scoring. This is much more efficient 
             than loading all documents into memory and leverages your existing GIN indexes.
 
-            **For SQLite users**: 'bm25' now has fallback support that uses in-memory BM25 processing.
+            **For SQLite users**: 'bm25' runs against the FTS5 index of the table, ranked with SQLite's native
+            bm25(). When SQLite is built without FTS5 it falls back to in-memory BM25 processing.
 
             Performance comparison:
             - PostgreSQL 'bm25': Native DB search, very fast, scales well
-            - Fallback 'bm25' (SQLite): In-memory processing, slower for large datasets but still provides 
+            - SQLite 'bm25': FTS5 index, does not load the table into memory
+            - Fallback 'bm25' (SQLite without FTS5): In-memory processing, slower for large datasets but still provides 
               proper BM25 ranking
         """
+        if search_method == 'hybrid' and query != '':
+            return hybrid_search(
+                self.list_procedures, ProceduralMemoryItem, agent_state, query, search_field,
+                embedded_text=embedded_text, limit=limit, vector_search_effort=vector_search_effort,
+                tree_path_prefix=tree_path_prefix)
+
         with self.session_maker() as session:
 
             if query == '':
                 query_stmt = select(ProceduralMemoryItem).order_by(
                     ProceduralMemoryItem.created_at.desc())
+                if tree_path_prefix:
+                    query_stmt = query_stmt.where(subtree_filter(ProceduralMemoryItem, tree_path_prefix))
                 if limit:
                     query_stmt = query_stmt.limit(limit)
                 result = session.execute(query_stmt)
@@ -535,6 +610,8 @@ class ProceduralMemoryManager:
                     ProceduralMemoryItem.last_modify.label("last_modify"),
                     ProceduralMemoryItem.tree_path.label("tree_path"),
                 )
+                if tree_path_prefix:
+                    base_query = base_query.where(subtree_filter(ProceduralMemoryItem, tree_path_prefix))
 
                 if search_method == 'embedding':
 
@@ -547,7 +624,11 @@ class ProceduralMemoryManager:
                         search_field=eval(
                             "ProceduralMemoryItem." + search_field + "_embedding"),
                         target_class=ProceduralMemoryItem,
+                        limit=limit,
+                        candidate_ids=subtree_candidate_ids(session, ProceduralMemoryItem, tree_path_prefix),
                     )
+                    apply_vector_search_params(
+                        session, vector_search_effort, limit)
 
                 elif search_method == 'string_match':
 
@@ -576,108 +657,41 @@ class ProceduralMemoryManager:
                     if settings.violet_pg_uri_no_default:
                         # Use PostgreSQL native full-text search
                         return self._postgresql_fulltext_search(
-                            session, base_query, query, search_field, limit
+                            session, base_query, query, search_field, limit, tree_path_prefix
                         )
+                    elif memory_fts_index.is_available(session, ProceduralMemoryItem):
+                        # SQLite FTS5 index, ranked with the native bm25()
+                        procedural_items = memory_fts_index.search(
+                            session, ProceduralMemoryItem, query, search_field, limit,
+                            filters=[subtree_filter(ProceduralMemoryItem, tree_path_prefix)] if tree_path_prefix else None)
+                        return [item.to_pydantic() for item in procedural_items]
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
-                        # Load all candidate items (memory-intensive, kept for compatibility)
-                        result = session.execute(select(ProceduralMemoryItem))
-                        all_items = result.scalars().all()
-
-                        if not all_items:
-                            return []
-
-                        # Prepare documents for BM25
-                        documents = []
-                        valid_items = []
-
-                        for item in all_items:
-                            # Determine which field to use for search
-                            if search_field == 'summary':
-                                text_to_search = item.summary or ""
-                            elif search_field == 'steps':
-                                # Convert JSON array to text for searching
-                                if isinstance(item.steps, list):
-                                    text_to_search = ' '.join(item.steps)
-                                else:
-                                    text_to_search = str(
-                                        item.steps) if item.steps else ""
-                            elif search_field == 'entry_type':
-                                text_to_search = item.entry_type or ""
-                            else:
-                                # Default to searching across all text fields
-                                texts = [
-                                    item.summary or "",
-                                    item.entry_type or ""
-                                ]
-                                # Handle steps field conversion
-                                if isinstance(item.steps, list):
-                                    texts.append(' '.join(item.steps))
-                                else:
-                                    texts.append(str(item.steps)
-                                                 if item.steps else "")
-                                text_to_search = ' '.join(texts)
-
-                            # Preprocess the text into tokens
-                            tokens = self._preprocess_text_for_bm25(
-                                text_to_search)
-
-                            # Only include items that have tokens after preprocessing
-                            if tokens:
-                                documents.append(tokens)
-                                valid_items.append(item)
-
-                        if not documents:
-                            return []
-
-                        # Initialize BM25 with the documents
-                        bm25 = BM25Okapi(documents)
-
-                        # Preprocess the query
-                        query_tokens = self._preprocess_text_for_bm25(query)
-
-                        if not query_tokens:
-                            # If query has no valid tokens, return most recent items
-                            return [item.to_pydantic() for item in valid_items[:limit]]
-
-                        # Get BM25 scores for all documents
-                        scores = bm25.get_scores(query_tokens)
-
-                        # Create scored items list
-                        scored_items = list(zip(scores, valid_items))
-
-                        # Sort by BM25 score in descending order
-                        scored_items.sort(key=lambda x: x[0], reverse=True)
-
-                        # Get top items based on limit
-                        top_items = [item for score,
-                                     item in scored_items[:limit]]
-
-                        # Return the list after converting to Pydantic
-                        return [item.to_pydantic() for item in top_items]
+                        # Fallback to in-memory BM25 when SQLite is built without FTS5
+                        # Incrementally maintained index, ranks like rank_bm25.BM25Okapi
+                        field = search_field if search_field in ('summary', 'steps', 'entry_type') else 'all'
+                        # the tree path filter restricts the corpus, so each subtree gets its own index
+                        procedural_items = bm25_index_manager.search(
+                            session, ProceduralMemoryItem,
+                            (field, *normalize_tree_path(tree_path_prefix)) if tree_path_prefix else field,
+                            self._preprocess_text_for_bm25(query), limit,
+                            text_fn=lambda item: self._procedure_text_for_bm25(item, field),
+                            tokenizer=self._preprocess_text_for_bm25,
+                            predicate=(lambda item: in_subtree(item.tree_path, tree_path_prefix)) if tree_path_prefix else None,
+                            filters=[subtree_filter(ProceduralMemoryItem, tree_path_prefix)] if tree_path_prefix else None,
+                        )
+                        return [item.to_pydantic() for item in procedural_items]
 
                 elif search_method == 'fuzzy_match':
-                    # For fuzzy matching, load all candidate items into memory.
-                    result = session.execute(select(ProceduralMemoryItem))
-                    all_items = result.scalars().all()
-                    scored_items = []
-                    for item in all_items:
-                        # Use the provided search_field if available; default to 'description'
-                        if search_field and hasattr(item, search_field):
-                            text_to_search = getattr(item, search_field)
-                        else:
-                            text_to_search = item.summary
-
-                        # Compute a fuzzy matching score using partial_ratio,
-                        # which is suited for comparing a short query to longer text.
-                        score = fuzz.partial_ratio(
-                            query.lower(), text_to_search.lower())
-                        scored_items.append((score, item))
-
-                    # Sort items by score in descending order and select the top ones.
-                    scored_items.sort(key=lambda x: x[0], reverse=True)
-                    top_items = [item for score, item in scored_items[:limit]]
-                    return [item.to_pydantic() for item in top_items]
+                    # Cached corpus scored in bulk with rapidfuzz partial_ratio, defaulting to the summary.
+                    # Steps are a list and are matched as one text.
+                    field = search_field if search_field and hasattr(ProceduralMemoryItem, search_field) else 'summary'
+                    # one corpus per field, the tree path filter restricts the ranked ids
+                    procedural_items = fuzzy_index_manager.search(
+                        session, ProceduralMemoryItem, field, query, limit,
+                        text_fn=lambda item: self._procedure_text_for_bm25(item, field),
+                        ids=subtree_ids(session, ProceduralMemoryItem, tree_path_prefix) if tree_path_prefix else None,
+                    )
+                    return [item.to_pydantic() for item in procedural_items]
 
                 if limit:
                     main_query = main_query.limit(limit)
@@ -689,7 +703,13 @@ class ProceduralMemoryManager:
                     data = dict(row._mapping)
                     procedures.append(ProceduralMemoryItem(**data))
 
-                return [procedure.to_pydantic() for procedure in procedures]
+                procedures = [procedure.to_pydantic() for procedure in procedures]
+                if search_method == 'embedding':
+                    # rows still waiting for their embeddings are ranked lexically
+                    return merge_pending_embeddings(
+                        self.list_procedures, ProceduralMemoryItem, agent_state, query, search_field,
+                        procedures, limit, tree_path_prefix=tree_path_prefix)
+                return procedures
 
     @enforce_types
     def insert_procedure(self,
@@ -700,37 +720,50 @@ class ProceduralMemoryManager:
                          organization_id: str,
                          tree_path: Optional[List[str]] = None) -> PydanticProceduralMemoryItem:
 
-        try:
+        return self.insert_procedures(
+            agent_state=agent_state,
+            items=[{'entry_type': entry_type, 'summary': summary, 'steps': steps, 'tree_path': tree_path}],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                # TODO: need to check if we need to chunk the text
-                embed_model = embedding_model(agent_state.embedding_config)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                steps_embedding = embed_model.get_text_embedding(
-                    "\n".join(steps))
-                embedding_config = agent_state.embedding_config
-            else:
-                summary_embedding = None
-                steps_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_procedures(self, agent_state: AgentState, items: List[dict], organization_id: str) -> List[PydanticProceduralMemoryItem]:
+        """
+        Insert several procedures, embedding all of their fields with one batched embedding call.
 
-            procedure = self.create_item(
+        Every dict holds the `insert_procedure` arguments `entry_type`, `summary`, `steps`
+        and optionally `tree_path`.
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag,
+        # in deferred mode they are computed afterwards by the embedding backfill worker
+        embedding_pending = BUILD_EMBEDDINGS_FOR_MEMORY and settings.defer_memory_embeddings
+        if BUILD_EMBEDDINGS_FOR_MEMORY and items and not embedding_pending:
+            embed_model = embedding_model(agent_state.embedding_config)
+            embeddings = iter(embed_model.get_text_embeddings(
+                [text for item in items for text in (item['summary'], "\n".join(item['steps']))]))
+            embedding_config = agent_state.embedding_config
+        else:
+            embeddings = None
+            embedding_config = agent_state.embedding_config if embedding_pending else None
+
+        inserted = []
+        for item in items:
+            summary_embedding = next(embeddings) if embeddings else None
+            steps_embedding = next(embeddings) if embeddings else None
+            inserted.append(self.create_item(
                 item_data=PydanticProceduralMemoryItem(
-                    entry_type=entry_type,
-                    summary=summary,
-                    steps=steps,
-                    tree_path=tree_path or [],
+                    entry_type=item['entry_type'],
+                    summary=item['summary'],
+                    steps=item['steps'],
+                    tree_path=item.get('tree_path') or [],
                     organization_id=organization_id,
                     summary_embedding=summary_embedding,
                     steps_embedding=steps_embedding,
                     embedding_config=embedding_config,
+                    embedding_pending=embedding_pending,
                 ),
-            )
-            return procedure
-
-        except Exception as e:
-            raise e
+            ))
+        return inserted
 
     def delete_procedure_by_id(self, procedure_id: str) -> None:
         """Delete a procedural memory item by ID."""
@@ -739,6 +772,8 @@ class ProceduralMemoryManager:
                 item = ProceduralMemoryItem.read(
                     db_session=session, identifier=procedure_id)
                 item.hard_delete(session)
+                remove_memory_item(ProceduralMemoryItem, procedure_id)
+                memory_versions.bump(ProceduralMemoryItem)
             except NoResultFound:
                 raise NoResultFound(
                     f"Procedural memory item with id {procedure_id} not found.")
@@ -1,5 +1,6 @@
 from typing import List, Optional
 
+from violet.llm_api.embeddings import embedding_model_registry
 from violet.orm.provider import Provider as ProviderModel
 from violet.schemas.providers import Provider as PydanticProvider
 from violet.schemas.providers import ProviderUpdate
@@ -64,6 +65,8 @@ class ProviderManager:
             new_provider = ProviderModel(
                 **provider.model_dump(exclude_unset=True))
             new_provider.create(session, actor=actor)
+            # the OpenAI embedding model is built with the provider key
+            embedding_model_registry.invalidate()
             return new_provider.to_pydantic()
 
     @enforce_types
@@ -82,6 +85,8 @@ class ProviderManager:
 
             # Commit the updated provider
             existing_provider.update(session, actor=actor)
+            # the OpenAI embedding model is built with the provider key
+            embedding_model_registry.invalidate()
             return existing_provider.to_pydantic()
 
     @enforce_types
@@ -98,6 +103,8 @@ class ProviderManager:
             existing_provider.delete(session, actor=actor)
 
             session.commit()
+            # the OpenAI embedding model is built with the provider key
+            embedding_model_registry.invalidate()
 
     @enforce_types
     def list_providers(self, after: Optional[str] = None, limit: Optional[int] = 50, actor: PydanticUser = None) -> List[PydanticProvider]:
@@ -1,11 +1,10 @@
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import json
 import string
 import re
 import time
 
-from rank_bm25 import BM25Okapi
 from violet.orm.errors import NoResultFound
 from violet.llm_api.embeddings import embedding_model, parse_and_chunk_text
 from violet.orm.resource_memory import ResourceMemoryItem
@@ -18,7 +17,25 @@ from violet.schemas.agent import AgentState
 from violet.utils.utils import enforce_types
 from pydantic import BaseModel, Field
 from sqlalchemy import select, func, text
-from violet.services.utils import build_query, update_timezone
+from violet.database.pgvector_indexes import apply_vector_search_params
+from violet.services.utils import build_query, hybrid_search, iter_item_texts, merge_pending_embeddings, update_timezone
+from violet.services.bm25_index import bm25_index_manager
+from violet.services.fuzzy_index import fuzzy_index_manager
+from violet.services.memory_index_sync import remove_memory_item, sync_memory_item
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.memory_stats import memory_stats
+from violet.services.memory_tiering import memory_tiering, records_access
+from violet.services.memory_tree_paths import (
+    count_subtree,
+    in_subtree,
+    list_subtree,
+    normalize_tree_path,
+    subtree_candidate_ids,
+    subtree_filter,
+    subtree_ids,
+    subtree_sql_filter,
+)
+from violet.services.memory_fts import memory_fts_index
 from violet.settings import settings
 from violet.helpers.converters import deserialize_vector
 from violet.constants import BUILD_EMBEDDINGS_FOR_MEMORY
@@ -132,7 +149,7 @@ class ResourceMemoryManager:
             print(f"Warning: Failed to parse embedding field: {e}")
             return None
 
-    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit):
+    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit, tree_path_prefix=None):
         """
         Efficient PostgreSQL-native full-text search using ts_rank_cd for BM25-like functionality.
         This method leverages PostgreSQL's built-in full-text search capabilities and GIN indexes.
@@ -143,6 +160,7 @@ class ResourceMemoryManager:
             query_text: Search query string
             search_field: Field to search in ('title', 'summary', 'content', 'resource_type', etc.)
             limit: Maximum number of results to return
+            tree_path_prefix: Only search items under this category
 
         Returns:
             List of ResourceMemoryItem objects ranked by relevance
@@ -213,6 +231,11 @@ class ResourceMemoryManager:
                 setweight(to_tsvector('english', coalesce(resource_type, '')), 'D'),
                 to_tsquery('english', :tsquery), 32)"""
 
+        # Restrict to a tree path subtree if provided
+        tree_path_filter, tree_path_params = "", {}
+        if tree_path_prefix:
+            tree_path_filter, tree_path_params = subtree_sql_filter("resource_memory", tree_path_prefix)
+
         # Try AND query first for more precise results
         try:
             and_query_sql = text(f"""
@@ -221,14 +244,15 @@ class ResourceMemoryManager:
                     created_at, resource_type, organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM resource_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = list(session.execute(and_query_sql, {
                 'tsquery': tsquery_string_and,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             }))
 
             # If AND query returns sufficient results, use them
@@ -271,14 +295,15 @@ class ResourceMemoryManager:
                     created_at, resource_type, organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM resource_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = session.execute(or_query_sql, {
                 'tsquery': tsquery_string_or,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             })
 
             resources = []
@@ -386,6 +411,8 @@ class ResourceMemoryManager:
         with self.session_maker() as session:
             item = ResourceMemoryItem(**data_dict)
             item.create(session)
+            sync_memory_item(item)
+            memory_versions.bump(item)
             return item.to_pydantic()
 
     @enforce_types
@@ -400,6 +427,8 @@ class ResourceMemoryManager:
                     setattr(item, k, v)
             item.updated_at = item_update.updated_at
             item.update(session, actor=actor)
+            sync_memory_item(item)
+            memory_versions.bump(item)
             return item.to_pydantic()
 
     @enforce_types
@@ -409,11 +438,29 @@ class ResourceMemoryManager:
 
     def get_total_number_of_items(self) -> int:
         """Get the total number of items in the resource memory."""
+        return memory_stats.count(ResourceMemoryItem)
+
+    def iter_texts(self, ids: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Ids and texts (title, summary and content) of all resources, or of `ids`, read page by page without loading the table."""
+        return iter_item_texts(self.session_maker, ResourceMemoryItem, [ResourceMemoryItem.title, ResourceMemoryItem.summary, ResourceMemoryItem.content],
+                               lambda row: f"{row.title or ''} {row.summary or ''} {row.content or ''}", ids)
+
+    @update_timezone
+    @enforce_types
+    def list_resources_in_subtree(self,
+                                  tree_path: List[str],
+                                  limit: Optional[int] = 50,
+                                  timezone_str: str = None) -> List[PydanticResourceMemoryItem]:
+        """List the resources under a tree path category, most recently created first."""
+        with self.session_maker() as session:
+            return [item.to_pydantic() for item in list_subtree(session, ResourceMemoryItem, tree_path, limit)]
+
+    def count_resources_in_subtree(self, tree_path: List[str]) -> int:
+        """Count the resources under a tree path category."""
         with self.session_maker() as session:
-            query = select(func.count(ResourceMemoryItem.id))
-            result = session.execute(query)
-            return result.scalar_one()
+            return count_subtree(session, ResourceMemoryItem, tree_path)
 
+    @records_access(ResourceMemoryItem)
     @update_timezone
     @enforce_types
     def list_resources(self,
@@ -423,7 +470,10 @@ class ResourceMemoryManager:
                        search_field: str = 'content',
                        search_method: str = 'string_match',
                        limit: Optional[int] = 50,
-                       timezone_str: str = None) -> List[PydanticResourceMemoryItem]:
+                       timezone_str: str = None,
+                       vector_search_effort: Optional[int] = None,
+                       tree_path_prefix: Optional[List[str]] = None,
+                       include_archive: bool = False) -> List[PydanticResourceMemoryItem]:
         """
         Retrieve resource memory items according to the query.
 
@@ -436,10 +486,16 @@ class ResourceMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
-                - 'fuzzy_match': Fuzzy string matching (not implemented)
+                               uses the FTS5 index with bm25() ranking on SQLite
+                - 'fuzzy_match': Fuzzy string matching with rapidfuzz partial_ratio
+                - 'hybrid': bm25 and embedding candidates fused with reciprocal rank fusion
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
+            vector_search_effort: Recall/latency knob of the pgvector ANN index for embedding search
+                (hnsw.ef_search or ivfflat.probes), defaults to the configured value
+            tree_path_prefix: Only return items under this category, a prefix of their tree_path
+            include_archive: Also search the archived (cold) items, which fill the places left by the
+                hot items; the archive is matched on the words of the query
 
         Returns:
             List of resource memory items matching the search criteria
@@ -449,14 +505,32 @@ class ResourceMemoryManager:
             PostgreSQL's native full-text search with ts_rank_cd for BM25-like scoring. This is much more efficient 
             than loading all documents into memory and leverages your existing GIN indexes.
 
-            **For SQLite users**: 'bm25' now has fallback support that uses in-memory BM25 processing.
+            **For SQLite users**: 'bm25' runs against the FTS5 index of the table, ranked with SQLite's native
+            bm25(). When SQLite is built without FTS5 it falls back to in-memory BM25 processing.
 
             Performance comparison:
             - PostgreSQL 'bm25': Native DB search, very fast, scales well
-            - Fallback 'bm25' (SQLite): In-memory processing, slower for large datasets but still provides 
+            - SQLite 'bm25': FTS5 index, does not load the table into memory
+            - Fallback 'bm25' (SQLite without FTS5): In-memory processing, slower for large datasets but still provides 
               proper BM25 ranking
         """
 
+        if include_archive:
+            items = self.list_resources(
+                agent_state=agent_state, query=query, embedded_text=embedded_text, search_field=search_field,
+                search_method=search_method, limit=limit, vector_search_effort=vector_search_effort,
+                tree_path_prefix=tree_path_prefix)
+            if limit and len(items) >= limit:
+                return items
+            return items + memory_tiering.search_archive(
+                ResourceMemoryItem, query, limit=limit - len(items) if limit else None, tree_path_prefix=tree_path_prefix)
+
+        if search_method == 'hybrid' and query != '':
+            return hybrid_search(
+                self.list_resources, ResourceMemoryItem, agent_state, query, search_field,
+                embedded_text=embedded_text, limit=limit, vector_search_effort=vector_search_effort,
+                tree_path_prefix=tree_path_prefix)
+
         with self.session_maker() as session:
 
             if query == '':
@@ -466,6 +540,8 @@ class ResourceMemoryManager:
                     cast(
                         text("resource_memory.last_modify ->> 'timestamp'"), DateTime).desc()
                 )
+                if tree_path_prefix:
+                    query_stmt = query_stmt.where(subtree_filter(ResourceMemoryItem, tree_path_prefix))
                 if limit:
                     query_stmt = query_stmt.limit(limit)
                 result = session.execute(query_stmt)
@@ -487,6 +563,8 @@ class ResourceMemoryManager:
                 ResourceMemoryItem.last_modify.label("last_modify"),
                 ResourceMemoryItem.tree_path.label("tree_path"),
             )
+            if tree_path_prefix:
+                base_query = base_query.where(subtree_filter(ResourceMemoryItem, tree_path_prefix))
 
             if search_method == 'string_match':
                 main_query = base_query.where(func.lower(
@@ -505,7 +583,11 @@ class ResourceMemoryManager:
                     search_field=eval("ResourceMemoryItem." +
                                       search_field + "_embedding"),
                     target_class=ResourceMemoryItem,
+                    limit=limit,
+                    candidate_ids=subtree_candidate_ids(session, ResourceMemoryItem, tree_path_prefix),
                 )
+                apply_vector_search_params(
+                    session, vector_search_effort, limit)
 
             elif search_method == 'bm25':
 
@@ -513,68 +595,40 @@ class ResourceMemoryManager:
                 if settings.violet_pg_uri_no_default:
                     # Use PostgreSQL native full-text search
                     return self._postgresql_fulltext_search(
-                        session, base_query, query, search_field, limit
+                        session, base_query, query, search_field, limit, tree_path_prefix
                     )
+                elif memory_fts_index.is_available(session, ResourceMemoryItem):
+                    # SQLite FTS5 index, ranked with the native bm25()
+                    resource_items = memory_fts_index.search(
+                        session, ResourceMemoryItem, query, search_field, limit,
+                        filters=[subtree_filter(ResourceMemoryItem, tree_path_prefix)] if tree_path_prefix else None)
+                    return [item.to_pydantic() for item in resource_items]
                 else:
-                    # Fallback to in-memory BM25 for SQLite (legacy method)
-                    # Load all candidate items (memory-intensive, kept for compatibility)
-                    result = session.execute(select(ResourceMemoryItem))
-                    all_items = result.scalars().all()
-
-                    if not all_items:
-                        return []
-
-                    # Prepare documents for BM25
-                    documents = []
-                    valid_items = []
-
-                    for item in all_items:
-                        # Determine which field to use for search
-                        if search_field and hasattr(item, search_field):
-                            text_to_search = getattr(item, search_field) or ""
-                        else:
-                            text_to_search = item.content or ""
-
-                        # Preprocess the text into tokens
-                        tokens = self._preprocess_text_for_bm25(text_to_search)
-
-                        # Only include items that have tokens after preprocessing
-                        if tokens:
-                            documents.append(tokens)
-                            valid_items.append(item)
-
-                    if not documents:
-                        return []
-
-                    # Initialize BM25 with the documents
-                    bm25 = BM25Okapi(documents)
-
-                    # Preprocess the query
-                    query_tokens = self._preprocess_text_for_bm25(query)
-
-                    if not query_tokens:
-                        # If query has no valid tokens, return most recent items
-                        return [item.to_pydantic() for item in valid_items[:limit]]
-
-                    # Get BM25 scores for all documents
-                    scores = bm25.get_scores(query_tokens)
-
-                    # Create scored items list
-                    scored_items = list(zip(scores, valid_items))
-
-                    # Sort by BM25 score in descending order
-                    scored_items.sort(key=lambda x: x[0], reverse=True)
-
-                    # Get top items based on limit
-                    top_items = [item for score, item in scored_items[:limit]]
-                    resource_memory = top_items
-
-                    # Return the list after converting to Pydantic
-                    return [item.to_pydantic() for item in resource_memory]
+                    # Fallback to in-memory BM25 when SQLite is built without FTS5
+                    # Incrementally maintained index, ranks like rank_bm25.BM25Okapi
+                    field = search_field if search_field and hasattr(ResourceMemoryItem, search_field) else 'content'
+                    # the tree path filter restricts the corpus, so each subtree gets its own index
+                    resource_items = bm25_index_manager.search(
+                        session, ResourceMemoryItem,
+                        (field, *normalize_tree_path(tree_path_prefix)) if tree_path_prefix else field,
+                        self._preprocess_text_for_bm25(query), limit,
+                        text_fn=lambda item: getattr(item, field) or "",
+                        tokenizer=self._preprocess_text_for_bm25,
+                        predicate=(lambda item: in_subtree(item.tree_path, tree_path_prefix)) if tree_path_prefix else None,
+                        filters=[subtree_filter(ResourceMemoryItem, tree_path_prefix)] if tree_path_prefix else None,
+                    )
+                    return [item.to_pydantic() for item in resource_items]
 
             elif search_method == "fuzzy_match":
-                raise NotImplementedError(
-                    "Fuzzy matching is not implemented yet.")
+                # Cached corpus scored in bulk with rapidfuzz partial_ratio, defaulting to the summary.
+                field = search_field if search_field and hasattr(ResourceMemoryItem, search_field) else 'summary'
+                # one corpus per field, the tree path filter restricts the ranked ids
+                resource_items = fuzzy_index_manager.search(
+                    session, ResourceMemoryItem, field, query, limit,
+                    text_fn=lambda item: getattr(item, field) or "",
+                    ids=subtree_ids(session, ResourceMemoryItem, tree_path_prefix) if tree_path_prefix else None,
+                )
+                return [item.to_pydantic() for item in resource_items]
 
             else:
                 raise ValueError(f"Unknown search method: {search_method}")
@@ -587,7 +641,13 @@ class ResourceMemoryManager:
                 data = dict(row._mapping)
                 resource_memory.append(ResourceMemoryItem(**data))
 
-            return [item.to_pydantic() for item in resource_memory]
+            resource_memory = [item.to_pydantic() for item in resource_memory]
+            if search_method == 'embedding':
+                # rows still waiting for their embeddings are ranked lexically
+                return merge_pending_embeddings(
+                    self.list_resources, ResourceMemoryItem, agent_state, query, search_field,
+                    resource_memory, limit, tree_path_prefix=tree_path_prefix)
+            return resource_memory
 
     @enforce_types
     def insert_resource(self,
@@ -600,33 +660,48 @@ class ResourceMemoryManager:
                         tree_path: Optional[List[str]] = None
                         ) -> PydanticResourceMemoryItem:
         """Create a new resource memory item."""
-        try:
+        return self.insert_resources(
+            agent_state=agent_state,
+            items=[{'title': title, 'summary': summary, 'resource_type': resource_type,
+                    'content': content, 'tree_path': tree_path}],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                embed_model = embedding_model(agent_state.embedding_config)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                embedding_config = agent_state.embedding_config
-            else:
-                summary_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_resources(self, agent_state: AgentState, items: List[dict], organization_id: str) -> List[PydanticResourceMemoryItem]:
+        """
+        Create several resource memory items, embedding their summaries with one batched embedding call.
+
+        Every dict holds the `insert_resource` arguments `title`, `summary`, `resource_type`,
+        `content` and optionally `tree_path`.
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag,
+        # in deferred mode they are computed afterwards by the embedding backfill worker
+        embedding_pending = BUILD_EMBEDDINGS_FOR_MEMORY and settings.defer_memory_embeddings
+        if BUILD_EMBEDDINGS_FOR_MEMORY and items and not embedding_pending:
+            embed_model = embedding_model(agent_state.embedding_config)
+            summary_embeddings = embed_model.get_text_embeddings([item['summary'] for item in items])
+            embedding_config = agent_state.embedding_config
+        else:
+            summary_embeddings = [None] * len(items)
+            embedding_config = agent_state.embedding_config if embedding_pending else None
 
-            resource = self.create_item(
+        return [
+            self.create_item(
                 item_data=PydanticResourceMemoryItem(
-                    title=title,
-                    summary=summary,
-                    content=content,
-                    resource_type=resource_type,
-                    tree_path=tree_path or [],
+                    title=item['title'],
+                    summary=item['summary'],
+                    content=item['content'],
+                    resource_type=item['resource_type'],
+                    tree_path=item.get('tree_path') or [],
                     organization_id=organization_id,
                     summary_embedding=summary_embedding,
                     embedding_config=embedding_config,
+                    embedding_pending=embedding_pending,
                 )
             )
-            return resource
-
-        except Exception as e:
-            raise e
+            for item, summary_embedding in zip(items, summary_embeddings)
+        ]
 
     @enforce_types
     def delete_resource_by_id(self, resource_id: str) -> None:
@@ -636,6 +711,8 @@ class ResourceMemoryManager:
                 item = ResourceMemoryItem.read(
                     db_session=session, identifier=resource_id)
                 item.hard_delete(session)
+                remove_memory_item(ResourceMemoryItem, resource_id)
+                memory_versions.bump(ResourceMemoryItem)
             except NoResultFound:
                 raise NoResultFound(
                     f"Resource Memory record with id {resource_id} not found.")
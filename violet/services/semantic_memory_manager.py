@@ -1,11 +1,27 @@
 from violet.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 from violet.settings import settings
-from violet.services.utils import build_query, update_timezone
+from violet.database.pgvector_indexes import apply_vector_search_params
+from violet.services.utils import build_query, hybrid_search, iter_item_texts, merge_pending_embeddings, update_timezone
+from violet.services.bm25_index import bm25_index_manager
+from violet.services.fuzzy_index import fuzzy_index_manager
+from violet.services.memory_index_sync import remove_memory_item, sync_memory_item
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.memory_stats import memory_stats
+from violet.services.memory_tiering import memory_tiering, records_access
+from violet.services.memory_tree_paths import (
+    count_subtree,
+    in_subtree,
+    list_subtree,
+    normalize_tree_path,
+    subtree_candidate_ids,
+    subtree_filter,
+    subtree_ids,
+    subtree_sql_filter,
+)
+from violet.services.memory_fts import memory_fts_index
 from violet.schemas.embedding_config import EmbeddingConfig
 from violet.llm_api.embeddings import embedding_model, parse_and_chunk_text
 from violet.schemas.agent import AgentState
-from rank_bm25 import BM25Okapi
-from rapidfuzz import fuzz
 from sqlalchemy import select, func, text
 from pydantic import BaseModel
 from violet.utils.utils import enforce_types, generate_short_id, generate_unique_short_id
@@ -20,7 +36,7 @@ import uuid
 import random
 import string
 import time
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import json
 import re
 
@@ -186,7 +202,7 @@ class SemanticMemoryManager:
 
         return word_matches
 
-    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit):
+    def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit, tree_path_prefix=None):
         """
         Efficient PostgreSQL-native full-text search using ts_rank_cd for BM25-like functionality.
         This method leverages PostgreSQL's built-in full-text search capabilities and GIN indexes.
@@ -197,6 +213,7 @@ class SemanticMemoryManager:
             query_text: Search query string
             search_field: Field to search in ('name', 'summary', 'details', 'source', etc.)
             limit: Maximum number of results to return
+            tree_path_prefix: Only search items under this category
 
         Returns:
             List of SemanticMemoryItem objects ranked by relevance
@@ -267,6 +284,11 @@ class SemanticMemoryManager:
                 setweight(to_tsvector('english', coalesce(source, '')), 'D'),
                 to_tsquery('english', :tsquery), 32)"""
 
+        # Restrict to a tree path subtree if provided
+        tree_path_filter, tree_path_params = "", {}
+        if tree_path_prefix:
+            tree_path_filter, tree_path_params = subtree_sql_filter("semantic_memory", tree_path_prefix)
+
         # Try AND query first for more precise results
         try:
             and_query_sql = text(f"""
@@ -276,14 +298,15 @@ class SemanticMemoryManager:
                     organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM semantic_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = list(session.execute(and_query_sql, {
                 'tsquery': tsquery_string_and,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             }))
 
             # If AND query returns sufficient results, use them
@@ -328,14 +351,15 @@ class SemanticMemoryManager:
                     organization_id, metadata_, last_modify,
                     {rank_sql} as rank_score
                 FROM semantic_memory 
-                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery)
+                WHERE {tsvector_sql} @@ to_tsquery('english', :tsquery){tree_path_filter}
                 ORDER BY rank_score DESC, created_at DESC
                 LIMIT :limit_val
             """)
 
             results = session.execute(or_query_sql, {
                 'tsquery': tsquery_string_or,
-                'limit_val': limit or 50
+                'limit_val': limit or 50,
+                **tree_path_params
             })
 
             semantic_items = []
@@ -443,6 +467,8 @@ class SemanticMemoryManager:
         with self.session_maker() as session:
             item = SemanticMemoryItem(**data_dict)
             item.create(session)
+            sync_memory_item(item)
+            memory_versions.bump(item)
             return item.to_pydantic()
 
     @enforce_types
@@ -457,6 +483,8 @@ class SemanticMemoryManager:
                     setattr(item, k, v)
             item.updated_at = item_update.updated_at
             item.update(session, actor=actor)
+            sync_memory_item(item)
+            memory_versions.bump(item)
             return item.to_pydantic()
 
     @enforce_types
@@ -466,11 +494,29 @@ class SemanticMemoryManager:
 
     def get_total_number_of_items(self) -> int:
         """Get the total number of items in the semantic memory."""
+        return memory_stats.count(SemanticMemoryItem)
+
+    def iter_texts(self, ids: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Ids and texts (name, summary and details) of all items, or of `ids`, read page by page without loading the table."""
+        return iter_item_texts(self.session_maker, SemanticMemoryItem, [SemanticMemoryItem.name, SemanticMemoryItem.summary, SemanticMemoryItem.details],
+                               lambda row: f"{row.name or ''} {row.summary or ''} {row.details or ''}", ids)
+
+    @update_timezone
+    @enforce_types
+    def list_semantic_items_in_subtree(self,
+                                       tree_path: List[str],
+                                       limit: Optional[int] = 50,
+                                       timezone_str: str = None) -> List[PydanticSemanticMemoryItem]:
+        """List the semantic memory items under a tree path category, most recently created first."""
+        with self.session_maker() as session:
+            return [item.to_pydantic() for item in list_subtree(session, SemanticMemoryItem, tree_path, limit)]
+
+    def count_semantic_items_in_subtree(self, tree_path: List[str]) -> int:
+        """Count the semantic memory items under a tree path category."""
         with self.session_maker() as session:
-            query = select(func.count(SemanticMemoryItem.id))
-            result = session.execute(query)
-            return result.scalar_one()
+            return count_subtree(session, SemanticMemoryItem, tree_path)
 
+    @records_access(SemanticMemoryItem)
     @update_timezone
     @enforce_types
     def list_semantic_items(self,
@@ -480,7 +526,10 @@ class SemanticMemoryManager:
                             search_field: str = '',
                             search_method: str = 'embedding',
                             limit: Optional[int] = 50,
-                            timezone_str: str = None) -> List[PydanticSemanticMemoryItem]:
+                            timezone_str: str = None,
+                            vector_search_effort: Optional[int] = None,
+                            tree_path_prefix: Optional[List[str]] = None,
+                            include_archive: bool = False) -> List[PydanticSemanticMemoryItem]:
         """
         List semantic memory items with various search methods.
 
@@ -493,10 +542,16 @@ class SemanticMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the FTS5 index with bm25() ranking on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
+                - 'hybrid': bm25 and embedding candidates fused with reciprocal rank fusion
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
+            vector_search_effort: Recall/latency knob of the pgvector ANN index for embedding search
+                (hnsw.ef_search or ivfflat.probes), defaults to the configured value
+            tree_path_prefix: Only return items under this category, a prefix of their tree_path
+            include_archive: Also search the archived (cold) items, which fill the places left by the
+                hot items; the archive is matched on the words of the query
 
         Returns:
             List of semantic memory items matching the search criteria
@@ -506,13 +561,31 @@ class SemanticMemoryManager:
             PostgreSQL's native full-text search with ts_rank_cd for BM25-like scoring. This is much more efficient 
             than loading all documents into memory and leverages your existing GIN indexes.
 
-            **For SQLite users**: 'bm25' now has fallback support that uses in-memory BM25 processing.
+            **For SQLite users**: 'bm25' runs against the FTS5 index of the table, ranked with SQLite's native
+            bm25(). When SQLite is built without FTS5 it falls back to in-memory BM25 processing.
 
             Performance comparison:
             - PostgreSQL 'bm25': Native DB search, very fast, scales well
-            - Fallback 'bm25' (SQLite): In-memory processing, slower for large datasets but still provides 
+            - SQLite 'bm25': FTS5 index, does not load the table into memory
+            - Fallback 'bm25' (SQLite without FTS5): In-memory processing, slower for large datasets but still provides 
               proper BM25 ranking
         """
+        if include_archive:
+            items = self.list_semantic_items(
+                agent_state=agent_state, query=query, embedded_text=embedded_text, search_field=search_field,
+                search_method=search_method, limit=limit, vector_search_effort=vector_search_effort,
+                tree_path_prefix=tree_path_prefix)
+            if limit and len(items) >= limit:
+                return items
+            return items + memory_tiering.search_archive(
+                SemanticMemoryItem, query, limit=limit - len(items) if limit else None, tree_path_prefix=tree_path_prefix)
+
+        if search_method == 'hybrid' and query != '':
+            return hybrid_search(
+                self.list_semantic_items, SemanticMemoryItem, agent_state, query, search_field,
+                embedded_text=embedded_text, limit=limit, vector_search_effort=vector_search_effort,
+                tree_path_prefix=tree_path_prefix)
+
         with self.session_maker() as session:
 
             if query == '':
@@ -522,6 +595,8 @@ class SemanticMemoryManager:
                     cast(
                         text("semantic_memory.last_modify ->> 'timestamp'"), DateTime).desc()
                 )
+                if tree_path_prefix:
+                    query_stmt = query_stmt.where(subtree_filter(SemanticMemoryItem, tree_path_prefix))
                 if limit:
                     query_stmt = query_stmt.limit(limit)
                 result = session.execute(query_stmt)
@@ -550,6 +625,8 @@ class SemanticMemoryManager:
                     SemanticMemoryItem.last_modify.label("last_modify"),
                     SemanticMemoryItem.tree_path.label("tree_path"),
                 )
+                if tree_path_prefix:
+                    base_query = base_query.where(subtree_filter(SemanticMemoryItem, tree_path_prefix))
 
                 if search_method == 'embedding':
                     embed_query = True
@@ -564,7 +641,11 @@ class SemanticMemoryManager:
                         search_field=eval(
                             "SemanticMemoryItem." + search_field + "_embedding"),
                         target_class=SemanticMemoryItem,
+                        limit=limit,
+                        candidate_ids=subtree_candidate_ids(session, SemanticMemoryItem, tree_path_prefix),
                     )
+                    apply_vector_search_params(
+                        session, vector_search_effort, limit)
 
                 elif search_method == 'string_match':
 
@@ -578,90 +659,40 @@ class SemanticMemoryManager:
                     if settings.violet_pg_uri_no_default:
                         # Use PostgreSQL native full-text search
                         return self._postgresql_fulltext_search(
-                            session, base_query, query, search_field, limit
+                            session, base_query, query, search_field, limit, tree_path_prefix
                         )
+                    elif memory_fts_index.is_available(session, SemanticMemoryItem):
+                        # SQLite FTS5 index, ranked with the native bm25()
+                        semantic_items = memory_fts_index.search(
+                            session, SemanticMemoryItem, query, search_field, limit,
+                            filters=[subtree_filter(SemanticMemoryItem, tree_path_prefix)] if tree_path_prefix else None)
+                        return [item.to_pydantic() for item in semantic_items]
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
-                        # Load all candidate items (memory-intensive, kept for compatibility)
-                        result = session.execute(select(SemanticMemoryItem))
-                        all_items = result.scalars().all()
-
-                        if not all_items:
-                            return []
-
-                        # Prepare documents for BM25
-                        documents = []
-                        valid_items = []
-
-                        for item in all_items:
-                            # Determine which field to use for search
-                            if search_field and hasattr(item, search_field):
-                                text_to_search = getattr(
-                                    item, search_field) or ""
-                            else:
-                                text_to_search = item.name or ""
-
-                            # Preprocess the text into tokens
-                            tokens = self._preprocess_text_for_bm25(
-                                text_to_search)
-
-                            # Only include items that have tokens after preprocessing
-                            if tokens:
-                                documents.append(tokens)
-                                valid_items.append(item)
-
-                        if not documents:
-                            return []
-
-                        # Initialize BM25 with the documents
-                        bm25 = BM25Okapi(documents)
-
-                        # Preprocess the query
-                        query_tokens = self._preprocess_text_for_bm25(query)
-
-                        if not query_tokens:
-                            # If query has no valid tokens, return most recent items
-                            return [item.to_pydantic() for item in valid_items[:limit]]
-
-                        # Get BM25 scores for all documents
-                        scores = bm25.get_scores(query_tokens)
-
-                        # Create scored items list
-                        scored_items = list(zip(scores, valid_items))
-
-                        # Sort by BM25 score in descending order
-                        scored_items.sort(key=lambda x: x[0], reverse=True)
-
-                        # Get top items based on limit
-                        top_items = [item for score,
-                                     item in scored_items[:limit]]
-                        semantic_items = top_items
-
-                        # Return the list after converting to Pydantic
+                        # Fallback to in-memory BM25 when SQLite is built without FTS5
+                        # Incrementally maintained index, ranks like rank_bm25.BM25Okapi
+                        field = search_field if search_field and hasattr(SemanticMemoryItem, search_field) else 'name'
+                        # the tree path filter restricts the corpus, so each subtree gets its own index
+                        semantic_items = bm25_index_manager.search(
+                            session, SemanticMemoryItem,
+                            (field, *normalize_tree_path(tree_path_prefix)) if tree_path_prefix else field,
+                            self._preprocess_text_for_bm25(query), limit,
+                            text_fn=lambda item: getattr(item, field) or "",
+                            tokenizer=self._preprocess_text_for_bm25,
+                            predicate=(lambda item: in_subtree(item.tree_path, tree_path_prefix)) if tree_path_prefix else None,
+                            filters=[subtree_filter(SemanticMemoryItem, tree_path_prefix)] if tree_path_prefix else None,
+                        )
                         return [item.to_pydantic() for item in semantic_items]
 
                 elif search_method == 'fuzzy_match':
-                    # Fuzzy matching: load all candidate items into memory and compute a fuzzy match score.
-                    result = session.execute(select(SemanticMemoryItem))
-                    all_items = result.scalars().all()
-                    scored_items = []
-                    for item in all_items:
-                        # Determine which field to use:
-                        # 1. If a search_field is provided (e.g., "concept" or "summary") and exists in the item, use it.
-                        # 2. Otherwise, default to using the "concept" field.
-                        if search_field and hasattr(item, search_field):
-                            text_to_search = getattr(item, search_field)
-                        else:
-                            text_to_search = item.name
-                        # Compute the fuzzy matching score using partial_ratio for better short-to-long matching.
-                        score = fuzz.partial_ratio(
-                            query.lower(), text_to_search.lower())
-                        scored_items.append((score, item))
-
-                    # Sort items descending by score and pick the top ones.
-                    scored_items.sort(key=lambda x: x[0], reverse=True)
-                    top_items = [item for score, item in scored_items[:limit]]
-                    return [item.to_pydantic() for item in top_items]
+                    # Cached corpus scored in bulk with rapidfuzz partial_ratio, defaulting to the name.
+                    field = search_field if search_field and hasattr(SemanticMemoryItem, search_field) else 'name'
+                    # one corpus per field, the tree path filter restricts the ranked ids
+                    semantic_items = fuzzy_index_manager.search(
+                        session, SemanticMemoryItem, field, query, limit,
+                        text_fn=lambda item: getattr(item, field) or "",
+                        ids=subtree_ids(session, SemanticMemoryItem, tree_path_prefix) if tree_path_prefix else None,
+                    )
+                    return [item.to_pydantic() for item in semantic_items]
 
                 if limit:
                     main_query = main_query.limit(limit)
@@ -673,7 +704,13 @@ class SemanticMemoryManager:
                     data = dict(row._mapping)
                     semantic_items.append(SemanticMemoryItem(**data))
 
-                return [item.to_pydantic() for item in semantic_items]
+                semantic_items = [item.to_pydantic() for item in semantic_items]
+                if search_method == 'embedding':
+                    # rows still waiting for their embeddings are ranked lexically
+                    return merge_pending_embeddings(
+                        self.list_semantic_items, SemanticMemoryItem, agent_state, query, search_field,
+                        semantic_items, limit, tree_path_prefix=tree_path_prefix)
+                return semantic_items
 
     @enforce_types
     def insert_semantic_item(
@@ -689,41 +726,54 @@ class SemanticMemoryManager:
         """
         Create a new semantic memory entry using provided parameters.
         """
-        try:
+        return self.insert_semantic_items(
+            agent_state=agent_state,
+            items=[{'name': name, 'summary': summary, 'details': details, 'source': source, 'tree_path': tree_path}],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                # TODO: need to check if we need to chunk the text
-                embed_model = embedding_model(agent_state.embedding_config)
-                name_embedding = embed_model.get_text_embedding(name)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                details_embedding = embed_model.get_text_embedding(details)
-                embedding_config = agent_state.embedding_config
-            else:
-                name_embedding = None
-                summary_embedding = None
-                details_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_semantic_items(self, agent_state: AgentState, items: List[dict], organization_id: str) -> List[PydanticSemanticMemoryItem]:
+        """
+        Create several semantic memory entries, embedding all of their fields with one batched embedding call.
 
-            semantic_item = self.create_item(
+        Every dict holds the `insert_semantic_item` arguments `name`, `summary`, `details`,
+        `source` and `tree_path`.
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag,
+        # in deferred mode they are computed afterwards by the embedding backfill worker
+        embedding_pending = BUILD_EMBEDDINGS_FOR_MEMORY and settings.defer_memory_embeddings
+        if BUILD_EMBEDDINGS_FOR_MEMORY and items and not embedding_pending:
+            embed_model = embedding_model(agent_state.embedding_config)
+            embeddings = iter(embed_model.get_text_embeddings(
+                [text for item in items for text in (item['name'], item['summary'], item['details'])]))
+            embedding_config = agent_state.embedding_config
+        else:
+            embeddings = None
+            embedding_config = agent_state.embedding_config if embedding_pending else None
+
+        inserted = []
+        for item in items:
+            name_embedding = next(embeddings) if embeddings else None
+            summary_embedding = next(embeddings) if embeddings else None
+            details_embedding = next(embeddings) if embeddings else None
+            # Note: Item is added to clustering tree in create_item()
+            inserted.append(self.create_item(
                 item_data=PydanticSemanticMemoryItem(
-                    name=name,
-                    summary=summary,
-                    details=details,
-                    source=source,
+                    name=item['name'],
+                    summary=item['summary'],
+                    details=item['details'],
+                    source=item['source'],
                     organization_id=organization_id,
                     details_embedding=details_embedding,
                     name_embedding=name_embedding,
                     summary_embedding=summary_embedding,
                     embedding_config=embedding_config,
-                    tree_path=tree_path,
+                    embedding_pending=embedding_pending,
+                    tree_path=item['tree_path'],
                 )
-            )
-
-            # Note: Item is already added to clustering tree in create_item()
-            return semantic_item
-        except Exception as e:
-            raise e
+            ))
+        return inserted
 
     def delete_semantic_item_by_id(self, semantic_memory_id: str) -> None:
         """Delete a semantic memory item by ID."""
@@ -732,6 +782,8 @@ class SemanticMemoryManager:
                 item = SemanticMemoryItem.read(
                     db_session=session, identifier=semantic_memory_id)
                 item.hard_delete(session)
+                remove_memory_item(SemanticMemoryItem, semantic_memory_id)
+                memory_versions.bump(SemanticMemoryItem)
             except NoResultFound:
                 raise NoResultFound(
                     f"Semantic memory item with id {semantic_memory_id} not found.")
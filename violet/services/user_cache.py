@@ -0,0 +1,65 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from violet.database.unit_of_work import after_unit_of_work
+from violet.orm.user import User as UserModel
+from violet.schemas.user import User as PydanticUser
+
+
+class UserCache:
+    """
+    Process-wide cache of the users read by `UserManager.get_user_by_id`.
+
+    Agents and tools look up their user, most often just for its timezone, several times per
+    step. Every write to a user row moves the version of that user, and an entry is only
+    returned while it was read at the current version. Callers get a copy, so they may
+    change it freely.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._entries: Dict[str, Tuple[int, PydanticUser]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, user_id: str) -> int:
+        return self._versions[user_id]
+
+    def get(self, user_id: str) -> Optional[PydanticUser]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != self._versions[user_id]:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1].model_copy()
+
+    def put(self, user: PydanticUser, version: int) -> None:
+        """Store a user read at `version`, read before the user was loaded."""
+        with self._lock:
+            if version == self._versions[user.id]:
+                self._entries[user.id] = (version, user.model_copy())
+
+    def bump(self, user_id: str) -> None:
+        with self._lock:
+            self._versions[user_id] += 1
+            self._entries.pop(user_id, None)
+        # and again when a step's unit of work ends, a user read meanwhile saw the state before the commit
+        after_unit_of_work(self.bump, user_id)
+
+
+def _after_user_write(mapper, connection, target) -> None:
+    user_cache.bump(target.id)
+
+
+# mapper events fire on flush, a rolled back write only costs a re-read
+for _event_name in ("after_update", "after_delete"):
+    event.listen(UserModel, _event_name, _after_user_write)
+
+
+# singleton
+user_cache = UserCache()
@@ -6,6 +6,7 @@ from violet.orm.user import User as UserModel
 from violet.schemas.user import User as PydanticUser
 from violet.schemas.user import UserUpdate
 from violet.services.organization_manager import OrganizationManager
+from violet.services.user_cache import user_cache
 from violet.utils.utils import enforce_types
 
 
@@ -98,10 +99,17 @@ class UserManager:
 
     @enforce_types
     def get_user_by_id(self, user_id: str) -> PydanticUser:
-        """Fetch a user by ID."""
+        """Fetch a user by ID, served from the process-wide user cache while the user is unchanged."""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+
+        # read the version before the user, an update meanwhile keeps the stale read out of the cache
+        version = user_cache.version(user_id)
         with self.session_maker() as session:
-            user = UserModel.read(db_session=session, identifier=user_id)
-            return user.to_pydantic()
+            user = UserModel.read(db_session=session, identifier=user_id).to_pydantic()
+        user_cache.put(user, version)
+        return user
 
     @enforce_types
     def get_default_user(self) -> PydanticUser:
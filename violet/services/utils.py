@@ -1,18 +1,23 @@
 import numpy as np
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Collection, Dict, Iterator, List, Optional, Tuple
 from violet.constants import (
     CORE_MEMORY_TOOLS, BASE_TOOLS,
-    MAX_EMBEDDING_DIM,
+    MAX_EMBEDDING_DIM, VECTOR_INDEX_OVERSAMPLE,
+    HYBRID_SEARCH_CANDIDATE_MULTIPLIER, RRF_K, MEMORY_SCAN_PAGE_SIZE,
     EPISODIC_MEMORY_TOOLS, PROCEDURAL_MEMORY_TOOLS,
     RESOURCE_MEMORY_TOOLS, KNOWLEDGE_VAULT_TOOLS, META_MEMORY_TOOLS
 )
-from violet.orm.sqlite_functions import adapt_array
+from violet.database.pgvector_indexes import indexed_search_target
+from violet.services.embedding_backfill import embedding_backfill
+from violet.services.vector_index import vector_index_manager
 from violet.schemas.embedding_config import EmbeddingConfig
-from violet.llm_api.embeddings import embedding_model, parse_and_chunk_text
-from sqlalchemy import Select, func, literal, select, union_all
+from violet.llm_api.embeddings import get_query_embedding, parse_and_chunk_text
+from sqlalchemy import Select, case, false, func, literal, select, union_all
+from datetime import datetime
 from functools import wraps
 import pytz
 from violet.settings import settings
+from violet.utils.utils import get_timezone, pad_embedding
 
 
 def build_query(base_query,
@@ -22,17 +27,24 @@ def build_query(base_query,
                 embed_query: bool = True,
                 embedding_config: Optional[EmbeddingConfig] = None,
                 ascending: bool = True,
-                target_class: object = None):
+                target_class: object = None,
+                limit: Optional[int] = None,
+                candidate_ids: Optional[Collection[str]] = None):
     """
     Build a query based on the query text
+
+    On PostgreSQL the ranking is delegated to pgvector and its ANN index, run
+    `apply_vector_search_params` in the same transaction to tune recall. On SQLite the candidates are
+    taken from the in-process vector index, `limit` bounds how many are fetched. `candidate_ids`
+    restricts the in-process ranking to the rows `base_query` is filtered to, so a selective filter
+    does not empty the oversampled candidates.
     """
 
     if embed_query:
         if embedded_text is None:
             assert embedding_config is not None, "embedding_config must be specified for vector search"
             assert query_text is not None, "query_text must be specified for vector search"
-            embedded_text = embedding_model(
-                embedding_config).get_text_embedding(query_text)
+            embedded_text = get_query_embedding(embedding_config, query_text)
             embedded_text = np.array(embedded_text)
             embedded_text = np.pad(
                 embedded_text, (0, MAX_EMBEDDING_DIM - embedded_text.shape[0]), mode="constant").tolist()
@@ -42,34 +54,43 @@ def build_query(base_query,
     if embedded_text:
         # Check which database type we're using
         if settings.violet_pg_uri_no_default:
-            # PostgreSQL with pgvector - use direct cosine_distance method
+            # PostgreSQL with pgvector - rank on the expression covered by the ANN index
+            distance_field, query_vector = indexed_search_target(
+                search_field, embedded_text, embedding_config)
             if ascending:
                 main_query = main_query.order_by(
-                    search_field.cosine_distance(embedded_text).asc(),
+                    distance_field.cosine_distance(query_vector).asc(),
                     target_class.created_at.asc(),
                     target_class.id.asc(),
                 )
             else:
                 main_query = main_query.order_by(
-                    search_field.cosine_distance(embedded_text).asc(),
+                    distance_field.cosine_distance(query_vector).asc(),
                     target_class.created_at.desc(),
                     target_class.id.asc(),
                 )
         else:
-            # SQLite with custom vector type
-            query_embedding_binary = adapt_array(embedded_text)
+            # SQLite - rank with the in-process vector index instead of the row-by-row UDF
+            candidate_k = limit * VECTOR_INDEX_OVERSAMPLE if limit else None
+            ranked_ids = vector_index_manager.search(
+                target_class, search_field.key, embedded_text, k=candidate_k, ids=candidate_ids)
+
+            if not ranked_ids:
+                return main_query.where(false())
+
+            rank = case({item_id: position for position, item_id in enumerate(ranked_ids)},
+                        value=target_class.id)
+            main_query = main_query.where(target_class.id.in_(ranked_ids))
 
             if ascending:
                 main_query = main_query.order_by(
-                    func.cosine_distance(
-                        search_field, query_embedding_binary).asc(),
+                    rank.asc(),
                     target_class.created_at.asc(),
                     target_class.id.asc(),
                 )
             else:
                 main_query = main_query.order_by(
-                    func.cosine_distance(
-                        search_field, query_embedding_binary).asc(),
+                    rank.asc(),
                     target_class.created_at.desc(),
                     target_class.id.asc(),
                 )
@@ -81,6 +102,129 @@ def build_query(base_query,
     return main_query
 
 
+def reciprocal_rank_fusion(result_lists: List[list], limit: Optional[int] = None, k: int = RRF_K) -> list:
+    """
+    Fuse several ranked result lists with reciprocal rank fusion.
+
+    Every item scores `sum(1 / (k + rank))` over the lists it appears in (rank starting at 1),
+    items are matched by `id`. Ties keep the order in which items were first seen.
+    """
+    scores: Dict[str, float] = {}
+    items: Dict[str, Any] = {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            scores[item.id] = scores.get(item.id, 0.0) + 1.0 / (k + rank)
+            items.setdefault(item.id, item)
+
+    fused = sorted(items.values(), key=lambda item: scores[item.id], reverse=True)
+    return fused[:limit] if limit else fused
+
+
+def hybrid_search(list_method, target_class, agent_state, query: str, search_field: str,
+                  embedded_text: Optional[List[float]] = None, limit: Optional[int] = 50, **kwargs) -> list:
+    """
+    Run bm25 and embedding retrieval through a manager's `list_*` method and fuse them with
+    reciprocal rank fusion.
+
+    The query is embedded at most once. The embedding side is skipped when `search_field`
+    has no embedding column, e.g. resource `content`, so the result degrades to bm25.
+    """
+    candidate_limit = limit * HYBRID_SEARCH_CANDIDATE_MULTIPLIER if limit else None
+    result_lists = [list_method(agent_state=agent_state, query=query, search_field=search_field,
+                                search_method='bm25', limit=candidate_limit, **kwargs)]
+
+    if search_field and hasattr(target_class, search_field + "_embedding"):
+        if embedded_text is None:
+            embedded_text = pad_embedding(get_query_embedding(agent_state.embedding_config, query))
+        result_lists.append(list_method(agent_state=agent_state, query=query, embedded_text=embedded_text,
+                                        search_field=search_field, search_method='embedding',
+                                        limit=candidate_limit, **kwargs))
+
+    return reciprocal_rank_fusion(result_lists, limit)
+
+
+def merge_pending_embeddings(list_method, target_class, agent_state, query: str, search_field: str,
+                             results: list, limit: Optional[int] = 50, **kwargs) -> list:
+    """
+    Complete an embedding search with the rows whose embeddings are still being backfilled.
+
+    Those rows cannot be ranked by similarity yet, so they are ranked with bm25 through the
+    manager's `list_*` method and fused with the embedding results by reciprocal rank fusion.
+    """
+    pending_ids = embedding_backfill.pending_ids(target_class)
+    if not pending_ids:
+        return results
+
+    candidate_limit = limit * HYBRID_SEARCH_CANDIDATE_MULTIPLIER if limit else None
+    lexical_results = list_method(agent_state=agent_state, query=query, search_field=search_field,
+                                  search_method='bm25', limit=candidate_limit, **kwargs)
+    return reciprocal_rank_fusion([
+        [item for item in results if item.id not in pending_ids],
+        [item for item in lexical_results if item.id in pending_ids],
+    ], limit)
+
+
+
+def iter_item_texts(session_maker, target_class, columns: list, text_fn: Callable,
+                    ids: Optional[Collection[str]] = None,
+                    page_size: int = MEMORY_SCAN_PAGE_SIZE) -> Iterator[Tuple[str, str]]:
+    """
+    (id, text) of every item of `target_class`, or of the items in `ids`, in id order.
+
+    Only the id and `columns` are selected and `text_fn` builds the text of one row. The
+    table is read in keyset pages of `page_size` rows on the id, each in its own session,
+    so a scan over the whole table never holds more than one page.
+    """
+    query = select(target_class.id, *columns).order_by(target_class.id).limit(page_size)
+    if ids is not None:
+        query = query.where(target_class.id.in_(list(ids)))
+    after = None
+    while True:
+        with session_maker() as session:
+            page = session.execute(query if after is None else query.where(target_class.id > after)).all()
+        for row in page:
+            yield row.id, text_fn(row)
+        if len(page) < page_size:
+            return
+        after = page[-1].id
+
+
+TIMESTAMP_FIELDS = ('occurred_at', 'created_at', 'updated_at')
+
+
+def localize_timestamps(results: list, timezone_str: str) -> list:
+    """
+    Convert the timestamps of `results` to the user's timezone, naive timestamps being UTC.
+
+    The timezone is resolved once for the whole list and every field is converted in one
+    pass over it, instead of a timezone lookup per field of every item.
+    """
+    target_tz = get_timezone(timezone_str)
+
+    for field in TIMESTAMP_FIELDS:
+        for result in results:
+            timestamp = getattr(result, field, None)
+            if timestamp is None:
+                continue
+            if timestamp.tzinfo is None:
+                timestamp = pytz.utc.localize(timestamp)
+            setattr(result, field, timestamp.astimezone(target_tz))
+
+    for result in results:
+        last_modify = getattr(result, 'last_modify', None)
+        if not last_modify or 'timestamp' not in last_modify:
+            continue
+        # Check if timestamp is a string (ISO format) and convert to datetime
+        timestamp = last_modify['timestamp']
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if timestamp.tzinfo is None:
+            timestamp = pytz.utc.localize(timestamp)
+        last_modify['timestamp'] = timestamp.astimezone(target_tz)
+
+    return results
+
+
 def update_timezone(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -99,40 +243,7 @@ def update_timezone(func):
             return None
 
         if timezone_str:
-            for result in results:
-                if hasattr(result, 'occurred_at'):
-                    if result.occurred_at.tzinfo is None:
-                        result.occurred_at = pytz.utc.localize(
-                            result.occurred_at)
-                    target_tz = pytz.timezone(timezone_str.split(" (")[0])
-                    result.occurred_at = result.occurred_at.astimezone(
-                        target_tz)
-                if hasattr(result, 'created_at'):
-                    if result.created_at.tzinfo is None:
-                        result.created_at = pytz.utc.localize(
-                            result.created_at)
-                    target_tz = pytz.timezone(timezone_str.split(" (")[0])
-                    result.created_at = result.created_at.astimezone(target_tz)
-                if hasattr(result, 'updated_at') and result.updated_at is not None:
-                    if result.updated_at.tzinfo is None:
-                        result.updated_at = pytz.utc.localize(
-                            result.updated_at)
-                    target_tz = pytz.timezone(timezone_str.split(" (")[0])
-                    result.updated_at = result.updated_at.astimezone(target_tz)
-                if hasattr(result, 'last_modify') and result.last_modify and 'timestamp' in result.last_modify:
-                    # Check if timestamp is a string (ISO format) and convert to datetime
-                    timestamp = result.last_modify['timestamp']
-                    if isinstance(timestamp, str):
-                        from datetime import datetime
-                        timestamp = datetime.fromisoformat(
-                            timestamp.replace('Z', '+00:00'))
-
-                    # Now handle timezone conversion
-                    if timestamp.tzinfo is None:
-                        timestamp = pytz.utc.localize(timestamp)
-                    target_tz = pytz.timezone(timezone_str.split(" (")[0])
-                    result.last_modify['timestamp'] = timestamp.astimezone(
-                        target_tz)
+            localize_timestamps(results, timezone_str)
 
         return results
 
@@ -0,0 +1,244 @@
+import os
+import threading
+from typing import Collection, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy import inspect, select
+
+from violet.log import get_logger
+from violet.orm.custom_columns import CommonVector
+from violet.settings import settings
+
+logger = get_logger(__name__)
+
+
+class VectorIndex:
+    """
+    In-process vector index over a single embedding column.
+
+    Embeddings are kept unit-normalized in one contiguous float32 matrix so that
+    a query is answered with a single matrix-vector product instead of decoding
+    and comparing rows one at a time. The matrix can optionally be backed by a
+    memory-mapped file to keep large indexes off the Python heap.
+    """
+
+    def __init__(self, dim: Optional[int] = None, mmap_path: Optional[str] = None, initial_capacity: int = 1024):
+        self.dim = dim
+        self.mmap_path = mmap_path
+        self._initial_capacity = initial_capacity
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._positions
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if self.mmap_path:
+            os.makedirs(os.path.dirname(self.mmap_path), exist_ok=True)
+            return np.memmap(self.mmap_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        return np.zeros((capacity, self.dim), dtype=np.float32)
+
+    def _ensure_capacity(self, size: int) -> None:
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if size <= capacity:
+            return
+        new_capacity = max(self._initial_capacity, capacity * 2, size)
+        old_matrix = self._matrix
+        if self.mmap_path and old_matrix is not None:
+            # the backing file is recreated, so copy the live rows out first
+            old_matrix = np.array(old_matrix[:len(self._ids)])
+        new_matrix = self._allocate(new_capacity)
+        if old_matrix is not None:
+            new_matrix[:len(self._ids)] = old_matrix[:len(self._ids)]
+        self._matrix = new_matrix
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        """Fit vectors to the index dimension and scale them to unit length."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] > self.dim:
+            # extra dimensions are zero padding, dropping them keeps the cosine unchanged
+            vectors = vectors[:, :self.dim]
+        elif vectors.shape[1] < self.dim:
+            vectors = np.pad(
+                vectors, ((0, 0), (0, self.dim - vectors.shape[1])), mode="constant")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_many(self, item_ids: List[str], vectors: Union[List, np.ndarray]) -> None:
+        """Insert or replace several embeddings in one vectorized pass."""
+        if not item_ids:
+            return
+        with self.lock:
+            normalized = self._normalize(np.vstack(vectors))
+            new_ids = [
+                item_id for item_id in item_ids if item_id not in self._positions]
+            self._ensure_capacity(len(self._ids) + len(new_ids))
+            for item_id in new_ids:
+                self._positions[item_id] = len(self._ids)
+                self._ids.append(item_id)
+            rows = [self._positions[item_id] for item_id in item_ids]
+            self._matrix[rows] = normalized
+
+    def upsert(self, item_id: str, vector) -> None:
+        """Insert or replace the embedding of an item. A `None` vector removes the item."""
+        if vector is None or len(vector) == 0:
+            self.remove(item_id)
+            return
+        self.add_many([item_id], [np.asarray(vector, dtype=np.float32)])
+
+    def remove(self, item_id: str) -> None:
+        """Remove an item by moving the last row into its slot."""
+        with self.lock:
+            position = self._positions.pop(item_id, None)
+            if position is None:
+                return
+            last_position = len(self._ids) - 1
+            if position != last_position:
+                last_id = self._ids[last_position]
+                self._matrix[position] = self._matrix[last_position]
+                self._ids[position] = last_id
+                self._positions[last_id] = position
+            self._ids.pop()
+
+    def search(self, query, k: Optional[int] = None, ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Return the `k` nearest items to `query` as (id, cosine distance) pairs,
+        ordered from closest to farthest. When `k` is None all items are ranked.
+        With `ids` only those items are ranked.
+        """
+        with self.lock:
+            size = len(self._ids)
+            if size == 0 or query is None:
+                return []
+            query_vector = self._normalize(query)[0]
+            if ids is None:
+                positions = None
+                similarities = self._matrix[:size] @ query_vector
+            else:
+                positions = np.fromiter(
+                    (self._positions[item_id] for item_id in ids if item_id in self._positions), dtype=np.int64)
+                # keep the position order so ties rank like an unrestricted search
+                positions.sort()
+                similarities = self._matrix[positions] @ query_vector
+                size = positions.size
+
+            if k is not None and k < size:
+                candidates = np.argpartition(-similarities, k)[:k]
+                order = candidates[np.argsort(-similarities[candidates], kind="stable")]
+            else:
+                order = np.argsort(-similarities, kind="stable")
+
+            if positions is None:
+                return [(self._ids[i], float(1.0 - similarities[i])) for i in order]
+            return [(self._ids[positions[i]], float(1.0 - similarities[i])) for i in order]
+
+
+class VectorIndexManager:
+    """
+    Process-wide registry of vector indexes, one per memory table and embedding column.
+
+    Indexes are built lazily from the database on first search and are then kept in
+    sync by the memory managers through `sync_item` and `remove_item`.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str], VectorIndex] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """The in-process index replaces the SQLite UDF; PostgreSQL ranks with pgvector."""
+        return not settings.violet_pg_uri_no_default
+
+    @staticmethod
+    def vector_columns(target_class) -> List[str]:
+        """Names of the embedding columns declared on an ORM class."""
+        return [
+            attr.key for attr in inspect(target_class).column_attrs
+            if isinstance(attr.columns[0].type, CommonVector)
+        ]
+
+    def _mmap_path(self, table_name: str, column_name: str) -> Optional[str]:
+        if not settings.vector_index_mmap:
+            return None
+        return os.path.join(str(settings.VIOLET_DIR), "vector_index", f"{table_name}.{column_name}.f32")
+
+    def get_index(self, target_class, column_name: str) -> VectorIndex:
+        """Return the index for a column, building it from the database if needed."""
+        key = (target_class.__tablename__, column_name)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                return index
+            index = VectorIndex(mmap_path=self._mmap_path(*key))
+            # hold the index lock while loading so concurrent writes are applied after the snapshot
+            index.lock.acquire()
+            self._indexes[key] = index
+
+        try:
+            self._load(index, target_class, column_name)
+        except Exception:
+            with self._lock:
+                self._indexes.pop(key, None)
+            raise
+        finally:
+            index.lock.release()
+        return index
+
+    def _load(self, index: VectorIndex, target_class, column_name: str) -> None:
+        from violet.server.server import db_context
+
+        column = getattr(target_class, column_name)
+        with db_context() as session:
+            rows = session.execute(
+                select(target_class.id, column).where(column.isnot(None))).all()
+
+        item_ids = [row[0] for row in rows if row[1] is not None and len(row[1]) > 0]
+        vectors = [np.asarray(row[1], dtype=np.float32)
+                   for row in rows if row[1] is not None and len(row[1]) > 0]
+        index.add_many(item_ids, vectors)
+        logger.debug(
+            f"Built vector index for {target_class.__tablename__}.{column_name} with {len(index)} items")
+
+    def search(self, target_class, column_name: str, query_vector, k: Optional[int] = None,
+               ids: Optional[Collection[str]] = None) -> List[str]:
+        """Return the ids of the `k` items closest to `query_vector`, among `ids` when given."""
+        index = self.get_index(target_class, column_name)
+        return [item_id for item_id, _ in index.search(query_vector, k, ids)]
+
+    def sync_item(self, item) -> None:
+        """Propagate the embeddings of a freshly written ORM row to the loaded indexes."""
+        if not self.is_enabled():
+            return
+        target_class = type(item)
+        for column_name in self.vector_columns(target_class):
+            index = self._indexes.get((target_class.__tablename__, column_name))
+            if index is not None:
+                index.upsert(item.id, getattr(item, column_name, None))
+
+    def remove_item(self, target_class, item_id: str) -> None:
+        """Drop a deleted row from every loaded index of its table."""
+        if not self.is_enabled():
+            return
+        for (table_name, _), index in list(self._indexes.items()):
+            if table_name == target_class.__tablename__:
+                index.remove(item_id)
+
+    def reset(self) -> None:
+        """Forget all loaded indexes; they are rebuilt on the next search."""
+        with self._lock:
+            self._indexes.clear()
+
+
+# singleton
+vector_index_manager = VectorIndexManager()
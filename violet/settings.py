@@ -1,6 +1,6 @@
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -172,6 +172,58 @@ class Settings(BaseSettings):
     pg_pool_recycle: int = 1800  # When to recycle connections
     pg_echo: bool = False  # Logging
 
+    # pgvector ANN indexes on the memory embedding columns
+    pg_vector_index_type: Literal["hnsw", "ivfflat", "none"] = "hnsw"
+    pg_vector_index_dim: int = 2000  # leading dimensions indexed, up to 2000 as vector and 4000 as halfvec
+    pg_hnsw_m: int = 16
+    pg_hnsw_ef_construction: int = 64
+    pg_hnsw_ef_search: int = 40  # default recall/latency trade-off of hnsw queries
+    pg_ivfflat_lists: int = 100
+    pg_ivfflat_probes: int = 10  # default recall/latency trade-off of ivfflat queries
+
+    # in-process vector index (SQLite)
+    vector_index_mmap: bool = False  # back the index matrices with files under VIOLET_DIR
+
+    # precision used when storing embeddings on SQLite: float32, float16 or int8
+    embedding_storage_dtype: Literal["float32", "float16", "int8"] = "float32"
+
+    # in-memory BM25 index used when SQLite is built without FTS5
+    bm25_index_persist: bool = True  # save the per-field indexes under VIOLET_DIR so restarts skip the rebuild
+    bm25_index_max_filtered: int = 32  # indexes over a tree path or sensitivity filter kept in memory
+
+    # batched embedding requests (`get_text_embeddings`)
+    embedding_batch_size: int = 32  # texts per request
+    embedding_batch_max_tokens: int = 32768  # tokens per request
+
+    # query embedding cache shared by all agents, 0 disables it
+    embedding_cache_max_bytes: int = 64 * 1024 * 1024
+    embedding_cache_persist: bool = False  # also keep the embeddings in VIOLET_DIR/embedding_cache.db
+
+    # deferred embedding mode: memory rows are written right away and embedded by a background worker
+    defer_memory_embeddings: bool = False
+    embedding_backfill_batch_size: int = 64  # rows embedded per table and pass
+    embedding_backfill_interval: float = 5.0  # seconds between scans for pending rows, also the retry delay
+    embedding_backfill_max_attempts: int = 8  # failed passes of a row, with doubling delays, before it is left alone
+
+    # maintained memory row counts, recomputed with COUNT(*) every interval seconds, 0 disables it
+    memory_stats_reconcile_interval: float = 3600.0
+
+    # hot/cold memory tiering: old, rarely retrieved episodic, semantic and resource rows move to the
+    # compressed memory_archive table every interval seconds, 0 disables it; the archive is only searched on request
+    memory_tiering_interval: float = 0.0
+    memory_tiering_min_age_days: float = 180.0  # younger rows, and rows retrieved since, stay hot
+    memory_tiering_max_access_count: int = 2  # rows retrieved more often stay hot
+    memory_tiering_max_hot_items: int = 0  # rows per hot table, the coldest surplus is archived regardless of age, 0 disables the cap
+    memory_tiering_batch_size: int = 500  # rows moved per transaction
+    memory_access_flush_interval: float = 60.0  # seconds between writes of the retrieval counts, 0 disables counting
+
+    # warm Agent objects reused by consecutive steps of the same agent, 0 disables the cache
+    agent_cache_max_size: int = 32
+
+    # persist the step, messages and in-context window of an agent inner step in one transaction,
+    # see database/unit_of_work.py
+    agent_step_unit_of_work: bool = True
+
     # multi agent settings
     multi_agent_send_message_max_retries: int = 3
     multi_agent_send_message_timeout: int = 20 * 60
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch):
+    """
+    Factory of in-memory SQLite databases served to the managers through `server.db_context`.
+
+    `sqlite_db(*models)` creates the tables of the given ORM classes, and the memory_stats table
+    the memory writes are counted in, and returns the engine; every manager session then shares
+    its one connection.
+    """
+    import violet.server.server as server
+    from violet.orm.base import Base
+    from violet.orm.memory_stats import MemoryStats
+
+    def create(*models):
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine, tables=[model.__table__ for model in {MemoryStats, *models}])
+
+        @contextmanager
+        def db_context():
+            with Session(engine) as session:
+                yield session
+
+        monkeypatch.setattr(server, "db_context", db_context)
+        return engine
+
+    return create
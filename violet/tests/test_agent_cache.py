@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from violet.services.agent_cache import AgentCache, agent_versions
+
+
+class FakeAgent:
+    def __init__(self, agent_id, user_id="user-1"):
+        self.agent_state = SimpleNamespace(id=agent_id)
+        self.user = SimpleNamespace(id=user_id)
+
+
+def build(cache, agent_id, user_id="user-1"):
+    agent = FakeAgent(agent_id, user_id)
+    cache.lease(agent, agent_versions.get(agent_id))
+    return agent
+
+
+def test_checked_in_agents_are_reused_once_at_a_time():
+    cache = AgentCache(max_size=2)
+    agent = build(cache, "agent-cache-1")
+    assert cache.checkout("agent-cache-1", "user-1") is None
+    cache.checkin(agent)
+
+    assert cache.checkout("agent-cache-1", "user-1") is agent
+    # checked out: a concurrent step of the same agent builds its own
+    assert cache.checkout("agent-cache-1", "user-1") is None
+    cache.checkin(agent)
+    assert cache.checkout("agent-cache-1", "user-2") is None
+
+
+def test_writes_to_the_agent_or_shared_state_invalidate():
+    cache = AgentCache(max_size=2)
+    agent = build(cache, "agent-cache-2")
+    cache.checkin(agent)
+    agent_versions.bump("agent-cache-2")
+    assert cache.checkout("agent-cache-2", "user-1") is None
+
+    # the state changed during the step, the Agent is not kept
+    agent = build(cache, "agent-cache-2")
+    agent_versions.bump_all()
+    cache.checkin(agent)
+    assert cache.checkout("agent-cache-2", "user-1") is None
+
+
+def test_least_recently_used_agents_are_evicted():
+    cache = AgentCache(max_size=2)
+    agents = [build(cache, f"agent-cache-lru-{i}") for i in range(3)]
+    for agent in agents:
+        cache.checkin(agent)
+    assert cache.checkout("agent-cache-lru-0", "user-1") is None
+    assert cache.checkout("agent-cache-lru-2", "user-1") is agents[2]
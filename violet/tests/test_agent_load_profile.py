@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from violet.orm import (
+    Agent,
+    AgentEnvironmentVariable,
+    AgentsMessages,
+    AgentsTags,
+    Block,
+    BlocksAgents,
+    Message,
+    Organization,
+    Tool,
+    ToolsAgents,
+)
+from violet.orm.errors import NoResultFound
+from violet.schemas.user import User
+from violet.services.agent_manager import FULL_AGENT_LOAD_OPTIONS, AgentManager
+
+
+@pytest.fixture
+def engine(sqlite_db):
+    engine = sqlite_db(Organization, Agent, AgentsMessages, Message, Tool, ToolsAgents, Block,
+                       BlocksAgents, AgentsTags, AgentEnvironmentVariable)
+
+    with Session(engine) as session:
+        session.add(Organization(id="org-1", name="org"))
+        session.add(Agent(id="agent-1", name="chat", organization_id="org-1"))
+        session.add_all([AgentsMessages(agent_id="agent-1", position=i, message_id=f"message-{i}") for i in range(2)])
+        session.add_all([Message(id=f"message-{i}", agent_id="agent-1", organization_id="org-1", role="user", text="hi")
+                         for i in range(3)])
+        session.commit()
+    return engine
+
+
+def test_agents_are_read_without_their_messages(engine):
+    with Session(engine) as session:
+        agent = Agent.read(db_session=session, identifier="agent-1")
+        assert {"messages", "tools", "core_memory", "tags"} <= inspect(agent).unloaded
+
+    with Session(engine) as session:
+        agent = Agent.read(db_session=session, identifier="agent-1", load_options=FULL_AGENT_LOAD_OPTIONS)
+        assert "tools" not in inspect(agent).unloaded
+        assert "messages" in inspect(agent).unloaded
+
+
+def test_message_ids_are_read_without_the_agent(engine):
+    manager = AgentManager()
+    actor = User(id="user-1", organization_id="org-1", name="user", timezone="UTC")
+    assert manager.get_agent_message_ids(agent_id="agent-1", actor=actor) == ["message-0", "message-1"]
+
+    with pytest.raises(NoResultFound):
+        manager.get_agent_message_ids(agent_id="agent-1", actor=actor.model_copy(update={"organization_id": "org-2"}))
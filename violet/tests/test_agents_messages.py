@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from violet.orm.agents_messages import AgentsMessages
+from violet.orm.base import Base
+from violet.services.helpers.agent_manager_helper import (
+    _append_in_context_message_ids,
+    _prepend_in_context_message_ids,
+    _replace_system_message_id,
+    _set_in_context_message_ids,
+    _trim_in_context_message_ids,
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[AgentsMessages.__table__])
+    with Session(engine) as session:
+        yield session
+
+
+def window(session, agent_id="agent-1"):
+    return session.execute(
+        select(AgentsMessages.message_id).where(AgentsMessages.agent_id == agent_id).order_by(AgentsMessages.position)
+    ).scalars().all()
+
+
+def test_append_and_trim(session):
+    _append_in_context_message_ids(session, "agent-1", ["system", "m1", "m2"])
+    _append_in_context_message_ids(session, "agent-1", ["m3", "m4"])
+    _append_in_context_message_ids(session, "agent-2", ["other"])
+    assert window(session) == ["system", "m1", "m2", "m3", "m4"]
+
+    # same as [ids[0]] + ids[3:]
+    _trim_in_context_message_ids(session, "agent-1", 3)
+    assert window(session) == ["system", "m3", "m4"]
+    _append_in_context_message_ids(session, "agent-1", ["m5"])
+    assert window(session) == ["system", "m3", "m4", "m5"]
+
+    _trim_in_context_message_ids(session, "agent-1")
+    assert window(session) == ["system"]
+    assert window(session, "agent-2") == ["other"]
+
+
+def test_prepend_after_the_system_message(session):
+    _append_in_context_message_ids(session, "agent-1", ["system", "m1", "m2", "m3"])
+    _trim_in_context_message_ids(session, "agent-1", 3)
+    # fits in the gap left by the trim
+    _prepend_in_context_message_ids(session, "agent-1", ["summary"])
+    assert window(session) == ["system", "summary", "m3"]
+
+    # does not fit, the rest of the window moves
+    _prepend_in_context_message_ids(session, "agent-1", ["s1", "s2"])
+    assert window(session) == ["system", "s1", "s2", "summary", "m3"]
+
+    _replace_system_message_id(session, "agent-1", "new-system")
+    assert window(session) == ["new-system", "s1", "s2", "summary", "m3"]
+
+
+def test_set_rewrites_after_the_shared_prefix(session):
+    _set_in_context_message_ids(session, "agent-1", ["system", "m1", "m2"])
+    _set_in_context_message_ids(session, "agent-1", ["system", "m1", "m3", "m4"])
+    assert window(session) == ["system", "m1", "m3", "m4"]
+    positions = session.execute(select(AgentsMessages.position).where(
+        AgentsMessages.agent_id == "agent-1").order_by(AgentsMessages.position)).scalars().all()
+    assert positions == [0, 1, 2, 3]
+
+    _set_in_context_message_ids(session, "agent-1", [])
+    assert window(session) == []
@@ -0,0 +1,119 @@
+import random
+
+from rank_bm25 import BM25Okapi
+
+from violet.services.bm25_index import BM25Index
+
+VOCABULARY = ["alpha", "beta", "gamma", "delta", "meeting", "coffee", "paris", "python"]
+
+
+def okapi_ranking(corpus, query_tokens, limit):
+    ids = list(corpus)
+    scores = BM25Okapi([corpus[item_id] for item_id in ids]).get_scores(query_tokens)
+    ranked = sorted(zip(scores, ids), key=lambda x: x[0], reverse=True)
+    return [item_id for _, item_id in ranked[:limit]]
+
+
+def random_document(rng):
+    return [rng.choice(VOCABULARY) for _ in range(rng.randint(1, 8))]
+
+
+def test_ranking_matches_bm25okapi_through_updates():
+    rng = random.Random(0)
+    corpus = {f"ep_{i}": random_document(rng) for i in range(60)}
+    index = BM25Index(text_fn=None, tokenizer=None)
+    for item_id, tokens in corpus.items():
+        index.add_tokens(item_id, tokens)
+
+    for step in range(30):
+        item_id = f"ep_{rng.randrange(80)}"
+        if rng.random() < 0.3:
+            corpus.pop(item_id, None)
+            index.remove(item_id)
+        else:
+            # updates keep their position in the corpus, new documents are appended
+            corpus[item_id] = random_document(rng)
+            index.add_tokens(item_id, corpus[item_id])
+
+        query_tokens = rng.sample(VOCABULARY, 2)
+        for limit in (5, 50, None):
+            assert index.rank(query_tokens, limit) == okapi_ranking(corpus, query_tokens, limit)
+
+
+def test_saved_state_round_trips():
+    index = BM25Index(text_fn=None, tokenizer=None)
+    index.add_tokens("ep_1", ["coffee", "in", "paris"])
+    index.add_tokens("ep_2", ["python", "meeting", "meeting"])
+
+    restored = BM25Index(text_fn=None, tokenizer=None)
+    restored.load_state(index.state())
+
+    assert restored.get_scores(["meeting", "paris"]) == index.get_scores(["meeting", "paris"])
+
+
+def test_filtered_indexes_are_bounded_and_not_persisted(tmp_path, monkeypatch):
+    from contextlib import contextmanager
+    from datetime import datetime
+
+    from sqlalchemy import DateTime, String, create_engine
+    from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+    import violet.server.server as server
+    from violet.services.bm25_index import BM25IndexManager
+    from violet.settings import settings
+
+    class Base(DeclarativeBase):
+        pass
+
+    class Note(Base):
+        __tablename__ = "note"
+        id: Mapped[str] = mapped_column(String, primary_key=True)
+        text: Mapped[str] = mapped_column(String)
+        updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([Note(id=f"note_{i}", text=f"coffee in paris {i}") for i in range(5)])
+        session.commit()
+
+    @contextmanager
+    def db_context():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr(server, "db_context", db_context)
+    monkeypatch.setattr(settings, "VIOLET_DIR", tmp_path)
+    monkeypatch.setattr(settings, "bm25_index_max_filtered", 2)
+    manager = BM25IndexManager()
+    index_kwargs = dict(text_fn=lambda note: note.text, tokenizer=str.split)
+
+    with Session(engine) as session:
+        manager.search(session, Note, "text", ["paris"], **index_kwargs)
+        for i in range(5):
+            manager.search(session, Note, ("text", str(i)), ["paris"], filters=[Note.id == f"note_{i}"], **index_kwargs)
+
+    assert list(manager._indexes) == [("note", "text"), ("note", ("text", "3")), ("note", ("text", "4"))]
+    manager.sync_item(Note(id="note_5", text="python meeting"))
+    manager.save()
+    assert [path.name for path in (tmp_path / "bm25_index").iterdir()] == ["note.text.pkl"]
+
+
+def test_save_logs_database_errors(tmp_path, monkeypatch):
+    import violet.server.server as server
+    from violet.services.bm25_index import BM25IndexManager
+    from violet.settings import settings
+
+    def db_context():
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(server, "db_context", db_context)
+    monkeypatch.setattr(settings, "VIOLET_DIR", tmp_path)
+    manager = BM25IndexManager()
+    manager._indexes[("note", "text")] = BM25Index(text_fn=None, tokenizer=None)
+    manager._sources[("note", "text")] = (None, [])
+    manager._dirty.add(("note", "text"))
+
+    manager.save()
+
+    assert manager._dirty == {("note", "text")}
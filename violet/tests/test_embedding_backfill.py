@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from violet.services.embedding_backfill import EmbeddingBackfillWorker
+
+
+def test_backlog_tracks_enqueued_and_deleted_rows(monkeypatch):
+    worker = EmbeddingBackfillWorker(batch_size=8, interval=1)
+    monkeypatch.setattr(worker, "start", lambda: None)
+
+    for item_id in ("ep_1", "ep_2"):
+        worker.enqueue(SimpleNamespace(__tablename__="episodic_memory", id=item_id))
+    worker.enqueue(SimpleNamespace(__tablename__="knowledge_vault", id="kv_1"))
+
+    backlog = worker.backlog()
+    assert backlog["episodic_memory"] == 2
+    assert backlog["knowledge_vault"] == 1
+    assert backlog["semantic_memory"] == 0
+
+    worker.discard(SimpleNamespace(__tablename__="episodic_memory"), "ep_1")
+    assert worker.pending_ids("episodic_memory") == {"ep_2"}
+
+
+def test_a_failing_row_does_not_hold_back_its_batch(sqlite_db, monkeypatch):
+    from sqlalchemy.orm import Session
+
+    from violet.orm.knowledge_vault import KnowledgeVaultItem
+    from violet.services import embedding_backfill
+
+    engine = sqlite_db(KnowledgeVaultItem)
+    with Session(engine) as session:
+        session.add_all([
+            KnowledgeVaultItem(
+                id=item_id, entry_type="note", source="chat", sensitivity="low", secret_value="secret",
+                caption=caption, last_modify={}, metadata_={}, embedding_config={"embedding_model": "test"},
+                embedding_pending=True, organization_id="org-1")
+            for item_id, caption in (("kv_1", "rejected"), ("kv_2", "coffee"), ("kv_3", "tea"))])
+        session.commit()
+
+    class Model:
+        def get_text_embeddings(self, texts):
+            if "rejected" in texts:
+                raise ValueError("input rejected")
+            return [[1.0, 0.0]] * len(texts)
+
+    monkeypatch.setattr(embedding_backfill, "embedding_model", lambda config: Model())
+    monkeypatch.setattr(embedding_backfill, "embedding_model_identity", lambda config: "test")
+    monkeypatch.setattr(embedding_backfill.vector_index_manager, "sync_item", lambda item: None)
+    worker = EmbeddingBackfillWorker(batch_size=8, interval=0, max_attempts=2)
+    monkeypatch.setattr(worker, "start", lambda: None)
+    for item_id in ("kv_1", "kv_2", "kv_3"):
+        worker.enqueue(SimpleNamespace(__tablename__="knowledge_vault", id=item_id))
+
+    # the rest of the batch is embedded one by one
+    assert worker.run_once() == 2
+    assert worker.pending_ids("knowledge_vault") == {"kv_1"}
+
+    # retried until it failed max_attempts times, then skipped but still pending
+    assert worker.run_once() == 0
+    assert worker.skipped_ids("knowledge_vault") == {"kv_1"}
+    assert worker.run_once() == 0
+    assert worker.failures == 2
+    assert worker.pending_ids("knowledge_vault") == {"kv_1"}
+    with Session(engine) as session:
+        assert session.get(KnowledgeVaultItem, "kv_1").embedding_pending
+        assert not session.get(KnowledgeVaultItem, "kv_2").embedding_pending
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from violet.llm_api.embedding_cache import EmbeddingCache
+from violet.schemas.embedding_config import EmbeddingConfig
+
+
+@pytest.fixture
+def embedding_config():
+    return EmbeddingConfig(
+        embedding_model="bge-m3-q8_0.gguf",
+        embedding_endpoint_type='llama',
+        embedding_dim=4
+    )
+
+
+def test_hits_are_keyed_by_model_and_normalized_text(embedding_config):
+    cache = EmbeddingCache(max_bytes=1024)
+    cache.put(embedding_config, "coffee  shops\n", [0.1, 0.2, 0.3, 0.4])
+
+    assert cache.get(embedding_config, " coffee shops") == pytest.approx([0.1, 0.2, 0.3, 0.4])
+    assert cache.get(embedding_config, "tea shops") is None
+    other_model = embedding_config.model_copy(update={"embedding_model": "text-embedding-3-small"})
+    assert cache.get(other_model, "coffee shops") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_memory_footprint_is_bounded(embedding_config):
+    # room for two 4-dimensional float32 vectors
+    cache = EmbeddingCache(max_bytes=32)
+    for i in range(3):
+        cache.put(embedding_config, f"query {i}", np.full(4, i))
+    cache.get(embedding_config, "query 1")
+    cache.put(embedding_config, "query 3", np.full(4, 3))
+
+    assert cache.get(embedding_config, "query 0") is None
+    assert cache.get(embedding_config, "query 2") is None
+    assert cache.get(embedding_config, "query 1") is not None
+    assert cache.stats()["bytes"] <= 32
+
+
+def test_disk_backed_cache_survives_restart(embedding_config, tmp_path):
+    path = str(tmp_path / "embedding_cache.db")
+    EmbeddingCache(max_bytes=1024, persist=True, path=path).put(embedding_config, "coffee", [1.0, 0.0, 0.5, 0.25])
+
+    cache = EmbeddingCache(max_bytes=1024, persist=True, path=path)
+    assert cache.get(embedding_config, "coffee") == [1.0, 0.0, 0.5, 0.25]
+    assert cache.stats()["disk_hits"] == 1
@@ -0,0 +1,26 @@
+import base64
+
+import numpy as np
+import pytest
+
+from violet.helpers.converters import decode_embedding, decode_legacy_embedding, encode_embedding, is_encoded_embedding
+
+
+@pytest.mark.parametrize("dtype,atol", [("float32", 0), ("float16", 1e-3), ("int8", 1e-2)])
+def test_embedding_round_trip_keeps_native_dimension(dtype, atol):
+    vector = np.random.default_rng(0).uniform(-1, 1, size=384).astype(np.float32)
+
+    data = encode_embedding(vector, dtype=dtype)
+    decoded = decode_embedding(data)
+
+    assert is_encoded_embedding(data)
+    assert decoded.shape == (384,)
+    np.testing.assert_allclose(decoded, vector, atol=atol)
+
+
+def test_legacy_embeddings_are_still_readable():
+    vector = np.pad(np.arange(1, 9, dtype=np.float32), (0, 4088))
+    legacy = base64.b64encode(vector.tobytes())
+
+    assert not is_encoded_embedding(legacy)
+    np.testing.assert_array_equal(decode_legacy_embedding(legacy), vector)
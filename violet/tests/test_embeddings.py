@@ -23,3 +23,87 @@ async def test_embed(embedding_config):
     embedding = model.get_text_embedding(text)
     assert embedding is not None
     assert len(embedding) > 0
+
+
+@pytest.mark.asyncio
+async def test_embed_batch(embedding_config):
+    texts = ["Hello, world!", "Llamas are members of the camelid family", "Hello, world!"]
+
+    model = embedding_model(embedding_config)
+
+    embeddings = model.get_text_embeddings(texts)
+    assert len(embeddings) == len(texts)
+    assert embeddings[0] == pytest.approx(embeddings[2], abs=1e-5)
+    assert embeddings[0] == pytest.approx(model.get_text_embedding(texts[0]), abs=1e-5)
+
+
+def test_micro_batches_respect_size_and_token_budget():
+    from violet.llm_api.embeddings import BatchedEmbeddings, batch_texts
+
+    texts = ["one two three", "four", "five six", "seven eight nine ten " * 10, "eleven"]
+
+    batches = batch_texts(texts, "text-embedding-3-small", batch_size=2, max_tokens=5)
+    assert [text for batch in batches for text in batch] == texts
+    assert all(len(batch) <= 2 for batch in batches)
+    # the long text is sent on its own
+    assert [texts[3]] in batches
+
+    class CountingEmbeddings(BatchedEmbeddings):
+        model_name = "text-embedding-3-small"
+
+        def __init__(self):
+            self.requests = 0
+
+        def _embed_batch(self, batch):
+            self.requests += 1
+            return [[float(len(text))] for text in batch]
+
+    model = CountingEmbeddings()
+    assert model.get_text_embeddings(texts * 4) == [[float(len(text))] for text in texts * 4]
+    assert model.requests == 1
+
+
+def test_registry_reuses_models_until_invalidated(embedding_config, monkeypatch):
+    import gc
+
+    from violet.llm_api import embeddings
+    from violet.llm_api.embeddings import BatchedEmbeddings, EmbeddingModelRegistry
+
+    created = []
+
+    class FakeClient:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    class FakeModel(BatchedEmbeddings):
+        model_name = embedding_config.embedding_model
+
+        def __init__(self):
+            self._http_client = FakeClient()
+
+    def create(config, user_id=None):
+        created.append(FakeModel())
+        return created[-1]
+
+    monkeypatch.setattr(embeddings, "create_embedding_model", create)
+    registry = EmbeddingModelRegistry()
+
+    first = registry.get(embedding_config)
+    assert registry.get(embedding_config.model_copy()) is first
+    assert len(created) == 1
+
+    other_config = embedding_config.model_copy(update={"embedding_dim": 768})
+    assert registry.get(other_config) is not first
+
+    registry.invalidate(embedding_config)
+    assert registry.get(embedding_config) is not first
+    assert len(created) == 3
+
+    # a request still holding the invalidated model keeps its connections open
+    first_client = first._http_client
+    assert not first_client.closed
+    del first, created[0]
+    gc.collect()
+    assert first_client.closed and not created[0]._http_client.closed
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+import violet.server.server as server
+from violet.orm.episodic_memory import EpisodicEvent
+from violet.schemas.agent import AgentState
+from violet.services.episodic_memory_manager import (
+    EpisodicMemoryManager,
+    decode_timeline_cursor,
+    encode_timeline_cursor,
+)
+
+START = datetime(2024, 1, 1)
+AGENT_STATE = AgentState.model_construct()
+
+
+@pytest.fixture
+def manager(sqlite_db):
+    engine = sqlite_db(EpisodicEvent)
+    with Session(engine) as session:
+        # three events per hour, so pages end in the middle of equal timestamps
+        session.add_all([
+            EpisodicEvent(
+                id=f"ep_mem-{i:03d}", occurred_at=START + timedelta(hours=i // 3), actor="user",
+                event_type="activity", summary=f"event {i}", details="details", organization_id="org-1")
+            for i in range(40)
+        ])
+        session.commit()
+
+    manager = EpisodicMemoryManager.__new__(EpisodicMemoryManager)
+    manager.session_maker = server.db_context
+    return manager
+
+
+def read_timeline(manager, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = manager.list_episodic_memory_page(agent_state=AGENT_STATE, cursor=cursor, limit=7, **kwargs)
+        ids += [event.id for event in page]
+        if len(page) < 7:
+            return ids
+        cursor = encode_timeline_cursor(page[-1])
+
+
+def test_keyset_pages_cover_the_timeline_once(manager):
+    expected = [f"ep_mem-{i:03d}" for i in range(40)]
+
+    assert read_timeline(manager) == expected[::-1]
+    assert read_timeline(manager, ascending=True) == expected
+    assert read_timeline(manager, ascending=True, start_time=START + timedelta(hours=2),
+                         end_time=START + timedelta(hours=5)) == expected[6:18]
+    assert read_timeline(manager, organization_id="org-2") == []
+
+
+def test_cursor_round_trip_and_buckets(manager):
+    page = manager.list_episodic_memory_page(agent_state=AGENT_STATE, limit=1, timezone_str="Asia/Shanghai")
+    # the cursor is in UTC whatever timezone the page was converted to
+    assert decode_timeline_cursor(encode_timeline_cursor(page[0])) == (START + timedelta(hours=13), "ep_mem-039")
+
+    buckets = manager.count_episodic_memory_by_bucket(
+        START, START + timedelta(hours=23, minutes=59), bucket=timedelta(hours=6))
+    assert buckets == [(START + timedelta(hours=6 * i), count) for i, count in enumerate([18, 18, 4, 0])]
+
+
+def test_bucket_counts_are_capped(manager):
+    # a range ending just short of a bucket edge does not count that bucket
+    buckets = manager.count_episodic_memory_by_bucket(
+        START, START + timedelta(hours=2, milliseconds=-1), bucket=timedelta(hours=1))
+    assert buckets == [(START, 3), (START + timedelta(hours=1), 3)]
+
+    with pytest.raises(ValueError):
+        manager.count_episodic_memory_by_bucket(START, START + timedelta(days=365), bucket=timedelta(minutes=1))
+
+
+def test_texts_are_read_in_keyset_pages(manager):
+    from violet.services.utils import iter_item_texts
+
+    pages = iter_item_texts(server.db_context, EpisodicEvent, [EpisodicEvent.summary], lambda row: row.summary, page_size=7)
+    assert list(pages) == [(f"ep_mem-{i:03d}", f"event {i}") for i in range(40)]
+    assert list(manager.iter_texts(ids=["ep_mem-005", "ep_mem-001"])) == [
+        ("ep_mem-001", "event 1 details"), ("ep_mem-005", "event 5 details")]
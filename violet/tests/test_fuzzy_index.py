@@ -0,0 +1,64 @@
+import random
+
+from rapidfuzz import fuzz
+
+from violet.services.fuzzy_index import FuzzyIndex
+
+VOCABULARY = ["alpha", "beta", "gamma", "delta", "meeting", "coffee", "paris", "python"]
+
+
+def partial_ratio_ranking(corpus, query, limit):
+    # sorted() is stable, ties keep the corpus order like the row-by-row search
+    ranked = sorted(corpus, key=lambda item_id: fuzz.partial_ratio(query.lower(), corpus[item_id].lower()), reverse=True)
+    return ranked[:limit] if limit else ranked
+
+
+def random_document(rng):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 8)))
+
+
+def test_ranking_matches_partial_ratio_through_updates():
+    rng = random.Random(0)
+    corpus = {f"ep_{i}": random_document(rng) for i in range(60)}
+    index = FuzzyIndex(text_fn=None)
+    for item_id, text in corpus.items():
+        index.add_text(item_id, text)
+
+    for step in range(30):
+        item_id = f"ep_{rng.randrange(80)}"
+        if rng.random() < 0.3:
+            corpus.pop(item_id, None)
+            index.remove(item_id)
+        else:
+            # updates keep their position in the corpus, new documents are appended
+            corpus[item_id] = random_document(rng)
+            index.add_text(item_id, corpus[item_id])
+
+        query = rng.choice(VOCABULARY)[:rng.randint(2, 6)].upper()
+        for limit in (5, 50, None):
+            assert index.rank(query, limit) == partial_ratio_ranking(corpus, query, limit)
+
+
+def test_ngram_prefilter_keeps_the_best_match_of_a_large_corpus():
+    rng = random.Random(1)
+    index = FuzzyIndex(text_fn=None)
+    for i in range(5000):
+        index.add_text(f"ep_{i}", random_document(rng))
+    index.add_text("ep_target", "Booked the flight to Lisbon for the conference")
+
+    assert index.rank("flight to lisbon", limit=3)[0] == "ep_target"
+
+
+def test_ranking_restricted_to_ids():
+    rng = random.Random(2)
+    corpus = {f"ep_{i}": random_document(rng) for i in range(3000)}
+    index = FuzzyIndex(text_fn=None)
+    for item_id, text in corpus.items():
+        index.add_text(item_id, text)
+
+    # a subtree or sensitivity filter ranks a subset of the one corpus, unknown ids are ignored
+    subset = {item_id: corpus[item_id] for item_id in list(corpus)[::3]}
+    for limit in (5, None):
+        assert index.rank("coffee", limit, ids=list(subset) + ["ep_missing"]) == partial_ratio_ranking(
+            subset, "coffee", limit)
+    assert index.rank("coffee", 5, ids=[]) == []
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from violet.services.utils import reciprocal_rank_fusion
+
+
+def items(*ids):
+    return [SimpleNamespace(id=item_id) for item_id in ids]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    lexical = items("ep_1", "ep_2", "ep_3")
+    vector = items("ep_3", "ep_4", "ep_1")
+
+    fused = reciprocal_rank_fusion([lexical, vector], limit=3)
+
+    # ep_1 and ep_3 are found by both methods and tie, ep_1 was seen first
+    assert [item.id for item in fused] == ["ep_1", "ep_3", "ep_2"]
+
+
+def test_reciprocal_rank_fusion_with_a_single_list_keeps_its_order():
+    assert [item.id for item in reciprocal_rank_fusion([items("a", "b", "c")])] == ["a", "b", "c"]
+
+
+def test_rows_without_embeddings_are_ranked_lexically(monkeypatch):
+    from violet.services import utils
+
+    monkeypatch.setattr(utils.embedding_backfill, "pending_ids", lambda target: {"ep_9"})
+    calls = []
+
+    def list_method(**kwargs):
+        calls.append(kwargs)
+        return items("ep_9", "ep_1")
+
+    # a pending row ranked last by the vector search only counts with its lexical rank
+    merged = utils.merge_pending_embeddings(
+        list_method, None, None, "coffee", "summary", items("ep_1", "ep_2", "ep_9"), limit=3)
+
+    assert [item.id for item in merged] == ["ep_1", "ep_9", "ep_2"]
+    assert calls[0]["search_method"] == "bm25"
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from violet.services.memory_fts import MemoryFTSIndex, create_fts_index
+
+Base = declarative_base()
+
+
+class Procedure(Base):
+    __tablename__ = "procedural_memory"
+
+    id = Column(String, primary_key=True)
+    summary = Column(String)
+    steps = Column(JSON)
+    entry_type = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+def test_fts_index_follows_inserts_updates_and_deletes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Procedure(id="proc_1", summary="How to bake bread",
+                              steps=["mix flour", "knead dough"], entry_type="recipe"))
+        session.commit()
+
+    # rows written before the index exists are picked up by the rebuild
+    with engine.begin() as connection:
+        create_fts_index(connection, "procedural_memory")
+
+    index = MemoryFTSIndex()
+    with Session(engine) as session:
+        session.add(Procedure(id="proc_2", summary="Deploy the server",
+                              steps=["build image", "push"], entry_type="workflow"))
+        session.commit()
+
+        assert [item.id for item in index.search(session, Procedure, "dough server")] == ["proc_2", "proc_1"]
+        assert index.search(session, Procedure, "dough", search_field="summary") == []
+
+        session.get(Procedure, "proc_2").summary = "Restart the service"
+        session.delete(session.get(Procedure, "proc_1"))
+        session.commit()
+
+        assert index.search(session, Procedure, "deploy") == []
+        assert index.search(session, Procedure, "bread") == []
+        assert [item.id for item in index.search(session, Procedure, "restart")] == ["proc_2"]
+
+
+def test_fts_index_survives_renumbered_rowids():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        create_fts_index(connection, "procedural_memory")
+
+    index = MemoryFTSIndex()
+    with Session(engine) as session:
+        session.add_all([Procedure(id=f"proc_{i}", summary=f"step {i}", steps=[], entry_type="note") for i in range(5)])
+        session.add(Procedure(id="proc_bread", summary="How to bake bread", steps=[], entry_type="recipe"))
+        session.commit()
+        for i in range(5):
+            session.delete(session.get(Procedure, f"proc_{i}"))
+        session.commit()
+
+    # renumber the implicit rowids of the memory table, as VACUUM may
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE procedural_memory SET rowid = rowid + 100")
+
+    with Session(engine) as session:
+        assert [item.id for item in index.search(session, Procedure, "bread")] == ["proc_bread"]
+        session.get(Procedure, "proc_bread").summary = "How to brew coffee"
+        session.commit()
+        assert index.search(session, Procedure, "bread") == []
+        assert [item.id for item in index.search(session, Procedure, "coffee")] == ["proc_bread"]
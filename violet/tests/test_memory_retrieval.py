@@ -0,0 +1,129 @@
+import logging
+import time
+from functools import partial
+from types import SimpleNamespace
+
+from violet.agent.agent import UNAVAILABLE_MEMORY, Agent
+from violet.constants import MEMORY_RETRIEVAL_MAX_WORKERS
+
+
+def fake_agent():
+    return SimpleNamespace(logger=logging.getLogger("violet.tests.memory_retrieval"))
+
+
+def test_retrievals_run_concurrently():
+    def slow(key_words):
+        time.sleep(0.5)
+        return key_words
+
+    retrievers = {memory_type: slow for memory_type in ("episodic", "semantic", "resource", "procedural")}
+    start = time.monotonic()
+    results = Agent._retrieve_memories_concurrently(fake_agent(), retrievers, key_words="coffee")
+
+    assert results == {memory_type: "coffee" for memory_type in retrievers}
+    assert time.monotonic() - start < 1.5
+
+
+def test_failed_retrieval_is_left_out(monkeypatch):
+    monkeypatch.setattr("violet.agent.agent.MEMORY_RETRIEVAL_TIMEOUT", 0.2)
+
+    def failing(key_words):
+        raise RuntimeError("database is locked")
+
+    def hanging(key_words):
+        time.sleep(1)
+        return "too late"
+
+    results = Agent._retrieve_memories_concurrently(
+        fake_agent(), {"core": lambda key_words: "core", "semantic": failing, "resource": hanging}, key_words="")
+
+    assert results == {"core": "core"}
+
+
+def test_queued_retrievals_get_their_budget_when_they_start(monkeypatch):
+    monkeypatch.setattr("violet.agent.agent.MEMORY_RETRIEVAL_TIMEOUT", 0.35)
+
+    def slow(key_words):
+        time.sleep(0.2)
+        return key_words
+
+    # more retrievers than pool workers, the last ones wait 0.2s for a worker before running
+    retrievers = {f"type_{i}": slow for i in range(MEMORY_RETRIEVAL_MAX_WORKERS + 2)}
+    results = Agent._retrieve_memories_concurrently(fake_agent(), retrievers, key_words="coffee")
+
+    assert results == {memory_type: "coffee" for memory_type in retrievers}
+
+
+def prompt_agent():
+    agent = fake_agent()
+    agent.user = SimpleNamespace(id="user-1")
+    agent.user_manager = SimpleNamespace(get_user_by_id=lambda user_id: SimpleNamespace(timezone="UTC (UTC+00:00)"))
+    agent.build_system_prompt = partial(Agent.build_system_prompt, agent)
+    return agent
+
+
+def test_failed_retrievals_are_not_rendered_as_empty():
+    prompt = Agent.build_system_prompt(prompt_agent(), {
+        "key_words": "coffee",
+        "core": "name: Ada",
+        "semantic": {"total_number_of_items": 3, "current_count": 0, "text": ""},
+    })
+
+    assert "<semantic_memory> (0 out of 3 Items):\nEmpty\n" in prompt
+    assert f"<resource_memory> (Unavailable):\n{UNAVAILABLE_MEMORY}\n" in prompt
+    assert f"Most Relevant Events (Unavailable):\n{UNAVAILABLE_MEMORY}\n" in prompt
+
+
+def test_core_memory_is_never_dropped():
+    def failing(**kwargs):
+        raise RuntimeError("database is locked")
+
+    agent = prompt_agent()
+    agent.agent_state = SimpleNamespace(
+        name="chat_agent", topic="coffee", memory=SimpleNamespace(compile=lambda: "name: Ada"))
+    for memory_type in ("core_memory", "knowledge_vault", "episodic_memory", "resource_memory",
+                        "procedural_memory", "semantic_memory"):
+        setattr(agent, f"_retrieve_{memory_type}", failing)
+    agent._retrieve_cached = lambda memory_type, table_name, retriever, **kwargs: retriever(**kwargs)
+    agent._retrieve_memories_concurrently = partial(Agent._retrieve_memories_concurrently, agent)
+
+    prompt, retrieved_memories = Agent.build_system_prompt_with_memories(agent, "system")
+
+    # the blocks loaded with the agent state stand in, the persisted ones are retried on the next step
+    assert "<core_memory>\nname: Ada\n</core_memory>" in prompt
+    assert "core" not in retrieved_memories
+
+
+class FakeMemory(SimpleNamespace):
+    def __getattr__(self, name):
+        return None
+
+
+def test_search_in_all_memory_runs_concurrently_and_ranks_across_types():
+    from violet.functions.function_sets.base import search_in_memory
+
+    def manager(prefix, fail=False):
+        def list_method(**kwargs):
+            time.sleep(0.3)
+            if fail:
+                raise RuntimeError("database is locked")
+            return [FakeMemory(id=f"{prefix}_{rank}") for rank in range(2)]
+        return list_method
+
+    agent = fake_agent()
+    agent.agent_state = SimpleNamespace(name="chat_agent")
+    agent.episodic_memory_manager = SimpleNamespace(list_episodic_memory=manager("ep"))
+    agent.resource_memory_manager = SimpleNamespace(list_resources=manager("res"))
+    agent.procedural_memory_manager = SimpleNamespace(list_procedures=manager("proc"))
+    agent.knowledge_vault_manager = SimpleNamespace(list_knowledge=manager("kv"))
+    agent.semantic_memory_manager = SimpleNamespace(list_semantic_items=manager("sem", fail=True))
+    agent._retrieve_memories_concurrently = lambda *args, **kwargs: Agent._retrieve_memories_concurrently(agent, *args, **kwargs)
+
+    start = time.monotonic()
+    results, count = search_in_memory(agent, "all", "coffee", "null", "bm25", "UTC")
+
+    assert time.monotonic() - start < 1.2
+    # the best match of every type comes before the second best of any type
+    assert [result["id"] for result in results] == [
+        "ep_0", "res_0", "proc_0", "kv_0", "ep_1", "res_1", "proc_1", "kv_1"]
+    assert count == 8
@@ -0,0 +1,40 @@
+from violet.services.memory_retrieval_cache import MemoryRetrievalCache, memory_versions
+
+
+class Retriever:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"text": f"result {self.calls}"}
+
+
+def test_unchanged_memory_is_not_requeried():
+    cache = MemoryRetrievalCache("agent-1")
+    retrieve = Retriever()
+
+    first = cache.get_or_retrieve("semantic", "semantic_memory", ("coffee", "bm25"), retrieve)
+    second = cache.get_or_retrieve("semantic", "semantic_memory", ("coffee", "bm25"), retrieve)
+
+    assert first is second
+    assert retrieve.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # a different query is a different entry
+    cache.get_or_retrieve("semantic", "semantic_memory", ("tea", "bm25"), retrieve)
+    assert retrieve.calls == 2
+
+
+def test_write_to_the_table_invalidates():
+    cache = MemoryRetrievalCache("agent-1")
+    retrieve = Retriever()
+
+    cache.get_or_retrieve("episodic", "episodic_memory", ("coffee", "bm25"), retrieve)
+    memory_versions.bump("resource_memory")
+    cache.get_or_retrieve("episodic", "episodic_memory", ("coffee", "bm25"), retrieve)
+    assert retrieve.calls == 1
+
+    memory_versions.bump("episodic_memory")
+    result = cache.get_or_retrieve("episodic", "episodic_memory", ("coffee", "bm25"), retrieve)
+    assert result == {"text": "result 2"}
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from violet.database.unit_of_work import after_commit, unit_of_work
+from violet.orm.episodic_memory import EpisodicEvent
+from violet.orm.memory_stats import MemoryStats
+from violet.services.memory_retrieval_cache import memory_versions
+from violet.services.memory_stats import COUNTED_MEMORY_CLASSES, MemoryStatsManager
+
+
+def episodic_event(item_id):
+    return EpisodicEvent(
+        id=item_id, occurred_at=datetime(2024, 1, 1), actor="user", event_type="activity",
+        summary="summary", details="details", organization_id="org-1")
+
+
+def test_counts_follow_inserts_deletes_and_rollbacks(sqlite_db):
+    engine = sqlite_db(MemoryStats, *COUNTED_MEMORY_CLASSES)
+    stats = MemoryStatsManager(interval=0)
+
+    with Session(engine) as session:
+        session.add_all([episodic_event(f"ep_{i}") for i in range(3)])
+        session.commit()
+    # the first lookup seeds the count
+    assert stats.count(EpisodicEvent) == 3
+
+    with Session(engine) as session:
+        session.add(episodic_event("ep_3"))
+        session.flush()
+        # the count is written in the writer's transaction
+        assert session.get(MemoryStats, "episodic_memory").item_count == 4
+        session.commit()
+        session.delete(session.get(EpisodicEvent, "ep_0"))
+        session.delete(session.get(EpisodicEvent, "ep_1"))
+        session.commit()
+        session.add(episodic_event("ep_4"))
+        session.flush()
+        session.rollback()
+    memory_versions.bump(EpisodicEvent)
+    assert stats.count(EpisodicEvent) == 2
+    with Session(engine) as session:
+        assert session.get(MemoryStats, "episodic_memory").item_count == 2
+
+    # writes bypassing the ORM are only picked up by the reconciliation
+    with Session(engine) as session:
+        session.execute(insert(EpisodicEvent.__table__).values(
+            id="ep_5", occurred_at=datetime(2024, 1, 1), actor="user", event_type="activity",
+            summary="summary", details="details", last_modify={}, tree_path=[]))
+        session.commit()
+    assert stats.count(EpisodicEvent) == 2
+    assert stats.reconcile()["episodic_memory"] == 3
+    assert stats.count(EpisodicEvent) == 3
+
+
+
+def test_a_reconciliation_right_after_a_commit_counts_the_write_once(sqlite_db):
+    engine = sqlite_db(MemoryStats, *COUNTED_MEMORY_CLASSES)
+    stats = MemoryStatsManager(interval=0)
+    assert stats.reconcile()["episodic_memory"] == 0
+
+    reconciled = []
+    with unit_of_work(engine) as unit:
+        # runs once the transaction is committed, before the callbacks of the write below
+        after_commit(lambda: reconciled.append(stats.reconcile()["episodic_memory"]))
+        with unit.session() as session:
+            session.add(episodic_event("ep_0"))
+            session.commit()
+
+    memory_versions.bump(EpisodicEvent)
+    assert reconciled == [1]
+    assert stats.count(EpisodicEvent) == 1
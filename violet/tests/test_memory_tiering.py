@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from violet.orm.memory_archive import MemoryArchiveItem
+from violet.orm.memory_stats import MemoryStats
+from violet.orm.memory_tree_path import MemoryTreePath
+from violet.orm.semantic_memory import SemanticMemoryItem
+from violet.services.memory_fts import ARCHIVE_FTS_COLUMNS, ARCHIVE_FTS_KEY_COLUMNS, create_fts_index, memory_fts_index
+from violet.services.memory_tiering import (
+    TIERED_MEMORY_CLASSES,
+    MemoryTieringManager,
+    TieringPolicy,
+    decode_payload,
+    encode_payload,
+)
+
+
+def semantic_item(item_id, name, created_at, access_count=0):
+    return SemanticMemoryItem(
+        id=item_id, name=name, summary=f"{name} summary", details="details", source="chat",
+        tree_path=["topics", name], organization_id="org-1", created_at=created_at, access_count=access_count)
+
+
+def test_payload_round_trip():
+    item = semantic_item("sem_1", "espresso", datetime(2024, 1, 1, 12, 30))
+    item.details_embedding = np.arange(4, dtype=np.float32)
+
+    values = decode_payload(encode_payload(item))
+    assert values["created_at"] == datetime(2024, 1, 1, 12, 30)
+    assert values["tree_path"] == ["topics", "espresso"]
+    np.testing.assert_array_equal(values["details_embedding"], np.arange(4, dtype=np.float32))
+    assert values["name_embedding"] is None
+
+
+def test_cold_items_move_to_the_archive_and_back(sqlite_db, monkeypatch):
+    engine = sqlite_db(MemoryStats, MemoryTreePath, MemoryArchiveItem, *TIERED_MEMORY_CLASSES)
+    with engine.begin() as connection:
+        create_fts_index(connection, "memory_archive", ARCHIVE_FTS_COLUMNS, ARCHIVE_FTS_KEY_COLUMNS)
+    monkeypatch.setattr(memory_fts_index, "_available", {})
+    tiering = MemoryTieringManager(
+        TieringPolicy(min_age=timedelta(days=30), max_access_count=2), interval=0, flush_interval=0, batch_size=1)
+
+    old = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=365)
+    with Session(engine) as session:
+        session.add_all([
+            semantic_item("sem_1", "espresso", old),
+            semantic_item("sem_2", "cappuccino", old, access_count=5),
+            semantic_item("sem_3", "latte", old),
+            semantic_item("sem_4", "mocha", datetime.now(timezone.utc).replace(tzinfo=None)),
+        ])
+        session.commit()
+
+    # retrieved just now, the old latte stays hot
+    tiering.record_access(SemanticMemoryItem, ["sem_3"])
+    assert tiering.run_once()["semantic_memory"] == 1
+
+    with Session(engine) as session:
+        assert sorted(session.execute(select(SemanticMemoryItem.id)).scalars()) == ["sem_2", "sem_3", "sem_4"]
+        assert session.get(SemanticMemoryItem, "sem_3").access_count == 1
+    assert tiering.count_archived(SemanticMemoryItem) == 1
+
+    assert [item.id for item in tiering.search_archive(SemanticMemoryItem, "ESPRESSO summary")] == ["sem_1"]
+    assert tiering.search_archive(SemanticMemoryItem, "latte") == []
+    assert tiering.search_archive(SemanticMemoryItem, "", tree_path_prefix=["topics", "mocha"]) == []
+    assert [item.id for item in tiering.search_archive(
+        SemanticMemoryItem, "espresso", tree_path_prefix=["Topics"])] == ["sem_1"]
+
+    restored = tiering.restore(SemanticMemoryItem, ["sem_1"])
+    assert [item.name for item in restored] == ["espresso"]
+    assert tiering.count_archived(SemanticMemoryItem) == 0
+    assert tiering.search_archive(SemanticMemoryItem, "espresso") == []
+    with Session(engine) as session:
+        assert session.get(SemanticMemoryItem, "sem_1").tree_path == ["topics", "espresso"]
+        # the tree path index follows the row
+        assert session.execute(select(MemoryTreePath.table_name, MemoryTreePath.item_id).where(
+            MemoryTreePath.path == '["topics", "espresso"]')).all() == [("semantic_memory", "sem_1")]
+
+
+def test_hot_tables_are_capped(sqlite_db):
+    engine = sqlite_db(MemoryStats, MemoryTreePath, MemoryArchiveItem, *TIERED_MEMORY_CLASSES)
+    tiering = MemoryTieringManager(
+        TieringPolicy(min_age=timedelta(days=30), max_access_count=2, max_hot_items=2),
+        interval=0, flush_interval=0, batch_size=10)
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with Session(engine) as session:
+        session.add_all([semantic_item(f"sem_{i}", f"item{i}", now - timedelta(hours=i), access_count=i % 2)
+                         for i in range(5)])
+        session.commit()
+
+    # the least retrieved, then the oldest, leave the hot table
+    assert tiering.run_once()["semantic_memory"] == 3
+    with Session(engine) as session:
+        assert sorted(session.execute(select(SemanticMemoryItem.id)).scalars()) == ["sem_1", "sem_3"]
@@ -0,0 +1,49 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from violet.orm.base import Base
+from violet.orm.memory_stats import MemoryStats
+from violet.orm.memory_tree_path import MemoryTreePath
+from violet.orm.semantic_memory import SemanticMemoryItem
+from violet.services.memory_tree_paths import count_subtree, in_subtree, list_subtree, subtree_filter
+
+
+def semantic_item(item_id, tree_path):
+    return SemanticMemoryItem(
+        id=item_id, name=item_id, summary="summary", details="details", source="chat",
+        tree_path=tree_path, organization_id="org-1")
+
+
+def test_subtrees_follow_inserts_updates_and_deletes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[MemoryStats.__table__, MemoryTreePath.__table__, SemanticMemoryItem.__table__])
+
+    with Session(engine) as session:
+        session.add_all([
+            semantic_item("sem_1", ["Favorites", "Pets", "Dog"]),
+            # segments are matched case and whitespace insensitively
+            semantic_item("sem_2", ["favorites", " pets "]),
+            semantic_item("sem_3", ["work"]),
+            semantic_item("sem_4", []),
+        ])
+        session.commit()
+
+        assert count_subtree(session, SemanticMemoryItem, ["favorites"]) == 2
+        assert count_subtree(session, SemanticMemoryItem, ["favorites", "pets", "dog"]) == 1
+        # a prefix of a segment is not a subtree
+        assert count_subtree(session, SemanticMemoryItem, ["fav"]) == 0
+
+        session.get(SemanticMemoryItem, "sem_1").tree_path = ["work", "dog"]
+        session.delete(session.get(SemanticMemoryItem, "sem_3"))
+        session.commit()
+
+        assert count_subtree(session, SemanticMemoryItem, ["favorites"]) == 1
+        assert [item.id for item in list_subtree(session, SemanticMemoryItem, ["work"])] == ["sem_1"]
+        assert session.execute(select(SemanticMemoryItem.id).where(
+            subtree_filter(SemanticMemoryItem, ["Work", "Dog"]))).scalars().all() == ["sem_1"]
+
+
+def test_in_subtree_matches_the_index():
+    assert in_subtree(["Work", "Dog"], ["work"])
+    assert not in_subtree(["work"], ["work", "dog"])
+    assert in_subtree(["anything"], None)
@@ -0,0 +1,21 @@
+from sqlalchemy import event
+
+from violet.orm.message import Message as MessageModel
+from violet.schemas.message import Message
+from violet.schemas.user import User
+from violet.services.message_manager import MessageManager
+
+
+def test_messages_are_created_in_one_commit(sqlite_db):
+    engine = sqlite_db(MessageModel)
+    commits = []
+    event.listen(engine, "commit", lambda connection: commits.append(connection))
+
+    actor = User(id="user-1", organization_id="org-1", name="user", timezone="UTC")
+    messages = [Message(agent_id="agent-1", role="user", text=f"message {i}") for i in range(5)]
+    created = MessageManager().create_many_messages(messages, actor=actor)
+
+    assert len(commits) == 1
+    assert [m.id for m in created] == [m.id for m in messages]
+    assert [m.text for m in created] == [f"message {i}" for i in range(5)]
+    assert all(m.organization_id == "org-1" and m.created_by_id == "user-1" for m in created)
@@ -0,0 +1,35 @@
+import random
+
+from violet.services.near_duplicates import find_similar_pairs, jaccard_similarity, word_set
+
+VOCABULARY = [f"word{i}" for i in range(400)]
+
+
+def all_similar_pairs(texts, threshold):
+    pairs = []
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            similarity = jaccard_similarity(word_set(texts[i]), word_set(texts[j]))
+            if similarity > threshold:
+                pairs.append((i, j, similarity))
+    return pairs
+
+
+def test_similar_pairs_match_the_pairwise_comparison():
+    rng = random.Random(0)
+    texts = []
+    for _ in range(300):
+        if texts and rng.random() < 0.3:
+            # a near copy of an earlier memory, one word replaced and some case changes
+            words = rng.choice(texts).split() or ["empty"]
+            words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+            texts.append(" ".join(word.upper() if rng.random() < 0.2 else word for word in words))
+        else:
+            texts.append(" ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(0, 12))))
+
+    # chunks smaller than the corpus, pairs across chunks are found as well
+    assert find_similar_pairs(texts, threshold=0.7, chunk_size=64) == all_similar_pairs(texts, 0.7)
+
+
+def test_empty_texts_are_never_similar():
+    assert find_similar_pairs(["", "  ", "same words", "SAME words"], threshold=0.7) == [(2, 3, 1.0)]
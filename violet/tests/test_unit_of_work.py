@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, event, select
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import StaticPool
+
+from violet.database.unit_of_work import (
+    after_commit,
+    after_unit_of_work,
+    current_unit_of_work,
+    unit_of_work,
+)
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    engine.commits = []
+    event.listen(engine, "commit", lambda connection: engine.commits.append(connection))
+    return engine
+
+
+def write(name, fail=False):
+    """A manager call: its own session, committed, or rolled back on error."""
+    with current_unit_of_work().session() as session:
+        session.add(Row(name=name))
+        if fail:
+            session.rollback()
+            return
+        session.commit()
+
+
+def names(engine):
+    with Session(engine) as session:
+        return session.execute(select(Row.name).order_by(Row.id)).scalars().all()
+
+
+def test_sessions_share_one_commit(engine):
+    with unit_of_work(engine):
+        write("message")
+        write("step")
+        # a failed call only undoes its own writes
+        write("tool", fail=True)
+        with unit_of_work(engine):
+            write("memory")
+        assert engine.commits == []
+
+    assert len(engine.commits) == 1
+    assert names(engine) == ["message", "step", "memory"]
+
+
+def test_a_failed_step_writes_nothing(engine):
+    with pytest.raises(RuntimeError):
+        with unit_of_work(engine):
+            write("message")
+            raise RuntimeError("llm error")
+    assert names(engine) == []
+
+
+def test_commit_callbacks_only_run_on_commit(engine):
+    ended, committed = [], []
+    # outside a unit of work the write is already committed
+    after_commit(committed.append, "before")
+    assert committed == ["before"]
+
+    with unit_of_work(engine):
+        write("message")
+        after_commit(committed.append, "message")
+        after_unit_of_work(ended.append, "message")
+        assert committed == ["before"]
+    assert committed == ["before", "message"]
+    assert ended == ["message"]
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work(engine):
+            write("step")
+            after_commit(committed.append, "step")
+            after_unit_of_work(ended.append, "step")
+            raise RuntimeError("llm error")
+    assert committed == ["before", "message"]
+    assert ended == ["message", "step"]
+    assert names(engine) == ["message"]
@@ -0,0 +1,52 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from violet.orm.user import User as UserModel
+from violet.services.user_cache import user_cache
+from violet.services.user_manager import UserManager
+from violet.services.utils import localize_timestamps
+
+
+def test_users_are_read_once_until_updated(sqlite_db):
+    engine = sqlite_db(UserModel)
+    selects = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: selects.append(statement) if statement.startswith("SELECT") else None)
+
+    with Session(engine) as session:
+        session.add(UserModel(id="user-cache-1", name="user", timezone="UTC (UTC+00:00)", organization_id="org-1"))
+        session.commit()
+
+    manager = UserManager()
+    assert manager.get_user_by_id("user-cache-1").timezone == "UTC (UTC+00:00)"
+    user = manager.get_user_by_id("user-cache-1")
+    assert len(selects) == 1
+
+    # callers get a copy
+    user.timezone = "changed"
+    assert manager.get_user_by_id("user-cache-1").timezone == "UTC (UTC+00:00)"
+
+    manager.update_user_timezone("Asia/Shanghai (UTC+08:00)", "user-cache-1")
+    selects.clear()
+    assert manager.get_user_by_id("user-cache-1").timezone == "Asia/Shanghai (UTC+08:00)"
+    assert manager.get_user_by_id("user-cache-1").timezone == "Asia/Shanghai (UTC+08:00)"
+    assert len(selects) == 1
+    assert user_cache.hits >= 3
+
+
+def test_localize_timestamps():
+    results = [
+        SimpleNamespace(occurred_at=datetime(2024, 1, 1, 12), created_at=datetime(2024, 1, 1, 12), updated_at=None,
+                        last_modify={"timestamp": "2024-01-01T12:00:00Z"}),
+        SimpleNamespace(created_at=datetime(2024, 1, 1, 23), last_modify={}),
+    ]
+    localize_timestamps(results, "Asia/Shanghai (UTC+08:00)")
+
+    assert results[0].occurred_at.isoformat() == "2024-01-01T20:00:00+08:00"
+    assert results[0].created_at.isoformat() == "2024-01-01T20:00:00+08:00"
+    assert results[0].updated_at is None
+    assert results[0].last_modify["timestamp"].isoformat() == "2024-01-01T20:00:00+08:00"
+    assert results[1].created_at.isoformat() == "2024-01-02T07:00:00+08:00"
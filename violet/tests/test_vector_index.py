@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from violet.services.vector_index import VectorIndex
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return {f"ep_{i}": rng.normal(size=32) for i in range(100)}
+
+
+def brute_force(vectors, query, k):
+    def distance(item_id):
+        vector = vectors[item_id]
+        return 1 - np.dot(vector, query) / (np.linalg.norm(vector) * np.linalg.norm(query))
+    return sorted(vectors, key=distance)[:k]
+
+
+def test_search_matches_brute_force(vectors):
+    index = VectorIndex()
+    index.add_many(list(vectors), list(vectors.values()))
+
+    query = np.random.default_rng(1).normal(size=32)
+    results = index.search(query, k=10)
+
+    assert [item_id for item_id, _ in results] == brute_force(vectors, query, 10)
+
+
+def test_search_restricted_to_ids(vectors):
+    index = VectorIndex()
+    index.add_many(list(vectors), list(vectors.values()))
+
+    subset = {item_id: vectors[item_id] for item_id in list(vectors)[::7]}
+    query = np.random.default_rng(1).normal(size=32)
+    # unknown ids are ignored
+    results = index.search(query, k=5, ids=list(subset) + ["ep_missing"])
+
+    assert [item_id for item_id, _ in results] == brute_force(subset, query, 5)
+
+
+def test_upsert_and_remove_stay_in_sync(vectors, tmp_path):
+    index = VectorIndex(mmap_path=str(tmp_path / "index.f32"), initial_capacity=8)
+    for item_id, vector in vectors.items():
+        # padded vectors are fitted back to the native dimension
+        index.upsert(item_id, np.pad(vector, (0, 96)))
+
+    for i in range(0, 100, 3):
+        index.remove(f"ep_{i}")
+        vectors.pop(f"ep_{i}")
+    vectors["ep_1"] = -vectors["ep_1"]
+    index.upsert("ep_1", vectors["ep_1"])
+
+    query = np.random.default_rng(2).normal(size=32)
+    assert len(index) == len(vectors)
+    assert [item_id for item_id, _ in index.search(query, k=5)] == brute_force(vectors, query, 5)
+
+
+def test_sensitivity_filter_restricts_the_ranking(vectors, sqlite_db):
+    from sqlalchemy.orm import Session
+
+    from violet.orm.knowledge_vault import KnowledgeVaultItem
+    from violet.services.knowledge_vault_manager import sensitivity_candidate_ids
+
+    engine = sqlite_db(KnowledgeVaultItem)
+    query = np.random.default_rng(1).normal(size=32)
+    # the nearest items are all sensitive, ranking first and filtering after would return nothing
+    nearest = brute_force(vectors, query, len(vectors))
+    with Session(engine) as session:
+        session.add_all([
+            KnowledgeVaultItem(
+                id=item_id, entry_type="credential", source="chat", secret_value="secret", caption=item_id,
+                sensitivity="high" if rank < 90 else "low", last_modify={}, metadata_={}, organization_id="org-1")
+            for rank, item_id in enumerate(nearest)])
+        session.commit()
+
+        index = VectorIndex()
+        index.add_many(list(vectors), list(vectors.values()))
+        ids = sensitivity_candidate_ids(session, ["low", "medium"])
+        results = index.search(query, k=5, ids=ids)
+
+        assert sensitivity_candidate_ids(session, None) is None
+    assert [item_id for item_id, _ in results] == nearest[90:95]
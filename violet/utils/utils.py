@@ -15,7 +15,7 @@ import sys
 import uuid
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import List, Union, _GenericAlias, get_args, get_origin, get_type_hints
 from urllib.parse import urljoin, urlparse
 
@@ -34,6 +34,7 @@ from violet.constants import (
     CORE_MEMORY_PERSONA_CHAR_LIMIT,
     ERROR_MESSAGE_PREFIX,
     VIOLET_DIR,
+    MAX_EMBEDDING_DIM,
     MAX_FILENAME_LENGTH,
     TOOL_CALL_ID_MAX_LEN,
 )
@@ -1099,6 +1100,24 @@ def create_uuid_from_string(val: str):
     return uuid.UUID(hex=hex_string)
 
 
+def pad_embedding(embedding: List[float]) -> List[float]:
+    """
+    Pad an embedding to `MAX_EMBEDDING_DIM` when the backend requires fixed-size vectors.
+
+    pgvector columns are declared with a fixed dimension, SQLite stores embeddings at
+    their native dimension so they are returned unchanged there.
+    """
+    from violet.settings import settings
+
+    if not embedding or not settings.violet_pg_uri_no_default or len(embedding) == MAX_EMBEDDING_DIM:
+        return embedding
+
+    import numpy as np
+
+    np_embedding = np.array(embedding)
+    return np.pad(np_embedding, (0, MAX_EMBEDDING_DIM - np_embedding.shape[0]), mode="constant").tolist()
+
+
 def json_dumps(data, indent=2):
     def safe_serializer(obj):
         if isinstance(obj, datetime):
@@ -1401,6 +1420,14 @@ def num_tokens_from_messages(messages: List[dict], model: str = "gpt-4") -> int:
     return num_tokens
 
 
+@lru_cache(maxsize=256)
+def get_timezone(timezone_str: str):
+    """The pytz timezone of a user timezone string, resolved once per process."""
+    # timezone is something like "Asia/Shanghai (UTC+08:00)"
+    # Extract the timezone region name, e.g., "Asia/Shanghai" from "Asia/Shanghai (UTC+08:00)"
+    return pytz.timezone(timezone_str.split(" (")[0])
+
+
 def convert_timezone_to_utc(timestamp_str, timezone):
 
     try:
@@ -1408,12 +1435,8 @@ def convert_timezone_to_utc(timestamp_str, timezone):
     except:
         timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
 
-    # timezone is something like "Asia/Shanghai (UTC+08:00)"
-    # Extract the timezone region name, e.g., "Asia/Shanghai" from "Asia/Shanghai (UTC+08:00)"
-    tz_region = timezone.split(" (")[0]
-
     # Get the timezone object using pytz
-    local_tz = pytz.timezone(tz_region)
+    local_tz = get_timezone(timezone)
 
     # Localize the naive datetime object to the provided timezone
     localized_timestamp = local_tz.localize(timestamp)